@@ -10,6 +10,8 @@ Versión: 3.1.2 - Bugfixes, limpieza de código, formatters centralizados
 
 import os
 import sys
+import threading
+import time
 
 # Fix para deploys en Render/Heroku: asegurar que el directorio actual esté en PYTHONPATH
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -18,9 +20,14 @@ if APP_DIR not in sys.path:
 
 import logging
 
+# Configuración de entorno leída una sola vez al importar el módulo
+# (default: False para producción)
+DEBUG_MODE = os.getenv("DEBUG", "false").lower() == "true"
+PORT = int(os.getenv("PORT", 8050))
+
 # Configuración de logging (reemplaza prints de debug)
 logging.basicConfig(
-    level=logging.DEBUG if os.getenv("DEBUG", "false").lower() == "true" else logging.INFO,
+    level=logging.DEBUG if DEBUG_MODE else logging.INFO,
     format='%(asctime)s [%(levelname)s] %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
@@ -30,12 +37,15 @@ import dash
 from dash import dcc, html, callback, Input, Output, State, no_update, ctx, ALL, MATCH
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
-from datetime import datetime
-import yfinance as yf
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import asdict, is_dataclass
+from datetime import date, datetime
+from functools import lru_cache
 
 # Importar módulos del analizador
 from financial_ratios import (
-    calculate_all_ratios,
+    calculate_all_ratios_cached,
     aggregate_alerts,
     format_ratio,
     graham_number,
@@ -49,7 +59,8 @@ from data_fetcher import (
     FinancialDataService, 
     InvalidSymbolError, 
     APITimeoutError,
-    DataFetchError
+    DataFetchError,
+    fetch_market_context
 )
 from sector_profiles import get_sector_profile
 from stock_database import search_stocks, POPULAR_STOCKS
@@ -68,7 +79,7 @@ from finanzer.components.sensitivity import build_sensitivity_section
 from finanzer.components.charts import (
     get_score_color, 
     create_score_donut,
-    create_price_chart,
+    create_period_chart_payloads,
     create_ytd_comparison_chart
 )
 from finanzer.components.pdf_generator import generate_simple_pdf
@@ -105,12 +116,93 @@ server = app.server
 
 QUICK_PICKS = ["AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "TSLA", "META", "JPM", "V", "TSM"]
 
+# Estilo compartido por todos los quick picks (un solo dict para los 10 botones)
+QUICK_PICK_STYLE = {
+    "background": "rgba(16, 185, 129, 0.15)",
+    "border": "1px solid rgba(16, 185, 129, 0.4)",
+    "color": "#34d399",
+    "borderRadius": "8px",
+    "padding": "10px 22px",
+    "margin": "5px",
+    "fontWeight": "500",
+    "fontSize": "0.9rem",
+    "cursor": "pointer",
+    "transition": "all 0.2s ease"
+}
+
+# Botones de quick picks construidos una sola vez al importar el módulo
+# (usando html.Button para evitar override de Bootstrap)
+QUICK_PICK_BUTTONS = [
+    html.Button(ticker, id={"type": "quick-pick", "index": ticker},
+                n_clicks=0, style=QUICK_PICK_STYLE)
+    for ticker in QUICK_PICKS
+]
+
+# Autocompletado: segundos de pausa antes de disparar el callback de sugerencias
+# (debounce numérico de dcc.Input, Dash >= 2.15) y longitud mínima de la consulta.
+# Enter y el botón no dependen del debounce: leen el valor vivo del DOM (ver
+# el callback clientside de "search-submit").
+SEARCH_DEBOUNCE_SECONDS = 0.25
+SEARCH_MIN_CHARS = 2
+
+# Estilos del dropdown de sugerencias, construidos una sola vez.
+# Los callbacks retornan estas mismas referencias: no deben mutarse.
+SEARCH_DROPDOWN_BASE = {
+    "position": "absolute",
+    "top": "100%",
+    "left": "0",
+    "right": "0",
+    "marginTop": "4px",
+    "background": "#1f1f23",
+    "border": "1px solid rgba(16, 185, 129, 0.5)",
+    "borderRadius": "10px",
+    "boxShadow": "0 8px 32px rgba(0, 0, 0, 0.7)",
+    "zIndex": "9999",
+    "maxHeight": "300px",
+    "overflowY": "auto"
+}
+SEARCH_DROPDOWN_HIDDEN = {**SEARCH_DROPDOWN_BASE, "display": "none"}
+SEARCH_DROPDOWN_VISIBLE = {**SEARCH_DROPDOWN_BASE, "display": "block"}
+SUGGESTION_LIST_STYLE = {"listStyle": "none", "margin": "0", "padding": "0"}
+SUGGESTION_ITEM_STYLE = {
+    "padding": "12px 16px",
+    "cursor": "pointer",
+    "borderBottom": "1px solid rgba(63, 63, 70, 0.5)",
+    "transition": "all 0.15s ease",
+    "backgroundColor": "transparent"
+}
+SUGGESTION_LAST_ITEM_STYLE = {**SUGGESTION_ITEM_STYLE, "borderBottom": "none"}
+
+# Estilos de las vistas home/análisis (compartidos por handle_navigation)
+HOME_VISIBLE_STYLE = {"display": "block"}
+HOME_HIDDEN_STYLE = {"display": "none"}
+ANALYSIS_VISIBLE_STYLE = {"display": "block"}
+ANALYSIS_HIDDEN_STYLE = {"display": "none"}
+
+# Mapeo completo de sectores (Yahoo Finance -> SECTOR_THRESHOLDS keys)
+SECTOR_KEY_MAP = {
+    "Technology": "technology",
+    "Financial Services": "financials",
+    "Healthcare": "healthcare",
+    "Utilities": "utilities",
+    "Consumer Cyclical": "consumer_discretionary",
+    "Consumer Defensive": "consumer_staples",
+    "Energy": "energy",
+    "Real Estate": "real_estate",
+    "Industrials": "industrials",
+    "Basic Materials": "materials",
+    "Communication Services": "communication_services",
+}
+
 # =============================================================================
 # LAYOUT PRINCIPAL
 # =============================================================================
 
 app.layout = dbc.Container([
     dcc.Store(id="analysis-data", storage_type="memory"),
+    dcc.Store(id="lazy-tabs-rendered", data=[], storage_type="memory"),  # Tabs bajo demanda ya construidos
+    dcc.Store(id="selected-suggestion", storage_type="memory"),  # Ticker de la sugerencia clickeada
+    dcc.Store(id="search-submit", storage_type="memory"),  # Texto buscado con Enter o el botón
     dcc.Store(id="current-symbol", data="", storage_type="memory"),
     dcc.Store(id="comparison-stocks", data=[], storage_type="session"),  # v2.9: Lista de acciones para comparar
     dcc.Store(id="theme-store", data="dark", storage_type="local"),  # Persiste en localStorage
@@ -188,7 +280,7 @@ app.layout = dbc.Container([
                             id="navbar-search-input", 
                             type="text",
                             placeholder="Buscar: AAPL, Microsoft, Tesla...",
-                            debounce=False,  # Actualiza con cada tecla
+                            debounce=SEARCH_DEBOUNCE_SECONDS,  # Espera a que el usuario pause
                             value="",
                             n_submit=0,
                             style={
@@ -220,7 +312,8 @@ app.layout = dbc.Container([
                     ], style={"display": "flex", "alignItems": "center"}),
                     
                     # Dropdown de sugerencias
-                    html.Div(id="navbar-search-suggestions", style={"display": "none"})
+                    # Un solo listener de clicks para toda la lista (delegación de eventos)
+                    html.Div(id="navbar-search-suggestions", n_clicks=0, style={"display": "none"})
                     
                 ], style={"position": "relative"})
             ], xs=12, md=6),
@@ -270,24 +363,8 @@ app.layout = dbc.Container([
             html.P("Análisis fundamental de acciones para decisiones de inversión informadas",
                   className="home-subtitle"),
             
-            # Quick Pills - usando html.Button para evitar override de Bootstrap
-            html.Div([
-                html.Button(ticker, id={"type": "quick-pick", "index": ticker},
-                          n_clicks=0,
-                          style={
-                              "background": "rgba(16, 185, 129, 0.15)",
-                              "border": "1px solid rgba(16, 185, 129, 0.4)",
-                              "color": "#34d399", 
-                              "borderRadius": "8px",
-                              "padding": "10px 22px", 
-                              "margin": "5px",
-                              "fontWeight": "500", 
-                              "fontSize": "0.9rem",
-                              "cursor": "pointer",
-                              "transition": "all 0.2s ease"
-                          })
-                for ticker in QUICK_PICKS
-            ], style={"textAlign": "center", "marginBottom": "40px"}),
+            # Quick Pills (precalculados en QUICK_PICK_BUTTONS)
+            html.Div(QUICK_PICK_BUTTONS, style={"textAlign": "center", "marginBottom": "40px"}),
             
             # Contenedor horizontal para las 3 listas
             html.Div([
@@ -564,7 +641,12 @@ app.layout = dbc.Container([
         ], className="tabs-wrapper"),
         
         html.Hr(),
-        html.P(id="analysis-footer", className="text-center small text-muted")
+        html.P(id="analysis-footer", className="text-center small text-muted"),
+        # Vuelve a consultar Yahoo ignorando los cachés (memoria y disco)
+        html.Div(
+            dbc.Button("🔄 Actualizar datos", id="refresh-analysis", color="secondary", size="sm", outline=True),
+            className="text-center mb-3"
+        )
     ]),
     
     # =========================================================================
@@ -607,40 +689,23 @@ app.layout = dbc.Container([
 # CALLBACKS
 # =============================================================================
 
-# Callback para sugerencias de búsqueda (se activa con cada tecla)
+# Callback para sugerencias de búsqueda (se activa al pausar la escritura)
 @callback(
     Output("navbar-search-suggestions", "children"),
     Output("navbar-search-suggestions", "style"),
     Input("navbar-search-input", "value"),
+    State("navbar-search-suggestions", "style"),
     prevent_initial_call=True
 )
-def update_search_suggestions(search_value):
+def update_search_suggestions(search_value, current_style):
     """Muestra sugerencias mientras el usuario escribe."""
     
-    # Estilos base del dropdown
-    dropdown_base = {
-        "position": "absolute",
-        "top": "100%",
-        "left": "0",
-        "right": "0",
-        "marginTop": "4px",
-        "background": "#1f1f23",
-        "border": "1px solid rgba(16, 185, 129, 0.5)",
-        "borderRadius": "10px",
-        "boxShadow": "0 8px 32px rgba(0, 0, 0, 0.7)",
-        "zIndex": "9999",
-        "maxHeight": "300px",
-        "overflowY": "auto"
-    }
-    
-    hidden_style = {**dropdown_base, "display": "none"}
-    visible_style = {**dropdown_base, "display": "block"}
-    
-    # Si no hay valor o es muy corto, ocultar
-    if not search_value or len(str(search_value).strip()) < 1:
-        return [], hidden_style
-    
-    query = str(search_value).strip()
+    # Si no hay valor o es muy corto, ocultar sin buscar (Dash pasa str o None)
+    query = (search_value or "").strip()
+    if len(query) < SEARCH_MIN_CHARS:
+        if current_style and current_style.get("display") == "none":
+            return no_update, no_update  # Ya está oculto: nada que enviar al navegador
+        return [], SEARCH_DROPDOWN_HIDDEN
     
     # Buscar sugerencias
     suggestions = search_stocks(query, limit=6)
@@ -655,35 +720,67 @@ def update_search_suggestions(search_value):
                     "color": "#10b981", "margin": "0", "fontSize": "0.8rem", "fontWeight": "500"
                 })
             ], style={"padding": "12px 16px", "textAlign": "center"})
-        ], visible_style
+        ], SEARCH_DROPDOWN_VISIBLE
     
-    # Crear items de sugerencias clickeables
-    suggestion_items = []
-    for i, (ticker, name, _) in enumerate(suggestions):
-        is_last = i == len(suggestions) - 1
-        suggestion_items.append(
-            html.Div([
-                html.Span(ticker, style={
-                    "color": "#10b981", "fontWeight": "700", "fontSize": "0.95rem",
-                    "marginRight": "12px", "minWidth": "60px", "display": "inline-block"
-                }),
-                html.Span(name[:35] + ("..." if len(name) > 35 else ""), style={
-                    "color": "#d4d4d8", "fontSize": "0.85rem"
-                })
-            ], 
-            id={"type": "suggestion-item", "index": ticker}, 
-            n_clicks=0,
-            style={
-                "padding": "12px 16px",
-                "cursor": "pointer",
-                "borderBottom": "none" if is_last else "1px solid rgba(63, 63, 70, 0.5)",
-                "transition": "all 0.15s ease",
-                "backgroundColor": "transparent"
-            }, 
-            className="suggestion-hover")
-        )
+    # Lista ligera de items: el click se resuelve por delegación leyendo data-ticker
+    last = len(suggestions) - 1
+    suggestion_list = html.Ul([
+        html.Li([
+            html.Span(ticker, style={
+                "color": "#10b981", "fontWeight": "700", "fontSize": "0.95rem",
+                "marginRight": "12px", "minWidth": "60px", "display": "inline-block"
+            }),
+            html.Span(name[:35] + ("..." if len(name) > 35 else ""), style={
+                "color": "#d4d4d8", "fontSize": "0.85rem"
+            })
+        ],
+        style=SUGGESTION_LAST_ITEM_STYLE if i == last else SUGGESTION_ITEM_STYLE,
+        className="suggestion-hover",
+        **{"data-ticker": ticker})
+        for i, (ticker, name, _) in enumerate(suggestions)
+    ], style=SUGGESTION_LIST_STYLE)
     
-    return suggestion_items, visible_style
+    return suggestion_list, SEARCH_DROPDOWN_VISIBLE
+
+
+# Click en la lista de sugerencias: traducir el n_clicks del contenedor al ticker
+# del <li> clickeado (capturado en window.finanzerSuggestion por el listener global)
+app.clientside_callback(
+    """
+    function(n_clicks) {
+        const ticker = window.finanzerSuggestion;
+        window.finanzerSuggestion = null;
+        if (!n_clicks || !ticker) {
+            return window.dash_clientside.no_update;
+        }
+        return {ticker: ticker, clicks: n_clicks};
+    }
+    """,
+    Output("selected-suggestion", "data"),
+    Input("navbar-search-suggestions", "n_clicks"),
+    prevent_initial_call=True
+)
+
+
+# Enter o botón de búsqueda: leer el valor directamente del <input>. El "value"
+# de Dash llega con el debounce numérico, así que justo después de teclear
+# puede ser un prefijo ("ms" en vez de "msft") o seguir vacío.
+app.clientside_callback(
+    """
+    function(n_submit, n_clicks) {
+        const input = document.getElementById('navbar-search-input');
+        const value = input ? input.value.trim() : '';
+        if ((!n_submit && !n_clicks) || !value) {
+            return window.dash_clientside.no_update;
+        }
+        return {value: value, ts: Date.now()};
+    }
+    """,
+    Output("search-submit", "data"),
+    Input("navbar-search-input", "n_submit"),
+    Input("navbar-search-btn", "n_clicks"),
+    prevent_initial_call=True
+)
 
 
 # Callback para mostrar búsquedas recientes en el home
@@ -1099,1738 +1196,1503 @@ def show_strategy_stocks(value_clicks, growth_clicks, dividend_clicks, bluechip_
     })
 
 
-# Callback principal de navegación (SOLO se activa con click o Enter)
-@callback(
-    Output("home-view", "style"),
-    Output("analysis-view", "style"),
-    Output("company-header", "children"),
-    Output("score-card-container", "children"),
-    Output("key-metrics-container", "children"),
-    Output("sector-notes-container", "children"),
-    Output("tab-valuation-content", "children"),
-    Output("tab-profitability-content", "children"),
-    Output("tab-health-content", "children"),
-    Output("tab-historical-content", "children"),
-    Output("tab-comparison-content", "children"),
-    Output("tab-intrinsic-content", "children"),
-    Output("tab-evaluation-content", "children"),
-    Output("analysis-footer", "children"),
-    Output("analysis-data", "data"),
-    Output("current-symbol", "data"),
-    Output("error-message", "children"),
-    Output("loading-trigger", "children"),
-    Output("current-stock-badge", "children"),
-    Output("navbar-search-input", "value"),
-    Output("navbar-search-suggestions", "style", allow_duplicate=True),
-    Output("search-history", "data"),  # v3.0: Guardar al historial
-    Input("navbar-search-btn", "n_clicks"),
-    Input("navbar-search-input", "n_submit"),
-    Input("logo-home", "n_clicks"),
-    Input({"type": "quick-pick", "index": ALL}, "n_clicks"),
-    Input({"type": "suggestion-item", "index": ALL}, "n_clicks"),
-    Input({"type": "recent-search", "index": ALL}, "n_clicks"),
-    Input({"type": "posiciones-item", "index": ALL}, "n_clicks"),  # v3.1.3: Click en posiciones
-    Input({"type": "radar-item", "index": ALL}, "n_clicks"),  # v3.1.3: Click en radar
-    Input({"type": "screener-pick", "index": ALL}, "n_clicks"),
-    State("navbar-search-input", "value"),
-    State("analysis-data", "data"),
-    State("search-history", "data"),
-    prevent_initial_call=True
+# =============================================================================
+# TARJETAS DE MÉTRICAS POR TAB
+# =============================================================================
+# Cada tabla es (label, clave en ratios, formato de format_ratio, ícono); las
+# filas se generan con metric_cards_row en lugar de repetir dbc.Col a mano.
+
+# Resumen (Métricas Clave)
+SUMMARY_TOP_CARDS = (
+    ("Market Cap", "market_cap", "currency", "🌐"),
+    ("P/E", "pe", "multiple", "📊"),
+    ("ROE", "roe", "percent", "🎯"),
+    ("D/E", "debt_to_equity", "multiple", "⚖️"),
 )
-def handle_navigation(search_btn, search_submit, logo_clicks, quick_picks, suggestion_clicks, recent_clicks, posiciones_clicks, radar_clicks, screener_clicks, search_value, stored_data, current_history):
-    triggered_id = ctx.triggered_id
-    triggered_prop = ctx.triggered[0]["prop_id"] if ctx.triggered else ""
-    
-    home_style = {"display": "block"}
-    analysis_style = {"display": "none"}
-    empty_outputs = [None] * 13
-    
-    # Historial actual (o lista vacía si es None)
-    history = current_history if current_history else []
+SUMMARY_BOTTOM_CARDS = (
+    ("Margen Neto", "net_margin", "percent", "💎"),
+    ("FCF Yield", "fcf_yield", "percent", "💸"),
+    ("EV/EBITDA", "ev_ebitda", "multiple", "🏢"),
+    ("Beta", "beta", "decimal", "📉"),
+)
+
+# Tab Valoración
+VALUATION_CARDS = (
+    ("P/E", "pe", "multiple", "📊"),
+    ("Forward P/E", "forward_pe", "multiple", "🔮"),
+    ("P/B", "pb", "multiple", "📚"),
+    ("P/S", "ps", "multiple", "💰"),
+)
+VALUATION_EXTRA_CARDS = (
+    ("EV/EBITDA", "ev_ebitda", "multiple", "🏢"),
+    ("P/FCF", "p_fcf", "multiple", "💵"),
+    ("PEG Ratio", "peg", "decimal", "📈"),
+    ("FCF Yield", "fcf_yield", "percent", "💸"),
+)
+BANK_VALUATION_EXTRA_CARDS = (
+    ("Dividend Yield", "dividend_yield", "percent", "💵"),
+    ("Earnings Yield", "earnings_yield", "percent", "📈"),
+    ("PEG Ratio", "peg", "decimal", "📈"),
+    ("Payout Ratio", "payout_ratio", "percent", "📤"),
+)
+
+# Tab Rentabilidad (sector financiero)
+BANK_RETURNS_CARDS = (
+    ("ROE", "roe", "percent", "🎯"),
+    ("ROA", "roa", "percent", "🏭"),
+    ("Margen Neto", "net_margin", "percent", "💎"),
+    ("Margen Operativo", "operating_margin", "percent", "⚙️"),
+)
+
+# Tab Rentabilidad (estándar)
+RETURNS_CARDS = (
+    ("ROE", "roe", "percent", "🎯"),
+    ("ROA", "roa", "percent", "🏭"),
+    ("ROIC", "roic", "percent", "💎"),
+    ("ROE 5Y Avg", "roe_5y_avg", "percent", "📊"),
+)
+MARGINS_CARDS = (
+    ("Margen Bruto", "gross_margin", "percent", "📦"),
+    ("Margen Operativo", "operating_margin", "percent", "⚙️"),
+    ("Margen Neto", "net_margin", "percent", "💎"),
+    ("Margen EBITDA", "ebitda_margin", "percent", "📈"),
+)
+RESULTS_CARDS = (
+    ("EBITDA", "ebitda", "currency", "📊"),
+    ("Ingreso Neto", "net_income", "currency", "💵"),
+    ("EPS", "eps", "decimal", "📈"),
+)
+
+# Tab Solidez (sector financiero)
+BANK_PROFITABILITY_CARDS = (
+    ("ROA", "roa", "percent", "📊"),
+    ("ROE", "roe", "percent", "📈"),
+    ("Margen Neto", "net_margin", "percent", "💎"),
+    ("Margen Operativo", "operating_margin", "percent", "⚙️"),
+)
+BANK_VALUATION_CARDS = (
+    ("P/B", "pb", "multiple", "📚"),
+    ("P/E", "pe", "multiple", "📊"),
+    ("Dividend Yield", "dividend_yield", "percent", "💵"),
+    ("Payout Ratio", "payout_ratio", "percent", "📤"),
+)
+
+# Tab Solidez (estándar)
+LIQUIDITY_CARDS = (
+    ("Current Ratio", "current_ratio", "multiple", "💧"),
+    ("Quick Ratio", "quick_ratio", "multiple", "⚡"),
+    ("Cash Ratio", "cash_ratio", "multiple", "💵"),
+    ("Working Capital", "working_capital", "currency", "📊"),
+)
+LEVERAGE_CARDS = (
+    ("Deuda/Equity", "debt_to_equity", "multiple", "⚖️"),
+    ("Deuda/Activos", "debt_to_assets", "percent", "📉"),
+    ("Deuda Neta/EBITDA", "net_debt_to_ebitda", "multiple", "🔗"),
+    ("Deuda Total", "total_debt", "currency", "💳"),
+)
+COVERAGE_CARDS = (
+    ("Cobertura Int.", "interest_coverage", "multiple", "🛡️"),
+    ("FCF", "fcf", "currency", "💵"),
+    ("FCF/Deuda", "fcf_to_debt", "percent", "📈"),
+    ("Cash & Eq.", "cash_and_equivalents", "currency", "🏦"),
+)
+
+
+# Formato de cada ratio mostrado en tarjetas (unión de todas las tablas);
+# una clave siempre usa el mismo formato aunque aparezca en varios tabs
+METRIC_CARD_TABLES = (
+    SUMMARY_TOP_CARDS,
+    SUMMARY_BOTTOM_CARDS,
+    VALUATION_CARDS,
+    VALUATION_EXTRA_CARDS,
+    BANK_VALUATION_EXTRA_CARDS,
+    BANK_RETURNS_CARDS,
+    RETURNS_CARDS,
+    MARGINS_CARDS,
+    RESULTS_CARDS,
+    BANK_PROFITABILITY_CARDS,
+    BANK_VALUATION_CARDS,
+    LIQUIDITY_CARDS,
+    LEVERAGE_CARDS,
+    COVERAGE_CARDS,
+)
+RATIO_FORMATS = {key: fmt_type for cards in METRIC_CARD_TABLES for _, key, fmt_type, _ in cards}
+
+
+def format_ratios(ratios):
+    """Formatea una sola vez todos los ratios que aparecen en tarjetas."""
+    get_ratio = ratios.get
+    return {key: format_ratio(get_ratio(key), fmt_type) for key, fmt_type in RATIO_FORMATS.items()}
+
+
+def metric_cards_row(cards, formatted, md=3, col_class="mb-3", row_class=None):
+    """Fila de tarjetas de métricas a partir de una tabla (label, clave, formato, ícono)."""
+    return dbc.Row([
+        dbc.Col([create_metric_card(label, formatted[key], icon)], xs=6, md=md, className=col_class)
+        for label, key, _, icon in cards
+    ], className=row_class)
+
+
+# =============================================================================
+# CONSTRUCCIÓN DEL ANÁLISIS (memoizada por datos)
+# =============================================================================
+
+# Vistas ya construidas: (símbolo, datos congelados) -> resultado de build_analysis_views
+ANALYSIS_VIEWS_CACHE_SIZE = 128
+_analysis_views_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+# Callbacks concurrentes (hilos): consulta, inserción y desalojo van con lock
+_analysis_views_lock = threading.Lock()
+
+
+# Fuentes de alertas: (categoría mostrada, clave en alerts, motivos negativos,
+# motivos positivos, severidad de los negativos). Los positivos van siempre a success.
+ALERT_SPEC = (
+    ("Valoración", "valuation", "overvalued_reasons", "undervalued_reasons", "danger"),
+    ("Deuda", "leverage", "warning_reasons", "positive_reasons", "danger"),
+    ("Rentabilidad", "profitability", "warning_reasons", "positive_reasons", "warning"),
+    ("Liquidez", "liquidity", "warning_reasons", "positive_reasons", "warning"),
+    ("Flujo de Caja", "cash_flow", "warning_reasons", "positive_reasons", "danger"),
+    ("Crecimiento", "growth", "warning_reasons", "positive_reasons", "warning"),
+    ("Volatilidad", "volatility", "warning_reasons", "positive_reasons", "warning"),
+)
+
+
+# Color y etiqueta de las métricas institucionales según nivel (o puntaje)
+FINANCIAL_HEALTH_LEVELS = {
+    "STRONG": ("#22c55e", " · Excelente"),
+    "GOOD": ("#84cc16", " · Buena"),
+    "NEUTRAL": ("#eab308", " · Neutral"),
+}
+FINANCIAL_HEALTH_DEFAULT = ("#ef4444", " · Débil")
+Z_SCORE_ZONES = {
+    "SAFE": ("#22c55e", " · Zona Segura"),
+    "GREY": ("#eab308", " · Zona Gris"),
+}
+Z_SCORE_DEFAULT_ZONE = ("#ef4444", " · Zona de Riesgo")
+# Categorías del score v2 en el orden del resumen de puntuación
+SCORE_CATEGORY_KEYS = ("solidez", "rentabilidad", "valoracion", "calidad", "crecimiento")
+# Color de una categoría del score (0-20) indexado por puntaje: <10 rojo, 10-14 amarillo, >=15 verde
+CATEGORY_SCORE_COLORS = ("#ef4444",) * 10 + ("#eab308",) * 5 + ("#22c55e",) * 6
+# Piotroski: <4 débil, 4-6 neutral, >=7 fuerte (índice vía bisect_right)
+PIOTROSKI_THRESHOLDS = (4, 7)
+PIOTROSKI_ZONES = (
+    ("#ef4444", " · Débil"),
+    ("#eab308", " · Neutral"),
+    ("#22c55e", " · Fuerte"),
+)
+
+
+def category_score_color(score):
+    """Color de CATEGORY_SCORE_COLORS para un puntaje de categoría (acotado a 0-20)."""
+    return CATEGORY_SCORE_COLORS[min(max(int(score or 0), 0), 20)]
+
+
+def collect_alert_reasons(alerts):
+    """Listas (danger, warning, success) de (categoría, motivo) según ALERT_SPEC."""
+    buckets = {"danger": [], "warning": [], "success": []}
+    success = buckets["success"]
+    for label, key, negative_field, positive_field, negative_bucket in ALERT_SPEC:
+        source = alerts.get(key) or {}
+        buckets[negative_bucket].extend((label, reason) for reason in source.get(negative_field, ()))
+        success.extend((label, reason) for reason in source.get(positive_field, ()))
+    return buckets["danger"], buckets["warning"], success
+
+
+def unique_alerts(pairs):
+    """
+    Deduplica (categoría, motivo) en una sola pasada manteniendo el orden.
+    Dos motivos se consideran iguales si coinciden sus primeros 50 caracteres.
+    """
+    unique = {}
+    for cat, reason in pairs:
+        unique.setdefault((cat, reason[:50]), (cat, reason))
+    return list(unique.values())
+
+
+def enrich_ratios_for_pdf(ratios, financials):
+    """
+    Retorna una copia de ratios con los datos adicionales que usa el PDF
+    (precio, deuda, rango 52W...). Los atributos se leen una vez y los
+    derivados solo se agregan si hay datos (si no, se conserva lo calculado).
+    """
+    if not financials:
+        return {**ratios, **dict.fromkeys((
+            "price", "revenue", "total_debt", "shares_outstanding", "cash_and_equivalents",
+            "fifty_two_week_high", "fifty_two_week_low", "average_volume",
+        ))}
     
-    # Estilo para ocultar sugerencias
-    hide_suggestions = {
-        "position": "absolute",
-        "top": "100%",
-        "left": "0",
-        "right": "0",
-        "marginTop": "4px",
-        "background": "#1a1a1f",
-        "border": "1px solid rgba(16, 185, 129, 0.4)",
-        "borderRadius": "10px",
-        "boxShadow": "0 8px 32px rgba(0, 0, 0, 0.6)",
-        "zIndex": "9999",
-        "maxHeight": "280px",
-        "overflowY": "auto",
-        "display": "none"
+    shares = financials.shares_outstanding
+    total_debt = financials.total_debt
+    total_equity = financials.total_equity
+    current_assets = financials.current_assets
+    current_liabilities = financials.current_liabilities
+    fcf = ratios.get("fcf")
+    return {
+        **ratios,
+        "price": financials.price,
+        "revenue": financials.revenue,
+        "total_debt": total_debt,
+        "shares_outstanding": shares,
+        "cash_and_equivalents": financials.cash,
+        "fifty_two_week_high": financials.price_52w_high,
+        "fifty_two_week_low": financials.price_52w_low,
+        "average_volume": financials.average_volume,
+        **({"working_capital": current_assets - current_liabilities}
+           if current_assets and current_liabilities else {}),
+        **({"book_value_per_share": total_equity / shares} if total_equity and shares else {}),
+        **({"fcf_to_debt": fcf / total_debt} if fcf and total_debt and total_debt > 0 else {}),
     }
+
+
+@lru_cache(maxsize=2)
+def minute_stamp(minute_epoch):
+    """'YYYY-MM-DD HH:MM' de un minuto epoch; renders del mismo minuto reutilizan el texto."""
+    return datetime.fromtimestamp(minute_epoch * 60).strftime('%Y-%m-%d %H:%M')
+
+
+@lru_cache(maxsize=2)
+def day_stamp(day):
+    """'YYYYMMDD' de una fecha; las descargas del mismo día reutilizan el texto."""
+    return day.strftime('%Y%m%d')
+
+
+def _freeze(value):
+    """Versión hashable y recursiva de dataclasses, dicts y listas (para claves de caché)."""
+    if is_dataclass(value):
+        value = asdict(value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def build_analysis_views(symbol, profile, financials, contextual, fin_dict):
+    """
+    Construye el contenido completo del análisis (header, score, tabs) a partir
+    de los datos ya descargados. Retorna (vistas, ratios, alerts, company_name, stock_badge),
+    donde vistas son los 11 hijos de header/score/métricas/notas/tabs en orden de salida.
+    """
+    ratios = calculate_all_ratios_cached(fin_dict)
+    get_ratio = ratios.get  # Lookup local: se usa decenas de veces al construir los tabs
+    formatted = format_ratios(ratios)  # Textos de las tarjetas, calculados una sola vez
     
-    # Si no hay triggered_id o es None, no hacer nada
-    if not triggered_id:
-        return no_update
-    
-    # Verificar el valor del trigger (debe ser > 0 para ser un click real)
-    triggered_value = ctx.triggered[0]["value"] if ctx.triggered else None
+    sector_key = SECTOR_KEY_MAP.get(profile.sector if profile else "", "default")
+    real_sector = profile.sector if profile else ""  # v3.1: Sector real de Yahoo Finance
+    contextual["pe_5y_avg"] = get_ratio("pe")
+    alerts = aggregate_alerts(ratios, contextual, sector_key, real_sector=real_sector)
+    sector_profile = get_sector_profile(profile.sector if profile else None)
     
-    # Regresar al home
-    if triggered_id == "logo-home":
-        if logo_clicks and logo_clicks > 0:
-            return home_style, analysis_style, *empty_outputs, "", None, None, None, "", hide_suggestions, no_update
-        return no_update
+    # v2.9: Detectar si es REIT y calcular métricas específicas
+    is_reit = is_reit_sector(profile.sector if profile else "")
+    reit_metrics = None
+    if is_reit and financials:
+        try:
+            reit_metrics = calculate_reit_metrics(
+                net_income=financials.net_income,
+                depreciation=financials.depreciation,
+                gains_on_sale=None,  # No disponible en yfinance
+                capex=financials.capex,
+                shares_outstanding=financials.shares_outstanding,
+                price=financials.price,
+                dividend_per_share=financials.dividend_per_share
+            )
+        except Exception as e:
+            logger.warning(f"Error calculando métricas REIT: {e}")
+            reit_metrics = None
     
-    symbol = None
+    company_name = profile.name if profile else symbol
+    company_sector = profile.sector if profile else "N/A"
+    company_industry = profile.industry if profile else "N/A"
+    current_price = f"${financials.price:.2f}" if financials and financials.price else "N/A"
     
-    # CASO 1: Click en botón de búsqueda
-    if triggered_id == "navbar-search-btn":
-        if search_btn and search_btn > 0 and search_value:
-            symbol = resolve_symbol(search_value.strip())
-        else:
-            return no_update
+    score = alerts.get("score", 0)
+    score_color, score_label = get_score_color(score)
+    score_v2 = alerts.get("score_v2", {})
     
-    # CASO 2: Enter en el input (n_submit incrementa)
-    elif triggered_id == "navbar-search-input":
-        # n_submit solo se dispara con Enter, y value cambia con cada tecla
-        # Si triggered_value es un entero > 0, fue Enter
-        if isinstance(triggered_value, int) and triggered_value > 0 and search_value:
-            symbol = resolve_symbol(search_value.strip())
-        else:
-            # Fue un cambio de valor (escribiendo), ignorar
-            return no_update
+    # Badge del stock actual para navbar
+    stock_badge = html.Div([
+        html.Span(symbol, style={"color": "#3b82f6", "fontWeight": "700", "fontSize": "1.1rem"}),
+        html.Span(f" · {current_price}", className="text-muted")
+    ])
     
-    # CASO 3: Quick pick
-    elif isinstance(triggered_id, dict) and triggered_id.get("type") == "quick-pick":
-        if triggered_value and triggered_value > 0:
-            symbol = triggered_id.get("index")
-        else:
-            return no_update
+    # Company Header (sin botón PDF - está en el layout principal)
+    company_header = html.Div([
+        dbc.Row([
+            dbc.Col([
+                html.H2(company_name, className="mb-1", style={"fontWeight": "700"}),
+                html.P([
+                    html.Span("📁 ", className="text-muted"),
+                    html.Span(company_sector, className="text-secondary"),
+                    html.Span(" · ", className="text-muted"),
+                    html.Span("🏭 ", className="text-muted"),
+                    html.Span(company_industry, className="text-secondary"),
+                ], className="mb-0 small")
+            ], xs=12, md=6),
+            dbc.Col([
+                html.Div([
+                    html.Div([
+                        html.H3(current_price, className="text-info mb-0", style={"fontWeight": "700"}),
+                        html.Small("Precio actual", className="text-muted")
+                    ]),
+                    # v2.9: Botón agregar a comparación
+                    html.Button([
+                        html.Span("➕ ", style={"marginRight": "4px"}),
+                        "Comparar"
+                    ], id="btn-add-comparison", n_clicks=0,
+                       className="btn btn-outline-success btn-sm mt-2",
+                       style={"fontSize": "0.75rem", "padding": "4px 10px"})
+                ], className="text-md-end")
+            ], xs=12, md=6, className="mt-2 mt-md-0")
+        ])
+    ], className="company-header-card")
     
-    # CASO 4: Click en sugerencia
-    elif isinstance(triggered_id, dict) and triggered_id.get("type") == "suggestion-item":
-        # triggered_value es el n_clicks del elemento clickeado
-        if triggered_value and triggered_value > 0:
-            symbol = triggered_id.get("index")
-        else:
-            # n_clicks = 0 significa que el elemento se acaba de crear, no un click real
-            return no_update
+    # Score Card - Rediseñado con mejor centrado
+    score_card = html.Div([
+        # Contenedor del donut con padding
+        html.Div([
+            dcc.Graph(
+                figure=create_score_donut(score), 
+                config={'displayModeBar': False}, 
+                style={"height": "160px", "marginTop": "5px"}
+            )
+        ], style={"display": "flex", "justifyContent": "center", "alignItems": "center"}),
+        
+        # Badges centrados con mejor espaciado
+        html.Div([
+            html.Span("🚀 Growth", className="badge me-2", style={
+                "backgroundColor": "rgba(16, 185, 129, 0.15)",
+                "color": "#34d399",
+                "border": "1px solid rgba(16, 185, 129, 0.3)",
+                "fontWeight": "500",
+                "padding": "5px 12px",
+                "fontSize": "0.75rem",
+                "borderRadius": "20px"
+            }) if score_v2.get("is_growth_company") else None,
+            html.Span(score_v2.get("level", ""), className="badge score-level-badge",
+                style={
+                    "backgroundColor": score_v2.get('level_color', '#71717a'),
+                    "color": "#ffffff",
+                    "border": "none",
+                    "fontWeight": "600",
+                    "padding": "8px 20px",
+                    "fontSize": "0.85rem",
+                    "borderRadius": "25px",
+                    "boxShadow": f"0 4px 12px {score_v2.get('level_color', '#71717a')}40"
+                })
+            if score_v2.get("level") else None
+        ], style={
+            "display": "flex", 
+            "justifyContent": "center", 
+            "alignItems": "center",
+            "gap": "8px",
+            "marginTop": "10px",
+            "marginBottom": "15px",
+            "paddingBottom": "5px"
+        })
+    ], style={
+        "display": "flex",
+        "flexDirection": "column",
+        "justifyContent": "center",
+        "alignItems": "center",
+        "minHeight": "220px",
+        "padding": "10px"
+    })
     
-    # CASO 5: Click en búsqueda reciente
-    elif isinstance(triggered_id, dict) and triggered_id.get("type") == "recent-search":
-        if triggered_value and triggered_value > 0:
-            symbol = triggered_id.get("index")
-        else:
-            return no_update
+    # Key Metrics
+    key_metrics = html.Div([
+        html.H5("📊 Métricas Clave", className="mb-3"),
+        metric_cards_row(SUMMARY_TOP_CARDS, formatted, col_class="mb-2"),
+        metric_cards_row(SUMMARY_BOTTOM_CARDS, formatted, col_class="mb-2")
+    ])
     
-    # CASO 6: Click en posiciones item
-    elif isinstance(triggered_id, dict) and triggered_id.get("type") == "posiciones-item":
-        if triggered_value and triggered_value > 0:
-            symbol = triggered_id.get("index")
-        else:
-            return no_update
+    # Sector Notes
+    sector_notes = html.Details([
+        html.Summary(f"📋 Notas para sector {sector_profile.display_name}", className="text-muted"),
+        html.Div([
+            html.P([html.Span("ETF de referencia: ", className="text-muted"),
+                   html.Span(sector_profile.sector_etf, className="text-info")], className="mb-2 small"),
+            html.Ul([html.Li(note, className="small") for note in sector_profile.sector_notes])
+        ], className="mt-2")
+    ]) if sector_profile.sector_notes else None
     
-    # CASO 7: Click en radar item
-    elif isinstance(triggered_id, dict) and triggered_id.get("type") == "radar-item":
-        if triggered_value and triggered_value > 0:
-            symbol = triggered_id.get("index")
-        else:
-            return no_update
+    # Tab Valoración
+    tab_valuation = html.Div([
+        html.H5("Métricas de Valoración", className="mb-2"),
+        html.P("¿Está cara o barata la acción? · Datos TTM", className="text-muted small mb-3"),
+        metric_cards_row(VALUATION_CARDS, formatted),
+        # Segunda fila: Adaptativa según sector
+        metric_cards_row(BANK_VALUATION_EXTRA_CARDS if is_financial_sector(real_sector) else VALUATION_EXTRA_CARDS, formatted),
+        
+        # v2.9: Sección especial para REITs
+        html.Div([
+            html.Hr(className="my-4"),
+            html.H6("🏠 Métricas REIT (FFO/AFFO)", className="mb-3"),
+            html.P("Métricas específicas para Real Estate Investment Trusts", className="text-muted small mb-3"),
+            dbc.Row([
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardBody([
+                            html.P("FFO/Share", className="text-muted small mb-1 text-center"),
+                            html.H4(f"${reit_metrics['ffo_per_share']:.2f}" if reit_metrics.get('ffo_per_share') else "N/A", 
+                                   className="mb-1 text-center text-info"),
+                            html.P("Funds From Operations", className="small text-muted text-center", style={"fontSize": "0.7rem"})
+                        ])
+                    ], style={"backgroundColor": "#27272a", "border": "none"})
+                ], xs=6, md=3, className="mb-3"),
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardBody([
+                            html.P("P/FFO", className="text-muted small mb-1 text-center"),
+                            html.H4(f"{reit_metrics['p_ffo']:.1f}x" if reit_metrics.get('p_ffo') else "N/A",
+                                   className=f"mb-1 text-center {reit_metrics['p_ffo_interpretation'][1] if reit_metrics.get('p_ffo_interpretation') else ''}"),
+                            html.P(reit_metrics['p_ffo_interpretation'][0] if reit_metrics.get('p_ffo_interpretation') else "Precio/FFO", 
+                                  className="small text-muted text-center", style={"fontSize": "0.7rem"})
+                        ])
+                    ], style={"backgroundColor": "#27272a", "border": "none"})
+                ], xs=6, md=3, className="mb-3"),
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardBody([
+                            html.P("AFFO/Share", className="text-muted small mb-1 text-center"),
+                            html.H4(f"${reit_metrics['affo_per_share']:.2f}" if reit_metrics.get('affo_per_share') else "N/A",
+                                   className="mb-1 text-center text-info"),
+                            html.P("Adjusted FFO", className="small text-muted text-center", style={"fontSize": "0.7rem"})
+                        ])
+                    ], style={"backgroundColor": "#27272a", "border": "none"})
+                ], xs=6, md=3, className="mb-3"),
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardBody([
+                            html.P("FFO Payout", className="text-muted small mb-1 text-center"),
+                            html.H4(f"{reit_metrics['ffo_payout_ratio']:.0f}%" if reit_metrics.get('ffo_payout_ratio') else "N/A",
+                                   className=f"mb-1 text-center {reit_metrics['payout_interpretation'][1] if reit_metrics.get('payout_interpretation') else ''}"),
+                            html.P(reit_metrics['payout_interpretation'][0] if reit_metrics.get('payout_interpretation') else "Dividendo/FFO",
+                                  className="small text-muted text-center", style={"fontSize": "0.7rem"})
+                        ])
+                    ], style={"backgroundColor": "#27272a", "border": "none"})
+                ], xs=6, md=3, className="mb-3"),
+            ]),
+            # Nota explicativa
+            dbc.Alert([
+                html.Strong("💡 ¿Por qué FFO? "),
+                "Para REITs, el FFO es más relevante que el Net Income porque la depreciación inmobiliaria ",
+                "no refleja una pérdida real de valor. Un P/FFO < 15 generalmente indica buena valoración."
+            ], color="info", className="mb-0 small", style={"backgroundColor": "rgba(16, 185, 129, 0.1)", "border": "1px solid rgba(16, 185, 129, 0.3)"})
+        ]) if is_reit and reit_metrics and reit_metrics.get("is_valid") else None,
+    ])
     
-    # CASO 8: Click en screener pick
-    elif isinstance(triggered_id, dict) and triggered_id.get("type") == "screener-pick":
-        if triggered_value and triggered_value > 0:
-            symbol = triggered_id.get("index")
-        else:
-            return no_update
-    
-    # Si no hay símbolo válido, no hacer nada
-    if not symbol:
-        return no_update
-    
-    try:
-        service = FinancialDataService()
-        data = service.get_complete_analysis_data(symbol)
-        
-        if not data.get("financials"):
-            error_msg = dbc.Alert(f"❌ No se encontraron datos para '{symbol}'. Verifica el símbolo.",
-                                 color="danger", dismissable=True)
-            return home_style, analysis_style, *empty_outputs, "", error_msg, None, None, "", hide_suggestions, no_update
-        
-        profile = data.get("profile")
-        financials = data.get("financials")
-        contextual = data.get("contextual", {})
-        
-        fin_dict = service.financials_to_dict(financials)
-        ratios = calculate_all_ratios(fin_dict)
-        
-        # Mapeo completo de sectores (Yahoo Finance -> SECTOR_THRESHOLDS keys)
-        sector_map = {
-            "Technology": "technology",
-            "Financial Services": "financials",
-            "Healthcare": "healthcare",
-            "Utilities": "utilities",
-            "Consumer Cyclical": "consumer_discretionary",
-            "Consumer Defensive": "consumer_staples",
-            "Energy": "energy",
-            "Real Estate": "real_estate",
-            "Industrials": "industrials",
-            "Basic Materials": "materials",
-            "Communication Services": "communication_services",
-        }
-        sector_key = sector_map.get(profile.sector if profile else "", "default")
-        real_sector = profile.sector if profile else ""  # v3.1: Sector real de Yahoo Finance
-        contextual["pe_5y_avg"] = ratios.get("pe")
-        alerts = aggregate_alerts(ratios, contextual, sector_key, real_sector=real_sector)
-        sector_profile = get_sector_profile(profile.sector if profile else None)
-        
-        # v2.9: Detectar si es REIT y calcular métricas específicas
-        is_reit = is_reit_sector(profile.sector if profile else "")
-        reit_metrics = None
-        if is_reit and financials:
-            try:
-                reit_metrics = calculate_reit_metrics(
-                    net_income=financials.net_income,
-                    depreciation=financials.depreciation,
-                    gains_on_sale=None,  # No disponible en yfinance
-                    capex=financials.capex,
-                    shares_outstanding=financials.shares_outstanding,
-                    price=financials.price,
-                    dividend_per_share=financials.dividend_per_share
-                )
-            except Exception as e:
-                logger.warning(f"Error calculando métricas REIT: {e}")
-                reit_metrics = None
-        
-        company_name = profile.name if profile else symbol
-        company_sector = profile.sector if profile else "N/A"
-        company_industry = profile.industry if profile else "N/A"
-        current_price = f"${financials.price:.2f}" if financials and financials.price else "N/A"
-        
-        score = alerts.get("score", 0)
-        score_color, score_label = get_score_color(score)
-        score_v2 = alerts.get("score_v2", {})
-        
-        # Badge del stock actual para navbar
-        stock_badge = html.Div([
-            html.Span(symbol, style={"color": "#3b82f6", "fontWeight": "700", "fontSize": "1.1rem"}),
-            html.Span(f" · {current_price}", className="text-muted")
-        ])
-        
-        # Company Header (sin botón PDF - está en el layout principal)
-        company_header = html.Div([
-            dbc.Row([
-                dbc.Col([
-                    html.H2(company_name, className="mb-1", style={"fontWeight": "700"}),
-                    html.P([
-                        html.Span("📁 ", className="text-muted"),
-                        html.Span(company_sector, className="text-secondary"),
-                        html.Span(" · ", className="text-muted"),
-                        html.Span("🏭 ", className="text-muted"),
-                        html.Span(company_industry, className="text-secondary"),
-                    ], className="mb-0 small")
-                ], xs=12, md=6),
-                dbc.Col([
-                    html.Div([
-                        html.Div([
-                            html.H3(current_price, className="text-info mb-0", style={"fontWeight": "700"}),
-                            html.Small("Precio actual", className="text-muted")
-                        ]),
-                        # v2.9: Botón agregar a comparación
-                        html.Button([
-                            html.Span("➕ ", style={"marginRight": "4px"}),
-                            "Comparar"
-                        ], id="btn-add-comparison", n_clicks=0,
-                           className="btn btn-outline-success btn-sm mt-2",
-                           style={"fontSize": "0.75rem", "padding": "4px 10px"})
-                    ], className="text-md-end")
-                ], xs=12, md=6, className="mt-2 mt-md-0")
-            ])
-        ], className="company-header-card")
-        
-        # Score Card - Rediseñado con mejor centrado
-        score_card = html.Div([
-            # Contenedor del donut con padding
-            html.Div([
-                dcc.Graph(
-                    figure=create_score_donut(score), 
-                    config={'displayModeBar': False}, 
-                    style={"height": "160px", "marginTop": "5px"}
-                )
-            ], style={"display": "flex", "justifyContent": "center", "alignItems": "center"}),
+    # Tab Rentabilidad - ADAPTATIVO según sector
+    if is_financial_sector(real_sector):
+        # === VERSIÓN PARA SECTOR FINANCIERO ===
+        tab_profitability = html.Div([
+            html.H5("Métricas de Rentabilidad", className="mb-2"),
+            html.P("Rentabilidad adaptada para sector bancario/financiero", className="text-muted small mb-4"),
             
-            # Badges centrados con mejor espaciado
-            html.Div([
-                html.Span("🚀 Growth", className="badge me-2", style={
-                    "backgroundColor": "rgba(16, 185, 129, 0.15)",
-                    "color": "#34d399",
-                    "border": "1px solid rgba(16, 185, 129, 0.3)",
-                    "fontWeight": "500",
-                    "padding": "5px 12px",
-                    "fontSize": "0.75rem",
-                    "borderRadius": "20px"
-                }) if score_v2.get("is_growth_company") else None,
-                html.Span(score_v2.get("level", ""), className="badge score-level-badge",
-                    style={
-                        "backgroundColor": score_v2.get('level_color', '#71717a'),
-                        "color": "#ffffff",
-                        "border": "none",
-                        "fontWeight": "600",
-                        "padding": "8px 20px",
-                        "fontSize": "0.85rem",
-                        "borderRadius": "25px",
-                        "boxShadow": f"0 4px 12px {score_v2.get('level_color', '#71717a')}40"
-                    })
-                if score_v2.get("level") else None
-            ], style={
-                "display": "flex", 
-                "justifyContent": "center", 
-                "alignItems": "center",
-                "gap": "8px",
-                "marginTop": "10px",
-                "marginBottom": "15px",
-                "paddingBottom": "5px"
-            })
-        ], style={
-            "display": "flex",
-            "flexDirection": "column",
-            "justifyContent": "center",
-            "alignItems": "center",
-            "minHeight": "220px",
-            "padding": "10px"
-        })
-        
-        # Key Metrics
-        key_metrics = html.Div([
-            html.H5("📊 Métricas Clave", className="mb-3"),
-            dbc.Row([
-                dbc.Col([create_metric_card("Market Cap", format_ratio(ratios.get("market_cap"), "currency"), "🌐")], xs=6, md=3, className="mb-2"),
-                dbc.Col([create_metric_card("P/E", format_ratio(ratios.get("pe"), "multiple"), "📊")], xs=6, md=3, className="mb-2"),
-                dbc.Col([create_metric_card("ROE", format_ratio(ratios.get("roe"), "percent"), "🎯")], xs=6, md=3, className="mb-2"),
-                dbc.Col([create_metric_card("D/E", format_ratio(ratios.get("debt_to_equity"), "multiple"), "⚖️")], xs=6, md=3, className="mb-2"),
-            ]),
-            dbc.Row([
-                dbc.Col([create_metric_card("Margen Neto", format_ratio(ratios.get("net_margin"), "percent"), "💎")], xs=6, md=3, className="mb-2"),
-                dbc.Col([create_metric_card("FCF Yield", format_ratio(ratios.get("fcf_yield"), "percent"), "💸")], xs=6, md=3, className="mb-2"),
-                dbc.Col([create_metric_card("EV/EBITDA", format_ratio(ratios.get("ev_ebitda"), "multiple"), "🏢")], xs=6, md=3, className="mb-2"),
-                dbc.Col([create_metric_card("Beta", f"{financials.beta:.2f}" if financials and financials.beta else "N/A", "📉")], xs=6, md=3, className="mb-2"),
-            ])
-        ])
-        
-        # Sector Notes
-        sector_notes = html.Details([
-            html.Summary(f"📋 Notas para sector {sector_profile.display_name}", className="text-muted"),
-            html.Div([
-                html.P([html.Span("ETF de referencia: ", className="text-muted"),
-                       html.Span(sector_profile.sector_etf, className="text-info")], className="mb-2 small"),
-                html.Ul([html.Li(note, className="small") for note in sector_profile.sector_notes])
-            ], className="mt-2")
-        ]) if sector_profile.sector_notes else None
-        
-        # Tab Valoración
-        tab_valuation = html.Div([
-            html.H5("Métricas de Valoración", className="mb-2"),
-            html.P("¿Está cara o barata la acción? · Datos TTM", className="text-muted small mb-3"),
+            # Fila 1: Retornos (más importante para bancos)
+            html.H6("🏦 Retornos Bancarios", className="mb-3"),
+            metric_cards_row(BANK_RETURNS_CARDS, formatted, row_class="mb-3"),
+            
+            html.Hr(className="theme-hr"),
+            
+            # Fila 2: Métricas por acción
+            html.H6("📊 Métricas por Acción", className="mb-3 mt-3"),
             dbc.Row([
-                dbc.Col([create_metric_card("P/E", format_ratio(ratios.get("pe"), "multiple"), "📊")], xs=6, md=3, className="mb-3"),
-                dbc.Col([create_metric_card("Forward P/E", format_ratio(ratios.get("forward_pe"), "multiple"), "🔮")], xs=6, md=3, className="mb-3"),
-                dbc.Col([create_metric_card("P/B", format_ratio(ratios.get("pb"), "multiple"), "📚")], xs=6, md=3, className="mb-3"),
-                dbc.Col([create_metric_card("P/S", format_ratio(ratios.get("ps"), "multiple"), "💰")], xs=6, md=3, className="mb-3"),
-            ]),
-            # Segunda fila: Adaptativa según sector
+                dbc.Col([create_metric_card("EPS", formatted["eps"], "📈")], xs=6, md=3, className="mb-3"),
+                dbc.Col([create_metric_card("Book Value/Share", f"${financials.book_value_per_share:.2f}" if financials and financials.book_value_per_share else "N/A", "📖")], xs=6, md=3, className="mb-3"),
+                dbc.Col([create_metric_card("Dividend/Share", f"${financials.dividend_per_share:.2f}" if financials and financials.dividend_per_share else "N/A", "💵")], xs=6, md=3, className="mb-3"),
+                dbc.Col([create_metric_card("Payout Ratio", formatted["payout_ratio"], "📤")], xs=6, md=3, className="mb-3"),
+            ], className="mb-3"),
+            
+            html.Hr(className="theme-hr"),
+            
+            # Fila 3: Resultados
+            html.H6("💰 Resultados Absolutos", className="mb-3 mt-3"),
             dbc.Row([
-                # Para NO financieras: EV/EBITDA, P/FCF, PEG, FCF Yield
-                dbc.Col([create_metric_card("EV/EBITDA", format_ratio(ratios.get("ev_ebitda"), "multiple"), "🏢")], xs=6, md=3, className="mb-3") if not is_financial_sector(real_sector) else
-                dbc.Col([create_metric_card("Dividend Yield", format_ratio(ratios.get("dividend_yield"), "percent"), "💵")], xs=6, md=3, className="mb-3"),
-                
-                dbc.Col([create_metric_card("P/FCF", format_ratio(ratios.get("p_fcf"), "multiple"), "💵")], xs=6, md=3, className="mb-3") if not is_financial_sector(real_sector) else
-                dbc.Col([create_metric_card("Earnings Yield", format_ratio(ratios.get("earnings_yield"), "percent"), "📈")], xs=6, md=3, className="mb-3"),
-                
-                dbc.Col([create_metric_card("PEG Ratio", format_ratio(ratios.get("peg"), "decimal"), "📈")], xs=6, md=3, className="mb-3"),
-                
-                dbc.Col([create_metric_card("FCF Yield", format_ratio(ratios.get("fcf_yield"), "percent"), "💸")], xs=6, md=3, className="mb-3") if not is_financial_sector(real_sector) else
-                dbc.Col([create_metric_card("Payout Ratio", format_ratio(ratios.get("payout_ratio"), "percent"), "📤")], xs=6, md=3, className="mb-3"),
+                dbc.Col([create_metric_card("Ingreso Neto", formatted["net_income"], "💵")], xs=6, md=4, className="mb-3"),
+                dbc.Col([create_metric_card("Revenue", format_ratio(financials.revenue if financials else None, "currency"), "📊")], xs=6, md=4, className="mb-3"),
+                dbc.Col([create_metric_card("Total Equity", format_ratio(financials.total_equity if financials else None, "currency"), "🏦")], xs=6, md=4, className="mb-3"),
             ]),
             
-            # v2.9: Sección especial para REITs
+            # Nota informativa
             html.Div([
-                html.Hr(className="my-4"),
-                html.H6("🏠 Métricas REIT (FFO/AFFO)", className="mb-3"),
-                html.P("Métricas específicas para Real Estate Investment Trusts", className="text-muted small mb-3"),
-                dbc.Row([
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.CardBody([
-                                html.P("FFO/Share", className="text-muted small mb-1 text-center"),
-                                html.H4(f"${reit_metrics['ffo_per_share']:.2f}" if reit_metrics.get('ffo_per_share') else "N/A", 
-                                       className="mb-1 text-center text-info"),
-                                html.P("Funds From Operations", className="small text-muted text-center", style={"fontSize": "0.7rem"})
-                            ])
-                        ], style={"backgroundColor": "#27272a", "border": "none"})
-                    ], xs=6, md=3, className="mb-3"),
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.CardBody([
-                                html.P("P/FFO", className="text-muted small mb-1 text-center"),
-                                html.H4(f"{reit_metrics['p_ffo']:.1f}x" if reit_metrics.get('p_ffo') else "N/A",
-                                       className=f"mb-1 text-center {reit_metrics['p_ffo_interpretation'][1] if reit_metrics.get('p_ffo_interpretation') else ''}"),
-                                html.P(reit_metrics['p_ffo_interpretation'][0] if reit_metrics.get('p_ffo_interpretation') else "Precio/FFO", 
-                                      className="small text-muted text-center", style={"fontSize": "0.7rem"})
-                            ])
-                        ], style={"backgroundColor": "#27272a", "border": "none"})
-                    ], xs=6, md=3, className="mb-3"),
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.CardBody([
-                                html.P("AFFO/Share", className="text-muted small mb-1 text-center"),
-                                html.H4(f"${reit_metrics['affo_per_share']:.2f}" if reit_metrics.get('affo_per_share') else "N/A",
-                                       className="mb-1 text-center text-info"),
-                                html.P("Adjusted FFO", className="small text-muted text-center", style={"fontSize": "0.7rem"})
-                            ])
-                        ], style={"backgroundColor": "#27272a", "border": "none"})
-                    ], xs=6, md=3, className="mb-3"),
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.CardBody([
-                                html.P("FFO Payout", className="text-muted small mb-1 text-center"),
-                                html.H4(f"{reit_metrics['ffo_payout_ratio']:.0f}%" if reit_metrics.get('ffo_payout_ratio') else "N/A",
-                                       className=f"mb-1 text-center {reit_metrics['payout_interpretation'][1] if reit_metrics.get('payout_interpretation') else ''}"),
-                                html.P(reit_metrics['payout_interpretation'][0] if reit_metrics.get('payout_interpretation') else "Dividendo/FFO",
-                                      className="small text-muted text-center", style={"fontSize": "0.7rem"})
-                            ])
-                        ], style={"backgroundColor": "#27272a", "border": "none"})
-                    ], xs=6, md=3, className="mb-3"),
-                ]),
-                # Nota explicativa
-                dbc.Alert([
-                    html.Strong("💡 ¿Por qué FFO? "),
-                    "Para REITs, el FFO es más relevante que el Net Income porque la depreciación inmobiliaria ",
-                    "no refleja una pérdida real de valor. Un P/FFO < 15 generalmente indica buena valoración."
-                ], color="info", className="mb-0 small", style={"backgroundColor": "rgba(16, 185, 129, 0.1)", "border": "1px solid rgba(16, 185, 129, 0.3)"})
-            ]) if is_reit and reit_metrics and reit_metrics.get("is_valid") else None,
+                html.P([
+                    html.Span("ℹ️ ", style={"color": "#60a5fa"}),
+                    "Para bancos, ROA >0.5% y ROE >8% son buenos. Margen Bruto y EBITDA no aplican al modelo bancario."
+                ], className="text-muted small", style={"fontStyle": "italic"})
+            ], style={"marginTop": "15px", "padding": "10px", "background": "rgba(96, 165, 250, 0.1)", "borderRadius": "8px"})
         ])
-        
-        # Tab Rentabilidad - ADAPTATIVO según sector
-        if is_financial_sector(real_sector):
-            # === VERSIÓN PARA SECTOR FINANCIERO ===
-            tab_profitability = html.Div([
-                html.H5("Métricas de Rentabilidad", className="mb-2"),
-                html.P("Rentabilidad adaptada para sector bancario/financiero", className="text-muted small mb-4"),
-                
-                # Fila 1: Retornos (más importante para bancos)
-                html.H6("🏦 Retornos Bancarios", className="mb-3"),
-                dbc.Row([
-                    dbc.Col([create_metric_card("ROE", format_ratio(ratios.get("roe"), "percent"), "🎯")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("ROA", format_ratio(ratios.get("roa"), "percent"), "🏭")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Margen Neto", format_ratio(ratios.get("net_margin"), "percent"), "💎")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Margen Operativo", format_ratio(ratios.get("operating_margin"), "percent"), "⚙️")], xs=6, md=3, className="mb-3"),
-                ], className="mb-3"),
-                
-                html.Hr(className="theme-hr"),
-                
-                # Fila 2: Métricas por acción
-                html.H6("📊 Métricas por Acción", className="mb-3 mt-3"),
-                dbc.Row([
-                    dbc.Col([create_metric_card("EPS", format_ratio(ratios.get("eps"), "decimal"), "📈")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Book Value/Share", f"${financials.book_value_per_share:.2f}" if financials and financials.book_value_per_share else "N/A", "📖")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Dividend/Share", f"${financials.dividend_per_share:.2f}" if financials and financials.dividend_per_share else "N/A", "💵")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Payout Ratio", format_ratio(ratios.get("payout_ratio"), "percent"), "📤")], xs=6, md=3, className="mb-3"),
-                ], className="mb-3"),
-                
-                html.Hr(className="theme-hr"),
-                
-                # Fila 3: Resultados
-                html.H6("💰 Resultados Absolutos", className="mb-3 mt-3"),
-                dbc.Row([
-                    dbc.Col([create_metric_card("Ingreso Neto", format_ratio(ratios.get("net_income"), "currency"), "💵")], xs=6, md=4, className="mb-3"),
-                    dbc.Col([create_metric_card("Revenue", format_ratio(financials.revenue if financials else None, "currency"), "📊")], xs=6, md=4, className="mb-3"),
-                    dbc.Col([create_metric_card("Total Equity", format_ratio(financials.total_equity if financials else None, "currency"), "🏦")], xs=6, md=4, className="mb-3"),
-                ]),
-                
-                # Nota informativa
-                html.Div([
-                    html.P([
-                        html.Span("ℹ️ ", style={"color": "#60a5fa"}),
-                        "Para bancos, ROA >0.5% y ROE >8% son buenos. Margen Bruto y EBITDA no aplican al modelo bancario."
-                    ], className="text-muted small", style={"fontStyle": "italic"})
-                ], style={"marginTop": "15px", "padding": "10px", "background": "rgba(96, 165, 250, 0.1)", "borderRadius": "8px"})
-            ])
-        else:
-            # === VERSIÓN ESTÁNDAR PARA OTROS SECTORES ===
-            tab_profitability = html.Div([
-                html.H5("Métricas de Rentabilidad", className="mb-2"),
-                html.P("¿Qué tan eficiente es generando ganancias?", className="text-muted small mb-4"),
-                
-                # Fila 1: Retornos
-                html.H6("🎯 Retornos sobre Capital", className="mb-3"),
-                dbc.Row([
-                    dbc.Col([create_metric_card("ROE", format_ratio(ratios.get("roe"), "percent"), "🎯")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("ROA", format_ratio(ratios.get("roa"), "percent"), "🏭")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("ROIC", format_ratio(ratios.get("roic"), "percent"), "💎")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("ROE 5Y Avg", format_ratio(ratios.get("roe_5y_avg"), "percent"), "📊")], xs=6, md=3, className="mb-3"),
-                ], className="mb-3"),
-                
-                html.Hr(className="theme-hr"),
-                
-                # Fila 2: Márgenes
-                html.H6("📊 Márgenes de Ganancia", className="mb-3 mt-3"),
-                dbc.Row([
-                    dbc.Col([create_metric_card("Margen Bruto", format_ratio(ratios.get("gross_margin"), "percent"), "📦")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Margen Operativo", format_ratio(ratios.get("operating_margin"), "percent"), "⚙️")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Margen Neto", format_ratio(ratios.get("net_margin"), "percent"), "💎")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Margen EBITDA", format_ratio(ratios.get("ebitda_margin"), "percent"), "📈")], xs=6, md=3, className="mb-3"),
-                ], className="mb-3"),
-                
-                html.Hr(className="theme-hr"),
-                
-                # Fila 3: Resultado
-                html.H6("💰 Resultados Absolutos", className="mb-3 mt-3"),
-                dbc.Row([
-                    dbc.Col([create_metric_card("EBITDA", format_ratio(ratios.get("ebitda"), "currency"), "📊")], xs=6, md=4, className="mb-3"),
-                    dbc.Col([create_metric_card("Ingreso Neto", format_ratio(ratios.get("net_income"), "currency"), "💵")], xs=6, md=4, className="mb-3"),
-                    dbc.Col([create_metric_card("EPS", format_ratio(ratios.get("eps"), "decimal"), "📈")], xs=6, md=4, className="mb-3"),
-                ])
-            ])
-        
-        # Tab Solidez - ADAPTATIVO según sector
-        is_financial = is_financial_sector(real_sector)
-        
-        if is_financial:
-            # === VERSIÓN PARA SECTOR FINANCIERO ===
-            tab_health = html.Div([
-                html.H5("Solidez Financiera", className="mb-2"),
-                html.P("Métricas adaptadas para sector bancario/financiero", className="text-muted small mb-4"),
-                
-                # Fila 1: Rentabilidad Bancaria
-                html.H6("🏦 Rentabilidad Bancaria", className="mb-3"),
-                dbc.Row([
-                    dbc.Col([create_metric_card("ROA", format_ratio(ratios.get("roa"), "percent"), "📊")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("ROE", format_ratio(ratios.get("roe"), "percent"), "📈")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Margen Neto", format_ratio(ratios.get("net_margin"), "percent"), "💎")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Margen Operativo", format_ratio(ratios.get("operating_margin"), "percent"), "⚙️")], xs=6, md=3, className="mb-3"),
-                ], className="mb-3"),
-                
-                html.Hr(className="theme-hr"),
-                
-                # Fila 2: Valoración Bancaria
-                html.H6("💰 Valoración Bancaria", className="mb-3 mt-3"),
-                dbc.Row([
-                    dbc.Col([create_metric_card("P/B", format_ratio(ratios.get("pb"), "multiple"), "📚")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("P/E", format_ratio(ratios.get("pe"), "multiple"), "📊")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Dividend Yield", format_ratio(ratios.get("dividend_yield"), "percent"), "💵")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Payout Ratio", format_ratio(ratios.get("payout_ratio"), "percent"), "📤")], xs=6, md=3, className="mb-3"),
-                ], className="mb-3"),
-                
-                html.Hr(className="theme-hr"),
-                
-                # Fila 3: Estructura de Capital
-                html.H6("🏛️ Estructura de Capital", className="mb-3 mt-3"),
-                dbc.Row([
-                    dbc.Col([create_metric_card("Deuda/Equity", format_ratio(ratios.get("debt_to_equity"), "multiple"), "⚖️")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Deuda/Activos", format_ratio(ratios.get("debt_to_assets"), "percent"), "📉")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Book Value/Share", f"${financials.book_value_per_share:.2f}" if financials and financials.book_value_per_share else "N/A", "📖")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Market Cap", format_ratio(profile.market_cap if profile else None, "currency"), "🌐")], xs=6, md=3, className="mb-3"),
-                ]),
-                
-                # Nota informativa mejorada
-                html.Div([
-                    html.P([
-                        html.Strong("🏦 Modelo Adaptativo Bancario", style={"color": "#60a5fa"}),
-                    ], className="mb-2"),
-                    html.P([
-                        "Umbrales calibrados para sector financiero: ",
-                        html.Span("ROA >0.5% excelente", style={"color": "#22c55e"}), " (promedio bancos: 0.3-0.5%), ",
-                        html.Span("ROE >12% excelente", style={"color": "#22c55e"}), " (objetivo típico: 8-12%), ",
-                        html.Span("D/E <5x conservador", style={"color": "#22c55e"}), " (bancos operan normalmente con 8-15x)."
-                    ], className="text-muted small mb-2"),
-                    html.P([
-                        html.Span("⚠️ ", style={"color": "#eab308"}),
-                        "Métricas regulatorias (CET1, Tier 1, NPL, LCR) no disponibles en Yahoo Finance. ",
-                        "Para análisis completo, consultar reportes regulatorios (EBA, BoE, Fed)."
-                    ], className="text-muted small", style={"fontStyle": "italic"})
-                ], style={"marginTop": "20px", "padding": "15px", "background": "rgba(96, 165, 250, 0.1)", "borderRadius": "8px", "border": "1px solid rgba(96, 165, 250, 0.2)"})
-            ])
-        else:
-            # === VERSIÓN ESTÁNDAR PARA OTROS SECTORES ===
-            tab_health = html.Div([
-                html.H5("Solidez Financiera", className="mb-2"),
-                html.P("¿Puede pagar sus deudas y mantener operaciones?", className="text-muted small mb-4"),
-                
-                # Fila 1: Liquidez
-                html.H6("💧 Liquidez (Corto Plazo)", className="mb-3"),
-                dbc.Row([
-                    dbc.Col([create_metric_card("Current Ratio", format_ratio(ratios.get("current_ratio"), "multiple"), "💧")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Quick Ratio", format_ratio(ratios.get("quick_ratio"), "multiple"), "⚡")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Cash Ratio", format_ratio(ratios.get("cash_ratio"), "multiple"), "💵")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Working Capital", format_ratio(ratios.get("working_capital"), "currency"), "📊")], xs=6, md=3, className="mb-3"),
-                ], className="mb-3"),
-                
-                html.Hr(className="theme-hr"),
-                
-                # Fila 2: Apalancamiento
-                html.H6("⚖️ Apalancamiento (Largo Plazo)", className="mb-3 mt-3"),
-                dbc.Row([
-                    dbc.Col([create_metric_card("Deuda/Equity", format_ratio(ratios.get("debt_to_equity"), "multiple"), "⚖️")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Deuda/Activos", format_ratio(ratios.get("debt_to_assets"), "percent"), "📉")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Deuda Neta/EBITDA", format_ratio(ratios.get("net_debt_to_ebitda"), "multiple"), "🔗")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Deuda Total", format_ratio(ratios.get("total_debt"), "currency"), "💳")], xs=6, md=3, className="mb-3"),
-                ], className="mb-3"),
-                
-                html.Hr(className="theme-hr"),
-                
-                # Fila 3: Cobertura y Flujo
-                html.H6("🛡️ Cobertura y Flujo de Caja", className="mb-3 mt-3"),
-                dbc.Row([
-                    dbc.Col([create_metric_card("Cobertura Int.", format_ratio(ratios.get("interest_coverage"), "multiple"), "🛡️")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("FCF", format_ratio(ratios.get("fcf"), "currency"), "💵")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("FCF/Deuda", format_ratio(ratios.get("fcf_to_debt"), "percent"), "📈")], xs=6, md=3, className="mb-3"),
-                    dbc.Col([create_metric_card("Cash & Eq.", format_ratio(ratios.get("cash_and_equivalents"), "currency"), "🏦")], xs=6, md=3, className="mb-3"),
-                ])
-            ])
-        
-        # Tab Histórico - obtener gráfico y datos de rendimiento
-        price_chart, ytd_pct, ytd_end = create_price_chart(symbol, "1y")
-        ytd_is_positive = ytd_pct >= 0
-        
-        # Obtener datos de 52 semanas
-        try:
-            ticker_info = yf.Ticker(symbol).info
-            week_high = ticker_info.get("fiftyTwoWeekHigh")
-            week_low = ticker_info.get("fiftyTwoWeekLow")
-            avg_volume = ticker_info.get("averageVolume")
-        except (KeyError, TypeError, ValueError, ConnectionError):
-            week_high, week_low, avg_volume = None, None, None
-        
-        # Colores del rendimiento
-        pct_color = '#10b981' if ytd_is_positive else '#f43f5e'
-        
-        tab_historical = html.Div([
-            html.H5("Histórico de Precio", className="mb-2"),
-            html.P("Evolución del precio de la acción", className="text-muted small mb-3"),
+    else:
+        # === VERSIÓN ESTÁNDAR PARA OTROS SECTORES ===
+        tab_profitability = html.Div([
+            html.H5("Métricas de Rentabilidad", className="mb-2"),
+            html.P("¿Qué tan eficiente es generando ganancias?", className="text-muted small mb-4"),
             
-            # Header de rendimiento (SEPARADO de la gráfica)
-            html.Div([
-                html.Div([
-                    html.Span(f"{ytd_pct:+.1f}%", style={
-                        "fontSize": "2rem",
-                        "fontWeight": "700",
-                        "color": pct_color
-                    }),
-                    html.Span(" 1 año", style={
-                        "fontSize": "0.9rem",
-                        "color": "#71717a",
-                        "marginLeft": "8px"
-                    })
-                ]),
-                html.Div([
-                    html.Span(f"${ytd_end:.2f}", style={
-                        "fontSize": "1.1rem",
-                        "color": "#a1a1aa"
-                    }),
-                    html.Span(" precio actual", style={
-                        "fontSize": "0.8rem",
-                        "color": "#52525b",
-                        "marginLeft": "6px"
-                    })
-                ])
-            ], style={
-                "textAlign": "center",
-                "padding": "15px 0",
-                "marginBottom": "10px",
-                "borderBottom": "1px solid rgba(255,255,255,0.05)"
-            }, id="price-performance-header"),
+            # Fila 1: Retornos
+            html.H6("🎯 Retornos sobre Capital", className="mb-3"),
+            metric_cards_row(RETURNS_CARDS, formatted, row_class="mb-3"),
             
-            # Selector de periodo
-            html.Div([
-                dbc.ButtonGroup([
-                    dbc.Button("1S", id="period-1wk", color="secondary", size="sm", outline=True, className="period-btn"),
-                    dbc.Button("1M", id="period-1mo", color="secondary", size="sm", outline=True, className="period-btn"),
-                    dbc.Button("3M", id="period-3mo", color="secondary", size="sm", outline=True, className="period-btn"),
-                    dbc.Button("6M", id="period-6mo", color="secondary", size="sm", outline=True, className="period-btn"),
-                    dbc.Button("1A", id="period-1y", color="primary", size="sm", className="period-btn"),
-                    dbc.Button("5A", id="period-5y", color="secondary", size="sm", outline=True, className="period-btn"),
-                ], className="mb-3")
-            ], className="text-center mb-3"),
+            html.Hr(className="theme-hr"),
             
-            # Gráfico principal (default 1Y)
-            html.Div(id="price-chart-container", children=[
-                dcc.Graph(figure=price_chart, config={'displayModeBar': False}, id="price-chart") if price_chart else 
-                    html.Div([html.P("📈 No se pudieron cargar los datos", className="text-muted text-center py-5")])
-            ]),
+            # Fila 2: Márgenes
+            html.H6("📊 Márgenes de Ganancia", className="mb-3 mt-3"),
+            metric_cards_row(MARGINS_CARDS, formatted, row_class="mb-3"),
+            
+            html.Hr(className="theme-hr"),
+            
+            # Fila 3: Resultado
+            html.H6("💰 Resultados Absolutos", className="mb-3 mt-3"),
+            metric_cards_row(RESULTS_CARDS, formatted, md=4)
+        ])
+    
+    # Tab Solidez - ADAPTATIVO según sector
+    is_financial = is_financial_sector(real_sector)
+    
+    if is_financial:
+        # === VERSIÓN PARA SECTOR FINANCIERO ===
+        tab_health = html.Div([
+            html.H5("Solidez Financiera", className="mb-2"),
+            html.P("Métricas adaptadas para sector bancario/financiero", className="text-muted small mb-4"),
+            
+            # Fila 1: Rentabilidad Bancaria
+            html.H6("🏦 Rentabilidad Bancaria", className="mb-3"),
+            metric_cards_row(BANK_PROFITABILITY_CARDS, formatted, row_class="mb-3"),
             
-            # Gráficos adicionales para otros periodos (hidden, se cargan en callbacks)
-            dcc.Store(id="chart-1wk", data=None),
-            dcc.Store(id="chart-1mo", data=None),
-            dcc.Store(id="chart-3mo", data=None),
-            dcc.Store(id="chart-6mo", data=None),
-            dcc.Store(id="chart-5y", data=None),
+            html.Hr(className="theme-hr"),
             
-            html.Hr(),
+            # Fila 2: Valoración Bancaria
+            html.H6("💰 Valoración Bancaria", className="mb-3 mt-3"),
+            metric_cards_row(BANK_VALUATION_CARDS, formatted, row_class="mb-3"),
             
-            # Métricas de rendimiento
-            html.H6("📊 Rendimiento 52 Semanas", className="mb-3"),
+            html.Hr(className="theme-hr"),
+            
+            # Fila 3: Estructura de Capital
+            html.H6("🏛️ Estructura de Capital", className="mb-3 mt-3"),
             dbc.Row([
-                dbc.Col([create_metric_card("52W High", f"${week_high:.2f}" if week_high else "N/A", "📈")], xs=6, md=3, className="mb-3"),
-                dbc.Col([create_metric_card("52W Low", f"${week_low:.2f}" if week_low else "N/A", "📉")], xs=6, md=3, className="mb-3"),
-                dbc.Col([create_metric_card("Beta", f"{financials.beta:.2f}" if financials and financials.beta else "N/A", "📊")], xs=6, md=3, className="mb-3"),
-                dbc.Col([create_metric_card("Vol. Promedio", f"{avg_volume/1e6:.1f}M" if avg_volume else "N/A", "📶")], xs=6, md=3, className="mb-3"),
+                dbc.Col([create_metric_card("Deuda/Equity", formatted["debt_to_equity"], "⚖️")], xs=6, md=3, className="mb-3"),
+                dbc.Col([create_metric_card("Deuda/Activos", formatted["debt_to_assets"], "📉")], xs=6, md=3, className="mb-3"),
+                dbc.Col([create_metric_card("Book Value/Share", f"${financials.book_value_per_share:.2f}" if financials and financials.book_value_per_share else "N/A", "📖")], xs=6, md=3, className="mb-3"),
+                dbc.Col([create_metric_card("Market Cap", format_ratio(profile.market_cap if profile else None, "currency"), "🌐")], xs=6, md=3, className="mb-3"),
             ]),
             
-            # Posición actual
-            html.Hr(),
-            html.H6("📍 Posición Actual", className="mb-3"),
+            # Nota informativa mejorada
             html.Div([
                 html.P([
-                    f"Precio actual ${financials.price:.2f}" if financials and financials.price else "N/A",
-                    html.Span(" · ", className="text-muted"),
-                    f"{((financials.price - week_low) / (week_high - week_low) * 100):.0f}% del rango 52W" if week_high and week_low and financials and financials.price else ""
-                ], className="text-muted mb-2") if week_high and week_low else None,
-                dbc.Progress(
-                    value=((financials.price - week_low) / (week_high - week_low) * 100) if week_high and week_low and financials and financials.price and (week_high - week_low) > 0 else 50,
-                    style={"height": "10px"}, className="mb-2"
-                ) if week_high and week_low else None
-            ])
+                    html.Strong("🏦 Modelo Adaptativo Bancario", style={"color": "#60a5fa"}),
+                ], className="mb-2"),
+                html.P([
+                    "Umbrales calibrados para sector financiero: ",
+                    html.Span("ROA >0.5% excelente", style={"color": "#22c55e"}), " (promedio bancos: 0.3-0.5%), ",
+                    html.Span("ROE >12% excelente", style={"color": "#22c55e"}), " (objetivo típico: 8-12%), ",
+                    html.Span("D/E <5x conservador", style={"color": "#22c55e"}), " (bancos operan normalmente con 8-15x)."
+                ], className="text-muted small mb-2"),
+                html.P([
+                    html.Span("⚠️ ", style={"color": "#eab308"}),
+                    "Métricas regulatorias (CET1, Tier 1, NPL, LCR) no disponibles en Yahoo Finance. ",
+                    "Para análisis completo, consultar reportes regulatorios (EBA, BoE, Fed)."
+                ], className="text-muted small", style={"fontStyle": "italic"})
+            ], style={"marginTop": "20px", "padding": "15px", "background": "rgba(96, 165, 250, 0.1)", "borderRadius": "8px", "border": "1px solid rgba(96, 165, 250, 0.2)"})
         ])
-        
-        # Tab Comparativa - COMPLETA
-        try:
-            current_year = datetime.now().year
-            ytd_start = f"{current_year}-01-01"
+    else:
+        # === VERSIÓN ESTÁNDAR PARA OTROS SECTORES ===
+        tab_health = html.Div([
+            html.H5("Solidez Financiera", className="mb-2"),
+            html.P("¿Puede pagar sus deudas y mantener operaciones?", className="text-muted small mb-4"),
             
-            # YTD de la empresa
-            ticker_hist = yf.Ticker(symbol).history(start=ytd_start)
-            stock_ytd = ((ticker_hist['Close'].iloc[-1] / ticker_hist['Close'].iloc[0]) - 1) * 100 if not ticker_hist.empty else 0
+            # Fila 1: Liquidez
+            html.H6("💧 Liquidez (Corto Plazo)", className="mb-3"),
+            metric_cards_row(LIQUIDITY_CARDS, formatted, row_class="mb-3"),
             
-            # YTD del mercado (SPY)
-            spy_hist = yf.Ticker("SPY").history(start=ytd_start)
-            market_ytd = ((spy_hist['Close'].iloc[-1] / spy_hist['Close'].iloc[0]) - 1) * 100 if not spy_hist.empty else 0
+            html.Hr(className="theme-hr"),
             
-            # YTD del sector
-            sector_etf = sector_profile.sector_etf if sector_profile else "XLK"
-            sector_hist = yf.Ticker(sector_etf).history(start=ytd_start)
-            sector_ytd = ((sector_hist['Close'].iloc[-1] / sector_hist['Close'].iloc[0]) - 1) * 100 if not sector_hist.empty else 0
+            # Fila 2: Apalancamiento
+            html.H6("⚖️ Apalancamiento (Largo Plazo)", className="mb-3 mt-3"),
+            metric_cards_row(LEVERAGE_CARDS, formatted, row_class="mb-3"),
             
-        except Exception as e:
-            logger.warning(f"Error calculando YTD: {e}")
-            stock_ytd, market_ytd, sector_ytd = 0, 0, 0
-        
-        diff_vs_market = stock_ytd - market_ytd
-        diff_vs_sector = stock_ytd - sector_ytd
-        
-        # Mensaje de análisis
-        if diff_vs_market > 10:
-            perf_msg = f"🚀 {symbol} está superando al mercado por {diff_vs_market:.1f} puntos"
-            perf_color = "#22c55e"
-        elif diff_vs_market > 0:
-            perf_msg = f"✅ {symbol} está ligeramente por encima del mercado (+{diff_vs_market:.1f}%)"
-            perf_color = "#4ade80"
-        elif diff_vs_market > -10:
-            perf_msg = f"⚠️ {symbol} está ligeramente por debajo del mercado ({diff_vs_market:.1f}%)"
-            perf_color = "#eab308"
-        else:
-            perf_msg = f"🔴 {symbol} está rezagado vs el mercado por {abs(diff_vs_market):.1f} puntos"
-            perf_color = "#ef4444"
-        
-        # Tabla de métricas comparativas
-        metrics_config = get_sector_metrics_config(company_sector)
-        comparison_rows = []
-        for m in metrics_config:
-            company_val = ratios.get(m["key"])
-            comparison_rows.append(
-                create_comparison_metric_row(m["name"], company_val, m["sector_val"], m["market_val"], m["fmt"], m["lower_better"])
+            html.Hr(className="theme-hr"),
+            
+            # Fila 3: Cobertura y Flujo
+            html.H6("🛡️ Cobertura y Flujo de Caja", className="mb-3 mt-3"),
+            metric_cards_row(COVERAGE_CARDS, formatted)
+        ])
+    
+    # Tabs Histórico y Comparativa: dependen de llamadas de red (precio, 52W, YTD),
+    # se construyen bajo demanda en render_market_tabs al activarse
+    tab_historical = LAZY_TAB_PLACEHOLDER
+    tab_comparison = LAZY_TAB_PLACEHOLDER
+    
+    # Tab Valor Intrínseco
+    eps = get_ratio("eps")
+    total_equity = financials.total_equity if financials else None
+    shares = financials.shares_outstanding if financials else None
+    bvps = total_equity / shares if total_equity and shares and shares > 0 else None
+    graham = graham_number(eps, bvps) if eps and bvps else None
+    
+    fcf = get_ratio("fcf")
+    
+    # v2.3: DCF Multi-Stage con 3 etapas. Sin FCF positivo o sin acciones el modelo
+    # no aplica: no se llama (ni se arman sus argumentos) y se usa un resultado vacío
+    if fcf and fcf > 0 and shares and shares > 0:
+        dcf_result = dcf_multi_stage_dynamic(
+            fcf=fcf,
+            shares_outstanding=shares,
+            beta=financials.beta if financials else None,
+            debt_to_equity=get_ratio("debt_to_equity"),
+            interest_expense=financials.interest_expense if financials else None,
+            total_debt=financials.total_debt if financials else None,
+            revenue_growth_3y=contextual.get("revenue_cagr_3y") if contextual else None,
+            fcf_growth_3y=contextual.get("fcf_cagr_3y") if contextual else None,
+            eps_growth_3y=contextual.get("eps_cagr_3y") if contextual else None,
+            margin_of_safety_pct=0.15  # 15% margen de seguridad
+        )
+    else:
+        dcf_result = {}
+    dcf_value = dcf_result.get("fair_value_per_share")
+    dcf_value_mos = dcf_result.get("fair_value_with_mos")
+    dcf_wacc = dcf_result.get("wacc_calculated")
+    dcf_growth = dcf_result.get("growth_estimated")
+    dcf_growth_source = dcf_result.get("growth_source", "")
+    dcf_is_valid = dcf_result.get("is_valid", False)
+    
+    # Obtener desglose del modelo multi-stage
+    model_result = dcf_result.get("model_result", {})
+    value_composition = model_result.get("value_composition", {}) if model_result else {}
+    stages = model_result.get("stages", {}) if model_result else {}
+    sensitivity = dcf_result.get("sensitivity_analysis", {})
+    
+    # v2.9: DCF Sensitivity Analysis - Matriz de sensibilidad
+    sensitivity_matrix = None
+    try:
+        # Solo calcular si tenemos TODOS los datos necesarios
+        if (dcf_is_valid and 
+            fcf is not None and fcf > 0 and 
+            shares is not None and shares > 0 and 
+            dcf_wacc is not None and dcf_wacc > 0 and 
+            dcf_growth is not None):
+            
+            sensitivity_matrix = dcf_sensitivity_analysis(
+                fcf=fcf,
+                shares_outstanding=shares,
+                current_price=financials.price if financials else None,
+                base_growth_rate=max(0.01, min(dcf_growth, 0.30)),  # Limitar entre 1% y 30%
+                base_discount_rate=max(0.05, min(dcf_wacc, 0.20)),  # Limitar entre 5% y 20%
+                growth_rate_range=(-0.05, 0.05, 0.025),
+                discount_rate_range=(-0.02, 0.02, 0.01),
             )
+    except Exception as e:
+        logger.warning(f"Error calculando sensitivity matrix: {e}")
+        sensitivity_matrix = None
+    
+    price = financials.price if financials else None
+    
+    # Calcular si está cara o barata
+    dcf_vs_price = ((dcf_value - price) / price * 100) if dcf_value and price else None
+    graham_vs_price = ((graham - price) / price * 100) if graham and price else None
+    
+    # Determinar veredicto general
+    if dcf_value and graham and price:
+        avg_intrinsic = (dcf_value + graham) / 2
+        avg_vs_price = ((avg_intrinsic - price) / price * 100)
+        if avg_vs_price > 20:
+            verdict = ("🟢", "Potencialmente SUBVALORADA", "text-success", "Los modelos sugieren que cotiza por debajo de su valor estimado. Podría ser oportunidad de compra.")
+        elif avg_vs_price > 0:
+            verdict = ("🟡", "Precio RAZONABLE", "text-warning", "Cotiza cerca de su valor estimado. Ni cara ni barata según estos modelos.")
+        elif avg_vs_price > -20:
+            verdict = ("🟠", "Ligeramente SOBREVALORADA", "text-warning", "Cotiza algo por encima de su valor estimado. Considerar esperar mejor precio.")
+        else:
+            verdict = ("🔴", "Potencialmente SOBREVALORADA", "text-danger", "Los modelos sugieren que el precio actual está muy por encima del valor estimado.")
+    elif dcf_value and price:
+        dcf_diff = ((dcf_value - price) / price * 100)
+        if dcf_diff > 15:
+            verdict = ("🟢", "Potencialmente SUBVALORADA", "text-success", "El modelo DCF sugiere que cotiza por debajo de su valor.")
+        elif dcf_diff > -15:
+            verdict = ("🟡", "Precio RAZONABLE", "text-warning", "Cotiza cerca de su valor estimado por DCF.")
+        else:
+            verdict = ("🔴", "Potencialmente SOBREVALORADA", "text-danger", "El modelo DCF sugiere sobrevaloración.")
+    else:
+        verdict = ("⚪", "Datos insuficientes", "text-muted", "No hay suficiente información para calcular el valor intrínseco.")
+    
+    # IDs únicos para tooltips
+    import random
+    uid = random.randint(1000, 9999)
+    
+    tab_intrinsic = html.Div([
+        html.H5("💰 ¿Cuánto vale realmente esta acción?", className="mb-1"),
+        html.P("Estimamos el valor real usando modelos financieros y lo comparamos con el precio de mercado", 
+               className="text-muted small mb-3"),
+        
+        # Veredicto principal
+        dbc.Card([
+            dbc.CardBody([
+                html.Div([
+                    html.Span(verdict[0], style={"fontSize": "2rem", "marginRight": "12px"}),
+                    html.Div([
+                        html.Span(verdict[1], className=f"h4 mb-0 {verdict[2]}"),
+                        html.P(verdict[3], className="text-muted small mb-0 mt-1")
+                    ])
+                ], className="d-flex align-items-start"),
+            ])
+        ], className="mb-4", style={"backgroundColor": "#1f1f23", "border": "1px solid #3f3f46"}),
         
-        tab_comparison = html.Div([
-            html.H5("🔄 Comparativa de Mercado", className="mb-2"),
-            html.P("Comparación vs Sector y S&P 500", className="text-muted small mb-3"),
+        # Comparación de valores con tooltips
+        html.H6("📊 Comparación de Valores", className="mb-3"),
+        dbc.Row([
+            # Precio actual
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.Div([
+                            html.Span("Precio de Mercado", className="text-muted small"),
+                            html.Span("i", id=f"tip-precio-{uid}", className="info-icon"),
+                        ], className="mb-1 text-center d-flex align-items-center justify-content-center", style={"gap": "6px"}),
+                        html.H3(f"${price:.2f}" if price else "N/A", className="mb-1 text-center"),
+                        html.P("Lo que cuesta hoy", className="text-muted small mb-0 text-center",
+                              style={"fontSize": "0.75rem"})
+                    ])
+                ], style={"backgroundColor": "#27272a", "border": "none"}),
+                dbc.Tooltip(
+                    "El precio actual de la acción en el mercado. Es lo que pagarías si compras ahora.",
+                    target=f"tip-precio-{uid}", placement="top"
+                )
+            ], xs=12, md=4, className="mb-3"),
             
+            # Graham
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.Div([
+                            html.Span("Valor Graham", className="text-muted small"),
+                            html.Span("i", id=f"tip-graham-{uid}", className="info-icon"),
+                        ], className="mb-1 text-center d-flex align-items-center justify-content-center", style={"gap": "6px"}),
+                        html.H3(f"${graham:.2f}" if graham else "N/A", 
+                               className=f"mb-1 text-center {'text-success' if graham and price and graham > price else 'text-danger' if graham else ''}"),
+                        html.P([
+                            f"{graham_vs_price:+.0f}% vs precio" if graham_vs_price else "Fórmula clásica"
+                        ], className="small mb-0 text-center text-muted", style={"fontSize": "0.75rem"})
+                    ])
+                ], style={"backgroundColor": "#27272a", "border": "none"}),
+                dbc.Tooltip(
+                    get_tooltip_text("graham"),
+                    target=f"tip-graham-{uid}", placement="top"
+                )
+            ], xs=12, md=4, className="mb-3"),
+            
+            # DCF
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.Div([
+                            html.Span("Valor DCF", className="text-muted small"),
+                            html.Span("i", id=f"tip-dcf-{uid}", className="info-icon"),
+                        ], className="mb-1 text-center d-flex align-items-center justify-content-center", style={"gap": "6px"}),
+                        html.H3(f"${dcf_value:.2f}" if dcf_value else "N/A",
+                               className=f"mb-1 text-center {'text-success' if dcf_value and price and dcf_value > price else 'text-danger' if dcf_value else ''}"),
+                        html.P([
+                            f"{dcf_vs_price:+.0f}% vs precio" if dcf_vs_price else "Flujos futuros"
+                        ], className="small mb-0 text-center text-muted", style={"fontSize": "0.75rem"})
+                    ])
+                ], style={"backgroundColor": "#27272a", "border": "none"}),
+                dbc.Tooltip(
+                    get_tooltip_text("dcf"),
+                    target=f"tip-dcf-{uid}", placement="top"
+                )
+            ], xs=12, md=4, className="mb-3"),
+        ]),
+        
+        # Sección fija: Detalles del DCF
+        html.Div([
+            html.Hr(className="my-3"),
             html.Div([
-                html.P([
-                    html.Strong("¿Qué compara esta sección? "),
-                    f"Comparamos {symbol} contra: ",
-                    html.Span(f"{sector_profile.sector_etf if sector_profile else 'ETF'}", className="text-success"),
-                    " (Sector) y ",
-                    html.Span("SPY", className="text-warning"),
-                    " (Mercado)"
-                ], className="small")
-            ], className="alert-info-custom alert-box mb-4"),
+                html.Span("⚙️ ", style={"marginRight": "6px"}),
+                html.Span("Parámetros del modelo DCF", className="text-info fw-bold"),
+            ], className="mb-3"),
             
-            # YTD Cards
-            html.H6("📊 Rendimiento YTD (Year-to-Date)", className="mb-3"),
+            # Grid 2x2 con parámetros principales
             dbc.Row([
                 dbc.Col([
                     html.Div([
-                        html.Div(f"📌 {symbol}", style={"color": "#3b82f6", "fontWeight": "600", "fontSize": "0.9rem"}),
-                        html.Div("EMPRESA", className="ytd-label"),
-                        html.Div(f"{stock_ytd:+.1f}%", style={
-                            "color": "#22c55e" if stock_ytd > 0 else "#ef4444",
-                            "fontSize": "1.8rem", "fontWeight": "700", "marginTop": "8px"
-                        })
-                    ], className="ytd-card", style={"borderColor": "rgba(59, 130, 246, 0.5)"})
-                ], xs=12, md=4, className="mb-3"),
+                        html.Div([
+                            html.Span("WACC", className="small", style={"color": "#a1a1aa"}),
+                            html.Span(" ⓘ", id=f"tip-wacc-{uid}", style={
+                                "cursor": "help", "color": "#60a5fa", "fontSize": "0.75rem"
+                            }),
+                        ]),
+                        html.Div(f"{dcf_wacc:.1%}" if dcf_wacc else "N/A", 
+                                style={"fontSize": "1.5rem", "fontWeight": "600", "color": "#60a5fa"}),
+                        html.Div("Tasa de descuento", className="small", style={"color": "#71717a"}),
+                        dbc.Tooltip(get_tooltip_text("wacc"), target=f"tip-wacc-{uid}", placement="top")
+                    ], style={
+                        "background": "rgba(96, 165, 250, 0.1)",
+                        "border": "1px solid rgba(96, 165, 250, 0.2)",
+                        "borderRadius": "12px",
+                        "padding": "16px",
+                        "textAlign": "center"
+                    })
+                ], xs=6, md=3, className="mb-3"),
+                
                 dbc.Col([
                     html.Div([
-                        html.Div(f"📊 vs {sector_profile.sector_etf if sector_profile else 'Sector'}", style={"color": "#22c55e", "fontWeight": "600", "fontSize": "0.9rem"}),
-                        html.Div("VS SECTOR", className="ytd-label"),
-                        html.Div(f"{diff_vs_sector:+.1f}%", style={
-                            "color": "#22c55e" if diff_vs_sector >= 0 else "#ef4444",
-                            "fontSize": "1.8rem", "fontWeight": "700", "marginTop": "8px"
-                        })
-                    ], className="ytd-card", style={"borderColor": "rgba(34, 197, 94, 0.5)"})
-                ], xs=12, md=4, className="mb-3"),
+                        html.Div([
+                            html.Span("Growth Rate", className="small", style={"color": "#a1a1aa"}),
+                        ]),
+                        html.Div(f"{dcf_growth:.1%}" if dcf_growth else "N/A", 
+                                style={"fontSize": "1.5rem", "fontWeight": "600", "color": "#22c55e"}),
+                        html.Div(dcf_growth_source.replace("_", " ").title() if dcf_growth_source else "—", 
+                                className="small", style={"color": "#71717a"}),
+                    ], style={
+                        "background": "rgba(34, 197, 94, 0.1)",
+                        "border": "1px solid rgba(34, 197, 94, 0.2)",
+                        "borderRadius": "12px",
+                        "padding": "16px",
+                        "textAlign": "center"
+                    })
+                ], xs=6, md=3, className="mb-3"),
+                
                 dbc.Col([
                     html.Div([
-                        html.Div("🌐 vs SPY", style={"color": "#eab308", "fontWeight": "600", "fontSize": "0.9rem"}),
-                        html.Div("VS MERCADO", className="ytd-label"),
-                        html.Div(f"{diff_vs_market:+.1f}%", style={
-                            "color": "#22c55e" if diff_vs_market >= 0 else "#ef4444",
-                            "fontSize": "1.8rem", "fontWeight": "700", "marginTop": "8px"
-                        })
-                    ], className="ytd-card", style={"borderColor": "rgba(234, 179, 8, 0.5)"})
-                ], xs=12, md=4, className="mb-3"),
+                        html.Div([
+                            html.Span("Terminal Growth", className="small", style={"color": "#a1a1aa"}),
+                        ]),
+                        html.Div("2.5%", 
+                                style={"fontSize": "1.5rem", "fontWeight": "600", "color": "#a78bfa"}),
+                        html.Div("Crecimiento perpetuo", className="small", style={"color": "#71717a"}),
+                    ], style={
+                        "background": "rgba(167, 139, 250, 0.1)",
+                        "border": "1px solid rgba(167, 139, 250, 0.2)",
+                        "borderRadius": "12px",
+                        "padding": "16px",
+                        "textAlign": "center"
+                    })
+                ], xs=6, md=3, className="mb-3"),
+                
+                dbc.Col([
+                    html.Div([
+                        html.Div([
+                            html.Span("Margen Seguridad", className="small", style={"color": "#a1a1aa"}),
+                            html.Span(" ⓘ", id=f"tip-mos-{uid}", style={
+                                "cursor": "help", "color": "#60a5fa", "fontSize": "0.75rem"
+                            }),
+                        ]),
+                        html.Div(f"${dcf_value_mos:.2f}" if dcf_value_mos else "N/A", 
+                                style={"fontSize": "1.5rem", "fontWeight": "600", "color": "#f59e0b"}),
+                        html.Div("Con 25% descuento", className="small", style={"color": "#71717a"}),
+                        dbc.Tooltip(get_tooltip_text("margin_of_safety"), target=f"tip-mos-{uid}", placement="top")
+                    ], style={
+                        "background": "rgba(245, 158, 11, 0.1)",
+                        "border": "1px solid rgba(245, 158, 11, 0.2)",
+                        "borderRadius": "12px",
+                        "padding": "16px",
+                        "textAlign": "center"
+                    })
+                ], xs=6, md=3, className="mb-3"),
             ]),
             
-            html.Div([html.P(perf_msg, style={"color": perf_color, "margin": "0"})],
-                    style={"background": "rgba(39, 39, 42, 0.5)", "borderRadius": "8px", "padding": "12px", "textAlign": "center", "marginBottom": "20px"}),
-            
-            # Gráfico YTD
-            dcc.Graph(figure=create_ytd_comparison_chart(stock_ytd, market_ytd, sector_ytd, symbol), config={'displayModeBar': False}),
-            
-            html.Hr(),
-            
-            # Tabla de métricas fundamentales con veredicto - REDISEÑADA
+            # Composición del valor por etapas
             html.Div([
-                # Header con mejor explicación
-                html.Div([
-                    html.H6("📋 Comparación de Métricas Fundamentales", style={
-                        "marginBottom": "8px", "fontWeight": "600", "fontSize": "1.1rem"
-                    }),
-                    html.P("¿Cómo se compara esta empresa vs su sector y el mercado general?", 
-                           style={"color": "#9ca3af", "fontSize": "0.9rem", "marginBottom": "0"})
-                ], style={"marginBottom": "20px"}),
-                
-                # Leyenda de columnas explicativa
+                html.P("📊 Distribución del valor por etapas", className="small mb-3", style={"color": "#a1a1aa"}),
                 html.Div([
+                    # Barra de progreso visual
                     html.Div([
-                        html.Div([
-                            html.Span("📊", style={"fontSize": "1.2rem", "marginRight": "8px"}),
+                        html.Div(style={
+                            "width": f"{value_composition.get('stage1_pct', 0)}%",
+                            "height": "8px",
+                            "background": "linear-gradient(90deg, #3b82f6, #60a5fa)",
+                            "borderRadius": "4px 0 0 4px"
+                        }),
+                        html.Div(style={
+                            "width": f"{value_composition.get('stage2_pct', 0)}%",
+                            "height": "8px",
+                            "background": "linear-gradient(90deg, #06b6d4, #22d3ee)",
+                        }),
+                        html.Div(style={
+                            "width": f"{value_composition.get('terminal_pct', 0)}%",
+                            "height": "8px",
+                            "background": "linear-gradient(90deg, #f59e0b, #fbbf24)",
+                            "borderRadius": "0 4px 4px 0"
+                        }),
+                    ], style={"display": "flex", "borderRadius": "4px", "overflow": "hidden", "marginBottom": "12px"}),
+                    
+                    dbc.Row([
+                        dbc.Col([
                             html.Div([
-                                html.Strong(symbol, style={"color": "#10b981"}),
-                                html.Div("Valor de la empresa", style={"fontSize": "0.75rem", "color": "#6b7280"})
+                                html.Span("●", style={"color": "#3b82f6", "marginRight": "6px"}),
+                                html.Span(f"{value_composition.get('stage1_pct', 0):.0f}%", 
+                                         style={"fontWeight": "600", "color": "#3b82f6"}),
+                                html.Span(" Años 1-5", className="small", style={"color": "#71717a", "marginLeft": "4px"})
                             ])
-                        ], style={"display": "flex", "alignItems": "center"}),
-                    ], style={"flex": "1", "padding": "10px"}),
-                    
-                    html.Div([
-                        html.Div([
-                            html.Span("🏢", style={"fontSize": "1.2rem", "marginRight": "8px"}),
+                        ], xs=4, className="text-center"),
+                        dbc.Col([
                             html.Div([
-                                html.Strong("Sector", style={"color": "#6b7280"}),
-                                html.Div("Promedio del sector", style={"fontSize": "0.75rem", "color": "#6b7280"})
+                                html.Span("●", style={"color": "#06b6d4", "marginRight": "6px"}),
+                                html.Span(f"{value_composition.get('stage2_pct', 0):.0f}%", 
+                                         style={"fontWeight": "600", "color": "#06b6d4"}),
+                                html.Span(" Años 6-10", className="small", style={"color": "#71717a", "marginLeft": "4px"})
                             ])
-                        ], style={"display": "flex", "alignItems": "center"}),
-                    ], style={"flex": "1", "padding": "10px"}),
-                    
-                    html.Div([
-                        html.Div([
-                            html.Span("🌐", style={"fontSize": "1.2rem", "marginRight": "8px"}),
+                        ], xs=4, className="text-center"),
+                        dbc.Col([
                             html.Div([
-                                html.Strong("SPY", style={"color": "#6b7280"}),
-                                html.Div("S&P 500 (mercado)", style={"fontSize": "0.75rem", "color": "#6b7280"})
+                                html.Span("●", style={"color": "#f59e0b", "marginRight": "6px"}),
+                                html.Span(f"{value_composition.get('terminal_pct', 0):.0f}%", 
+                                         style={"fontWeight": "600", "color": "#f59e0b"}),
+                                html.Span(" Perpetuidad", className="small", style={"color": "#71717a", "marginLeft": "4px"})
                             ])
-                        ], style={"display": "flex", "alignItems": "center"}),
-                    ], style={"flex": "1", "padding": "10px"}),
-                    
+                        ], xs=4, className="text-center"),
+                    ])
+                ])
+            ], style={
+                "background": "rgba(39, 39, 42, 0.5)",
+                "borderRadius": "12px",
+                "padding": "16px",
+                "marginTop": "8px"
+            }) if value_composition else None,
+            
+        ]) if dcf_is_valid else None,
+        
+        # Sección fija: Cómo interpretar
+        html.Div([
+            html.Div([
+                html.Span("📚 ", style={"marginRight": "6px"}),
+                html.Span("¿Cómo interpretar estos valores?", className="text-info fw-bold"),
+            ], className="mb-3 mt-4"),
+            html.Div([
+                # Graham
+                html.Div([
                     html.Div([
-                        html.Div([
-                            html.Span("✅", style={"fontSize": "1.2rem", "marginRight": "8px"}),
-                            html.Div([
-                                html.Strong("Veredicto", style={"color": "#6b7280"}),
-                                html.Div("Evaluación comparativa", style={"fontSize": "0.75rem", "color": "#6b7280"})
-                            ])
-                        ], style={"display": "flex", "alignItems": "center"}),
-                    ], style={"flex": "1", "padding": "10px"}),
-                ], style={
-                    "display": "flex", 
-                    "gap": "10px", 
-                    "background": "rgba(39, 39, 42, 0.5)", 
-                    "borderRadius": "12px", 
-                    "padding": "12px",
-                    "marginBottom": "15px",
-                    "flexWrap": "wrap"
-                }),
+                        html.Strong("🎯 Valor Graham", style={"color": "#3b82f6"}),
+                    ], className="mb-2"),
+                    html.P([
+                        "Fórmula de Benjamin Graham: ", 
+                        html.Code("√(22.5 × EPS × Book Value)", style={"background": "rgba(59,130,246,0.2)", "padding": "2px 6px", "borderRadius": "4px"}),
+                        ". Representa el ", html.Strong("precio máximo"), " que pagaría un inversor conservador. "
+                        "Si el precio actual está ", html.Strong("por debajo"), " del valor Graham, la acción podría estar barata."
+                    ], className="small mb-2", style={"color": "#a1a1aa"}),
+                    html.P("✓ Mejor para: Empresas maduras, estables, con activos tangibles (bancos, industriales, utilities).", 
+                           className="small mb-3", style={"color": "#71717a"}),
+                ]),
                 
-                # Tabla con mejor diseño
+                # DCF
                 html.Div([
-                    html.Table([
-                        html.Thead([
-                            html.Tr([
-                                html.Th("Métrica", style={
-                                    "textAlign": "left", "padding": "14px 16px", 
-                                    "color": "#9ca3af", "fontWeight": "600", "fontSize": "0.85rem",
-                                    "borderBottom": "1px solid #374151", "width": "25%"
-                                }),
-                                html.Th(symbol, style={
-                                    "textAlign": "center", "padding": "14px 16px",
-                                    "color": "#10b981", "fontWeight": "700", "fontSize": "0.9rem",
-                                    "borderBottom": "1px solid #374151", "width": "18%"
-                                }),
-                                html.Th("Sector", style={
-                                    "textAlign": "center", "padding": "14px 16px",
-                                    "color": "#6b7280", "fontWeight": "500", "fontSize": "0.85rem",
-                                    "borderBottom": "1px solid #374151", "width": "18%"
-                                }),
-                                html.Th("SPY", style={
-                                    "textAlign": "center", "padding": "14px 16px",
-                                    "color": "#6b7280", "fontWeight": "500", "fontSize": "0.85rem",
-                                    "borderBottom": "1px solid #374151", "width": "18%"
-                                }),
-                                html.Th("Resultado", style={
-                                    "textAlign": "center", "padding": "14px 16px",
-                                    "color": "#9ca3af", "fontWeight": "600", "fontSize": "0.85rem",
-                                    "borderBottom": "1px solid #374151", "width": "21%"
-                                }),
-                            ])
-                        ]),
-                        html.Tbody(comparison_rows)
-                    ], style={
-                        "width": "100%", 
-                        "borderCollapse": "separate",
-                        "borderSpacing": "0"
-                    })
-                ], style={
-                    "background": "rgba(24, 24, 27, 0.5)",
-                    "borderRadius": "12px",
-                    "overflow": "hidden",
-                    "border": "1px solid #374151"
-                }),
+                    html.Div([
+                        html.Strong("🎯 Valor DCF (Flujos Descontados)", style={"color": "#22c55e"}),
+                    ], className="mb-2"),
+                    html.P([
+                        "Calcula cuánto vale hoy ", html.Strong("todo el dinero futuro"), " que generará la empresa. "
+                        "Proyecta flujos de caja a 10 años y los descuenta al presente usando el WACC. "
+                        "Si el precio actual está ", html.Strong("por debajo"), " del DCF, podrías estar comprando con descuento."
+                    ], className="small mb-2", style={"color": "#a1a1aa"}),
+                    html.P("✓ Mejor para: Empresas con flujos predecibles. Es el método estándar en Wall Street.", 
+                           className="small mb-2", style={"color": "#71717a"}),
+                    html.P("⚠️ Para bancos/financieras: El DCF tradicional no aplica (no tienen FCF). Usar P/B y Dividend Discount Model.", 
+                           className="small mb-3", style={"color": "#f59e0b", "fontStyle": "italic"}) if is_financial_sector(real_sector) else None,
+                ]),
                 
-                # Leyenda inferior
+                # Advertencia
                 html.Div([
                     html.Div([
-                        html.Span("●", style={"color": "#22c55e", "marginRight": "6px", "fontSize": "1.2rem"}),
-                        html.Span("Excelente", style={"fontWeight": "500", "marginRight": "6px"}),
-                        html.Span("= Supera ambos benchmarks", style={"color": "#6b7280"})
-                    ], style={"display": "flex", "alignItems": "center"}),
-                    
-                    html.Div([
-                        html.Span("●", style={"color": "#eab308", "marginRight": "6px", "fontSize": "1.2rem"}),
-                        html.Span("Aceptable", style={"fontWeight": "500", "marginRight": "6px"}),
-                        html.Span("= Supera al menos uno", style={"color": "#6b7280"})
-                    ], style={"display": "flex", "alignItems": "center"}),
-                    
-                    html.Div([
-                        html.Span("●", style={"color": "#ef4444", "marginRight": "6px", "fontSize": "1.2rem"}),
-                        html.Span("Débil", style={"fontWeight": "500", "marginRight": "6px"}),
-                        html.Span("= Por debajo de ambos", style={"color": "#6b7280"})
-                    ], style={"display": "flex", "alignItems": "center"}),
+                        html.Strong("⚠️ Importante", style={"color": "#f59e0b"}),
+                    ], className="mb-2"),
+                    html.P([
+                        "Estos son ", html.Strong("modelos matemáticos"), ", no bolas de cristal. El valor real depende de: "
+                        "ejecución del management, competencia, cambios regulatorios, y factores que ningún modelo puede predecir. "
+                        "Úsalos como ", html.Strong("una herramienta más"), " junto con análisis cualitativo, nunca como única guía."
+                    ], className="small mb-0", style={"color": "#a1a1aa"}),
                 ], style={
-                    "display": "flex",
-                    "justifyContent": "center",
-                    "gap": "30px",
-                    "marginTop": "20px",
-                    "padding": "15px",
-                    "background": "rgba(39, 39, 42, 0.3)",
-                    "borderRadius": "10px",
-                    "fontSize": "0.85rem",
-                    "flexWrap": "wrap"
-                })
-            ], style={"marginTop": "25px"}),
-            
-            # v2.9: Sección de comparación multi-acción
-            html.Div([
-                html.Hr(className="my-4"),
-                html.H6("🔀 Comparador Multi-Acción", className="mb-3"),
-                html.P("Compara varias acciones lado a lado. Agrega acciones con el botón 'Comparar' en cada análisis.",
-                      className="text-muted small mb-3"),
-                html.Div(id="comparison-table-container", children=[
-                    html.P("No hay acciones en la lista de comparación.", className="text-muted text-center"),
-                    html.P("Usa el botón '➕ Comparar' en cada acción para agregarla.", className="text-muted small text-center")
-                ])
-            ], style={"backgroundColor": "rgba(24, 24, 27, 0.5)", "borderRadius": "12px", "padding": "20px", "marginTop": "20px"})
-        ])
-        
-        # Tab Valor Intrínseco
-        eps = ratios.get("eps")
-        total_equity = financials.total_equity if financials else None
-        shares = financials.shares_outstanding if financials else None
-        bvps = total_equity / shares if total_equity and shares and shares > 0 else None
-        graham = graham_number(eps, bvps) if eps and bvps else None
-        
-        fcf = ratios.get("fcf")
-        
-        # v2.3: DCF Multi-Stage con 3 etapas
-        dcf_result = dcf_multi_stage_dynamic(
-            fcf=fcf,
-            shares_outstanding=shares,
-            beta=financials.beta if financials else None,
-            debt_to_equity=ratios.get("debt_to_equity"),
-            interest_expense=financials.interest_expense if financials else None,
-            total_debt=financials.total_debt if financials else None,
-            revenue_growth_3y=contextual.get("revenue_cagr_3y") if contextual else None,
-            fcf_growth_3y=contextual.get("fcf_cagr_3y") if contextual else None,
-            eps_growth_3y=contextual.get("eps_cagr_3y") if contextual else None,
-            margin_of_safety_pct=0.15  # 15% margen de seguridad
-        )
-        dcf_value = dcf_result.get("fair_value_per_share")
-        dcf_value_mos = dcf_result.get("fair_value_with_mos")
-        dcf_wacc = dcf_result.get("wacc_calculated")
-        dcf_growth = dcf_result.get("growth_estimated")
-        dcf_growth_source = dcf_result.get("growth_source", "")
-        dcf_is_valid = dcf_result.get("is_valid", False)
-        
-        # Obtener desglose del modelo multi-stage
-        model_result = dcf_result.get("model_result", {})
-        value_composition = model_result.get("value_composition", {}) if model_result else {}
-        stages = model_result.get("stages", {}) if model_result else {}
-        sensitivity = dcf_result.get("sensitivity_analysis", {})
-        
-        # v2.9: DCF Sensitivity Analysis - Matriz de sensibilidad
-        sensitivity_matrix = None
-        try:
-            # Solo calcular si tenemos TODOS los datos necesarios
-            if (dcf_is_valid and 
-                fcf is not None and fcf > 0 and 
-                shares is not None and shares > 0 and 
-                dcf_wacc is not None and dcf_wacc > 0 and 
-                dcf_growth is not None):
-                
-                sensitivity_matrix = dcf_sensitivity_analysis(
-                    fcf=fcf,
-                    shares_outstanding=shares,
-                    current_price=financials.price if financials else None,
-                    base_growth_rate=max(0.01, min(dcf_growth, 0.30)),  # Limitar entre 1% y 30%
-                    base_discount_rate=max(0.05, min(dcf_wacc, 0.20)),  # Limitar entre 5% y 20%
-                    growth_rate_range=(-0.05, 0.05, 0.025),
-                    discount_rate_range=(-0.02, 0.02, 0.01),
-                )
-        except Exception as e:
-            logger.warning(f"Error calculando sensitivity matrix: {e}")
-            sensitivity_matrix = None
-        
-        price = financials.price if financials else None
+                    "background": "rgba(245, 158, 11, 0.1)",
+                    "border": "1px solid rgba(245, 158, 11, 0.2)",
+                    "borderRadius": "8px",
+                    "padding": "12px"
+                }),
+            ], className="p-3")
+        ]),
         
-        # Calcular si está cara o barata
-        dcf_vs_price = ((dcf_value - price) / price * 100) if dcf_value and price else None
-        graham_vs_price = ((graham - price) / price * 100) if graham and price else None
+        # v2.9: Matriz de Sensibilidad DCF - REDISEÑADA
+        build_sensitivity_section(sensitivity_matrix, price) if sensitivity_matrix and sensitivity_matrix.get("is_valid") else None,
         
-        # Determinar veredicto general
-        if dcf_value and graham and price:
-            avg_intrinsic = (dcf_value + graham) / 2
-            avg_vs_price = ((avg_intrinsic - price) / price * 100)
-            if avg_vs_price > 20:
-                verdict = ("🟢", "Potencialmente SUBVALORADA", "text-success", "Los modelos sugieren que cotiza por debajo de su valor estimado. Podría ser oportunidad de compra.")
-            elif avg_vs_price > 0:
-                verdict = ("🟡", "Precio RAZONABLE", "text-warning", "Cotiza cerca de su valor estimado. Ni cara ni barata según estos modelos.")
-            elif avg_vs_price > -20:
-                verdict = ("🟠", "Ligeramente SOBREVALORADA", "text-warning", "Cotiza algo por encima de su valor estimado. Considerar esperar mejor precio.")
-            else:
-                verdict = ("🔴", "Potencialmente SOBREVALORADA", "text-danger", "Los modelos sugieren que el precio actual está muy por encima del valor estimado.")
-        elif dcf_value and price:
-            dcf_diff = ((dcf_value - price) / price * 100)
-            if dcf_diff > 15:
-                verdict = ("🟢", "Potencialmente SUBVALORADA", "text-success", "El modelo DCF sugiere que cotiza por debajo de su valor.")
-            elif dcf_diff > -15:
-                verdict = ("🟡", "Precio RAZONABLE", "text-warning", "Cotiza cerca de su valor estimado por DCF.")
+    ])
+    
+    # Tab Evaluación con RESUMEN DE PUNTUACIÓN
+    categories = score_v2.get("categories", [])
+    cat_scores = score_v2.get("category_scores", {})
+    
+    solidez, rentabilidad, valoracion, calidad, crecimiento = (
+        cat_scores.get(key, 0) for key in SCORE_CATEGORY_KEYS
+    )
+    
+    # Alertas - Recolección completa de todas las fuentes (ver ALERT_SPEC)
+    danger_alerts, warning_alerts, success_alerts = collect_alert_reasons(alerts)
+    
+    # Extraer alertas de score_v2 categories (detalles de ajustes)
+    # Un solo lookup por ajuste y el texto se arma solo si cae en algún bucket
+    for cat in categories:
+        category = cat.get("category", "")
+        for adj in cat.get("adjustments", ()):
+            adjustment = adj.get("adjustment", 0)
+            if adjustment < -2:  # Penalizaciones fuertes
+                bucket = danger_alerts
+            elif adjustment < 0:  # Penalizaciones leves
+                bucket = warning_alerts
+            elif adjustment > 2:  # Bonificaciones fuertes
+                bucket = success_alerts
             else:
-                verdict = ("🔴", "Potencialmente SOBREVALORADA", "text-danger", "El modelo DCF sugiere sobrevaloración.")
-        else:
-            verdict = ("⚪", "Datos insuficientes", "text-muted", "No hay suficiente información para calcular el valor intrínseco.")
-        
-        # IDs únicos para tooltips
-        import random
-        uid = random.randint(1000, 9999)
+                continue
+            bucket.append((category, f"{adj.get('metric', '')}: {adj.get('reason', '')}"))
+    
+    # Métricas institucionales: un lookup por métrica y color/etiqueta por tabla
+    health = alerts.get("financial_health") or {}
+    health_color, health_label = FINANCIAL_HEALTH_LEVELS.get(health.get("level"), FINANCIAL_HEALTH_DEFAULT)
+    altman = alerts.get("altman_z_score") or {}
+    z_value = altman.get("value")
+    z_color, z_label = Z_SCORE_ZONES.get(altman.get("level"), Z_SCORE_DEFAULT_ZONE)
+    piotroski = alerts.get("piotroski_f_score") or {}
+    f_value = piotroski.get("value")
+    f_color, f_label = PIOTROSKI_ZONES[bisect_right(PIOTROSKI_THRESHOLDS, f_value or 0)]
+    
+    # Eliminar duplicados manteniendo orden
+    danger_alerts = unique_alerts(danger_alerts)
+    warning_alerts = unique_alerts(warning_alerts)
+    success_alerts = unique_alerts(success_alerts)
+    
+    tab_evaluation = html.Div([
+        html.H5("Evaluación Completa", className="mb-2"),
+        html.P("Desglose del score y análisis detallado", className="text-muted small mb-3"),
         
-        tab_intrinsic = html.Div([
-            html.H5("💰 ¿Cuánto vale realmente esta acción?", className="mb-1"),
-            html.P("Estimamos el valor real usando modelos financieros y lo comparamos con el precio de mercado", 
-                   className="text-muted small mb-3"),
-            
-            # Veredicto principal
-            dbc.Card([
-                dbc.CardBody([
+        # MÉTRICAS INSTITUCIONALES - Adaptativo según sector
+        html.H6("🏛️ Métricas Institucionales", className="mb-3"),
+        dbc.Row([
+            # Primera métrica: Z-Score O Financial Health Score según sector
+            dbc.Col([
+                # Si es sector financiero: Financial Health Score
+                html.Div([
                     html.Div([
-                        html.Span(verdict[0], style={"fontSize": "2rem", "marginRight": "12px"}),
-                        html.Div([
-                            html.Span(verdict[1], className=f"h4 mb-0 {verdict[2]}"),
-                            html.P(verdict[3], className="text-muted small mb-0 mt-1")
-                        ])
-                    ], className="d-flex align-items-start"),
-                ])
-            ], className="mb-4", style={"backgroundColor": "#1f1f23", "border": "1px solid #3f3f46"}),
-            
-            # Comparación de valores con tooltips
-            html.H6("📊 Comparación de Valores", className="mb-3"),
-            dbc.Row([
-                # Precio actual
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.Div([
-                                html.Span("Precio de Mercado", className="text-muted small"),
-                                html.Span("i", id=f"tip-precio-{uid}", className="info-icon"),
-                            ], className="mb-1 text-center d-flex align-items-center justify-content-center", style={"gap": "6px"}),
-                            html.H3(f"${price:.2f}" if price else "N/A", className="mb-1 text-center"),
-                            html.P("Lo que cuesta hoy", className="text-muted small mb-0 text-center",
-                                  style={"fontSize": "0.75rem"})
-                        ])
-                    ], style={"backgroundColor": "#27272a", "border": "none"}),
-                    dbc.Tooltip(
-                        "El precio actual de la acción en el mercado. Es lo que pagarías si compras ahora.",
-                        target=f"tip-precio-{uid}", placement="top"
-                    )
-                ], xs=12, md=4, className="mb-3"),
-                
-                # Graham
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.Div([
-                                html.Span("Valor Graham", className="text-muted small"),
-                                html.Span("i", id=f"tip-graham-{uid}", className="info-icon"),
-                            ], className="mb-1 text-center d-flex align-items-center justify-content-center", style={"gap": "6px"}),
-                            html.H3(f"${graham:.2f}" if graham else "N/A", 
-                                   className=f"mb-1 text-center {'text-success' if graham and price and graham > price else 'text-danger' if graham else ''}"),
-                            html.P([
-                                f"{graham_vs_price:+.0f}% vs precio" if graham_vs_price else "Fórmula clásica"
-                            ], className="small mb-0 text-center text-muted", style={"fontSize": "0.75rem"})
-                        ])
-                    ], style={"backgroundColor": "#27272a", "border": "none"}),
+                        html.Span("🏦 Solidez Bancaria ", className="institutional-title"),
+                        html.Span("ⓘ", id="tooltip-financial-health-inst", style={
+                            "cursor": "help", "color": "#60a5fa", "fontSize": "0.85rem"
+                        })
+                    ]),
                     dbc.Tooltip(
-                        get_tooltip_text("graham"),
-                        target=f"tip-graham-{uid}", placement="top"
-                    )
-                ], xs=12, md=4, className="mb-3"),
+                        [
+                            html.Strong("¿Qué es?"), html.Br(),
+                            "Puntuación 0-10 calibrada para bancos y financieras. Reemplaza al Z-Score que no aplica a este sector.",
+                            html.Br(), html.Br(),
+                            html.Strong("Componentes (umbrales bancarios):"), html.Br(),
+                            "• ROA (0-3 pts): >0.5% excelente, >0.3% bueno", html.Br(),
+                            "• ROE (0-3 pts): >12% excelente, >8% bueno", html.Br(),
+                            "• D/E Bancario (0-2 pts): <5x conservador", html.Br(),
+                            "• Book Value Growth (0-1 pts)", html.Br(),
+                            "• Dividendo sostenible (0-1 pts)", html.Br(), html.Br(),
+                            html.Span("Nota: Métricas regulatorias (CET1, Tier 1) no disponibles.", style={"fontStyle": "italic", "fontSize": "0.85em"})
+                        ],
+                        target="tooltip-financial-health-inst",
+                        placement="top",
+                        style={"maxWidth": "380px"}
+                    ),
+                    html.Div([
+                        html.Span(
+                            f"{health.get('score', 0)}/10" if health else "N/A", 
+                            className="institutional-value",
+                            style={"color": health_color}),
+                        html.Span(health_label, className="institutional-label")
+                    ]),
+                    html.P(health.get('interpretation', ''), className="institutional-desc")
+                ], className="institutional-card", style={"display": "block" if alerts.get('is_financial_sector') else "none"}),
                 
-                # DCF
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.Div([
-                                html.Span("Valor DCF", className="text-muted small"),
-                                html.Span("i", id=f"tip-dcf-{uid}", className="info-icon"),
-                            ], className="mb-1 text-center d-flex align-items-center justify-content-center", style={"gap": "6px"}),
-                            html.H3(f"${dcf_value:.2f}" if dcf_value else "N/A",
-                                   className=f"mb-1 text-center {'text-success' if dcf_value and price and dcf_value > price else 'text-danger' if dcf_value else ''}"),
-                            html.P([
-                                f"{dcf_vs_price:+.0f}% vs precio" if dcf_vs_price else "Flujos futuros"
-                            ], className="small mb-0 text-center text-muted", style={"fontSize": "0.75rem"})
-                        ])
-                    ], style={"backgroundColor": "#27272a", "border": "none"}),
-                    dbc.Tooltip(
-                        get_tooltip_text("dcf"),
-                        target=f"tip-dcf-{uid}", placement="top"
-                    )
-                ], xs=12, md=4, className="mb-3"),
-            ]),
-            
-            # Sección fija: Detalles del DCF
-            html.Div([
-                html.Hr(className="my-3"),
+                # Si NO es sector financiero: Altman Z-Score
                 html.Div([
-                    html.Span("⚙️ ", style={"marginRight": "6px"}),
-                    html.Span("Parámetros del modelo DCF", className="text-info fw-bold"),
-                ], className="mb-3"),
-                
-                # Grid 2x2 con parámetros principales
-                dbc.Row([
-                    dbc.Col([
-                        html.Div([
-                            html.Div([
-                                html.Span("WACC", className="small", style={"color": "#a1a1aa"}),
-                                html.Span(" ⓘ", id=f"tip-wacc-{uid}", style={
-                                    "cursor": "help", "color": "#60a5fa", "fontSize": "0.75rem"
-                                }),
-                            ]),
-                            html.Div(f"{dcf_wacc:.1%}" if dcf_wacc else "N/A", 
-                                    style={"fontSize": "1.5rem", "fontWeight": "600", "color": "#60a5fa"}),
-                            html.Div("Tasa de descuento", className="small", style={"color": "#71717a"}),
-                            dbc.Tooltip(get_tooltip_text("wacc"), target=f"tip-wacc-{uid}", placement="top")
-                        ], style={
-                            "background": "rgba(96, 165, 250, 0.1)",
-                            "border": "1px solid rgba(96, 165, 250, 0.2)",
-                            "borderRadius": "12px",
-                            "padding": "16px",
-                            "textAlign": "center"
-                        })
-                    ], xs=6, md=3, className="mb-3"),
-                    
-                    dbc.Col([
-                        html.Div([
-                            html.Div([
-                                html.Span("Growth Rate", className="small", style={"color": "#a1a1aa"}),
-                            ]),
-                            html.Div(f"{dcf_growth:.1%}" if dcf_growth else "N/A", 
-                                    style={"fontSize": "1.5rem", "fontWeight": "600", "color": "#22c55e"}),
-                            html.Div(dcf_growth_source.replace("_", " ").title() if dcf_growth_source else "—", 
-                                    className="small", style={"color": "#71717a"}),
-                        ], style={
-                            "background": "rgba(34, 197, 94, 0.1)",
-                            "border": "1px solid rgba(34, 197, 94, 0.2)",
-                            "borderRadius": "12px",
-                            "padding": "16px",
-                            "textAlign": "center"
-                        })
-                    ], xs=6, md=3, className="mb-3"),
-                    
-                    dbc.Col([
-                        html.Div([
-                            html.Div([
-                                html.Span("Terminal Growth", className="small", style={"color": "#a1a1aa"}),
-                            ]),
-                            html.Div("2.5%", 
-                                    style={"fontSize": "1.5rem", "fontWeight": "600", "color": "#a78bfa"}),
-                            html.Div("Crecimiento perpetuo", className="small", style={"color": "#71717a"}),
-                        ], style={
-                            "background": "rgba(167, 139, 250, 0.1)",
-                            "border": "1px solid rgba(167, 139, 250, 0.2)",
-                            "borderRadius": "12px",
-                            "padding": "16px",
-                            "textAlign": "center"
-                        })
-                    ], xs=6, md=3, className="mb-3"),
-                    
-                    dbc.Col([
-                        html.Div([
-                            html.Div([
-                                html.Span("Margen Seguridad", className="small", style={"color": "#a1a1aa"}),
-                                html.Span(" ⓘ", id=f"tip-mos-{uid}", style={
-                                    "cursor": "help", "color": "#60a5fa", "fontSize": "0.75rem"
-                                }),
-                            ]),
-                            html.Div(f"${dcf_value_mos:.2f}" if dcf_value_mos else "N/A", 
-                                    style={"fontSize": "1.5rem", "fontWeight": "600", "color": "#f59e0b"}),
-                            html.Div("Con 25% descuento", className="small", style={"color": "#71717a"}),
-                            dbc.Tooltip(get_tooltip_text("margin_of_safety"), target=f"tip-mos-{uid}", placement="top")
-                        ], style={
-                            "background": "rgba(245, 158, 11, 0.1)",
-                            "border": "1px solid rgba(245, 158, 11, 0.2)",
-                            "borderRadius": "12px",
-                            "padding": "16px",
-                            "textAlign": "center"
+                    html.Div([
+                        html.Span("📊 Altman Z-Score ", className="institutional-title"),
+                        html.Span("ⓘ", id="tooltip-altman-inst", style={
+                            "cursor": "help", "color": "#60a5fa", "fontSize": "0.85rem"
                         })
-                    ], xs=6, md=3, className="mb-3"),
-                ]),
-                
-                # Composición del valor por etapas
-                html.Div([
-                    html.P("📊 Distribución del valor por etapas", className="small mb-3", style={"color": "#a1a1aa"}),
+                    ]),
+                    dbc.Tooltip(
+                        [
+                            html.Strong("¿Qué es?"), html.Br(),
+                            "Fórmula que predice probabilidad de quiebra en 2 años. Combina 5 ratios: liquidez, rentabilidad, apalancamiento, valor de mercado y eficiencia.",
+                            html.Br(), html.Br(),
+                            html.Strong("Interpretación:"), html.Br(),
+                            "• >2.99: Zona Segura ✓", html.Br(),
+                            "• 1.81-2.99: Zona Gris ⚠️", html.Br(),
+                            "• <1.81: Riesgo de quiebra 🚨"
+                        ],
+                        target="tooltip-altman-inst",
+                        placement="top",
+                        style={"maxWidth": "350px"}
+                    ),
                     html.Div([
-                        # Barra de progreso visual
-                        html.Div([
-                            html.Div(style={
-                                "width": f"{value_composition.get('stage1_pct', 0)}%",
-                                "height": "8px",
-                                "background": "linear-gradient(90deg, #3b82f6, #60a5fa)",
-                                "borderRadius": "4px 0 0 4px"
-                            }),
-                            html.Div(style={
-                                "width": f"{value_composition.get('stage2_pct', 0)}%",
-                                "height": "8px",
-                                "background": "linear-gradient(90deg, #06b6d4, #22d3ee)",
-                            }),
-                            html.Div(style={
-                                "width": f"{value_composition.get('terminal_pct', 0)}%",
-                                "height": "8px",
-                                "background": "linear-gradient(90deg, #f59e0b, #fbbf24)",
-                                "borderRadius": "0 4px 4px 0"
-                            }),
-                        ], style={"display": "flex", "borderRadius": "4px", "overflow": "hidden", "marginBottom": "12px"}),
-                        
-                        dbc.Row([
-                            dbc.Col([
-                                html.Div([
-                                    html.Span("●", style={"color": "#3b82f6", "marginRight": "6px"}),
-                                    html.Span(f"{value_composition.get('stage1_pct', 0):.0f}%", 
-                                             style={"fontWeight": "600", "color": "#3b82f6"}),
-                                    html.Span(" Años 1-5", className="small", style={"color": "#71717a", "marginLeft": "4px"})
-                                ])
-                            ], xs=4, className="text-center"),
-                            dbc.Col([
-                                html.Div([
-                                    html.Span("●", style={"color": "#06b6d4", "marginRight": "6px"}),
-                                    html.Span(f"{value_composition.get('stage2_pct', 0):.0f}%", 
-                                             style={"fontWeight": "600", "color": "#06b6d4"}),
-                                    html.Span(" Años 6-10", className="small", style={"color": "#71717a", "marginLeft": "4px"})
-                                ])
-                            ], xs=4, className="text-center"),
-                            dbc.Col([
-                                html.Div([
-                                    html.Span("●", style={"color": "#f59e0b", "marginRight": "6px"}),
-                                    html.Span(f"{value_composition.get('terminal_pct', 0):.0f}%", 
-                                             style={"fontWeight": "600", "color": "#f59e0b"}),
-                                    html.Span(" Perpetuidad", className="small", style={"color": "#71717a", "marginLeft": "4px"})
-                                ])
-                            ], xs=4, className="text-center"),
-                        ])
-                    ])
-                ], style={
-                    "background": "rgba(39, 39, 42, 0.5)",
-                    "borderRadius": "12px",
-                    "padding": "16px",
-                    "marginTop": "8px"
-                }) if value_composition else None,
-                
-            ]) if dcf_is_valid else None,
+                        html.Span(f"{z_value:.2f}" if z_value else "N/A", 
+                                 className="institutional-value",
+                                 style={"color": z_color}),
+                        html.Span(z_label, className="institutional-label")
+                    ]),
+                    html.P(altman.get('interpretation', ''), className="institutional-desc")
+                ], className="institutional-card", style={"display": "none" if alerts.get('is_financial_sector') else "block"})
+            ], xs=12, md=6, className="mb-3"),
             
-            # Sección fija: Cómo interpretar
-            html.Div([
-                html.Div([
-                    html.Span("📚 ", style={"marginRight": "6px"}),
-                    html.Span("¿Cómo interpretar estos valores?", className="text-info fw-bold"),
-                ], className="mb-3 mt-4"),
+            # Piotroski F-Score (aplica a todos los sectores)
+            dbc.Col([
                 html.Div([
-                    # Graham
                     html.Div([
-                        html.Div([
-                            html.Strong("🎯 Valor Graham", style={"color": "#3b82f6"}),
-                        ], className="mb-2"),
-                        html.P([
-                            "Fórmula de Benjamin Graham: ", 
-                            html.Code("√(22.5 × EPS × Book Value)", style={"background": "rgba(59,130,246,0.2)", "padding": "2px 6px", "borderRadius": "4px"}),
-                            ". Representa el ", html.Strong("precio máximo"), " que pagaría un inversor conservador. "
-                            "Si el precio actual está ", html.Strong("por debajo"), " del valor Graham, la acción podría estar barata."
-                        ], className="small mb-2", style={"color": "#a1a1aa"}),
-                        html.P("✓ Mejor para: Empresas maduras, estables, con activos tangibles (bancos, industriales, utilities).", 
-                               className="small mb-3", style={"color": "#71717a"}),
+                        html.Span("📈 Piotroski F-Score ", className="institutional-title"),
+                        html.Span("ⓘ", id="tooltip-piotroski-inst", style={
+                            "cursor": "help", "color": "#60a5fa", "fontSize": "0.85rem"
+                        })
                     ]),
-                    
-                    # DCF
+                    dbc.Tooltip(
+                        [
+                            html.Strong("¿Qué es?"), html.Br(),
+                            "Puntuación 0-9 de salud financiera. Evalúa rentabilidad (4 pts), liquidez/deuda (3 pts) y eficiencia operativa (2 pts).",
+                            html.Br(), html.Br(),
+                            html.Strong("Interpretación:"), html.Br(),
+                            "• 8-9: Excelente ✓✓", html.Br(),
+                            "• 6-7: Buena salud ✓", html.Br(),
+                            "• 4-5: Neutral", html.Br(),
+                            "• 0-3: Débil ⚠️"
+                        ],
+                        target="tooltip-piotroski-inst",
+                        placement="top",
+                        style={"maxWidth": "350px"}
+                    ),
                     html.Div([
-                        html.Div([
-                            html.Strong("🎯 Valor DCF (Flujos Descontados)", style={"color": "#22c55e"}),
-                        ], className="mb-2"),
-                        html.P([
-                            "Calcula cuánto vale hoy ", html.Strong("todo el dinero futuro"), " que generará la empresa. "
-                            "Proyecta flujos de caja a 10 años y los descuenta al presente usando el WACC. "
-                            "Si el precio actual está ", html.Strong("por debajo"), " del DCF, podrías estar comprando con descuento."
-                        ], className="small mb-2", style={"color": "#a1a1aa"}),
-                        html.P("✓ Mejor para: Empresas con flujos predecibles. Es el método estándar en Wall Street.", 
-                               className="small mb-2", style={"color": "#71717a"}),
-                        html.P("⚠️ Para bancos/financieras: El DCF tradicional no aplica (no tienen FCF). Usar P/B y Dividend Discount Model.", 
-                               className="small mb-3", style={"color": "#f59e0b", "fontStyle": "italic"}) if is_financial_sector(real_sector) else None,
+                        html.Span(f"{f_value}/9" if f_value is not None else "N/A", 
+                                 className="institutional-value",
+                                 style={"color": f_color}),
+                        html.Span(f_label, className="institutional-label")
                     ]),
-                    
-                    # Advertencia
-                    html.Div([
-                        html.Div([
-                            html.Strong("⚠️ Importante", style={"color": "#f59e0b"}),
-                        ], className="mb-2"),
-                        html.P([
-                            "Estos son ", html.Strong("modelos matemáticos"), ", no bolas de cristal. El valor real depende de: "
-                            "ejecución del management, competencia, cambios regulatorios, y factores que ningún modelo puede predecir. "
-                            "Úsalos como ", html.Strong("una herramienta más"), " junto con análisis cualitativo, nunca como única guía."
-                        ], className="small mb-0", style={"color": "#a1a1aa"}),
-                    ], style={
-                        "background": "rgba(245, 158, 11, 0.1)",
-                        "border": "1px solid rgba(245, 158, 11, 0.2)",
-                        "borderRadius": "8px",
-                        "padding": "12px"
-                    }),
-                ], className="p-3")
-            ]),
-            
-            # v2.9: Matriz de Sensibilidad DCF - REDISEÑADA
-            build_sensitivity_section(sensitivity_matrix, price) if sensitivity_matrix and sensitivity_matrix.get("is_valid") else None,
-            
-        ])
-        
-        # Tab Evaluación con RESUMEN DE PUNTUACIÓN
-        categories = score_v2.get("categories", [])
-        cat_scores = score_v2.get("category_scores", {})
-        
-        solidez = cat_scores.get("solidez", 0)
-        rentabilidad = cat_scores.get("rentabilidad", 0)
-        valoracion = cat_scores.get("valoracion", 0)
-        calidad = cat_scores.get("calidad", 0)
-        crecimiento = cat_scores.get("crecimiento", 0)
-        
-        # Alertas - Recolección completa de todas las fuentes
-        danger_alerts, warning_alerts, success_alerts = [], [], []
-        
-        # Valoración
-        val = alerts.get("valuation", {})
-        for reason in val.get("overvalued_reasons", []):
-            danger_alerts.append(("Valoración", reason))
-        for reason in val.get("undervalued_reasons", []):
-            success_alerts.append(("Valoración", reason))
-        
-        # Deuda/Apalancamiento
-        lev = alerts.get("leverage", {})
-        for reason in lev.get("warning_reasons", []):
-            danger_alerts.append(("Deuda", reason))
-        for reason in lev.get("positive_reasons", []):
-            success_alerts.append(("Deuda", reason))
-        
-        # Rentabilidad
-        prof = alerts.get("profitability", {})
-        for reason in prof.get("warning_reasons", []):
-            warning_alerts.append(("Rentabilidad", reason))
-        for reason in prof.get("positive_reasons", []):
-            success_alerts.append(("Rentabilidad", reason))
-        
-        # Liquidez
-        liq = alerts.get("liquidity", {})
-        for reason in liq.get("warning_reasons", []):
-            warning_alerts.append(("Liquidez", reason))
-        for reason in liq.get("positive_reasons", []):
-            success_alerts.append(("Liquidez", reason))
+                    html.P(piotroski.get('interpretation', ''), className="institutional-desc")
+                ], className="institutional-card")
+            ], xs=12, md=6, className="mb-3"),
+        ]),
         
-        # Flujo de Caja
-        cf = alerts.get("cash_flow", {})
-        for reason in cf.get("warning_reasons", []):
-            danger_alerts.append(("Flujo de Caja", reason))
-        for reason in cf.get("positive_reasons", []):
-            success_alerts.append(("Flujo de Caja", reason))
+        html.Hr(),
         
-        # Crecimiento
-        growth = alerts.get("growth", {})
-        for reason in growth.get("warning_reasons", []):
-            warning_alerts.append(("Crecimiento", reason))
-        for reason in growth.get("positive_reasons", []):
-            success_alerts.append(("Crecimiento", reason))
+        # DESGLOSE DEL SCORE - Con detalles desplegables elegantes
+        html.H6("📊 Desglose del Score (5 categorías × 20 pts)", className="mb-3"),
+        html.Div([
+            html.Div([
+                # Header clickeable con categoría y puntuación
+                html.Div([
+                    html.Div([
+                        html.Span(f"{cat.get('emoji', '📊')} {cat.get('category', 'N/A')}", 
+                                 className="score-category-name"),
+                    ], style={"flex": "1"}),
+                    html.Span(f"{cat.get('score', 0)}/{cat.get('max_score', 20)}",
+                        className="score-value",
+                        style={
+                            "color": category_score_color(cat.get('score', 0))
+                        }),
+                    # Botón ver detalles
+                    html.Span("ver detalles ›", 
+                        id={"type": "score-detail-toggle", "index": i},
+                        n_clicks=0,
+                        className="score-detail-btn")
+                ], style={"display": "flex", "alignItems": "center", "marginBottom": "8px"}),
+                
+                # Barra de progreso
+                dbc.Progress(value=cat.get('score', 0), max=cat.get('max_score', 20), 
+                            style={"height": "6px"}, className="score-progress-bar"),
+                
+                # Contenido desplegable con ajustes
+                # Contenido desplegable: vacío hasta el primer click, lo llena el
+                # callback clientside con score_v2.categories de analysis-data
+                dbc.Collapse(
+                    html.Div(id={"type": "score-detail-body", "index": i},
+                             style={"marginTop": "12px", "paddingLeft": "4px"}),
+                    id={"type": "score-detail-collapse", "index": i},
+                    is_open=False
+                )
+                
+            ], className="score-category-box") for i, cat in enumerate(categories)
+        ]) if categories else html.P("Sin datos de scoring", className="text-muted"),
         
-        # Volatilidad
-        vol = alerts.get("volatility", {})
-        for reason in vol.get("warning_reasons", []):
-            warning_alerts.append(("Volatilidad", reason))
-        for reason in vol.get("positive_reasons", []):
-            success_alerts.append(("Volatilidad", reason))
+        html.Hr(),
         
-        # Extraer alertas de score_v2 categories (detalles de ajustes)
-        for cat in categories:
-            adjustments = cat.get("adjustments", [])
-            for adj in adjustments:
-                if adj.get("adjustment", 0) < -2:  # Penalizaciones fuertes
-                    danger_alerts.append((cat.get("category", ""), f"{adj.get('metric', '')}: {adj.get('reason', '')}"))
-                elif adj.get("adjustment", 0) < 0:  # Penalizaciones leves
-                    warning_alerts.append((cat.get("category", ""), f"{adj.get('metric', '')}: {adj.get('reason', '')}"))
-                elif adj.get("adjustment", 0) > 2:  # Bonificaciones fuertes
-                    success_alerts.append((cat.get("category", ""), f"{adj.get('metric', '')}: {adj.get('reason', '')}"))
+        # RESUMEN DE PUNTUACIÓN
+        html.H6("📋 Resumen de Puntuación", className="mb-3"),
+        # Grid CSS (2 columnas en móvil, 6 en desktop): solo las tarjetas, sin Row/Col
+        html.Div([
+            create_score_summary_card("Solidez", solidez, 20, "🏛️"),
+            create_score_summary_card("Rentabilidad", rentabilidad, 20, "💰"),
+            create_score_summary_card("Valoración", valoracion, 20, "💵"),
+            create_score_summary_card("Calidad", calidad, 20, "✅"),
+            create_score_summary_card("Crecimiento", crecimiento, 20, "📈"),
+            html.Div([
+                html.Div("🎯 TOTAL", className="score-summary-label"),
+                html.Div(f"{score}/100", style={"color": score_color, "fontSize": "1.8rem", "fontWeight": "700"})
+            ], className="score-summary-card score-total-card"),
+        ], className="score-summary-grid"),
         
-        # Eliminar duplicados manteniendo orden
-        def unique_alerts(alerts_list):
-            seen = set()
-            result = []
-            for cat, reason in alerts_list:
-                key = (cat, reason[:50])  # Usar primeros 50 chars para comparar
-                if key not in seen:
-                    seen.add(key)
-                    result.append((cat, reason))
-            return result
+        html.Hr(),
         
-        danger_alerts = unique_alerts(danger_alerts)
-        warning_alerts = unique_alerts(warning_alerts)
-        success_alerts = unique_alerts(success_alerts)
+        # SEÑALES DETECTADAS
+        html.H6("📋 Señales Detectadas", className="mb-3"),
+        dbc.Row([
+            dbc.Col([
+                html.Div([
+                    html.H4(len(danger_alerts), className="text-danger mb-0"),
+                    html.Small("Riesgos", className="text-muted")
+                ], className="text-center p-3", style={"background": "rgba(239, 68, 68, 0.1)", "borderRadius": "8px"})
+            ], xs=4),
+            dbc.Col([
+                html.Div([
+                    html.H4(len(warning_alerts), className="text-warning mb-0"),
+                    html.Small("Advertencias", className="text-muted")
+                ], className="text-center p-3", style={"background": "rgba(234, 179, 8, 0.1)", "borderRadius": "8px"})
+            ], xs=4),
+            dbc.Col([
+                html.Div([
+                    html.H4(len(success_alerts), className="text-success mb-0"),
+                    html.Small("Fortalezas", className="text-muted")
+                ], className="text-center p-3", style={"background": "rgba(34, 197, 94, 0.1)", "borderRadius": "8px"})
+            ], xs=4),
+        ], className="mb-4"),
         
-        tab_evaluation = html.Div([
-            html.H5("Evaluación Completa", className="mb-2"),
-            html.P("Desglose del score y análisis detallado", className="text-muted small mb-3"),
-            
-            # MÉTRICAS INSTITUCIONALES - Adaptativo según sector
-            html.H6("🏛️ Métricas Institucionales", className="mb-3"),
-            dbc.Row([
-                # Primera métrica: Z-Score O Financial Health Score según sector
-                dbc.Col([
-                    # Si es sector financiero: Financial Health Score
-                    html.Div([
-                        html.Div([
-                            html.Span("🏦 Solidez Bancaria ", className="institutional-title"),
-                            html.Span("ⓘ", id="tooltip-financial-health-inst", style={
-                                "cursor": "help", "color": "#60a5fa", "fontSize": "0.85rem"
-                            })
-                        ]),
-                        dbc.Tooltip(
-                            [
-                                html.Strong("¿Qué es?"), html.Br(),
-                                "Puntuación 0-10 calibrada para bancos y financieras. Reemplaza al Z-Score que no aplica a este sector.",
-                                html.Br(), html.Br(),
-                                html.Strong("Componentes (umbrales bancarios):"), html.Br(),
-                                "• ROA (0-3 pts): >0.5% excelente, >0.3% bueno", html.Br(),
-                                "• ROE (0-3 pts): >12% excelente, >8% bueno", html.Br(),
-                                "• D/E Bancario (0-2 pts): <5x conservador", html.Br(),
-                                "• Book Value Growth (0-1 pts)", html.Br(),
-                                "• Dividendo sostenible (0-1 pts)", html.Br(), html.Br(),
-                                html.Span("Nota: Métricas regulatorias (CET1, Tier 1) no disponibles.", style={"fontStyle": "italic", "fontSize": "0.85em"})
-                            ],
-                            target="tooltip-financial-health-inst",
-                            placement="top",
-                            style={"maxWidth": "380px"}
-                        ),
-                        html.Div([
-                            html.Span(
-                                f"{(alerts.get('financial_health') or {}).get('score', 0)}/10" if alerts.get('financial_health') else "N/A", 
-                                className="institutional-value",
-                                style={
-                                    "color": "#22c55e" if (alerts.get('financial_health') or {}).get('level') == "STRONG" else 
-                                             "#84cc16" if (alerts.get('financial_health') or {}).get('level') == "GOOD" else
-                                             "#eab308" if (alerts.get('financial_health') or {}).get('level') == "NEUTRAL" else "#ef4444"
-                                }),
-                            html.Span(
-                                " · Excelente" if (alerts.get('financial_health') or {}).get('level') == "STRONG" else
-                                " · Buena" if (alerts.get('financial_health') or {}).get('level') == "GOOD" else
-                                " · Neutral" if (alerts.get('financial_health') or {}).get('level') == "NEUTRAL" else
-                                " · Débil",
-                                className="institutional-label"
-                            )
-                        ]),
-                        html.P((alerts.get('financial_health') or {}).get('interpretation', ''), className="institutional-desc")
-                    ], className="institutional-card", style={"display": "block" if alerts.get('is_financial_sector') else "none"}),
-                    
-                    # Si NO es sector financiero: Altman Z-Score
-                    html.Div([
-                        html.Div([
-                            html.Span("📊 Altman Z-Score ", className="institutional-title"),
-                            html.Span("ⓘ", id="tooltip-altman-inst", style={
-                                "cursor": "help", "color": "#60a5fa", "fontSize": "0.85rem"
-                            })
-                        ]),
-                        dbc.Tooltip(
-                            [
-                                html.Strong("¿Qué es?"), html.Br(),
-                                "Fórmula que predice probabilidad de quiebra en 2 años. Combina 5 ratios: liquidez, rentabilidad, apalancamiento, valor de mercado y eficiencia.",
-                                html.Br(), html.Br(),
-                                html.Strong("Interpretación:"), html.Br(),
-                                "• >2.99: Zona Segura ✓", html.Br(),
-                                "• 1.81-2.99: Zona Gris ⚠️", html.Br(),
-                                "• <1.81: Riesgo de quiebra 🚨"
-                            ],
-                            target="tooltip-altman-inst",
-                            placement="top",
-                            style={"maxWidth": "350px"}
-                        ),
-                        html.Div([
-                            html.Span(f"{alerts.get('altman_z_score', {}).get('value', 0):.2f}" if alerts.get('altman_z_score', {}).get('value') else "N/A", 
-                                     className="institutional-value",
-                                     style={
-                                         "color": "#22c55e" if alerts.get('altman_z_score', {}).get('level') == "SAFE" else 
-                                                  "#eab308" if alerts.get('altman_z_score', {}).get('level') == "GREY" else "#ef4444"
-                                     }),
-                            html.Span(
-                                " · Zona Segura" if alerts.get('altman_z_score', {}).get('level') == "SAFE" else
-                                " · Zona Gris" if alerts.get('altman_z_score', {}).get('level') == "GREY" else
-                                " · Zona de Riesgo",
-                                className="institutional-label"
-                            )
-                        ]),
-                        html.P(alerts.get('altman_z_score', {}).get('interpretation', ''), className="institutional-desc")
-                    ], className="institutional-card", style={"display": "none" if alerts.get('is_financial_sector') else "block"})
-                ], xs=12, md=6, className="mb-3"),
-                
-                # Piotroski F-Score (aplica a todos los sectores)
-                dbc.Col([
-                    html.Div([
-                        html.Div([
-                            html.Span("📈 Piotroski F-Score ", className="institutional-title"),
-                            html.Span("ⓘ", id="tooltip-piotroski-inst", style={
-                                "cursor": "help", "color": "#60a5fa", "fontSize": "0.85rem"
-                            })
-                        ]),
-                        dbc.Tooltip(
-                            [
-                                html.Strong("¿Qué es?"), html.Br(),
-                                "Puntuación 0-9 de salud financiera. Evalúa rentabilidad (4 pts), liquidez/deuda (3 pts) y eficiencia operativa (2 pts).",
-                                html.Br(), html.Br(),
-                                html.Strong("Interpretación:"), html.Br(),
-                                "• 8-9: Excelente ✓✓", html.Br(),
-                                "• 6-7: Buena salud ✓", html.Br(),
-                                "• 4-5: Neutral", html.Br(),
-                                "• 0-3: Débil ⚠️"
-                            ],
-                            target="tooltip-piotroski-inst",
-                            placement="top",
-                            style={"maxWidth": "350px"}
-                        ),
-                        html.Div([
-                            html.Span(f"{alerts.get('piotroski_f_score', {}).get('value', 0)}/9" if alerts.get('piotroski_f_score', {}).get('value') is not None else "N/A", 
-                                     className="institutional-value",
-                                     style={
-                                         "color": "#22c55e" if (alerts.get('piotroski_f_score', {}).get('value') or 0) >= 7 else 
-                                                  "#eab308" if (alerts.get('piotroski_f_score', {}).get('value') or 0) >= 4 else "#ef4444"
-                                     }),
-                            html.Span(
-                                " · Fuerte" if (alerts.get('piotroski_f_score', {}).get('value') or 0) >= 7 else
-                                " · Neutral" if (alerts.get('piotroski_f_score', {}).get('value') or 0) >= 4 else
-                                " · Débil",
-                                className="institutional-label"
-                            )
-                        ]),
-                        html.P(alerts.get('piotroski_f_score', {}).get('interpretation', ''), className="institutional-desc")
-                    ], className="institutional-card")
-                ], xs=12, md=6, className="mb-3"),
-            ]),
-            
-            html.Hr(),
-            
-            # DESGLOSE DEL SCORE - Con detalles desplegables elegantes
-            html.H6("📊 Desglose del Score (5 categorías × 20 pts)", className="mb-3"),
+        # LISTA DE ALERTAS - Estilo simple con cajas
+        html.Div([
+            html.H6("🔴 Señales de Riesgo", className="text-danger") if danger_alerts else None,
             html.Div([
                 html.Div([
-                    # Header clickeable con categoría y puntuación
-                    html.Div([
-                        html.Div([
-                            html.Span(f"{cat.get('emoji', '📊')} {cat.get('category', 'N/A')}", 
-                                     className="score-category-name"),
-                        ], style={"flex": "1"}),
-                        html.Span(f"{cat.get('score', 0)}/{cat.get('max_score', 20)}",
-                            className="score-value",
-                            style={
-                                "color": "#22c55e" if cat.get('score', 0) >= 15 else 
-                                         "#eab308" if cat.get('score', 0) >= 10 else "#ef4444"
-                            }),
-                        # Botón ver detalles
-                        html.Span("ver detalles ›", 
-                            id={"type": "score-detail-toggle", "index": i},
-                            n_clicks=0,
-                            className="score-detail-btn")
-                    ], style={"display": "flex", "alignItems": "center", "marginBottom": "8px"}),
-                    
-                    # Barra de progreso
-                    dbc.Progress(value=cat.get('score', 0), max=cat.get('max_score', 20), 
-                                style={"height": "6px"}, className="score-progress-bar"),
-                    
-                    # Contenido desplegable con ajustes
-                    dbc.Collapse(
-                        html.Div([
-                            html.Div([
-                                html.Div([
-                                    # Indicador +/-
-                                    html.Span(
-                                        f"+{adj.get('adjustment', 0)}" if adj.get('adjustment', 0) > 0 else str(adj.get('adjustment', 0)),
-                                        style={
-                                            "fontSize": "0.8rem", "fontWeight": "700", "minWidth": "32px",
-                                            "color": "#22c55e" if adj.get('adjustment', 0) > 0 else "#ef4444",
-                                        }
-                                    ),
-                                    # Métrica
-                                    html.Span(adj.get('metric', ''), className="adjustment-metric"),
-                                    # Razón
-                                    html.Span(adj.get('reason', ''), className="adjustment-reason")
-                                ], className="adjustment-row")
-                            ]) for adj in cat.get('adjustments', [])
-                        ] if cat.get('adjustments') else [
-                            html.P("Sin ajustes registrados", className="no-adjustments-text")
-                        ], style={"marginTop": "12px", "paddingLeft": "4px"}),
-                        id={"type": "score-detail-collapse", "index": i},
-                        is_open=False
-                    )
-                    
-                ], className="score-category-box") for i, cat in enumerate(categories)
-            ]) if categories else html.P("Sin datos de scoring", className="text-muted"),
-            
-            html.Hr(),
-            
-            # RESUMEN DE PUNTUACIÓN
-            html.H6("📋 Resumen de Puntuación", className="mb-3"),
-            dbc.Row([
-                dbc.Col([create_score_summary_card("Solidez", solidez, 20, "🏛️")], xs=6, md=2, className="mb-3"),
-                dbc.Col([create_score_summary_card("Rentabilidad", rentabilidad, 20, "💰")], xs=6, md=2, className="mb-3"),
-                dbc.Col([create_score_summary_card("Valoración", valoracion, 20, "💵")], xs=6, md=2, className="mb-3"),
-                dbc.Col([create_score_summary_card("Calidad", calidad, 20, "✅")], xs=6, md=2, className="mb-3"),
-                dbc.Col([create_score_summary_card("Crecimiento", crecimiento, 20, "📈")], xs=6, md=2, className="mb-3"),
-                dbc.Col([
-                    html.Div([
-                        html.Div("🎯 TOTAL", className="score-summary-label"),
-                        html.Div(f"{score}/100", style={"color": score_color, "fontSize": "1.8rem", "fontWeight": "700"})
-                    ], className="score-summary-card score-total-card")
-                ], xs=6, md=2, className="mb-3"),
-            ], className="justify-content-center"),
-            
-            html.Hr(),
-            
-            # SEÑALES DETECTADAS
-            html.H6("📋 Señales Detectadas", className="mb-3"),
-            dbc.Row([
-                dbc.Col([
-                    html.Div([
-                        html.H4(len(danger_alerts), className="text-danger mb-0"),
-                        html.Small("Riesgos", className="text-muted")
-                    ], className="text-center p-3", style={"background": "rgba(239, 68, 68, 0.1)", "borderRadius": "8px"})
-                ], xs=4),
-                dbc.Col([
-                    html.Div([
-                        html.H4(len(warning_alerts), className="text-warning mb-0"),
-                        html.Small("Advertencias", className="text-muted")
-                    ], className="text-center p-3", style={"background": "rgba(234, 179, 8, 0.1)", "borderRadius": "8px"})
-                ], xs=4),
-                dbc.Col([
-                    html.Div([
-                        html.H4(len(success_alerts), className="text-success mb-0"),
-                        html.Small("Fortalezas", className="text-muted")
-                    ], className="text-center p-3", style={"background": "rgba(34, 197, 94, 0.1)", "borderRadius": "8px"})
-                ], xs=4),
-            ], className="mb-4"),
+                    html.Strong(f"{cat}: "), 
+                    html.Span(reason),
+                    html.Div(get_alert_explanation(cat, reason), className="text-muted small mt-1")
+                ], className="alert-box alert-danger-custom mb-2")
+                for cat, reason in danger_alerts
+            ]) if danger_alerts else None,
             
-            # LISTA DE ALERTAS - Estilo simple con cajas
+            html.H6("🟠 Advertencias", className="text-warning mt-3") if warning_alerts else None,
             html.Div([
-                html.H6("🔴 Señales de Riesgo", className="text-danger") if danger_alerts else None,
-                html.Div([
-                    html.Div([
-                        html.Strong(f"{cat}: "), 
-                        html.Span(reason),
-                        html.Div(get_alert_explanation(cat, reason), className="text-muted small mt-1")
-                    ], className="alert-box alert-danger-custom mb-2")
-                    for cat, reason in danger_alerts
-                ]) if danger_alerts else None,
-                
-                html.H6("🟠 Advertencias", className="text-warning mt-3") if warning_alerts else None,
                 html.Div([
-                    html.Div([
-                        html.Strong(f"{cat}: "), 
-                        html.Span(reason),
-                        html.Div(get_alert_explanation(cat, reason), className="text-muted small mt-1")
-                    ], className="alert-box alert-warning-custom mb-2")
-                    for cat, reason in warning_alerts
-                ]) if warning_alerts else None,
-                
-                html.H6("🟢 Fortalezas", className="text-success mt-3") if success_alerts else None,
+                    html.Strong(f"{cat}: "), 
+                    html.Span(reason),
+                    html.Div(get_alert_explanation(cat, reason), className="text-muted small mt-1")
+                ], className="alert-box alert-warning-custom mb-2")
+                for cat, reason in warning_alerts
+            ]) if warning_alerts else None,
+            
+            html.H6("🟢 Fortalezas", className="text-success mt-3") if success_alerts else None,
+            html.Div([
                 html.Div([
-                    html.Div([
-                        html.Strong(f"{cat}: "), 
-                        html.Span(reason),
-                        html.Div(get_alert_explanation(cat, reason), className="text-muted small mt-1")
-                    ], className="alert-box alert-success-custom mb-2")
-                    for cat, reason in success_alerts
-                ]) if success_alerts else None,
-            ])
+                    html.Strong(f"{cat}: "), 
+                    html.Span(reason),
+                    html.Div(get_alert_explanation(cat, reason), className="text-muted small mt-1")
+                ], className="alert-box alert-success-custom mb-2")
+                for cat, reason in success_alerts
+            ]) if success_alerts else None,
         ])
+    ])
+    
+    # ENRIQUECER ratios con datos adicionales para el PDF (copia; ratios no se muta)
+    pdf_ratios = enrich_ratios_for_pdf(ratios, financials)
+    
+    # DEBUG: Verificar que score_v2 está en alerts antes de guardar (solo si DEBUG está activo)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[SAVE] Guardando datos para %s", symbol)
+        logger.debug("[SAVE] alerts tiene score_v2: %s", 'score_v2' in alerts)
+        if 'score_v2' in alerts:
+            sv2 = alerts['score_v2']
+            logger.debug("[SAVE] score_v2.total_score: %s", sv2.get('total_score', 'NO EXISTE'))
+            logger.debug("[SAVE] score_v2.level: %s", sv2.get('level', 'NO EXISTE'))
+            logger.debug("[SAVE] score_v2.category_scores: %s", sv2.get('category_scores', 'NO EXISTE'))
+    
+    views = (
+        company_header, score_card, key_metrics, sector_notes,
+        tab_valuation, tab_profitability, tab_health, tab_historical, tab_comparison, tab_intrinsic, tab_evaluation
+    )
+    return views, pdf_ratios, alerts, company_name, stock_badge
+
+
+def get_analysis_views(symbol, profile, financials, contextual, fin_dict):
+    """
+    build_analysis_views memoizado por el contenido de los datos: volver a un
+    ticker ya visto (sin datos nuevos) es una búsqueda en dict en lugar de
+    reconstruir miles de componentes. Datos refrescados generan otra clave.
+    """
+    try:
+        key = (symbol, _freeze(profile), _freeze(financials), _freeze(contextual))
+        hash(key)
+    except TypeError:
+        return build_analysis_views(symbol, profile, financials, contextual, fin_dict)
+    
+    with _analysis_views_lock:
+        cached = _analysis_views_cache.get(key)
+        if cached is not None:
+            _analysis_views_cache.move_to_end(key)
+            return cached
+    
+    # La construcción queda fuera del lock: no serializa análisis distintos
+    result = build_analysis_views(symbol, profile, financials, contextual, fin_dict)
+    with _analysis_views_lock:
+        _analysis_views_cache[key] = result
+        _analysis_views_cache.move_to_end(key)
+        if len(_analysis_views_cache) > ANALYSIS_VIEWS_CACHE_SIZE:
+            _analysis_views_cache.popitem(last=False)
+    return result
+
+
+# Callback principal de navegación (SOLO se activa con click o Enter)
+@callback(
+    Output("home-view", "style"),
+    Output("analysis-view", "style"),
+    Output("company-header", "children"),
+    Output("score-card-container", "children"),
+    Output("key-metrics-container", "children"),
+    Output("sector-notes-container", "children"),
+    Output("tab-valuation-content", "children"),
+    Output("tab-profitability-content", "children"),
+    Output("tab-health-content", "children"),
+    Output("tab-historical-content", "children"),
+    Output("tab-comparison-content", "children"),
+    Output("tab-intrinsic-content", "children"),
+    Output("tab-evaluation-content", "children"),
+    Output("analysis-footer", "children"),
+    Output("analysis-data", "data"),
+    Output("current-symbol", "data"),
+    Output("error-message", "children"),
+    Output("loading-trigger", "children"),
+    Output("current-stock-badge", "children"),
+    Output("navbar-search-input", "value"),
+    Output("navbar-search-suggestions", "style", allow_duplicate=True),
+    Output("search-history", "data"),  # v3.0: Guardar al historial
+    Input("search-submit", "data"),
+    Input("logo-home", "n_clicks"),
+    Input({"type": "quick-pick", "index": ALL}, "n_clicks"),
+    Input("selected-suggestion", "data"),
+    Input({"type": "recent-search", "index": ALL}, "n_clicks"),
+    Input({"type": "posiciones-item", "index": ALL}, "n_clicks"),  # v3.1.3: Click en posiciones
+    Input({"type": "radar-item", "index": ALL}, "n_clicks"),  # v3.1.3: Click en radar
+    Input({"type": "screener-pick", "index": ALL}, "n_clicks"),
+    Input("refresh-analysis", "n_clicks"),
+    State("analysis-data", "data"),
+    State("search-history", "data"),
+    prevent_initial_call=True
+)
+def handle_navigation(search_request, logo_clicks, quick_picks, selected_suggestion, recent_clicks, posiciones_clicks, radar_clicks, screener_clicks, refresh_clicks, stored_data, current_history):
+    triggered_id = ctx.triggered_id
+    triggered_prop = ctx.triggered[0]["prop_id"] if ctx.triggered else ""
+    
+    home_style = HOME_VISIBLE_STYLE
+    analysis_style = ANALYSIS_HIDDEN_STYLE
+    empty_outputs = [None] * 13
+    
+    # Historial actual (o lista vacía si es None)
+    history = current_history if current_history else []
+    
+    # Estilo para ocultar sugerencias
+    hide_suggestions = SEARCH_DROPDOWN_HIDDEN
+    
+    # Si no hay triggered_id o es None, no hacer nada
+    if not triggered_id:
+        return no_update
+    
+    # Verificar el valor del trigger (debe ser > 0 para ser un click real)
+    triggered_value = ctx.triggered[0]["value"] if ctx.triggered else None
+    
+    # Regresar al home
+    if triggered_id == "logo-home":
+        if logo_clicks and logo_clicks > 0:
+            return home_style, analysis_style, *empty_outputs, "", None, None, None, "", hide_suggestions, no_update
+        return no_update
+    
+    symbol = None
+    force_refresh = False
+    
+    # CASO 1-2: Enter o click en el botón de búsqueda (valor leído del DOM)
+    if triggered_id == "search-submit":
+        if search_request and search_request.get("value"):
+            symbol = resolve_symbol(search_request["value"])
+        else:
+            return no_update
+    
+    # CASO 3: Quick pick
+    elif isinstance(triggered_id, dict) and triggered_id.get("type") == "quick-pick":
+        if triggered_value and triggered_value > 0:
+            symbol = triggered_id.get("index")
+        else:
+            return no_update
+    
+    # CASO 4: Click en sugerencia
+    elif triggered_id == "selected-suggestion":
+        # El store solo cambia con un click real sobre un <li> con data-ticker
+        if selected_suggestion and selected_suggestion.get("ticker"):
+            symbol = selected_suggestion["ticker"]
+        else:
+            return no_update
+    
+    # CASO 5: Click en búsqueda reciente
+    elif isinstance(triggered_id, dict) and triggered_id.get("type") == "recent-search":
+        if triggered_value and triggered_value > 0:
+            symbol = triggered_id.get("index")
+        else:
+            return no_update
+    
+    # CASO 6: Click en posiciones item
+    elif isinstance(triggered_id, dict) and triggered_id.get("type") == "posiciones-item":
+        if triggered_value and triggered_value > 0:
+            symbol = triggered_id.get("index")
+        else:
+            return no_update
+    
+    # CASO 7: Click en radar item
+    elif isinstance(triggered_id, dict) and triggered_id.get("type") == "radar-item":
+        if triggered_value and triggered_value > 0:
+            symbol = triggered_id.get("index")
+        else:
+            return no_update
+    
+    # CASO 8: Click en screener pick
+    elif isinstance(triggered_id, dict) and triggered_id.get("type") == "screener-pick":
+        if triggered_value and triggered_value > 0:
+            symbol = triggered_id.get("index")
+        else:
+            return no_update
+    
+    # CASO 9: Botón "Actualizar datos" sobre el análisis mostrado
+    elif triggered_id == "refresh-analysis":
+        if refresh_clicks and stored_data and stored_data.get("symbol"):
+            symbol = stored_data["symbol"]
+            force_refresh = True
+        else:
+            return no_update
+    
+    # Si no hay símbolo válido, no hacer nada
+    if not symbol:
+        return no_update
+    
+    try:
+        service = FinancialDataService()
+        # Con force_refresh (botón "Actualizar datos") se ignoran los cachés en memoria
+        # y en disco de perfil, financieros, históricos y ETF sectorial
+        data = service.get_complete_analysis_data(symbol, force_refresh=force_refresh)
+        
+        if not data.get("financials"):
+            error_msg = dbc.Alert(f"❌ No se encontraron datos para '{symbol}'. Verifica el símbolo.",
+                                 color="danger", dismissable=True)
+            return home_style, analysis_style, *empty_outputs, "", error_msg, None, None, "", hide_suggestions, no_update
+        
+        profile = data.get("profile")
+        financials = data.get("financials")
+        contextual = data.get("contextual", {})
+        
+        fin_dict = service.financials_to_dict(financials)
+        views, ratios, alerts, company_name, stock_badge = get_analysis_views(
+            symbol, profile, financials, contextual, fin_dict
+        )
         
         # Footer
         footer = [
-            f"📅 Análisis generado: {datetime.now().strftime('%Y-%m-%d %H:%M')} · ",
+            f"📅 Análisis generado: {minute_stamp(int(time.time() // 60))} · ",
             html.Span("Datos: Yahoo Finance · ", className="text-muted"),
             html.Span("Esto no es asesoría financiera.", className="text-warning")
         ]
         
-        # ENRIQUECER ratios con datos adicionales para el PDF
-        ratios["price"] = financials.price if financials else None
-        ratios["revenue"] = financials.revenue if financials else None
-        ratios["total_debt"] = financials.total_debt if financials else None
-        ratios["shares_outstanding"] = financials.shares_outstanding if financials else None
-        ratios["cash_and_equivalents"] = financials.cash if financials else None
-        ratios["fifty_two_week_high"] = week_high
-        ratios["fifty_two_week_low"] = week_low
-        ratios["average_volume"] = avg_volume
-        
-        # Calcular working_capital si tenemos los datos
-        if financials and financials.current_assets and financials.current_liabilities:
-            ratios["working_capital"] = financials.current_assets - financials.current_liabilities
-        
-        # Calcular book_value_per_share si tenemos los datos
-        if financials and financials.total_equity and financials.shares_outstanding:
-            ratios["book_value_per_share"] = financials.total_equity / financials.shares_outstanding
-        
-        # Calcular fcf_to_debt si tenemos los datos
-        if ratios.get("fcf") and financials and financials.total_debt and financials.total_debt > 0:
-            ratios["fcf_to_debt"] = ratios["fcf"] / financials.total_debt
+        # Si ya se mostraba un análisis, las vistas no cambian: no reenviar sus estilos
+        view_styles = (no_update, no_update) if stored_data else (HOME_HIDDEN_STYLE, ANALYSIS_VISIBLE_STYLE)
         
-        # DEBUG: Verificar que score_v2 está en alerts antes de guardar
-        logger.debug(f"[SAVE] Guardando datos para {symbol}")
-        logger.debug(f"[SAVE] alerts tiene score_v2: {'score_v2' in alerts}")
-        if 'score_v2' in alerts:
-            sv2 = alerts['score_v2']
-            logger.debug(f"[SAVE] score_v2.total_score: {sv2.get('total_score', 'NO EXISTE')}")
-            logger.debug(f"[SAVE] score_v2.level: {sv2.get('level', 'NO EXISTE')}")
-            logger.debug(f"[SAVE] score_v2.category_scores: {sv2.get('category_scores', 'NO EXISTE')}")
-        
-        stored_data = {"symbol": symbol, "company_name": company_name, "ratios": ratios, "alerts": alerts}
+        # Dict plano (floats/str/listas): Dash lo serializa con orjson (ver requirements.txt)
+        # y los callbacks que leen analysis-data, incluido el clientside, lo reciben ya parseado
+        stored_data = {
+            "symbol": symbol, "company_name": company_name, "ratios": ratios, "alerts": alerts,
+            "sector": profile.sector if profile else None  # Para los tabs bajo demanda
+        }
         
         # v3.0: Actualizar historial de búsquedas
         new_history = [h for h in history if h.get("symbol") != symbol]  # Eliminar duplicados
@@ -2838,9 +2700,7 @@ def handle_navigation(search_btn, search_submit, logo_clicks, quick_picks, sugge
         new_history = new_history[:10]  # Mantener máximo 10
         
         return (
-            {"display": "none"}, {"display": "block"},
-            company_header, score_card, key_metrics, sector_notes,
-            tab_valuation, tab_profitability, tab_health, tab_historical, tab_comparison, tab_intrinsic, tab_evaluation,
+            *view_styles, *views,
             footer, stored_data, symbol, None, None, stock_badge, "", hide_suggestions, new_history
         )
     
@@ -2877,119 +2737,510 @@ def handle_navigation(search_btn, search_submit, logo_clicks, quick_picks, sugge
         return home_style, analysis_style, *empty_outputs, "", error_msg, None, None, "", hide_suggestions, no_update
 
 
-# Callback para cambiar periodo del gráfico histórico
-@callback(
-    Output("price-chart-container", "children"),
-    Output("period-1wk", "color"),
-    Output("period-1mo", "color"),
-    Output("period-3mo", "color"),
-    Output("period-6mo", "color"),
-    Output("period-1y", "color"),
-    Output("period-5y", "color"),
-    Output("period-1wk", "outline"),
-    Output("period-1mo", "outline"),
-    Output("period-3mo", "outline"),
-    Output("period-6mo", "outline"),
-    Output("period-1y", "outline"),
-    Output("period-5y", "outline"),
-    Output("price-performance-header", "children"),
-    Input("period-1wk", "n_clicks"),
-    Input("period-1mo", "n_clicks"),
-    Input("period-3mo", "n_clicks"),
-    Input("period-6mo", "n_clicks"),
-    Input("period-1y", "n_clicks"),
-    Input("period-5y", "n_clicks"),
-    State("current-symbol", "data"),
-    prevent_initial_call=True
+# =============================================================================
+# TABS BAJO DEMANDA (Histórico y Comparativa)
+# =============================================================================
+
+# Contenido provisional de los tabs que se construyen al activarse
+LAZY_TAB_PLACEHOLDER = html.Div(
+    dbc.Spinner(color="success", size="sm"),
+    className="text-center py-5"
 )
-def update_price_chart_period(n1w, n1, n3, n6, n12, n60, symbol):
-    if not symbol:
-        return no_update, *["secondary"]*6, *[True]*6, no_update
-    
-    triggered_id = ctx.triggered_id
+LAZY_TABS = ("tab-historical", "tab-comparison")
+
+# Botón del selector de periodo -> periodo de create_period_charts
+PERIOD_BUTTONS = {
+    "period-1wk": "5d",
+    "period-1mo": "1mo",
+    "period-3mo": "3mo",
+    "period-6mo": "6mo",
+    "period-1y": "1y",
+    "period-5y": "5y",
+}
+PERIOD_PCT_STYLE = {"fontSize": "2rem", "fontWeight": "700"}
+
+
+def build_historical_tab(symbol, ratios):
+    """
+    Tab Histórico: gráfico de precio, rendimiento y rango de 52 semanas.
+    Las figuras de los seis periodos salen de una sola descarga y viajan en
+    los stores chart-*, así cambiar de periodo no requiere ir al servidor.
+    """
+    period_charts = create_period_chart_payloads(symbol)
+    default_chart = period_charts["1y"] or {}
+    price_chart = default_chart.get("figure")
+    ytd_pct = default_chart.get("pct", 0)
+    ytd_end = default_chart.get("end", 0)
+    ytd_is_positive = ytd_pct >= 0
+    price = ratios.get("price")
+    beta = ratios.get("beta")
     
-    period_map = {
-        "period-1wk": "5d",
-        "period-1mo": "1mo",
-        "period-3mo": "3mo",
-        "period-6mo": "6mo",
-        "period-1y": "1y",
-        "period-5y": "5y"
-    }
+    week_high = ratios.get("fifty_two_week_high")
+    week_low = ratios.get("fifty_two_week_low")
+    avg_volume = ratios.get("average_volume")
     
-    period_labels = {
-        "period-1wk": "1 semana",
-        "period-1mo": "1 mes",
-        "period-3mo": "3 meses",
-        "period-6mo": "6 meses",
-        "period-1y": "1 año",
-        "period-5y": "5 años"
-    }
+    # Colores del rendimiento
+    pct_color = '#10b981' if ytd_is_positive else '#f43f5e'
     
-    period = period_map.get(triggered_id, "1y")
-    period_label = period_labels.get(triggered_id, "1 año")
+    return html.Div([
+        html.H5("Histórico de Precio", className="mb-2"),
+        html.P("Evolución del precio de la acción", className="text-muted small mb-3"),
     
-    # Crear gráfico y obtener datos de rendimiento en una sola llamada
-    chart, pct_change, end_price = create_price_chart(symbol, period)
-    is_positive = pct_change >= 0
-    pct_color = '#10b981' if is_positive else '#f43f5e'
+        # Header de rendimiento (SEPARADO de la gráfica)
+        html.Div([
+            html.Div([
+                html.Span(f"{ytd_pct:+.1f}%", id="price-performance-pct",
+                          style={**PERIOD_PCT_STYLE, "color": pct_color}),
+                html.Span(" 1 año", id="price-performance-label", style={
+                    "fontSize": "0.9rem",
+                    "color": "#71717a",
+                    "marginLeft": "8px"
+                })
+            ]),
+            html.Div([
+                html.Span(f"${ytd_end:.2f}", id="price-performance-end", style={
+                    "fontSize": "1.1rem",
+                    "color": "#a1a1aa"
+                }),
+                html.Span(" precio actual", style={
+                    "fontSize": "0.8rem",
+                    "color": "#52525b",
+                    "marginLeft": "6px"
+                })
+            ])
+        ], style={
+            "textAlign": "center",
+            "padding": "15px 0",
+            "marginBottom": "10px",
+            "borderBottom": "1px solid rgba(255,255,255,0.05)"
+        }, id="price-performance-header"),
     
-    # Header de rendimiento actualizado
-    performance_header = [
+        # Selector de periodo
         html.Div([
-            html.Span(f"{pct_change:+.1f}%", style={
-                "fontSize": "2rem",
-                "fontWeight": "700",
-                "color": pct_color
-            }),
-            html.Span(f" {period_label}", style={
-                "fontSize": "0.9rem",
-                "color": "#71717a",
-                "marginLeft": "8px"
-            })
+            dbc.ButtonGroup([
+                dbc.Button("1S", id="period-1wk", color="secondary", size="sm", outline=True, className="period-btn"),
+                dbc.Button("1M", id="period-1mo", color="secondary", size="sm", outline=True, className="period-btn"),
+                dbc.Button("3M", id="period-3mo", color="secondary", size="sm", outline=True, className="period-btn"),
+                dbc.Button("6M", id="period-6mo", color="secondary", size="sm", outline=True, className="period-btn"),
+                dbc.Button("1A", id="period-1y", color="primary", size="sm", className="period-btn"),
+                dbc.Button("5A", id="period-5y", color="secondary", size="sm", outline=True, className="period-btn"),
+            ], className="mb-3")
+        ], className="text-center mb-3"),
+    
+        # Gráfico principal (default 1Y); el Graph siempre existe para el callback clientside
+        html.Div(id="price-chart-container", children=[
+            dcc.Graph(figure=price_chart or {}, config={'displayModeBar': False}, id="price-chart",
+                      responsive=True, style=None if price_chart else {"display": "none"})
+        ] + ([] if price_chart else [
+            html.Div([html.P("📈 No se pudieron cargar los datos", className="text-muted text-center py-5")])
+        ])),
+    
+        # Figura y rendimiento de cada periodo, listos para el cambio clientside
+        *[dcc.Store(id=f"chart-{button_id.split('-')[1]}", data=period_charts[period])
+          for button_id, period in PERIOD_BUTTONS.items()],
+    
+        html.Hr(),
+    
+        # Métricas de rendimiento
+        html.H6("📊 Rendimiento 52 Semanas", className="mb-3"),
+        dbc.Row([
+            dbc.Col([create_metric_card("52W High", f"${week_high:.2f}" if week_high else "N/A", "📈")], xs=6, md=3, className="mb-3"),
+            dbc.Col([create_metric_card("52W Low", f"${week_low:.2f}" if week_low else "N/A", "📉")], xs=6, md=3, className="mb-3"),
+            dbc.Col([create_metric_card("Beta", f"{beta:.2f}" if beta else "N/A", "📊")], xs=6, md=3, className="mb-3"),
+            dbc.Col([create_metric_card("Vol. Promedio", f"{avg_volume/1e6:.1f}M" if avg_volume else "N/A", "📶")], xs=6, md=3, className="mb-3"),
         ]),
+    
+        # Posición actual
+        html.Hr(),
+        html.H6("📍 Posición Actual", className="mb-3"),
         html.Div([
-            html.Span(f"${end_price:.2f}", style={
-                "fontSize": "1.1rem",
-                "color": "#a1a1aa"
-            }),
-            html.Span(" precio actual", style={
-                "fontSize": "0.8rem",
-                "color": "#52525b",
-                "marginLeft": "6px"
-            })
+            html.P([
+                f"Precio actual ${price:.2f}" if price else "N/A",
+                html.Span(" · ", className="text-muted"),
+                f"{((price - week_low) / (week_high - week_low) * 100):.0f}% del rango 52W" if week_high and week_low and price else ""
+            ], className="text-muted mb-2") if week_high and week_low else None,
+            dbc.Progress(
+                value=((price - week_low) / (week_high - week_low) * 100) if week_high and week_low and price and (week_high - week_low) > 0 else 50,
+                style={"height": "10px"}, className="mb-2"
+            ) if week_high and week_low else None
         ])
-    ]
+    ])
+
+
+def build_comparison_tab(symbol, company_sector, sector_profile, ratios, market_context):
+    """Tab Comparativa: YTD vs sector/SPY y tabla de métricas fundamentales."""
+    stock_ytd = market_context["stock_ytd"]
+    market_ytd = market_context["market_ytd"]
+    sector_ytd = market_context["sector_ytd"]
     
-    if chart:
-        chart_component = dcc.Graph(figure=chart, config={'displayModeBar': False}, id="price-chart")
+    diff_vs_market = stock_ytd - market_ytd
+    diff_vs_sector = stock_ytd - sector_ytd
+    
+    # Mensaje de análisis
+    if diff_vs_market > 10:
+        perf_msg = f"🚀 {symbol} está superando al mercado por {diff_vs_market:.1f} puntos"
+        perf_color = "#22c55e"
+    elif diff_vs_market > 0:
+        perf_msg = f"✅ {symbol} está ligeramente por encima del mercado (+{diff_vs_market:.1f}%)"
+        perf_color = "#4ade80"
+    elif diff_vs_market > -10:
+        perf_msg = f"⚠️ {symbol} está ligeramente por debajo del mercado ({diff_vs_market:.1f}%)"
+        perf_color = "#eab308"
     else:
-        chart_component = html.Div([html.P("📈 No se pudieron cargar los datos", className="text-muted text-center py-5")])
+        perf_msg = f"🔴 {symbol} está rezagado vs el mercado por {abs(diff_vs_market):.1f} puntos"
+        perf_color = "#ef4444"
+    
+    # Tabla de métricas comparativas
+    metrics_config = get_sector_metrics_config(company_sector)
+    comparison_rows = []
+    for m in metrics_config:
+        company_val = ratios.get(m["key"])
+        comparison_rows.append(
+            create_comparison_metric_row(m["name"], company_val, m["sector_val"], m["market_val"], m["fmt"], m["lower_better"])
+        )
+    
+    return html.Div([
+        html.H5("🔄 Comparativa de Mercado", className="mb-2"),
+        html.P("Comparación vs Sector y S&P 500", className="text-muted small mb-3"),
+    
+        html.Div([
+            html.P([
+                html.Strong("¿Qué compara esta sección? "),
+                f"Comparamos {symbol} contra: ",
+                html.Span(f"{sector_profile.sector_etf if sector_profile else 'ETF'}", className="text-success"),
+                " (Sector) y ",
+                html.Span("SPY", className="text-warning"),
+                " (Mercado)"
+            ], className="small")
+        ], className="alert-info-custom alert-box mb-4"),
+    
+        # YTD Cards
+        html.H6("📊 Rendimiento YTD (Year-to-Date)", className="mb-3"),
+        dbc.Row([
+            dbc.Col([
+                html.Div([
+                    html.Div(f"📌 {symbol}", style={"color": "#3b82f6", "fontWeight": "600", "fontSize": "0.9rem"}),
+                    html.Div("EMPRESA", className="ytd-label"),
+                    html.Div(f"{stock_ytd:+.1f}%", style={
+                        "color": "#22c55e" if stock_ytd > 0 else "#ef4444",
+                        "fontSize": "1.8rem", "fontWeight": "700", "marginTop": "8px"
+                    })
+                ], className="ytd-card", style={"borderColor": "rgba(59, 130, 246, 0.5)"})
+            ], xs=12, md=4, className="mb-3"),
+            dbc.Col([
+                html.Div([
+                    html.Div(f"📊 vs {sector_profile.sector_etf if sector_profile else 'Sector'}", style={"color": "#22c55e", "fontWeight": "600", "fontSize": "0.9rem"}),
+                    html.Div("VS SECTOR", className="ytd-label"),
+                    html.Div(f"{diff_vs_sector:+.1f}%", style={
+                        "color": "#22c55e" if diff_vs_sector >= 0 else "#ef4444",
+                        "fontSize": "1.8rem", "fontWeight": "700", "marginTop": "8px"
+                    })
+                ], className="ytd-card", style={"borderColor": "rgba(34, 197, 94, 0.5)"})
+            ], xs=12, md=4, className="mb-3"),
+            dbc.Col([
+                html.Div([
+                    html.Div("🌐 vs SPY", style={"color": "#eab308", "fontWeight": "600", "fontSize": "0.9rem"}),
+                    html.Div("VS MERCADO", className="ytd-label"),
+                    html.Div(f"{diff_vs_market:+.1f}%", style={
+                        "color": "#22c55e" if diff_vs_market >= 0 else "#ef4444",
+                        "fontSize": "1.8rem", "fontWeight": "700", "marginTop": "8px"
+                    })
+                ], className="ytd-card", style={"borderColor": "rgba(234, 179, 8, 0.5)"})
+            ], xs=12, md=4, className="mb-3"),
+        ]),
+    
+        html.Div([html.P(perf_msg, style={"color": perf_color, "margin": "0"})],
+                style={"background": "rgba(39, 39, 42, 0.5)", "borderRadius": "8px", "padding": "12px", "textAlign": "center", "marginBottom": "20px"}),
+    
+        # Gráfico YTD
+        dcc.Graph(figure=create_ytd_comparison_chart(stock_ytd, market_ytd, sector_ytd, symbol), config={'displayModeBar': False}),
+    
+        html.Hr(),
+    
+        # Tabla de métricas fundamentales con veredicto - REDISEÑADA
+        html.Div([
+            # Header con mejor explicación
+            html.Div([
+                html.H6("📋 Comparación de Métricas Fundamentales", style={
+                    "marginBottom": "8px", "fontWeight": "600", "fontSize": "1.1rem"
+                }),
+                html.P("¿Cómo se compara esta empresa vs su sector y el mercado general?", 
+                       style={"color": "#9ca3af", "fontSize": "0.9rem", "marginBottom": "0"})
+            ], style={"marginBottom": "20px"}),
+    
+            # Leyenda de columnas explicativa
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.Span("📊", style={"fontSize": "1.2rem", "marginRight": "8px"}),
+                        html.Div([
+                            html.Strong(symbol, style={"color": "#10b981"}),
+                            html.Div("Valor de la empresa", style={"fontSize": "0.75rem", "color": "#6b7280"})
+                        ])
+                    ], style={"display": "flex", "alignItems": "center"}),
+                ], style={"flex": "1", "padding": "10px"}),
+    
+                html.Div([
+                    html.Div([
+                        html.Span("🏢", style={"fontSize": "1.2rem", "marginRight": "8px"}),
+                        html.Div([
+                            html.Strong("Sector", style={"color": "#6b7280"}),
+                            html.Div("Promedio del sector", style={"fontSize": "0.75rem", "color": "#6b7280"})
+                        ])
+                    ], style={"display": "flex", "alignItems": "center"}),
+                ], style={"flex": "1", "padding": "10px"}),
+    
+                html.Div([
+                    html.Div([
+                        html.Span("🌐", style={"fontSize": "1.2rem", "marginRight": "8px"}),
+                        html.Div([
+                            html.Strong("SPY", style={"color": "#6b7280"}),
+                            html.Div("S&P 500 (mercado)", style={"fontSize": "0.75rem", "color": "#6b7280"})
+                        ])
+                    ], style={"display": "flex", "alignItems": "center"}),
+                ], style={"flex": "1", "padding": "10px"}),
+    
+                html.Div([
+                    html.Div([
+                        html.Span("✅", style={"fontSize": "1.2rem", "marginRight": "8px"}),
+                        html.Div([
+                            html.Strong("Veredicto", style={"color": "#6b7280"}),
+                            html.Div("Evaluación comparativa", style={"fontSize": "0.75rem", "color": "#6b7280"})
+                        ])
+                    ], style={"display": "flex", "alignItems": "center"}),
+                ], style={"flex": "1", "padding": "10px"}),
+            ], style={
+                "display": "flex", 
+                "gap": "10px", 
+                "background": "rgba(39, 39, 42, 0.5)", 
+                "borderRadius": "12px", 
+                "padding": "12px",
+                "marginBottom": "15px",
+                "flexWrap": "wrap"
+            }),
+    
+            # Tabla con mejor diseño
+            html.Div([
+                html.Table([
+                    html.Thead([
+                        html.Tr([
+                            html.Th("Métrica", style={
+                                "textAlign": "left", "padding": "14px 16px", 
+                                "color": "#9ca3af", "fontWeight": "600", "fontSize": "0.85rem",
+                                "borderBottom": "1px solid #374151", "width": "25%"
+                            }),
+                            html.Th(symbol, style={
+                                "textAlign": "center", "padding": "14px 16px",
+                                "color": "#10b981", "fontWeight": "700", "fontSize": "0.9rem",
+                                "borderBottom": "1px solid #374151", "width": "18%"
+                            }),
+                            html.Th("Sector", style={
+                                "textAlign": "center", "padding": "14px 16px",
+                                "color": "#6b7280", "fontWeight": "500", "fontSize": "0.85rem",
+                                "borderBottom": "1px solid #374151", "width": "18%"
+                            }),
+                            html.Th("SPY", style={
+                                "textAlign": "center", "padding": "14px 16px",
+                                "color": "#6b7280", "fontWeight": "500", "fontSize": "0.85rem",
+                                "borderBottom": "1px solid #374151", "width": "18%"
+                            }),
+                            html.Th("Resultado", style={
+                                "textAlign": "center", "padding": "14px 16px",
+                                "color": "#9ca3af", "fontWeight": "600", "fontSize": "0.85rem",
+                                "borderBottom": "1px solid #374151", "width": "21%"
+                            }),
+                        ])
+                    ]),
+                    html.Tbody(comparison_rows)
+                ], style={
+                    "width": "100%", 
+                    "borderCollapse": "separate",
+                    "borderSpacing": "0"
+                })
+            ], style={
+                "background": "rgba(24, 24, 27, 0.5)",
+                "borderRadius": "12px",
+                "overflow": "hidden",
+                "border": "1px solid #374151"
+            }),
+    
+            # Leyenda inferior
+            html.Div([
+                html.Div([
+                    html.Span("●", style={"color": "#22c55e", "marginRight": "6px", "fontSize": "1.2rem"}),
+                    html.Span("Excelente", style={"fontWeight": "500", "marginRight": "6px"}),
+                    html.Span("= Supera ambos benchmarks", style={"color": "#6b7280"})
+                ], style={"display": "flex", "alignItems": "center"}),
     
-    # Colores de botones
-    colors = ["secondary"] * 6
-    outlines = [True] * 6
+                html.Div([
+                    html.Span("●", style={"color": "#eab308", "marginRight": "6px", "fontSize": "1.2rem"}),
+                    html.Span("Aceptable", style={"fontWeight": "500", "marginRight": "6px"}),
+                    html.Span("= Supera al menos uno", style={"color": "#6b7280"})
+                ], style={"display": "flex", "alignItems": "center"}),
     
-    button_order = ["period-1wk", "period-1mo", "period-3mo", "period-6mo", "period-1y", "period-5y"]
-    if triggered_id in button_order:
-        idx = button_order.index(triggered_id)
-        colors[idx] = "primary"
-        outlines[idx] = False
+                html.Div([
+                    html.Span("●", style={"color": "#ef4444", "marginRight": "6px", "fontSize": "1.2rem"}),
+                    html.Span("Débil", style={"fontWeight": "500", "marginRight": "6px"}),
+                    html.Span("= Por debajo de ambos", style={"color": "#6b7280"})
+                ], style={"display": "flex", "alignItems": "center"}),
+            ], style={
+                "display": "flex",
+                "justifyContent": "center",
+                "gap": "30px",
+                "marginTop": "20px",
+                "padding": "15px",
+                "background": "rgba(39, 39, 42, 0.3)",
+                "borderRadius": "10px",
+                "fontSize": "0.85rem",
+                "flexWrap": "wrap"
+            })
+        ], style={"marginTop": "25px"}),
     
-    return chart_component, *colors, *outlines, performance_header
+        # v2.9: Sección de comparación multi-acción
+        html.Div([
+            html.Hr(className="my-4"),
+            html.H6("🔀 Comparador Multi-Acción", className="mb-3"),
+            html.P("Compara varias acciones lado a lado. Agrega acciones con el botón 'Comparar' en cada análisis.",
+                  className="text-muted small mb-3"),
+            html.Div(id="comparison-table-container", children=[
+                html.P("No hay acciones en la lista de comparación.", className="text-muted text-center"),
+                html.P("Usa el botón '➕ Comparar' en cada acción para agregarla.", className="text-muted small text-center")
+            ])
+        ], style={"backgroundColor": "rgba(24, 24, 27, 0.5)", "borderRadius": "12px", "padding": "20px", "marginTop": "20px"})
+    ])
 
 
-# Callback para expandir/colapsar detalles del score
+# Callback para construir Histórico/Comparativa solo cuando el usuario los abre
 @callback(
+    Output("tab-historical-content", "children", allow_duplicate=True),
+    Output("tab-comparison-content", "children", allow_duplicate=True),
+    Output("lazy-tabs-rendered", "data"),
+    Input("analysis-tabs", "active_tab"),
+    Input("analysis-data", "data"),
+    State("lazy-tabs-rendered", "data"),
+    prevent_initial_call=True
+)
+def render_market_tabs(active_tab, analysis_data, rendered):
+    # Un análisis nuevo invalida los tabs ya construidos
+    if ctx.triggered_id == "analysis-data":
+        rendered = []
+    
+    if not analysis_data or active_tab not in LAZY_TABS or active_tab in (rendered or []):
+        return no_update, no_update, rendered if ctx.triggered_id == "analysis-data" else no_update
+    
+    symbol = analysis_data.get("symbol")
+    ratios = analysis_data.get("ratios") or {}
+    
+    if active_tab == "tab-historical":
+        historical = build_historical_tab(symbol, ratios)
+        return historical, no_update, [*(rendered or []), active_tab]
+    
+    sector = analysis_data.get("sector")
+    sector_profile = get_sector_profile(sector)
+    sector_etf = sector_profile.sector_etf if sector_profile else "XLK"
+    
+    # YTD (símbolo, SPY y ETF sectorial) en paralelo
+    market_context = fetch_market_context(symbol, sector_etf, f"{datetime.now().year}-01-01")
+    comparison = build_comparison_tab(symbol, sector or "N/A", sector_profile, ratios, market_context)
+    return no_update, comparison, [*(rendered or []), active_tab]
+
+
+# Cambio de periodo del gráfico histórico: 100% clientside con las figuras
+# precalculadas en los stores chart-* (sin ida y vuelta al servidor)
+app.clientside_callback(
+    """
+    function(n1w, n1, n3, n6, n12, n60, s1w, s1, s3, s6, s12, s60) {
+        const noUpdate = window.dash_clientside.no_update;
+        const triggered = window.dash_clientside.callback_context.triggered;
+        // Índice por botón, etiquetas y los 6 estados posibles de colores/outlines:
+        // se construyen una sola vez por página y se reutilizan en cada click
+        const periods = window.finanzerPeriods || (window.finanzerPeriods = (function() {
+            const ids = ['period-1wk', 'period-1mo', 'period-3mo', 'period-6mo', 'period-1y', 'period-5y'];
+            return {
+                index: Object.fromEntries(ids.map((id, i) => [id, i])),
+                labels: [' 1 semana', ' 1 mes', ' 3 meses', ' 6 meses', ' 1 año', ' 5 años'],
+                buttonStates: ids.map((_, active) => ids.map((_, i) => i === active ? 'primary' : 'secondary')
+                    .concat(ids.map((_, i) => i !== active)))
+            };
+        })());
+        const stores = [s1w, s1, s3, s6, s12, s60];
+        const idx = triggered.length ? periods.index[triggered[0].prop_id.split('.')[0]] : undefined;
+        const data = idx !== undefined ? stores[idx] : null;
+        if (!data) {
+            return Array(17).fill(noUpdate);
+        }
+        // Mismo estilo que PERIOD_PCT_STYLE, con el color del rendimiento
+        const pctStyle = {fontSize: '2rem', fontWeight: '700', color: data.pct >= 0 ? '#10b981' : '#f43f5e'};
+        return [data.figure].concat(periods.buttonStates[idx], [
+            (data.pct >= 0 ? '+' : '') + data.pct.toFixed(1) + '%', pctStyle,
+            periods.labels[idx], '$' + data.end.toFixed(2)
+        ]);
+    }
+    """,
+    Output("price-chart", "figure"),
+    *[Output(button_id, "color") for button_id in PERIOD_BUTTONS],
+    *[Output(button_id, "outline") for button_id in PERIOD_BUTTONS],
+    Output("price-performance-pct", "children"),
+    Output("price-performance-pct", "style"),
+    Output("price-performance-label", "children"),
+    Output("price-performance-end", "children"),
+    *[Input(button_id, "n_clicks") for button_id in PERIOD_BUTTONS],
+    *[State(f"chart-{button_id.split('-')[1]}", "data") for button_id in PERIOD_BUTTONS],
+    prevent_initial_call=True
+)
+
+
+# Expandir/colapsar detalles del score: se resuelve en el navegador, sin ida al servidor
+app.clientside_callback(
+    """
+    function(n_clicks, isOpen) {
+        return n_clicks ? !isOpen : isOpen;
+    }
+    """,
     Output({"type": "score-detail-collapse", "index": MATCH}, "is_open"),
     Input({"type": "score-detail-toggle", "index": MATCH}, "n_clicks"),
     State({"type": "score-detail-collapse", "index": MATCH}, "is_open"),
     prevent_initial_call=True
 )
-def toggle_score_details(n_clicks, is_open):
-    if n_clicks:
-        return not is_open
-    return is_open
+
+
+# Llenar el detalle de una categoría del score al abrirlo por primera vez.
+# Las filas (+/-, métrica, razón) se arman en el navegador como un solo Markdown.
+app.clientside_callback(
+    """
+    function(isOpen, bodyId, children, analysisData) {
+        if (!isOpen || children) {
+            return window.dash_clientside.no_update;
+        }
+        const scoreV2 = ((analysisData || {}).alerts || {}).score_v2 || {};
+        const category = (scoreV2.categories || [])[bodyId.index] || {};
+        const adjustments = category.adjustments || [];
+        if (!adjustments.length) {
+            return {namespace: 'dash_html_components', type: 'P',
+                    props: {children: 'Sin ajustes registrados', className: 'no-adjustments-text'}};
+        }
+        const escapes = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'};
+        const esc = (value) => String(value == null ? '' : value).replace(/[&<>"']/g, (c) => escapes[c]);
+        const rows = adjustments.map((adj) => {
+            const value = adj.adjustment || 0;
+            const positive = value > 0;
+            return '<div class="adjustment-row">' +
+                '<span class="adjustment-value ' + (positive ? 'positive' : 'negative') + '">' +
+                (positive ? '+' + value : String(value)) + '</span>' +
+                '<span class="adjustment-metric">' + esc(adj.metric) + '</span>' +
+                '<span class="adjustment-reason">' + esc(adj.reason) + '</span></div>';
+        });
+        return {namespace: 'dash_core_components', type: 'Markdown',
+                props: {children: rows.join('\\n'), dangerously_allow_html: true}};
+    }
+    """,
+    Output({"type": "score-detail-body", "index": MATCH}, "children"),
+    Input({"type": "score-detail-collapse", "index": MATCH}, "is_open"),
+    State({"type": "score-detail-body", "index": MATCH}, "id"),
+    State({"type": "score-detail-body", "index": MATCH}, "children"),
+    State("analysis-data", "data"),
+    prevent_initial_call=True
+)
 
 
 # Callback para descargar PDF
@@ -3000,7 +3251,7 @@ def toggle_score_details(n_clicks, is_open):
     prevent_initial_call=True
 )
 def download_pdf(n_clicks, analysis_data):
-    logger.debug(f"[PDF] Click #{n_clicks}, data exists: {analysis_data is not None}")
+    logger.debug("[PDF] Click #%s, data exists: %s", n_clicks, analysis_data is not None)
     
     if not n_clicks or n_clicks == 0:
         return no_update
@@ -3015,35 +3266,27 @@ def download_pdf(n_clicks, analysis_data):
         ratios = analysis_data.get("ratios", {})
         alerts = analysis_data.get("alerts", {})
         
-        logger.debug(f"[PDF] Generando para {symbol}...")
-        logger.debug(f"[PDF] alerts keys: {list(alerts.keys()) if alerts else 'VACIO'}")
-        
         score_v2 = alerts.get("score_v2", {})
-        logger.debug(f"[PDF] score_v2 existe: {bool(score_v2)}")
-        logger.debug(f"[PDF] score_v2 keys: {list(score_v2.keys()) if score_v2 else 'VACIO'}")
-        
         score = score_v2.get("score", 50)  # CORREGIDO: usar "score" no "total_score"
-        logger.debug(f"[PDF] score final: {score}")
-        logger.debug(f"[PDF] level: {score_v2.get('level', 'N/A')}")
-        logger.debug(f"[PDF] category_scores: {score_v2.get('category_scores', {})}")
+        
+        # Solo materializar listas de claves si DEBUG está activo
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[PDF] Generando para %s...", symbol)
+            logger.debug("[PDF] alerts keys: %s", list(alerts.keys()) if alerts else 'VACIO')
+            logger.debug("[PDF] score_v2 existe: %s", bool(score_v2))
+            logger.debug("[PDF] score_v2 keys: %s", list(score_v2.keys()) if score_v2 else 'VACIO')
+            logger.debug("[PDF] score final: %s", score)
+            logger.debug("[PDF] level: %s", score_v2.get('level', 'N/A'))
+            logger.debug("[PDF] category_scores: %s", score_v2.get('category_scores', {}))
         
         # Generar PDF
         pdf_bytes = generate_simple_pdf(symbol, company_name, ratios, alerts, score)
         
         logger.info(f"[PDF] OK - {len(pdf_bytes)} bytes generados para {symbol}")
         
-        # Guardar temporalmente y enviar
-        import tempfile
-        
-        filename = f"analisis_{symbol}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        temp_path = os.path.join(tempfile.gettempdir(), filename)
-        
-        with open(temp_path, 'wb') as f:
-            f.write(pdf_bytes)
-        
-        logger.debug(f"[PDF] Guardado en {temp_path}")
-        
-        return dcc.send_file(temp_path)
+        # Enviar los bytes directamente, sin pasar por un archivo temporal
+        filename = f"analisis_{symbol}_{day_stamp(date.today())}.pdf"
+        return dcc.send_bytes(pdf_bytes, filename)
         
     except Exception as e:
         logger.error(f"[PDF] Error generando PDF: {e}", exc_info=True)
@@ -3072,33 +3315,8 @@ app.clientside_callback(
         // Guardar en localStorage para persistencia
         localStorage.setItem('finanzer-theme', newTheme);
         
-        // Actualizar icono del botón y colores
-        const btn = document.getElementById('theme-toggle');
-        const sunIcon = document.getElementById('icon-sun');
-        const moonIcon = document.getElementById('icon-moon');
-        
-        if (sunIcon && moonIcon) {
-            if (newTheme === 'light') {
-                sunIcon.style.display = 'none';
-                moonIcon.style.display = 'block';
-            } else {
-                sunIcon.style.display = 'block';
-                moonIcon.style.display = 'none';
-            }
-        }
-        
-        // Cambiar colores del botón según el tema
-        if (btn) {
-            if (newTheme === 'light') {
-                btn.style.backgroundColor = '#ffffff';
-                btn.style.borderColor = '#d4d4d8';
-                btn.style.boxShadow = '0 4px 12px rgba(0, 0, 0, 0.15)';
-            } else {
-                btn.style.backgroundColor = '#18181b';
-                btn.style.borderColor = '#3f3f46';
-                btn.style.boxShadow = '0 4px 12px rgba(0, 0, 0, 0.4)';
-            }
-        }
+        // Actualizar icono y colores del botón (elementos cacheados)
+        applyThemeToToggle(newTheme);
         
         // NUEVO: Cambiar estilos inline de elementos con colores hardcoded
         applyThemeToInlineStyles(newTheme);
@@ -3123,42 +3341,27 @@ app.clientside_callback(
         // Aplicar tema al documento
         document.documentElement.setAttribute('data-theme', themeToApply);
         
-        // Actualizar icono del botón
-        const btn = document.getElementById('theme-toggle');
-        const sunIcon = document.getElementById('icon-sun');
-        const moonIcon = document.getElementById('icon-moon');
-        
-        if (sunIcon && moonIcon) {
-            if (themeToApply === 'light') {
-                sunIcon.style.display = 'none';
-                moonIcon.style.display = 'block';
-            } else {
-                sunIcon.style.display = 'block';
-                moonIcon.style.display = 'none';
-            }
-        }
-        
-        // Cambiar colores del botón según el tema
-        if (btn) {
-            if (themeToApply === 'light') {
-                btn.style.backgroundColor = '#ffffff';
-                btn.style.borderColor = '#d4d4d8';
-                btn.style.boxShadow = '0 4px 12px rgba(0, 0, 0, 0.15)';
-            } else {
-                btn.style.backgroundColor = '#18181b';
-                btn.style.borderColor = '#3f3f46';
-                btn.style.boxShadow = '0 4px 12px rgba(0, 0, 0, 0.4)';
-            }
-        }
+        // Actualizar icono y colores del botón (elementos cacheados)
+        applyThemeToToggle(themeToApply);
         
         // NUEVO: Aplicar tema a estilos inline después de un pequeño delay
         setTimeout(() => applyThemeToInlineStyles(themeToApply), 100);
         
         // Observer para aplicar a nuevos elementos
         if (!window.themeObserver) {
-            window.themeObserver = new MutationObserver(() => {
-                const currentTheme = document.documentElement.getAttribute('data-theme') || 'dark';
-                applyThemeToInlineStyles(currentTheme);
+            // Las mutaciones de un mismo render se agrupan en un solo frame
+            let pending = false;
+            window.themeObserver = new MutationObserver((mutations) => {
+                // Solo los nodos añadidos obligan a repintar con el mismo tema
+                if (!mutations.some(m => m.addedNodes.length)) return;
+                window.__forceRetheme = true;
+                if (pending) return;
+                pending = true;
+                requestAnimationFrame(() => {
+                    pending = false;
+                    const currentTheme = document.documentElement.getAttribute('data-theme') || 'dark';
+                    applyThemeToInlineStyles(currentTheme);
+                });
             });
             window.themeObserver.observe(document.body, { childList: true, subtree: true });
         }
@@ -3810,7 +4013,58 @@ app.index_string = '''
         }
         </style>
         <script>
+        // Delegación de clicks de sugerencias: un único listener en fase de captura
+        // guarda el ticker antes de que Dash procese el n_clicks del contenedor
+        document.addEventListener('click', function(e) {
+            const item = e.target.closest ? e.target.closest('#navbar-search-suggestions [data-ticker]') : null;
+            window.finanzerSuggestion = item ? item.dataset.ticker : null;
+        }, true);
+        
+        // Patrones de colores compilados una sola vez al cargar la página: una
+        // alternancia por grupo sustituye a las cadenas de includes()
+        // (los paréntesis se escriben como [(] para no depender de escapes)
+        // Colores claros de texto (para dark mode) que deben cambiar en light mode
+        const THEME_LIGHT_TEXT_RE = /#fff|#ffffff|white|#fafafa|#d4d4d8|#f4f4f5|rgb[(]255|rgb[(]250|rgb[(]212/;
+        const THEME_MUTED_TEXT_RE = /#71717a|#a1a1aa|#52525b|rgb[(]113|rgb[(]161|rgb[(]82/;
+        const THEME_ACCENT_RE = /#34d399|#10b981|rgb[(]52, 211|rgb[(]16, 185/;
+        // Colores de estado (verde, rojo, amarillo) que no se modifican en el texto
+        const THEME_STATUS_TEXT_RE = /#22c55e|#ef4444|#eab308|#10b981|#f43f5e|#3b82f6|rgb[(]34, 197|rgb[(]239, 68|rgb[(]234, 179/;
+        // Fondos de acento y de valoración de sensibilidad que se conservan
+        const THEME_PROTECTED_BG_RE = /#10b981|#34d399|#22c55e|#ef4444|#eab308|#3b82f6|linear-gradient|#166534|#15803d|#854d0e|#b91c1c|#7f1d1d/;
+        const THEME_BG_PRIMARY_RE = /#09090b|rgb[(]9, 9, 11[)]/;
+        const THEME_BG_SECONDARY_RE = /#18181b|rgb[(]24, 24, 27[)]|#1f1f23/;
+        const THEME_BG_TERTIARY_RE = /#27272a|rgb[(]39, 39, 42[)]/;
+        const THEME_BORDER_RE = /#3f3f46|rgb[(]63, 63, 70[)]/;
+        
+        // Elementos del botón de tema: el layout es fijo, así que se buscan una
+        // sola vez y solo se reescriben sus estilos cuando el tema cambia
+        function applyThemeToToggle(theme) {
+            const els = window.__themeEls = window.__themeEls || {btn: null, sun: null, moon: null};
+            if (!els.btn || !els.btn.isConnected) {
+                els.btn = document.getElementById('theme-toggle');
+                els.sun = document.getElementById('icon-sun');
+                els.moon = document.getElementById('icon-moon');
+                window.__lastTheme = null;
+            }
+            if (!els.btn || window.__lastTheme === theme) return;
+            window.__lastTheme = theme;
+            
+            const isLight = theme === 'light';
+            if (els.sun && els.moon) {
+                els.sun.style.display = isLight ? 'none' : 'block';
+                els.moon.style.display = isLight ? 'block' : 'none';
+            }
+            els.btn.style.backgroundColor = isLight ? '#ffffff' : '#18181b';
+            els.btn.style.borderColor = isLight ? '#d4d4d8' : '#3f3f46';
+            els.btn.style.boxShadow = isLight ? '0 4px 12px rgba(0, 0, 0, 0.15)' : '0 4px 12px rgba(0, 0, 0, 0.4)';
+        }
+        
         function applyThemeToInlineStyles(theme) {
+            // Camino rápido: el tema ya está aplicado y no hay nodos nuevos
+            if (window.__appliedTheme === theme && !window.__forceRetheme) return;
+            window.__appliedTheme = theme;
+            window.__forceRetheme = false;
+            
             const isLight = theme === 'light';
             
             // PRIMERO: Limpiar TODOS los estilos inline de elementos de sensibilidad
@@ -3845,99 +4099,62 @@ app.index_string = '''
             
             const c = isLight ? colors.light : colors.dark;
             
-            // Lista de colores claros de texto (para dark mode) que deben cambiar en light mode
-            const lightTextColors = ['#fff', '#ffffff', 'white', '#fafafa', '#d4d4d8', '#f4f4f5', 'rgb(255', 'rgb(250', 'rgb(212'];
-            const mutedTextColors = ['#71717a', '#a1a1aa', '#52525b', 'rgb(113', 'rgb(161', 'rgb(82'];
-            const accentColors = ['#34d399', '#10b981', 'rgb(52, 211', 'rgb(16, 185'];
-            
-            // Cambiar colores de texto
-            document.querySelectorAll('[style]').forEach(el => {
+            // Un único recorrido sobre los elementos con estilo inline: el atributo
+            // se lee una vez y se decide color, fondo y borde en la misma pasada
+            const all = document.querySelectorAll('[style]');
+            for (const el of all) {
                 // No modificar NADA dentro de la tabla o contenedor de sensibilidad
-                if (el.closest('.sensitivity-table')) return;
-                if (el.closest('.sensitivity-container')) return;
-                if (el.hasAttribute('data-preserve')) return;
-                
-                const style = el.getAttribute('style') || '';
-                if (!style.includes('color')) return;
-                
-                // No modificar botones
-                if (el.closest('button') || el.closest('[class*="btn"]') || el.closest('.download-btn')) {
-                    return;
-                }
-                
-                // No modificar colores de estado (verde, rojo, amarillo)
-                if (style.includes('#22c55e') || style.includes('#ef4444') || style.includes('#eab308') || 
-                    style.includes('#10b981') || style.includes('#f43f5e') || style.includes('#3b82f6') ||
-                    style.includes('rgb(34, 197') || style.includes('rgb(239, 68') || style.includes('rgb(234, 179')) {
-                    return;
-                }
-                
-                // Texto claro -> oscuro
-                if (lightTextColors.some(c => style.includes(c))) {
-                    el.style.color = c.textPrimary;
-                }
-                
-                // Texto muted
-                if (mutedTextColors.some(col => style.includes(col))) {
-                    el.style.color = c.textMuted;
-                }
-                
-                // Texto accent (ahora verde)
-                if (accentColors.some(col => style.includes(col))) {
-                    el.style.color = isLight ? '#059669' : '#34d399';
-                }
-            });
-            
-            // Cambiar backgrounds
-            document.querySelectorAll('[style*="background"]').forEach(el => {
-                // No modificar NADA relacionado con sensibilidad
-                if (el.closest('.sensitivity-table')) return;
-                if (el.closest('.sensitivity-container')) return;
-                if (el.className && typeof el.className === 'string' && el.className.includes('sensitivity')) return;
-                if (el.className && typeof el.className === 'string' && el.className.includes('sens-')) return;
-                if (el.hasAttribute('data-preserve')) return;
+                if (el.closest('.sensitivity-table')) continue;
+                if (el.closest('.sensitivity-container')) continue;
+                if (el.hasAttribute('data-preserve')) continue;
                 
                 const style = el.getAttribute('style') || '';
+                const hasColor = style.indexOf('color') !== -1;
+                const hasBackground = style.indexOf('background') !== -1;
+                const hasBorder = style.indexOf('border') !== -1;
                 
-                // No cambiar botones con colores de acento (ahora verde)
-                if (style.includes('#10b981') || style.includes('#34d399') || 
-                    style.includes('#22c55e') || style.includes('#ef4444') ||
-                    style.includes('#eab308') || style.includes('#3b82f6') ||
-                    style.includes('linear-gradient')) {
-                    return;
-                }
-                
-                // No cambiar colores de valoración de sensibilidad
-                if (style.includes('#166534') || style.includes('#15803d') ||
-                    style.includes('#854d0e') || style.includes('#b91c1c') ||
-                    style.includes('#7f1d1d')) {
-                    return;
+                // Cambiar colores de texto (sin tocar botones ni colores de estado)
+                if (hasColor &&
+                    !(el.closest('button') || el.closest('[class*="btn"]') || el.closest('.download-btn')) &&
+                    !THEME_STATUS_TEXT_RE.test(style)) {
+                    // Texto claro -> oscuro
+                    if (THEME_LIGHT_TEXT_RE.test(style)) {
+                        el.style.color = c.textPrimary;
+                    }
+                    
+                    // Texto muted
+                    if (THEME_MUTED_TEXT_RE.test(style)) {
+                        el.style.color = c.textMuted;
+                    }
+                    
+                    // Texto accent (ahora verde)
+                    if (THEME_ACCENT_RE.test(style)) {
+                        el.style.color = isLight ? '#059669' : '#34d399';
+                    }
                 }
                 
-                // Backgrounds oscuros
-                if (style.includes('#09090b') || style.includes('rgb(9, 9, 11)')) {
-                    el.style.backgroundColor = c.bgPrimary;
-                }
-                if (style.includes('#18181b') || style.includes('rgb(24, 24, 27)') || style.includes('#1f1f23')) {
-                    el.style.backgroundColor = c.bgSecondary;
-                }
-                if (style.includes('#27272a') || style.includes('rgb(39, 39, 42)')) {
-                    el.style.backgroundColor = c.bgTertiary;
+                // Cambiar backgrounds (sin tocar acentos ni colores de valoración)
+                const className = typeof el.className === 'string' ? el.className : '';
+                if (hasBackground &&
+                    !className.includes('sensitivity') && !className.includes('sens-') &&
+                    !THEME_PROTECTED_BG_RE.test(style)) {
+                    // Backgrounds oscuros
+                    if (THEME_BG_PRIMARY_RE.test(style)) {
+                        el.style.backgroundColor = c.bgPrimary;
+                    }
+                    if (THEME_BG_SECONDARY_RE.test(style)) {
+                        el.style.backgroundColor = c.bgSecondary;
+                    }
+                    if (THEME_BG_TERTIARY_RE.test(style)) {
+                        el.style.backgroundColor = c.bgTertiary;
+                    }
                 }
-            });
-            
-            // Cambiar bordes
-            document.querySelectorAll('[style*="border"]').forEach(el => {
-                // No modificar NADA dentro de la tabla o contenedor de sensibilidad
-                if (el.closest('.sensitivity-table')) return;
-                if (el.closest('.sensitivity-container')) return;
-                if (el.hasAttribute('data-preserve')) return;
                 
-                const style = el.getAttribute('style') || '';
-                if (style.includes('#3f3f46') || style.includes('rgb(63, 63, 70)')) {
+                // Cambiar bordes
+                if (hasBorder && THEME_BORDER_RE.test(style)) {
                     el.style.borderColor = c.border;
                 }
-            });
+            }
             
             // Metric cards en modo claro
             if (isLight) {
@@ -4185,9 +4402,10 @@ def clear_comparison(n_clicks):
 
 
 if __name__ == "__main__":
-    # Debug mode controlado por variable de entorno (default: False para producción)
-    debug_mode = os.getenv("DEBUG", "false").lower() == "true"
-    port = int(os.getenv("PORT", 8050))
-    
-    logger.info(f"Starting Finanzer - Debug: {debug_mode}, Port: {port}")
-    app.run(debug=debug_mode, host="0.0.0.0", port=port)
+    # Servidor de desarrollo de Dash (un solo proceso). En producción usar
+    # gunicorn con varios workers sobre `server` (ver Procfile).
+    logger.info(f"Starting Finanzer - Debug: {DEBUG_MODE}, Port: {PORT}")
+    if not DEBUG_MODE:
+        workers = os.environ.get("WEB_CONCURRENCY", "2")
+        logger.info(f"Para producción (como el Procfile): gunicorn app:server --workers {workers} --bind 0.0.0.0:{PORT}")
+    app.run(debug=DEBUG_MODE, host="0.0.0.0", port=PORT)
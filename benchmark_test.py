@@ -14,7 +14,7 @@ import time
 import sys
 
 def run_benchmark():
-    from data_fetcher import FinancialDataService, _data_cache
+    from data_fetcher import FinancialDataService, clear_caches
     
     symbols = ["AAPL", "NVDA", "MSFT"] if "--multi" in sys.argv else [sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].startswith("-") else "AAPL"]
     
@@ -29,7 +29,7 @@ def run_benchmark():
         print("-" * 40)
         
         # Limpiar caché
-        _data_cache.clear()
+        clear_caches()
         
         # Medir tiempo
         start = time.time()
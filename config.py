@@ -7,7 +7,9 @@ Autor: Esteban
 Versión: 2.5
 """
 
+from bisect import bisect_right
 from dataclasses import dataclass
+from types import MappingProxyType
 from typing import Dict
 
 # =============================================================================
@@ -83,14 +85,41 @@ SCORE_CATEGORIES = {
     "crecimiento": {"peso": 20, "descripcion": "Crecimiento"}
 }
 
-# Niveles de score
-SCORE_LEVELS = {
-    "EXCEPTIONAL": {"min": 80, "color": "#22c55e", "label": "Excepcional"},
-    "GOOD": {"min": 65, "color": "#84cc16", "label": "Bueno"},
-    "FAIR": {"min": 50, "color": "#eab308", "label": "Aceptable"},
-    "WEAK": {"min": 35, "color": "#f97316", "label": "Débil"},
-    "POOR": {"min": 0, "color": "#ef4444", "label": "Pobre"}
-}
+@dataclass(frozen=True)
+class ScoreLevel:
+    """
+    Nivel de score inmutable (slots explícitos, compatible con Python 3.8).
+    
+    Antes get_score_level y SCORE_LEVELS devolvían dicts; level["color"] y
+    level.get("label") siguen funcionando para el código que los usaba así.
+    """
+    __slots__ = ("name", "min", "color", "label")
+    name: str
+    min: int
+    color: str
+    label: str
+    
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+
+# Niveles de score (de mayor a menor mínimo; solo lectura)
+SCORE_LEVELS = MappingProxyType({
+    "EXCEPTIONAL": ScoreLevel("EXCEPTIONAL", 80, "#22c55e", "Excepcional"),
+    "GOOD": ScoreLevel("GOOD", 65, "#84cc16", "Bueno"),
+    "FAIR": ScoreLevel("FAIR", 50, "#eab308", "Aceptable"),
+    "WEAK": ScoreLevel("WEAK", 35, "#f97316", "Débil"),
+    "POOR": ScoreLevel("POOR", 0, "#ef4444", "Pobre"),
+})
+
+# Niveles ordenados por mínimo ascendente para get_score_level (bisect)
+_SCORE_LEVELS_SORTED = tuple(sorted(SCORE_LEVELS.values(), key=lambda level: level.min))
+_SCORE_LEVEL_MINS = tuple(level.min for level in _SCORE_LEVELS_SORTED)
 
 # =============================================================================
 # GROWTH QUALITY THRESHOLDS
@@ -156,13 +185,15 @@ CACHE_PROFILE_TTL = 30            # TTL para perfiles (cambian poco)
 
 YAHOO_FINANCE_DELAY = 0.5         # Segundos entre requests
 MAX_PARALLEL_REQUESTS = 4         # Máximo de requests paralelos
+YAHOO_REQUESTS_PER_HOUR = 360     # Tope horario de requests a Yahoo, por proceso:
+                                  # con gunicorn el total es × WEB_CONCURRENCY
 
 # =============================================================================
 # UI SETTINGS
 # =============================================================================
 
-# Colores del tema
-UI_COLORS = {
+# Colores del tema (solo lectura)
+UI_COLORS = MappingProxyType({
     "primary": "#3b82f6",         # Azul principal
     "success": "#22c55e",         # Verde éxito
     "warning": "#eab308",         # Amarillo advertencia
@@ -173,7 +204,7 @@ UI_COLORS = {
     "card": "#27272a",            # Fondo de tarjetas
     "text": "#fafafa",            # Texto principal
     "text_muted": "#a1a1aa"       # Texto secundario
-}
+})
 
 # Formato de números
 NUMBER_FORMAT = {
@@ -187,7 +218,8 @@ NUMBER_FORMAT = {
 # SECTOR-SPECIFIC ADJUSTMENTS
 # =============================================================================
 
-SECTOR_ADJUSTMENTS = {
+# Ajustes por sector (solo lectura, también cada sub-diccionario)
+_SECTOR_ADJUSTMENTS = {
     "financials": {
         "ignore_debt_equity": True,
         "debt_equity_max": 15.0,
@@ -223,17 +255,20 @@ SECTOR_ADJUSTMENTS = {
     }
 }
 
+SECTOR_ADJUSTMENTS = MappingProxyType({
+    sector: MappingProxyType(adjustments)
+    for sector, adjustments in _SECTOR_ADJUSTMENTS.items()
+})
+
 
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
-def get_score_level(score: float) -> dict:
-    """Retorna el nivel correspondiente a un score."""
-    for level_name, config in SCORE_LEVELS.items():
-        if score >= config["min"]:
-            return {"name": level_name, **config}
-    return {"name": "POOR", **SCORE_LEVELS["POOR"]}
+def get_score_level(score: float) -> ScoreLevel:
+    """Retorna el nivel correspondiente a un score (búsqueda binaria sobre los mínimos)."""
+    i = bisect_right(_SCORE_LEVEL_MINS, score) - 1
+    return _SCORE_LEVELS_SORTED[i] if i >= 0 else _SCORE_LEVELS_SORTED[0]
 
 
 def get_altman_zone(z_score: float) -> str:
@@ -9,15 +9,20 @@ Versión: 2.10 - Rate limiting con retry y backoff exponencial
 """
 
 import os
+import re
+import sys
 import time
 import random
 import logging
-from typing import Optional, Dict, List, Any, Callable
-from dataclasses import dataclass
-from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from typing import Optional, Dict, List, Any, Callable, NamedTuple
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 import hashlib
 import json
+import tempfile
+import threading
+from collections import OrderedDict
 
 # =========================
 # CONSTANTES DE RETRY
@@ -26,6 +31,7 @@ MAX_RETRIES = 4       # Reintentos para rate limiting
 BASE_DELAY = 3        # segundos base entre reintentos
 MAX_DELAY = 45        # segundos máximo de espera
 
+
 # Configurar logging específico para este módulo
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -38,6 +44,14 @@ if not logger.handlers:
     ))
     logger.addHandler(handler)
 
+try:
+    from config import YAHOO_FINANCE_DELAY, MAX_PARALLEL_REQUESTS, YAHOO_REQUESTS_PER_HOUR
+except ImportError:
+    # Fallback si config.py no está disponible
+    YAHOO_FINANCE_DELAY = 0.5
+    MAX_PARALLEL_REQUESTS = 4
+    YAHOO_REQUESTS_PER_HOUR = 360
+
 try:
     import pandas as pd
     PANDAS_AVAILABLE = True
@@ -65,6 +79,79 @@ try:
 except ImportError:
     REQUESTS_AVAILABLE = False
 
+# Detección de rate limiting: excepción específica de yfinance (si existe) o
+# mensaje con "rate ... limit", "too many requests" o un 429
+_RATE_LIMIT_ERRORS = (YFRateLimitError,) if YF_RATE_LIMIT_AVAILABLE else ()
+_RATE_LIMIT_RE = re.compile(r"rate.*limit|limit.*rate|too many requests|\b429\b", re.IGNORECASE | re.DOTALL)
+
+# Última espera de cada hilo para el backoff con "decorrelated jitter"
+_backoff_state = threading.local()
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Segundos del header Retry-After de la respuesta HTTP asociada al error, si existe."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(error: Exception, attempt: int) -> float:
+    """
+    Espera antes de reintentar tras un rate limit.
+    
+    Usa "decorrelated jitter": cada espera se sortea entre BASE_DELAY y el
+    triple de la anterior (tope MAX_DELAY), así los hilos que reciben un 429
+    a la vez no vuelven a chocar en el mismo instante. Si Yahoo envía
+    Retry-After, se respeta ese valor, también con tope MAX_DELAY.
+    """
+    last_sleep = BASE_DELAY if attempt == 0 else getattr(_backoff_state, "last_sleep", BASE_DELAY)
+    delay = min(MAX_DELAY, random.uniform(BASE_DELAY, last_sleep * 3))
+    retry_after = _retry_after_seconds(error)
+    if retry_after is not None:
+        delay = min(MAX_DELAY, max(0.0, retry_after))
+    _backoff_state.last_sleep = delay
+    return delay
+
+
+# Enfriamiento del host: tras varios 429 seguidos, Yahoo está bloqueando la IP
+# y reintentar símbolo a símbolo solo alarga el bloqueo
+HOST_COOLDOWN_THRESHOLD = 3      # 429 consecutivos que activan el enfriamiento
+HOST_COOLDOWN_SECONDS = 120      # duración del enfriamiento
+
+_host_cooldown_until = 0.0
+_consecutive_rate_limits = 0
+_cooldown_lock = threading.Lock()
+
+
+def _record_rate_limit() -> bool:
+    """Registra un 429. Retorna True si con él se activa (o sigue activo) el enfriamiento."""
+    global _host_cooldown_until, _consecutive_rate_limits
+    with _cooldown_lock:
+        _consecutive_rate_limits += 1
+        if _consecutive_rate_limits >= HOST_COOLDOWN_THRESHOLD:
+            _host_cooldown_until = time.time() + HOST_COOLDOWN_SECONDS
+            _consecutive_rate_limits = 0
+            logger.warning(f"🧊 Yahoo Finance limitando peticiones: pausa de {HOST_COOLDOWN_SECONDS}s")
+        return time.time() < _host_cooldown_until
+
+
+def _record_success() -> None:
+    """Una respuesta válida rompe la racha de 429."""
+    global _consecutive_rate_limits
+    if _consecutive_rate_limits:
+        with _cooldown_lock:
+            _consecutive_rate_limits = 0
+
+
+def host_cooling_down() -> bool:
+    """True mientras dure el enfriamiento tras una racha de 429."""
+    return time.time() < _host_cooldown_until
+
 
 # =========================
 # CONSTANTES DE CONFIGURACIÓN
@@ -73,10 +160,20 @@ except ImportError:
 # Timeouts para operaciones de red (en segundos)
 API_TIMEOUT_SECONDS = 15          # Timeout para llamadas API individuales
 PARALLEL_TASK_TIMEOUT = 20        # Timeout para tareas paralelas
+THROTTLE_MAX_WAIT_SECONDS = 5     # Espera máxima por turno en los limitadores de Yahoo
 
 # Configuración del ThreadPoolExecutor
 THREAD_POOL_WORKERS = 4           # Número de workers paralelos
 
+# Caché en disco: directorio y TTL por endpoint
+DISK_CACHE_DIR = os.environ.get("FINANZER_CACHE_DIR", ".cache")
+DISK_CACHE_TTLS = {
+    "profile": timedelta(days=30),      # Nombre, sector, descripción: casi nunca cambian
+    "financials": timedelta(days=1),    # Incluye precio y múltiplos de mercado
+    "historical": timedelta(days=30),   # Estados anuales: cambian una vez al año
+    "detailed": timedelta(days=30),     # Históricos año por año (mismos estados anuales)
+}
+
 
 # =========================
 # EXCEPCIONES PERSONALIZADAS
@@ -86,8 +183,11 @@ class DataFetchError(Exception):
     """Error base para problemas de obtención de datos."""
     pass
 
-class APITimeoutError(DataFetchError):
-    """Timeout al llamar a una API externa."""
+class APITimeoutError(DataFetchError, TimeoutError):
+    """
+    Timeout al llamar a una API externa. También es un TimeoutError builtin,
+    así los except (ConnectionError, TimeoutError) existentes degradan igual.
+    """
     pass
 
 class InvalidSymbolError(DataFetchError):
@@ -103,107 +203,455 @@ class DataValidationError(DataFetchError):
     pass
 
 
+# =========================
+# LLAMADAS CON TIMEOUT
+# =========================
+
+# yfinance no expone timeout para Ticker.info: un socket colgado bloquearía el
+# callback de Dash indefinidamente. Se ejecuta en un pool propio y se espera
+# como máximo API_TIMEOUT_SECONDS (el hilo lento termina por su cuenta).
+_info_executor = ThreadPoolExecutor(max_workers=THREAD_POOL_WORKERS, thread_name_prefix="yf-info")
+
+# Pool para solapar las peticiones independientes de un mismo símbolo (info y
+# los tres estados): la latencia pasa a ser la de la más lenta, no la suma
+_overlap_executor = ThreadPoolExecutor(max_workers=THREAD_POOL_WORKERS * 3, thread_name_prefix="yf-overlap")
+
+
+class TokenBucket:
+    """
+    Limitador token bucket compartido por todos los hilos del proceso.
+    
+    Repone un token cada `interval` segundos hasta `capacity`; permite ráfagas
+    cortas (p.ej. las 4 llamadas paralelas de un análisis) y luego espacia las
+    peticiones para no provocar el 429 de Yahoo en lugar de reaccionar a él.
+    """
+    
+    def __init__(self, interval: float, capacity: int):
+        self._interval = interval
+        self._capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Toma un token, esperando (fuera del lock) si el bucket está vacío.
+        
+        Retorna los segundos esperados, o None sin consumir token si la espera
+        superaría `max_wait`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._tokens = min(self._capacity, self._tokens + elapsed / self._interval)
+            self._updated = now
+            # El token se reserva ya: un saldo negativo es la cola de espera
+            wait = (1.0 - self._tokens) * self._interval if self._tokens < 1.0 else 0.0
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= 1.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    def release(self):
+        """Devuelve un token tomado y no usado."""
+        with self._lock:
+            self._tokens = min(self._capacity, self._tokens + 1.0)
+
+
+# Los limitadores viven en memoria del proceso: con gunicorn cada worker tiene
+# los suyos, así que el tope real es el configurado × WEB_CONCURRENCY
+# (p.ej. YAHOO_REQUESTS_PER_HOUR × 2 con el Procfile por defecto).
+# Un token cada YAHOO_FINANCE_DELAY segundos, ráfagas de hasta MAX_PARALLEL_REQUESTS
+_yahoo_limiter = TokenBucket(YAHOO_FINANCE_DELAY, MAX_PARALLEL_REQUESTS)
+# Tope horario: YAHOO_REQUESTS_PER_HOUR sostenidas, con el cupo completo disponible
+_yahoo_hourly_limiter = TokenBucket(3600.0 / YAHOO_REQUESTS_PER_HOUR, YAHOO_REQUESTS_PER_HOUR)
+
+
+def throttle_yahoo(max_wait: float = THROTTLE_MAX_WAIT_SECONDS):
+    """
+    Espera turno en los limitadores compartidos antes de una petición a Yahoo.
+    
+    Raises:
+        APITimeoutError: Si el turno tardaría más de `max_wait` segundos (p.ej.
+            cupo horario agotado); mejor fallar rápido que bloquear el callback
+            de Dash más allá del timeout del worker.
+    """
+    if _yahoo_hourly_limiter.acquire(max_wait) is None:
+        raise APITimeoutError("Cupo horario de peticiones a Yahoo agotado")
+    if _yahoo_limiter.acquire(max_wait) is None:
+        _yahoo_hourly_limiter.release()
+        raise APITimeoutError("Demasiadas peticiones a Yahoo en cola")
+
+
+def fetch_ticker_info(ticker, timeout: float = API_TIMEOUT_SECONDS) -> Dict[str, Any]:
+    """
+    Retorna ticker.info con un límite de tiempo.
+    
+    Raises:
+        TimeoutError: Si Yahoo no responde en `timeout` segundos. Se usa el
+            TimeoutError builtin para que los except (ConnectionError,
+            TimeoutError) existentes lo traten como error de red.
+    """
+    throttle_yahoo()
+    future = _info_executor.submit(lambda: ticker.info)
+    try:
+        return future.result(timeout=timeout)
+    except FuturesTimeoutError:
+        raise TimeoutError(f"Ticker.info de {getattr(ticker, 'ticker', ticker)} excedió {timeout}s") from None
+
+
 # =========================
 # SISTEMA DE CACHÉ SIMPLE
 # =========================
 
+# Claves hasta este largo se guardan en texto plano (un dict ya las hashea)
+MAX_RAW_CACHE_KEY_LENGTH = 128
+
+
+class _CacheEntry:
+    """Entrada de SimpleCache: valor y expiración (time.monotonic) en slots, sin dict por entrada."""
+    __slots__ = ("value", "expires")
+    
+    def __init__(self, value: Any, expires: float):
+        self.value = value
+        self.expires = expires
+
+
 class SimpleCache:
     """
     Caché en memoria con TTL (Time To Live) y límite de entradas.
     Implementa LRU (Least Recently Used) eviction para prevenir memory leaks.
+    Es seguro entre hilos: los métodos públicos toman un único lock y
+    _evict_expired asume que ya se tiene.
+    
+    No se persiste: cada entrada tiene respaldo en FileCache (L2 en disco),
+    que sobrevive a reinicios y es compartido por todos los workers de
+    gunicorn, así que un proceso nuevo se recalienta sin llamar a Yahoo.
     """
     
     def __init__(self, default_ttl_minutes: int = 15, max_entries: int = 500):
-        self._cache: Dict[str, Dict] = {}
-        self._default_ttl = timedelta(minutes=default_ttl_minutes)
+        # Orden de inserción = orden de acceso (LRU al inicio, más reciente al final)
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._default_ttl_sec = default_ttl_minutes * 60.0
         self._max_entries = max_entries
-        self._access_order: List[str] = []  # Para LRU tracking
+        self._lock = threading.Lock()
     
     def _make_key(self, prefix: str, *args) -> str:
-        """Genera una clave única para el caché."""
+        """
+        Genera una clave única para el caché. Las claves cortas (p.ej. "profile:AAPL")
+        se usan tal cual; solo las muy largas se resumen con BLAKE2b.
+        """
         key_data = f"{prefix}:{':'.join(str(a) for a in args)}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        if len(key_data) <= MAX_RAW_CACHE_KEY_LENGTH:
+            return key_data
+        return hashlib.blake2b(key_data.encode(), digest_size=16).hexdigest()
     
     def _evict_expired(self):
         """Elimina entradas expiradas."""
-        now = datetime.now()
+        now = time.monotonic()
         expired_keys = [
             key for key, entry in self._cache.items()
-            if now > entry["expires"]
+            if now > entry.expires
         ]
         for key in expired_keys:
             del self._cache[key]
-            if key in self._access_order:
-                self._access_order.remove(key)
-    
-    def _evict_lru(self, count: int = 1):
-        """Elimina las entradas menos recientemente usadas."""
-        for _ in range(min(count, len(self._access_order))):
-            if self._access_order:
-                oldest_key = self._access_order.pop(0)
-                if oldest_key in self._cache:
-                    del self._cache[oldest_key]
     
     def get(self, key: str) -> Optional[Any]:
         """Obtiene un valor del caché si existe y no ha expirado."""
-        if key not in self._cache:
-            return None
-        
-        entry = self._cache[key]
-        if datetime.now() > entry["expires"]:
-            del self._cache[key]
-            if key in self._access_order:
-                self._access_order.remove(key)
-            return None
-        
-        # Actualizar orden de acceso (mover al final = más reciente)
-        if key in self._access_order:
-            self._access_order.remove(key)
-        self._access_order.append(key)
-        
-        return entry["value"]
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            
+            if time.monotonic() > entry.expires:
+                del self._cache[key]
+                return None
+            
+            # Actualizar orden de acceso (mover al final = más reciente), O(1)
+            self._cache.move_to_end(key)
+            
+            return entry.value
     
     def set(self, key: str, value: Any, ttl_minutes: Optional[int] = None):
         """Guarda un valor en el caché."""
-        # Limpiar expirados primero
-        self._evict_expired()
-        
-        # Si alcanzamos el límite, eliminar los más viejos
-        while len(self._cache) >= self._max_entries:
-            self._evict_lru(count=max(1, self._max_entries // 10))  # Eliminar 10%
-        
-        ttl = timedelta(minutes=ttl_minutes) if ttl_minutes else self._default_ttl
-        self._cache[key] = {
-            "value": value,
-            "expires": datetime.now() + ttl,
-            "created": datetime.now()
-        }
+        # Reloj monotónico: floats sin objetos datetime e inmune a ajustes de hora
+        ttl_sec = ttl_minutes * 60.0 if ttl_minutes else self._default_ttl_sec
+        entry = _CacheEntry(value, time.monotonic() + ttl_sec)
         
-        # Registrar en orden de acceso
-        if key in self._access_order:
-            self._access_order.remove(key)
-        self._access_order.append(key)
+        with self._lock:
+            # Limpiar expirados primero
+            self._evict_expired()
+            
+            # Si alcanzamos el límite, eliminar el menos usado (O(1), sin lotes)
+            if key not in self._cache and len(self._cache) >= self._max_entries:
+                self._cache.popitem(last=False)
+            
+            self._cache[key] = entry
+            
+            # Registrar en orden de acceso
+            self._cache.move_to_end(key)
     
     def clear(self):
         """Limpia todo el caché."""
-        self._cache.clear()
-        self._access_order.clear()
+        with self._lock:
+            self._cache.clear()
     
     def stats(self) -> Dict:
         """Retorna estadísticas del caché."""
-        self._evict_expired()  # Limpiar antes de reportar
+        with self._lock:
+            self._evict_expired()  # Limpiar antes de reportar
+            entries = len(self._cache)
         return {
-            "entries": len(self._cache),
+            "entries": entries,
             "max_entries": self._max_entries,
-            "utilization": f"{len(self._cache) / self._max_entries * 100:.1f}%"
+            "utilization": f"{entries / self._max_entries * 100:.1f}%"
         }
 
 
-# Instancia global del caché
-_data_cache = SimpleCache(default_ttl_minutes=30)
+# Nombres de carpeta aceptados por FileCache: tickers de Yahoo (BRK-B, ^GSPC,
+# EURUSD=X, 7203.T). Sin separadores de ruta, así un símbolo nunca sale de base_dir
+_CACHE_SYMBOL_RE = re.compile(r"^[A-Z0-9.\-^=]+$")
+
+
+class FileCache:
+    """
+    Caché persistente en disco (JSON) con TTL por endpoint.
+    
+    Cada entrada vive en {base_dir}/{SYMBOL}/{endpoint}.json con el formato
+    {"ts": <epoch>, "data": <payload>}. Sobrevive a reinicios del proceso, así
+    que una acción vista recientemente se carga sin llamar a Yahoo.
+    Los errores de E/S nunca se propagan: una lectura fallida es un miss.
+    """
+    
+    def __init__(self, base_dir: str, ttls: Dict[str, timedelta]):
+        self._base_dir = base_dir
+        self._ttls = {endpoint: ttl.total_seconds() for endpoint, ttl in ttls.items()}
+    
+    def _path(self, symbol: str, endpoint: str, *args) -> Optional[str]:
+        """Ruta de la entrada, o None si el símbolo no es un nombre de carpeta seguro."""
+        folder = str(symbol).strip().upper()
+        if not _CACHE_SYMBOL_RE.match(folder) or not folder.strip("."):
+            return None
+        filename = "_".join([endpoint, *(str(a) for a in args)])
+        return os.path.join(self._base_dir, folder, f"{filename}.json")
+    
+    def get(self, symbol: str, endpoint: str, *args) -> Optional[Any]:
+        """Retorna el payload si existe y no ha expirado."""
+        entry = self.get_entry(symbol, endpoint, *args)
+        return entry[1] if entry else None
+    
+    def get_entry(self, symbol: str, endpoint: str, *args) -> Optional[tuple]:
+        """
+        Retorna (ts, payload) si existe y no superó el TTL del endpoint, para
+        que el llamador pueda aplicar un criterio de frescura más estricto.
+        """
+        path = self._path(symbol, endpoint, *args)
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                envelope = json.load(f)
+            ts = float(envelope.get("ts", 0))
+        except (OSError, ValueError, TypeError, AttributeError):
+            return None
+        
+        ttl = self._ttls.get(endpoint)
+        if ttl is None or time.time() - ts > ttl:
+            return None
+        return ts, envelope.get("data")
+    
+    def set(self, symbol: str, endpoint: str, data: Any, *args):
+        """
+        Guarda el payload de forma atómica: archivo temporal único (mkstemp, así
+        dos hilos escribiendo la misma clave no se pisan) escrito con os.write
+        y luego rename.
+        """
+        path = self._path(symbol, endpoint, *args)
+        if path is None:
+            logger.debug(f"Símbolo no válido para el caché en disco: {symbol!r}")
+            return
+        tmp_path = None
+        try:
+            payload = json.dumps({"ts": time.time(), "data": data}).encode("utf-8")
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                view = memoryview(payload)
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.debug(f"No se pudo escribir caché en disco {path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+    
+    def delete(self, symbol: str, endpoint: str, *args):
+        """Elimina la entrada (p.ej. si su formato ya no corresponde al actual)."""
+        path = self._path(symbol, endpoint, *args)
+        if path is None:
+            return
+        try:
+            os.remove(path)
+        except OSError:
+            pass
 
 
-@dataclass
+class StaleWhileRevalidateCache:
+    """
+    Caché L1 en memoria con política stale-while-revalidate.
+    
+    - fresh (edad < ttl): se retorna directamente.
+    - stale (edad >= ttl): se retorna el valor viejo de inmediato y se agenda
+      un refresco en segundo plano (uno solo por clave a la vez).
+    - missing: se obtiene de forma síncrona.
+    
+    Pensado para llamadas de yfinance muy repetidas entre sesiones (SPY, ETFs
+    sectoriales, tickers populares) donde un dato de pocos minutos es aceptable.
+    """
+    
+    def __init__(self, maxsize: int, ttl_seconds: float, executor: ThreadPoolExecutor):
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (value, fetched_at)
+        self._maxsize = maxsize
+        self._ttl = ttl_seconds
+        self._executor = executor
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+    
+    def _store(self, key: tuple, value: Any):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+    
+    def _refresh(self, key: tuple, fetch_fn: Callable[[], Any]):
+        try:
+            self._store(key, fetch_fn())
+        except Exception as e:
+            logger.debug(f"Refresco en segundo plano falló para {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+    
+    def get_or_fetch(self, key: tuple, fetch_fn: Callable[[], Any]) -> Any:
+        """Retorna el valor de la clave, obteniéndolo con fetch_fn si hace falta."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                value, fetched_at = entry
+                if time.monotonic() - fetched_at < self._ttl:
+                    return value
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    self._executor.submit(self._refresh, key, fetch_fn)
+                return value
+        
+        value = fetch_fn()
+        self._store(key, value)
+        return value
+    
+    def clear(self):
+        """Limpia todas las entradas."""
+        with self._lock:
+            self._entries.clear()
+
+
+# TTL (minutos) de cada pool en memoria; un pool por endpoint evita que, p.ej.,
+# muchos históricos desalojen perfiles que se consultan en cada navegación
+CACHE_POOL_TTL_MINUTES = {
+    "profile": 24 * 60,     # Nombre, sector, descripción: casi nunca cambian
+    "financials": 60,       # Incluye precio: ver financials_ttl_minutes
+    "historical": 24 * 60,  # Estados anuales
+    "detailed": 24 * 60,    # Estados anuales
+}
+DEFAULT_CACHE_TTL_MINUTES = 30
+
+# Sesión regular de NYSE en UTC; el cierre cubre tanto horario de verano
+# (20:00) como de invierno (21:00)
+MARKET_OPEN_UTC_MINUTE = 13 * 60 + 30
+MARKET_CLOSE_UTC_MINUTE = 21 * 60
+INTRADAY_FINANCIALS_TTL_MINUTES = 15
+MAX_FINANCIALS_TTL_MINUTES = 24 * 60
+
+
+def financials_ttl_minutes(now: Optional[datetime] = None) -> int:
+    """
+    TTL para FinancialStatements según la vida útil de su dato más volátil,
+    el precio: corto con el mercado abierto y, fuera de horario, hasta la
+    próxima apertura (máximo un día).
+    """
+    now = now or datetime.now(timezone.utc)
+    minute = now.hour * 60 + now.minute
+    is_weekday = now.weekday() < 5
+    if is_weekday and MARKET_OPEN_UTC_MINUTE <= minute < MARKET_CLOSE_UTC_MINUTE:
+        return INTRADAY_FINANCIALS_TTL_MINUTES
+    
+    days_ahead = 0 if is_weekday and minute < MARKET_OPEN_UTC_MINUTE else 1
+    next_open = (now + timedelta(days=days_ahead)).replace(
+        hour=MARKET_OPEN_UTC_MINUTE // 60, minute=MARKET_OPEN_UTC_MINUTE % 60, second=0, microsecond=0
+    )
+    while next_open.weekday() >= 5:
+        next_open += timedelta(days=1)
+    minutes_to_open = int((next_open - now).total_seconds() // 60)
+    return max(INTRADAY_FINANCIALS_TTL_MINUTES, min(minutes_to_open, MAX_FINANCIALS_TTL_MINUTES))
+
+
+def financials_remaining_minutes(ts: float, now: Optional[float] = None) -> float:
+    """
+    Minutos de vida que le quedan a unos FinancialStatements guardados en `ts`
+    (epoch), con el TTL que correspondía al momento de guardarlos. <= 0: vencidos.
+    """
+    saved_at = datetime.fromtimestamp(ts, timezone.utc)
+    expires_at = ts + financials_ttl_minutes(saved_at) * 60
+    return (expires_at - (time.time() if now is None else now)) / 60
+
+# Caché negativo: un símbolo inexistente o sin datos se recuerda como
+# NEGATIVE_RESULT (distinto de None, que es un miss) para no repetir reintentos
+NEGATIVE_RESULT = object()
+NEGATIVE_CACHE_TTL_MINUTES = 60
+# Errores genéricos tras agotar reintentos: no implican que el símbolo no exista
+ERROR_CACHE_TTL_MINUTES = 1
+
+# Pools de SimpleCache, creados en el primer uso (ver get_cache)
+_caches: Dict[str, SimpleCache] = {}
+_caches_lock = threading.Lock()
+_disk_cache = FileCache(DISK_CACHE_DIR, DISK_CACHE_TTLS)
+
+
+def get_cache(name: str = "default") -> SimpleCache:
+    """Retorna el pool de caché en memoria `name`, creándolo la primera vez."""
+    cache = _caches.get(name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                ttl = CACHE_POOL_TTL_MINUTES.get(name, DEFAULT_CACHE_TTL_MINUTES)
+                cache = _caches[name] = SimpleCache(default_ttl_minutes=ttl)
+    return cache
+
+
+def clear_caches():
+    """Limpia todos los pools de caché en memoria (el caché en disco se conserva)."""
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.clear()
+
+
+# slots=True (sin __dict__ por instancia) solo existe desde Python 3.10; en
+# versiones anteriores las dataclasses se generan igual que antes
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class CompanyProfile:
     """Perfil básico de una empresa."""
     symbol: str
@@ -215,11 +663,27 @@ class CompanyProfile:
     exchange: str
     market_cap: Optional[float]
     description: str
+    
+    # Campos de vocabulario reducido (sectores, países, monedas...): se internan
+    # para que todos los perfiles compartan un único objeto str por valor
+    _INTERNED_FIELDS = ("sector", "industry", "country", "currency", "exchange")
+    
+    def __post_init__(self):
+        for field_name in self._INTERNED_FIELDS:
+            value = getattr(self, field_name)
+            if isinstance(value, str):
+                setattr(self, field_name, sys.intern(value))
 
 
-@dataclass 
+@dataclass(**_DATACLASS_SLOTS)
 class FinancialStatements:
-    """Estados financieros consolidados."""
+    """
+    Estados financieros consolidados.
+    
+    Los montos son float de Python (FP64): con FP32 (~7 dígitos) un revenue de
+    1e12 perdería precisión en las unidades de millón, y los valores se
+    serializan a JSON (caché en disco, dcc.Store), donde no hay ahorro.
+    """
     # Income Statement
     revenue: Optional[float] = None
     gross_profit: Optional[float] = None
@@ -258,6 +722,7 @@ class FinancialStatements:
     price: Optional[float] = None
     price_52w_high: Optional[float] = None
     price_52w_low: Optional[float] = None
+    average_volume: Optional[float] = None
     beta: Optional[float] = None
     
     # Growth & Historical
@@ -269,13 +734,585 @@ class FinancialStatements:
     last_updated: Optional[str] = None
 
 
+# Peticiones en curso (single-flight): si varios hilos piden la misma clave a la
+# vez, solo el primero llama a Yahoo y el resto espera su Future. Es global
+# porque app.py crea un FinancialDataService (y un fetcher) por callback.
+# Coalesce dentro de un worker; entre workers de gunicorn no se comparte.
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _flight_key(*parts, force_refresh: bool = False) -> str:
+    """
+    Clave de single-flight. Un force_refresh usa su propia clave: no debe
+    unirse a una consulta normal en curso, que podría responder desde caché.
+    """
+    key = ":".join(str(part) for part in parts)
+    return f"{key}:refresh" if force_refresh else key
+
+
+def _singleflight(key: str, fn: Callable[[], Any]) -> Any:
+    """Ejecuta fn() una sola vez por clave entre llamadas concurrentes."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    
+    if not owner:
+        return future.result()
+    
+    try:
+        value = fn()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(value)
+        return value
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+# Filas de cada estado que usa get_detailed_historical_data
+DETAILED_INCOME_ROWS = ("Total Revenue", "Gross Profit", "Operating Income", "Net Income", "EBITDA")
+DETAILED_BALANCE_ROWS = (
+    "Total Assets", "Stockholders Equity", "Total Debt", "Long Term Debt",
+    "Cash And Cash Equivalents", "Current Assets", "Current Liabilities",
+    "Ordinary Shares Number", "Share Issued", "Common Stock Shares Outstanding",
+)
+DETAILED_CASHFLOW_ROWS = (
+    "Depreciation And Amortization", "Operating Cash Flow", "Capital Expenditure", "Free Cash Flow",
+)
+
+
+def _statement_rows(df, rows, dates) -> Dict[str, List[Optional[float]]]:
+    """
+    Extrae de una vez las filas `rows` para las columnas `dates` de un estado.
+    Retorna {fila: [valor por fecha]} con None donde falta la fila, la fecha o
+    el valor no es numérico (mismo criterio que leer celda por celda).
+    """
+    if df is None or df.empty:
+        return {row: [None] * len(dates) for row in rows}
+    frame = df[~df.index.duplicated()].reindex(index=list(rows), columns=dates)
+    # tolist() convierte a float de Python en C, sin pasar por escalares NumPy
+    values = frame.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float).tolist()
+    return {
+        row: [None if v != v else v for v in row_values]  # v != v: NaN
+        for row, row_values in zip(rows, values)
+    }
+
+
+def _calculate_margin(numerator, denominator) -> Optional[float]:
+    """Calcula un margen (%) de forma segura."""
+    if numerator is not None and denominator is not None and denominator != 0:
+        return (numerator / denominator) * 100
+    return None
+
+
+def _calculate_growth(current, previous) -> Optional[float]:
+    """Calcula crecimiento YoY (%)."""
+    if current is not None and previous is not None and previous != 0:
+        return ((current - previous) / abs(previous)) * 100
+    return None
+
+
+def _calculate_cagr(end_val, start_val, periods) -> Optional[float]:
+    """CAGR (%) entre dos valores separados `periods` años."""
+    if end_val and start_val and start_val > 0 and periods > 0:
+        return ((end_val / start_val) ** (1 / periods) - 1) * 100
+    return None
+
+
+# Campos de cada año en get_detailed_historical_data, en orden. Los de
+# DETAILED_MM_FIELDS llevan además su versión en millones ("<campo>_mm")
+DETAILED_FIELDS = (
+    "revenue", "gross_profit", "operating_income", "net_income", "ebitda",
+    "gross_margin", "operating_margin", "net_margin", "ebitda_margin",
+    "total_assets", "total_equity", "total_debt", "long_term_debt", "shares_outstanding",
+    "cash", "net_debt",
+    "roe", "roa", "debt_to_equity", "current_ratio", "net_debt_to_ebitda",
+    "operating_cash_flow", "fcf", "capex",
+    "revenue_growth", "net_income_growth",
+)
+DETAILED_MM_FIELDS = frozenset((
+    "revenue", "gross_profit", "operating_income", "net_income", "ebitda",
+    "total_assets", "total_equity", "total_debt", "long_term_debt", "cash", "net_debt",
+    "operating_cash_flow", "fcf", "capex",
+))
+
+
+def _compute_year_metrics(inc, bal, cfs) -> Dict[str, List[Optional[float]]]:
+    """
+    Calcula en una sola pasada todas las métricas anuales de los históricos
+    detallados a partir de las filas extraídas con _statement_rows.
+    
+    Retorna {campo: [valor por año]} con los campos de DETAILED_FIELDS en el
+    mismo orden que las fechas de los estados (más reciente primero).
+    """
+    columns = {field: [] for field in DETAILED_FIELDS}
+    
+    prev_revenue = None
+    prev_net_income = None
+    
+    for i, revenue in enumerate(inc["Total Revenue"]):
+        gross_profit = inc["Gross Profit"][i]
+        operating_income = inc["Operating Income"][i]
+        net_income = inc["Net Income"][i]
+        ebitda = inc["EBITDA"][i]
+        
+        # Si no hay EBITDA directo, intentar calcularlo
+        if ebitda is None:
+            depreciation = cfs["Depreciation And Amortization"][i]
+            if operating_income is not None and depreciation is not None:
+                ebitda = operating_income + depreciation
+        
+        total_assets = bal["Total Assets"][i]
+        total_equity = bal["Stockholders Equity"][i]
+        total_debt = bal["Total Debt"][i]
+        cash = bal["Cash And Cash Equivalents"][i]
+        current_assets = bal["Current Assets"][i]
+        current_liabilities = bal["Current Liabilities"][i]
+        
+        # Shares Outstanding (para F-Score criterio de dilución)
+        shares_outstanding = bal["Ordinary Shares Number"][i]
+        if shares_outstanding is None:
+            shares_outstanding = bal["Share Issued"][i]
+        if shares_outstanding is None:
+            shares_outstanding = bal["Common Stock Shares Outstanding"][i]
+        
+        operating_cash_flow = cfs["Operating Cash Flow"][i]
+        capex = cfs["Capital Expenditure"][i]
+        fcf = cfs["Free Cash Flow"][i]
+        
+        # Si no hay FCF directo, calcularlo
+        if fcf is None and operating_cash_flow is not None and capex is not None:
+            fcf = operating_cash_flow + capex  # capex es negativo
+        
+        debt_to_equity = None
+        if total_debt is not None and total_equity is not None and total_equity > 0:
+            debt_to_equity = total_debt / total_equity
+        
+        current_ratio = None
+        if current_assets is not None and current_liabilities is not None and current_liabilities > 0:
+            current_ratio = current_assets / current_liabilities
+        
+        net_debt = None
+        if total_debt is not None and cash is not None:
+            net_debt = total_debt - cash
+        
+        net_debt_to_ebitda = None
+        if net_debt is not None and ebitda is not None and ebitda > 0:
+            net_debt_to_ebitda = net_debt / ebitda
+        
+        year_values = (
+            revenue, gross_profit, operating_income, net_income, ebitda,
+            _calculate_margin(gross_profit, revenue),
+            _calculate_margin(operating_income, revenue),
+            _calculate_margin(net_income, revenue),
+            _calculate_margin(ebitda, revenue),
+            total_assets, total_equity, total_debt, bal["Long Term Debt"][i], shares_outstanding,
+            cash, net_debt,
+            _calculate_margin(net_income, total_equity) if total_equity and total_equity > 0 else None,
+            _calculate_margin(net_income, total_assets) if total_assets and total_assets > 0 else None,
+            debt_to_equity, current_ratio, net_debt_to_ebitda,
+            operating_cash_flow, fcf, capex,
+            _calculate_growth(revenue, prev_revenue),
+            _calculate_growth(net_income, prev_net_income),
+        )
+        for column, value in zip(columns.values(), year_values):
+            column.append(value)
+        
+        prev_revenue = revenue
+        prev_net_income = net_income
+    
+    return columns
+
+
+def detailed_year_data(historical_data: Dict[str, Any], year) -> Dict[str, Optional[float]]:
+    """
+    Valores de un año de get_detailed_historical_data como diccionario
+    {campo: valor}, con los montos también en millones ("<campo>_mm").
+    Retorna {} si el año no está.
+    """
+    years = historical_data.get("years", [])
+    if year not in years:
+        return {}
+    i = years.index(year)
+    year_data = {}
+    for field, column in historical_data.get("metrics", {}).items():
+        value = column[i]
+        year_data[field] = value
+        if field in DETAILED_MM_FIELDS:
+            year_data[f"{field}_mm"] = value / 1e6 if value else None
+    return year_data
+
+
+# Filas de cada estado que usa get_financial_data (valor más reciente)
+LATEST_INCOME_ROWS = (
+    "Total Revenue", "Gross Profit", "Operating Income", "Net Income", "EBITDA", "Interest Expense",
+)
+LATEST_BALANCE_ROWS = (
+    "Total Assets", "Current Assets", "Cash And Cash Equivalents",
+    "Cash Cash Equivalents And Short Term Investments", "Inventory",
+    "Total Liabilities Net Minority Interest", "Current Liabilities", "Total Debt",
+    "Long Term Debt", "Stockholders Equity", "Total Equity Gross Minority Interest",
+    "Retained Earnings",
+)
+LATEST_CASHFLOW_ROWS = (
+    "Operating Cash Flow", "Capital Expenditure", "Free Cash Flow", "Cash Dividends Paid",
+    "Depreciation And Amortization",
+)
+
+
+def _latest_values(df, rows) -> Dict[str, float]:
+    """
+    {fila: valor de la columna más reciente} para las filas `rows` de un
+    estado, solo valores numéricos (sin NaN). Las filas se resuelven a
+    posiciones enteras con una sola llamada a get_indexer; las duplicadas
+    conservan la primera aparición.
+    """
+    if df is None or df.empty:
+        return {}
+    if not df.index.is_unique:
+        df = df[~df.index.duplicated()]
+    positions = df.index.get_indexer(rows)
+    latest = pd.to_numeric(df.iloc[:, 0], errors="coerce").to_numpy(dtype=float)
+    values = {}
+    for row, pos in zip(rows, positions):
+        if pos != -1:
+            value = latest[pos]
+            if value == value:  # Descarta NaN
+                values[row] = float(value)
+    return values
+
+
+# Datos típicos por sector (basados en promedios históricos)
+SECTOR_BENCHMARKS = {
+    "Technology": {
+        "name": "Tecnología",
+        "etf": "XLK",
+        "typical_pe": 28.0,
+        "typical_ps": 6.5,
+        "typical_pb": 8.0,
+        "typical_ev_ebitda": 18.0,
+        "typical_roe": 0.22,
+        "typical_roa": 0.12,
+        "typical_gross_margin": 0.50,
+        "typical_operating_margin": 0.22,
+        "typical_net_margin": 0.18,
+        "typical_debt_equity": 0.45,
+        "typical_current_ratio": 2.0,
+        "growth_outlook": "Alto",
+        "volatility": "Alta",
+        "dividend_typical": "Bajo",
+    },
+    "Healthcare": {
+        "name": "Salud",
+        "etf": "XLV",
+        "typical_pe": 22.0,
+        "typical_ps": 2.5,
+        "typical_pb": 4.5,
+        "typical_ev_ebitda": 14.0,
+        "typical_roe": 0.18,
+        "typical_roa": 0.08,
+        "typical_gross_margin": 0.55,
+        "typical_operating_margin": 0.18,
+        "typical_net_margin": 0.12,
+        "typical_debt_equity": 0.60,
+        "typical_current_ratio": 1.8,
+        "growth_outlook": "Moderado-Alto",
+        "volatility": "Media",
+        "dividend_typical": "Moderado",
+    },
+    "Financial Services": {
+        "name": "Servicios Financieros",
+        "etf": "XLF",
+        "typical_pe": 14.0,
+        "typical_ps": 3.0,
+        "typical_pb": 1.3,
+        "typical_ev_ebitda": 10.0,
+        "typical_roe": 0.12,
+        "typical_roa": 0.01,
+        "typical_gross_margin": 0.60,
+        "typical_operating_margin": 0.30,
+        "typical_net_margin": 0.22,
+        "typical_debt_equity": 1.50,
+        "typical_current_ratio": 1.2,
+        "growth_outlook": "Moderado",
+        "volatility": "Media-Alta",
+        "dividend_typical": "Alto",
+    },
+    "Consumer Cyclical": {
+        "name": "Consumo Discrecional",
+        "etf": "XLY",
+        "typical_pe": 22.0,
+        "typical_ps": 1.8,
+        "typical_pb": 6.0,
+        "typical_ev_ebitda": 14.0,
+        "typical_roe": 0.25,
+        "typical_roa": 0.08,
+        "typical_gross_margin": 0.35,
+        "typical_operating_margin": 0.10,
+        "typical_net_margin": 0.06,
+        "typical_debt_equity": 1.00,
+        "typical_current_ratio": 1.3,
+        "growth_outlook": "Cíclico",
+        "volatility": "Alta",
+        "dividend_typical": "Bajo",
+    },
+    "Consumer Defensive": {
+        "name": "Consumo Básico",
+        "etf": "XLP",
+        "typical_pe": 20.0,
+        "typical_ps": 1.5,
+        "typical_pb": 5.0,
+        "typical_ev_ebitda": 14.0,
+        "typical_roe": 0.22,
+        "typical_roa": 0.08,
+        "typical_gross_margin": 0.35,
+        "typical_operating_margin": 0.12,
+        "typical_net_margin": 0.08,
+        "typical_debt_equity": 1.20,
+        "typical_current_ratio": 1.0,
+        "growth_outlook": "Estable",
+        "volatility": "Baja",
+        "dividend_typical": "Alto",
+    },
+    "Industrials": {
+        "name": "Industriales",
+        "etf": "XLI",
+        "typical_pe": 20.0,
+        "typical_ps": 2.0,
+        "typical_pb": 4.5,
+        "typical_ev_ebitda": 12.0,
+        "typical_roe": 0.18,
+        "typical_roa": 0.06,
+        "typical_gross_margin": 0.28,
+        "typical_operating_margin": 0.12,
+        "typical_net_margin": 0.08,
+        "typical_debt_equity": 0.90,
+        "typical_current_ratio": 1.4,
+        "growth_outlook": "Cíclico",
+        "volatility": "Media",
+        "dividend_typical": "Moderado",
+    },
+    "Energy": {
+        "name": "Energía",
+        "etf": "XLE",
+        "typical_pe": 12.0,
+        "typical_ps": 1.2,
+        "typical_pb": 2.0,
+        "typical_ev_ebitda": 6.0,
+        "typical_roe": 0.15,
+        "typical_roa": 0.07,
+        "typical_gross_margin": 0.45,
+        "typical_operating_margin": 0.15,
+        "typical_net_margin": 0.10,
+        "typical_debt_equity": 0.40,
+        "typical_current_ratio": 1.2,
+        "growth_outlook": "Volátil",
+        "volatility": "Muy Alta",
+        "dividend_typical": "Alto",
+    },
+    "Utilities": {
+        "name": "Servicios Públicos",
+        "etf": "XLU",
+        "typical_pe": 18.0,
+        "typical_ps": 2.5,
+        "typical_pb": 2.0,
+        "typical_ev_ebitda": 12.0,
+        "typical_roe": 0.10,
+        "typical_roa": 0.03,
+        "typical_gross_margin": 0.40,
+        "typical_operating_margin": 0.22,
+        "typical_net_margin": 0.12,
+        "typical_debt_equity": 1.40,
+        "typical_current_ratio": 0.8,
+        "growth_outlook": "Estable",
+        "volatility": "Baja",
+        "dividend_typical": "Muy Alto",
+    },
+    "Real Estate": {
+        "name": "Bienes Raíces",
+        "etf": "XLRE",
+        "typical_pe": 35.0,
+        "typical_ps": 6.0,
+        "typical_pb": 2.5,
+        "typical_ev_ebitda": 18.0,
+        "typical_roe": 0.08,
+        "typical_roa": 0.04,
+        "typical_gross_margin": 0.55,
+        "typical_operating_margin": 0.30,
+        "typical_net_margin": 0.20,
+        "typical_debt_equity": 0.90,
+        "typical_current_ratio": 1.0,
+        "growth_outlook": "Moderado",
+        "volatility": "Media",
+        "dividend_typical": "Muy Alto",
+    },
+    "Materials": {
+        "name": "Materiales",
+        "etf": "XLB",
+        "typical_pe": 16.0,
+        "typical_ps": 1.8,
+        "typical_pb": 3.0,
+        "typical_ev_ebitda": 9.0,
+        "typical_roe": 0.15,
+        "typical_roa": 0.06,
+        "typical_gross_margin": 0.30,
+        "typical_operating_margin": 0.14,
+        "typical_net_margin": 0.08,
+        "typical_debt_equity": 0.60,
+        "typical_current_ratio": 1.8,
+        "growth_outlook": "Cíclico",
+        "volatility": "Alta",
+        "dividend_typical": "Moderado",
+    },
+    "Communication Services": {
+        "name": "Comunicaciones",
+        "etf": "XLC",
+        "typical_pe": 18.0,
+        "typical_ps": 2.5,
+        "typical_pb": 3.5,
+        "typical_ev_ebitda": 10.0,
+        "typical_roe": 0.12,
+        "typical_roa": 0.05,
+        "typical_gross_margin": 0.55,
+        "typical_operating_margin": 0.18,
+        "typical_net_margin": 0.12,
+        "typical_debt_equity": 0.80,
+        "typical_current_ratio": 1.3,
+        "growth_outlook": "Moderado",
+        "volatility": "Media-Alta",
+        "dividend_typical": "Bajo-Moderado",
+    },
+}
+
+# Default si no encontramos el sector ("name" se completa con el sector pedido)
+DEFAULT_SECTOR_BENCHMARK = {
+    "name": "General",
+    "etf": "SPY",
+    "typical_pe": 20.0,
+    "typical_ps": 2.5,
+    "typical_pb": 4.0,
+    "typical_ev_ebitda": 12.0,
+    "typical_roe": 0.15,
+    "typical_roa": 0.06,
+    "typical_gross_margin": 0.40,
+    "typical_operating_margin": 0.15,
+    "typical_net_margin": 0.10,
+    "typical_debt_equity": 0.80,
+    "typical_current_ratio": 1.5,
+    "growth_outlook": "Moderado",
+    "volatility": "Media",
+    "dividend_typical": "Moderado",
+}
+
+# Índice case-insensitive de SECTOR_BENCHMARKS
+_SECTOR_BENCHMARKS_LOWER = {key.lower(): data for key, data in SECTOR_BENCHMARKS.items()}
+
+
 class YahooFinanceFetcher:
     """Fetcher usando Yahoo Finance (yfinance)."""
     
+    # Tendencias de deuda indexadas por escalón de cambio (ver _calculate_debt_trend)
+    _DEBT_TRENDS = ("improving", "stable", "increasing")
+    
+    # Mapeo sector/industria (en minúsculas) → ETF sectorial, construido una vez
+    _SECTOR_ETF_MAP = {
+        # Tecnología
+        "technology": "XLK",
+        "tech": "XLK",
+        "information technology": "XLK",
+        "software": "XLK",
+        "semiconductors": "XLK",
+        # Financiero
+        "financial services": "XLF",
+        "financial": "XLF",
+        "financials": "XLF",
+        "banks": "XLF",
+        "banking": "XLF",
+        "insurance": "XLF",
+        "capital markets": "XLF",
+        "credit services": "XLF",
+        # Healthcare
+        "healthcare": "XLV",
+        "health care": "XLV",
+        "biotechnology": "XLV",
+        "pharmaceuticals": "XLV",
+        "medical devices": "XLV",
+        # Consumo Cíclico
+        "consumer cyclical": "XLY",
+        "consumer discretionary": "XLY",
+        "retail": "XLY",
+        "automobiles": "XLY",
+        "auto manufacturers": "XLY",
+        "restaurants": "XLY",
+        "travel & leisure": "XLY",
+        "apparel": "XLY",
+        # Consumo Defensivo
+        "consumer defensive": "XLP",
+        "consumer staples": "XLP",
+        "food & beverage": "XLP",
+        "household products": "XLP",
+        "tobacco": "XLP",
+        # Industriales
+        "industrials": "XLI",
+        "industrial": "XLI",
+        "aerospace & defense": "XLI",
+        "machinery": "XLI",
+        "construction": "XLI",
+        "transportation": "XLI",
+        "airlines": "XLI",
+        # Energía
+        "energy": "XLE",
+        "oil & gas": "XLE",
+        "oil": "XLE",
+        "gas": "XLE",
+        "petroleum": "XLE",
+        # Utilities
+        "utilities": "XLU",
+        "utility": "XLU",
+        "electric utilities": "XLU",
+        "gas utilities": "XLU",
+        "water utilities": "XLU",
+        # Real Estate
+        "real estate": "XLRE",
+        "reits": "XLRE",
+        "reit": "XLRE",
+        "real estate services": "XLRE",
+        # Materiales
+        "materials": "XLB",
+        "basic materials": "XLB",
+        "chemicals": "XLB",
+        "metals & mining": "XLB",
+        "steel": "XLB",
+        "gold": "XLB",
+        # Comunicaciones
+        "communication services": "XLC",
+        "communications": "XLC",
+        "telecommunication": "XLC",
+        "telecom": "XLC",
+        "media": "XLC",
+        "entertainment": "XLC",
+        "interactive media": "XLC",
+    }
+    
+    # Claves para la búsqueda parcial, de la más larga a la más corta: gana la
+    # coincidencia más específica ("gas utilities" antes que "gas")
+    _SECTOR_ETF_KEYS_SORTED = tuple(sorted(_SECTOR_ETF_MAP.items(), key=lambda kv: -len(kv[0])))
+    
     def __init__(self):
         if not YFINANCE_AVAILABLE:
             raise ImportError("yfinance no está instalado. Ejecuta: pip install yfinance")
     
+    @property
+    def is_cooling_down(self) -> bool:
+        """True si Yahoo está limitando peticiones y las consultas nuevas se omiten."""
+        return host_cooling_down()
+    
     def _calculate_debt_trend(self, recent_de: Optional[float], old_de: Optional[float]) -> str:
         """
         Calcula la tendencia de deuda comparando D/E reciente vs antiguo.
@@ -293,39 +1330,58 @@ class YahooFinanceFetcher:
         if recent_de is None or old_de is None:
             return "unknown"
         
-        # Calcular cambio porcentual
         if old_de == 0:
             # Si antes era 0 y ahora hay deuda, está aumentando
-            return "increasing" if recent_de > 0.05 else "stable"
+            return self._DEBT_TRENDS[1 + (recent_de > 0.05)]
         
+        # Umbral de 10%: cada comparación suma un escalón en la tabla
+        # (< -10% → improving, ±10% → stable, > +10% → increasing)
         change_pct = (recent_de - old_de) / old_de
-        
-        # Umbral de 10% para considerar cambio significativo
-        if change_pct < -0.10:  # Bajó más del 10%
-            return "improving"
-        elif change_pct > 0.10:  # Subió más del 10%
-            return "increasing"
-        else:
-            return "stable"
+        return self._DEBT_TRENDS[(change_pct >= -0.10) + (change_pct > 0.10)]
     
-    def get_company_profile(self, symbol: str) -> Optional[CompanyProfile]:
+    def get_company_profile(self, symbol: str, force_refresh: bool = False) -> Optional[CompanyProfile]:
         """Obtiene el perfil de la empresa (con caché y retry para rate limiting)."""
-        cache_key = _data_cache._make_key("profile", symbol.upper())
+        return _singleflight(
+            _flight_key("profile", symbol.upper(), force_refresh=force_refresh),
+            lambda: self._fetch_company_profile(symbol, force_refresh)
+        )
+    
+    def _fetch_company_profile(self, symbol: str, force_refresh: bool) -> Optional[CompanyProfile]:
+        cache = get_cache("profile")
+        cache_key = cache._make_key("profile", symbol.upper())
+        
+        # Verificar caché (memoria y luego disco)
+        if not force_refresh:
+            cached = cache.get(cache_key)
+            if cached is NEGATIVE_RESULT:
+                return None
+            if cached:
+                return cached
+            stored = _disk_cache.get(symbol, "profile")
+            if stored:
+                try:
+                    profile = CompanyProfile(**stored)
+                except TypeError:
+                    # Guardado con otra versión de CompanyProfile (campos distintos): miss
+                    _disk_cache.delete(symbol, "profile")
+                else:
+                    cache.set(cache_key, profile)
+                    return profile
         
-        # Verificar caché
-        cached = _data_cache.get(cache_key)
-        if cached:
-            return cached
+        if host_cooling_down():
+            logger.warning(f"Yahoo en enfriamiento: se omite la consulta de {symbol}")
+            return None
         
         last_error = None
         for attempt in range(MAX_RETRIES):
             try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
+                # Un solo Ticker.info por símbolo compartido entre perfil y financieros
+                info = fetch_ticker_info(yf.Ticker(symbol)) if force_refresh else get_ticker_info(symbol)
                 
                 # Validar que obtuvimos datos válidos
                 if not info or info.get("regularMarketPrice") is None:
                     logger.warning(f"Símbolo '{symbol}' no encontrado o sin datos de mercado")
+                    cache.set(cache_key, NEGATIVE_RESULT, ttl_minutes=NEGATIVE_CACHE_TTL_MINUTES)
                     return None
                 
                 profile = CompanyProfile(
@@ -340,107 +1396,143 @@ class YahooFinanceFetcher:
                     description=info.get("longBusinessSummary", "")[:500],
                 )
                 
-                # Guardar en caché (30 min para perfiles, cambian poco)
-                _data_cache.set(cache_key, profile, ttl_minutes=30)
+                # Guardar en caché (TTL del pool "profile")
+                cache.set(cache_key, profile)
+                _disk_cache.set(symbol, "profile", asdict(profile))
                 logger.debug(f"Perfil de {symbol} obtenido correctamente")
+                _record_success()
                 return profile
             
             except KeyError as e:
                 logger.warning(f"Campo faltante en datos de {symbol}: {e}")
+                cache.set(cache_key, NEGATIVE_RESULT, ttl_minutes=NEGATIVE_CACHE_TTL_MINUTES)
                 return None
             except (ConnectionError, TimeoutError) as e:
                 logger.error(f"Error de conexión obteniendo perfil de {symbol}: {e}")
                 raise APITimeoutError(f"Timeout obteniendo perfil de {symbol}") from e
             except Exception as e:
                 last_error = e
-                error_str = str(e).lower()
                 error_type = type(e).__name__
                 
-                # Detectar rate limiting (múltiples formas)
+                # Detectar rate limiting (por tipo o por mensaje, una sola búsqueda)
                 is_rate_limit = (
-                    'YFRateLimitError' in error_type or
+                    isinstance(e, _RATE_LIMIT_ERRORS) or
                     'ratelimit' in error_type.lower() or
-                    'rate' in error_str and 'limit' in error_str or
-                    'too many requests' in error_str or
-                    '429' in error_str
+                    _RATE_LIMIT_RE.search(str(e)) is not None
                 )
                 
+                # Tras varios 429 seguidos no se reintenta: el host está bloqueado
+                if is_rate_limit and _record_rate_limit():
+                    logger.warning(f"Yahoo en enfriamiento: se abandona {symbol}")
+                    return None
+                
                 if is_rate_limit and attempt < MAX_RETRIES - 1:
-                    delay = min(BASE_DELAY * (2 ** attempt) + random.uniform(0, 1), MAX_DELAY)
+                    delay = _backoff_delay(e, attempt)
                     logger.warning(f"⏳ Rate limited ({error_type}). Reintentando perfil {symbol} en {delay:.1f}s (intento {attempt + 1}/{MAX_RETRIES})")
                     time.sleep(delay)
                     continue  # Importante: continuar al siguiente intento
                 else:
                     logger.error(f"Error obteniendo perfil de {symbol}: {error_type}: {e}")
                     if attempt == MAX_RETRIES - 1:
+                        # Un rate limit no dice nada del símbolo: no se cachea. Otros
+                        # errores (red de requests/curl_cffi, HTTP 5xx) pueden ser
+                        # transitorios: se recuerdan solo un momento
+                        if not is_rate_limit:
+                            cache.set(cache_key, NEGATIVE_RESULT, ttl_minutes=ERROR_CACHE_TTL_MINUTES)
                         return None
         
         return None
     
-    def get_financial_data(self, symbol: str) -> Optional[FinancialStatements]:
+    def get_financial_data(self, symbol: str, force_refresh: bool = False) -> Optional[FinancialStatements]:
         """Obtiene todos los datos financieros de una empresa (con caché y retry para rate limiting)."""
-        cache_key = _data_cache._make_key("financials", symbol.upper())
-        
-        # Verificar caché
-        cached = _data_cache.get(cache_key)
-        if cached:
-            return cached
+        return _singleflight(
+            _flight_key("financials", symbol.upper(), force_refresh=force_refresh),
+            lambda: self._fetch_financial_data(symbol, force_refresh)
+        )
+    
+    def _fetch_financial_data(self, symbol: str, force_refresh: bool) -> Optional[FinancialStatements]:
+        cache = get_cache("financials")
+        cache_key = cache._make_key("financials", symbol.upper())
+        
+        # Verificar caché (memoria y luego disco)
+        if not force_refresh:
+            cached = cache.get(cache_key)
+            if cached is NEGATIVE_RESULT:
+                return None
+            if cached:
+                return cached
+            # El TTL en disco es solo un tope: la frescura real depende de la
+            # hora a la que se guardó (15 min con el mercado abierto)
+            entry = _disk_cache.get_entry(symbol, "financials")
+            if entry and entry[1]:
+                remaining = financials_remaining_minutes(entry[0])
+                if remaining > 0:
+                    try:
+                        result = FinancialStatements(**entry[1])
+                    except TypeError:
+                        # Guardado con otra versión de FinancialStatements (campos distintos): miss
+                        _disk_cache.delete(symbol, "financials")
+                    else:
+                        cache.set(cache_key, result, ttl_minutes=remaining)
+                        return result
         
-        # Helper function
-        def get_latest(df, key):
-            try:
-                if df is not None and not df.empty and key in df.index:
-                    val = df.loc[key].iloc[0]
-                    return float(val) if val is not None and str(val) != 'nan' else None
-            except (KeyError, IndexError, TypeError, ValueError):
-                pass
+        if host_cooling_down():
+            logger.warning(f"Yahoo en enfriamiento: se omite la consulta de {symbol}")
             return None
         
         last_error = None
         for attempt in range(MAX_RETRIES):
             try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
+                # Ticker.info (compartido con get_company_profile vía caché L1) se
+                # descarga en paralelo con los estados financieros
+                if force_refresh:
+                    info_future = _overlap_executor.submit(fetch_ticker_info, yf.Ticker(symbol))
+                else:
+                    info_future = _overlap_executor.submit(get_ticker_info, symbol)
+                
+                # Obtener estados financieros (compartidos con los históricos)
+                income_stmt, balance_sheet, cash_flow = get_statements(symbol, force_refresh)
+                info = info_future.result()
                 
-                # Obtener estados financieros
-                income_stmt = ticker.financials
-                balance_sheet = ticker.balance_sheet
-                cash_flow = ticker.cashflow
+                # Último valor de las filas usadas: un dict por estado, búsquedas sin excepciones
+                income = _latest_values(income_stmt, LATEST_INCOME_ROWS)
+                balance = _latest_values(balance_sheet, LATEST_BALANCE_ROWS)
+                cashflow = _latest_values(cash_flow, LATEST_CASHFLOW_ROWS)
                 
                 # Income Statement
-                revenue = get_latest(income_stmt, "Total Revenue")
-                gross_profit = get_latest(income_stmt, "Gross Profit")
-                operating_income = get_latest(income_stmt, "Operating Income")
-                net_income = get_latest(income_stmt, "Net Income")
-                ebitda_val = get_latest(income_stmt, "EBITDA")
-                interest_expense = get_latest(income_stmt, "Interest Expense")
+                revenue = income.get("Total Revenue")
+                gross_profit = income.get("Gross Profit")
+                operating_income = income.get("Operating Income")
+                net_income = income.get("Net Income")
+                ebitda_val = income.get("EBITDA")
+                interest_expense = income.get("Interest Expense")
                 
                 # Balance Sheet
-                total_assets = get_latest(balance_sheet, "Total Assets")
-                current_assets = get_latest(balance_sheet, "Current Assets")
-                cash = get_latest(balance_sheet, "Cash And Cash Equivalents")
+                total_assets = balance.get("Total Assets")
+                current_assets = balance.get("Current Assets")
+                cash = balance.get("Cash And Cash Equivalents")
                 if cash is None:
-                    cash = get_latest(balance_sheet, "Cash Cash Equivalents And Short Term Investments")
-                inventories = get_latest(balance_sheet, "Inventory")
-                total_liabilities = get_latest(balance_sheet, "Total Liabilities Net Minority Interest")
-                current_liabilities = get_latest(balance_sheet, "Current Liabilities")
-                total_debt = get_latest(balance_sheet, "Total Debt")
-                long_term_debt = get_latest(balance_sheet, "Long Term Debt")
-                total_equity = get_latest(balance_sheet, "Stockholders Equity")
+                    cash = balance.get("Cash Cash Equivalents And Short Term Investments")
+                inventories = balance.get("Inventory")
+                total_liabilities = balance.get("Total Liabilities Net Minority Interest")
+                current_liabilities = balance.get("Current Liabilities")
+                total_debt = balance.get("Total Debt")
+                long_term_debt = balance.get("Long Term Debt")
+                total_equity = balance.get("Stockholders Equity")
                 if total_equity is None:
-                    total_equity = get_latest(balance_sheet, "Total Equity Gross Minority Interest")
-                retained_earnings = get_latest(balance_sheet, "Retained Earnings")
+                    total_equity = balance.get("Total Equity Gross Minority Interest")
+                retained_earnings = balance.get("Retained Earnings")
                 
                 # Cash Flow
-                operating_cf = get_latest(cash_flow, "Operating Cash Flow")
-                capex = get_latest(cash_flow, "Capital Expenditure")
+                operating_cf = cashflow.get("Operating Cash Flow")
+                capex = cashflow.get("Capital Expenditure")
                 if capex is not None:
                     capex = abs(capex)  # CapEx suele venir negativo
-                fcf = get_latest(cash_flow, "Free Cash Flow")
-                dividends = get_latest(cash_flow, "Cash Dividends Paid")
+                fcf = cashflow.get("Free Cash Flow")
+                dividends = cashflow.get("Cash Dividends Paid")
                 
                 # Depreciation
-                depreciation = get_latest(cash_flow, "Depreciation And Amortization")
+                depreciation = cashflow.get("Depreciation And Amortization")
                 
                 # Datos de info
                 shares = info.get("sharesOutstanding")
@@ -501,6 +1593,7 @@ class YahooFinanceFetcher:
                     price=price,
                     price_52w_high=info.get("fiftyTwoWeekHigh"),
                     price_52w_low=info.get("fiftyTwoWeekLow"),
+                    average_volume=info.get("averageVolume"),
                     beta=info.get("beta"),
                     
                     # Growth
@@ -512,79 +1605,144 @@ class YahooFinanceFetcher:
                     last_updated=datetime.now().isoformat(),
                 )
                 
-                # Guardar en caché (60 min para datos financieros - reduce rate limiting)
-                _data_cache.set(cache_key, result, ttl_minutes=60)
+                # Guardar en caché (TTL adaptativo según horario de mercado)
+                cache.set(cache_key, result, ttl_minutes=financials_ttl_minutes())
+                _disk_cache.set(symbol, "financials", asdict(result))
                 logger.debug(f"Datos financieros de {symbol} cacheados correctamente")
+                _record_success()
                 return result
             
             except KeyError as e:
                 logger.warning(f"Campo faltante en datos financieros de {symbol}: {e}")
+                cache.set(cache_key, NEGATIVE_RESULT, ttl_minutes=NEGATIVE_CACHE_TTL_MINUTES)
                 return None
             except (ConnectionError, TimeoutError) as e:
                 logger.error(f"Error de conexión obteniendo datos financieros de {symbol}: {e}")
                 raise APITimeoutError(f"Timeout obteniendo datos financieros de {symbol}") from e
             except ValueError as e:
                 logger.warning(f"Error de conversión en datos de {symbol}: {e}")
+                cache.set(cache_key, NEGATIVE_RESULT, ttl_minutes=NEGATIVE_CACHE_TTL_MINUTES)
                 return None
             except Exception as e:
                 last_error = e
-                error_str = str(e).lower()
                 error_type = type(e).__name__
                 
-                # Detectar rate limiting (múltiples formas)
+                # Detectar rate limiting (por tipo o por mensaje, una sola búsqueda)
                 is_rate_limit = (
-                    'YFRateLimitError' in error_type or
+                    isinstance(e, _RATE_LIMIT_ERRORS) or
                     'ratelimit' in error_type.lower() or
-                    'rate' in error_str and 'limit' in error_str or
-                    'too many requests' in error_str or
-                    '429' in error_str
+                    _RATE_LIMIT_RE.search(str(e)) is not None
                 )
                 
+                # Tras varios 429 seguidos no se reintenta: el host está bloqueado
+                if is_rate_limit and _record_rate_limit():
+                    logger.warning(f"Yahoo en enfriamiento: se abandona {symbol}")
+                    return None
+                
                 if is_rate_limit and attempt < MAX_RETRIES - 1:
-                    delay = min(BASE_DELAY * (2 ** attempt) + random.uniform(0, 1), MAX_DELAY)
+                    delay = _backoff_delay(e, attempt)
                     logger.warning(f"⏳ Rate limited ({error_type}). Reintentando {symbol} en {delay:.1f}s (intento {attempt + 1}/{MAX_RETRIES})")
                     time.sleep(delay)
                     continue  # Importante: continuar al siguiente intento
                 else:
                     logger.error(f"Error obteniendo datos financieros de {symbol}: {error_type}: {e}")
                     if attempt == MAX_RETRIES - 1:
+                        # Un rate limit no dice nada del símbolo: no se cachea. Otros
+                        # errores (red de requests/curl_cffi, HTTP 5xx) pueden ser
+                        # transitorios: se recuerdan solo un momento
+                        if not is_rate_limit:
+                            cache.set(cache_key, NEGATIVE_RESULT, ttl_minutes=ERROR_CACHE_TTL_MINUTES)
                         return None
         
         return None
     
-    def get_historical_metrics(self, symbol: str, years: int = 5) -> Dict[str, List[float]]:
-        """Obtiene métricas históricas para análisis de tendencias (con caché)."""
-        cache_key = _data_cache._make_key("historical", symbol.upper(), years)
+    def get_bulk_financial_data(self, symbols: List[str], max_workers: int = 8) -> Dict[str, Optional[FinancialStatements]]:
+        """
+        Obtiene los datos financieros de varios símbolos en paralelo.
+        
+        Los que ya están en caché en memoria se resuelven sin tocar el pool; el
+        resto se reparte en un ThreadPoolExecutor (trabajo I/O-bound). El token
+        bucket global sigue espaciando las peticiones a Yahoo.
         
-        cached = _data_cache.get(cache_key)
-        if cached:
-            return cached
+        Returns:
+            {SYMBOL: FinancialStatements o None si falló}
+        """
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))  # Sin duplicados, mismo orden
+        cache = get_cache("financials")
+        results: Dict[str, Optional[FinancialStatements]] = {}
+        misses = []
+        for symbol in symbols:
+            cached = cache.get(cache._make_key("financials", symbol))
+            if cached is NEGATIVE_RESULT:
+                results[symbol] = None
+            elif cached:
+                results[symbol] = cached
+            else:
+                misses.append(symbol)
+        
+        if misses:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(misses))) as executor:
+                future_to_symbol = {
+                    executor.submit(self.get_financial_data, symbol): symbol
+                    for symbol in misses
+                }
+                for future in as_completed(future_to_symbol):
+                    symbol = future_to_symbol[future]
+                    try:
+                        results[symbol] = future.result()
+                    except Exception as e:
+                        logger.warning(f"Error obteniendo datos financieros de {symbol}: {type(e).__name__}: {e}")
+                        results[symbol] = None
+        
+        return {symbol: results.get(symbol) for symbol in symbols}
+    
+    def get_historical_metrics(self, symbol: str, years: int = 5, force_refresh: bool = False) -> Dict[str, List[float]]:
+        """Obtiene métricas históricas para análisis de tendencias (con caché)."""
+        return _singleflight(
+            _flight_key("historical", symbol.upper(), years, force_refresh=force_refresh),
+            lambda: self._fetch_historical_metrics(symbol, years, force_refresh)
+        )
+    
+    def _fetch_historical_metrics(self, symbol: str, years: int, force_refresh: bool) -> Dict[str, List[float]]:
+        cache = get_cache("historical")
+        cache_key = cache._make_key("historical", symbol.upper(), years)
+        
+        if not force_refresh:
+            cached = cache.get(cache_key)
+            if cached:
+                return cached
+            stored = _disk_cache.get(symbol, "historical", years)
+            if stored:
+                cache.set(cache_key, stored)
+                return stored
+        if host_cooling_down():
+            logger.warning(f"Yahoo en enfriamiento: se omiten los históricos de {symbol}")
+            return {}
         try:
-            ticker = yf.Ticker(symbol)
-            income_stmt = ticker.financials
-            balance_sheet = ticker.balance_sheet
-            cash_flow = ticker.cashflow
+            income_stmt, balance_sheet, cash_flow = get_statements(symbol, force_refresh)
             
-            def extract_series(df, key):
-                try:
-                    if df is not None and key in df.index:
-                        series = df.loc[key].dropna().tolist()
-                        return [float(x) for x in series[:years]]
-                except (KeyError, IndexError, TypeError, ValueError):
-                    pass
-                return []
+            def extract_series(df, rows):
+                """{fila: hasta `years` valores no nulos}, una extracción por estado."""
+                columns = df.columns if df is not None else []
+                table = _statement_rows(df, rows, columns)
+                return {row: [v for v in values if v is not None][:years] for row, values in table.items()}
+            
+            inc = extract_series(income_stmt, ("Total Revenue", "Net Income", "Operating Income"))
+            bal = extract_series(balance_sheet, ("Stockholders Equity", "Total Debt"))
+            cfs = extract_series(cash_flow, ("Free Cash Flow",))
             
             result = {
-                "revenue": extract_series(income_stmt, "Total Revenue"),
-                "net_income": extract_series(income_stmt, "Net Income"),
-                "operating_income": extract_series(income_stmt, "Operating Income"),
-                "total_equity": extract_series(balance_sheet, "Stockholders Equity"),
-                "total_debt": extract_series(balance_sheet, "Total Debt"),
-                "fcf": extract_series(cash_flow, "Free Cash Flow"),
+                "revenue": inc["Total Revenue"],
+                "net_income": inc["Net Income"],
+                "operating_income": inc["Operating Income"],
+                "total_equity": bal["Stockholders Equity"],
+                "total_debt": bal["Total Debt"],
+                "fcf": cfs["Free Cash Flow"],
             }
             
-            # Guardar en caché (30 min para históricos)
-            _data_cache.set(cache_key, result, ttl_minutes=30)
+            # Guardar en caché (TTL del pool "historical")
+            cache.set(cache_key, result)
+            _disk_cache.set(symbol, "historical", result, years)
             logger.debug(f"Datos históricos de {symbol} obtenidos correctamente")
             return result
         
@@ -595,243 +1753,107 @@ class YahooFinanceFetcher:
             logger.warning(f"Error obteniendo históricos de {symbol}: {type(e).__name__}: {e}")
             return {}
     
-    def get_detailed_historical_data(self, symbol: str, years: int = 5) -> Dict[str, Any]:
+    def get_detailed_historical_data(self, symbol: str, years: int = 5, force_refresh: bool = False) -> Dict[str, Any]:
         """
         Obtiene datos históricos detallados año por año.
-        Retorna un diccionario con años como keys y métricas como valores.
+        
+        Retorna {"years": [...], "metrics": {campo: [valor por año]}, "summary": {...}}
+        en formato columnar (mismo orden que "years", más reciente primero).
+        Para los valores de un año como diccionario usar detailed_year_data().
         """
+        return _singleflight(
+            _flight_key("detailed", symbol.upper(), years, force_refresh=force_refresh),
+            lambda: self._fetch_detailed_historical_data(symbol, years, force_refresh)
+        )
+    
+    def _fetch_detailed_historical_data(self, symbol: str, years: int, force_refresh: bool) -> Dict[str, Any]:
+        cache = get_cache("detailed")
+        cache_key = cache._make_key("detailed", symbol.upper(), years)
+        
+        # Verificar caché (memoria y luego disco)
+        if not force_refresh:
+            cached = cache.get(cache_key)
+            if cached:
+                return cached
+            stored = _disk_cache.get(symbol, "detailed", years)
+            # Las entradas del formato anterior (por año, sin "metrics") se descartan
+            if stored and "metrics" in stored:
+                cache.set(cache_key, stored)
+                return stored
+        
+        if host_cooling_down():
+            logger.warning(f"Yahoo en enfriamiento: se omiten los históricos detallados de {symbol}")
+            return {"years": [], "metrics": {}, "error": "Yahoo Finance está limitando peticiones"}
+        
         try:
-            ticker = yf.Ticker(symbol)
-            
-            # Obtener estados financieros
-            income_stmt = ticker.financials
-            balance_sheet = ticker.balance_sheet
-            cash_flow = ticker.cashflow
+            # Obtener estados financieros (compartidos con get_financial_data)
+            income_stmt, balance_sheet, cash_flow = get_statements(symbol, force_refresh)
             
             # Obtener las fechas (columnas) disponibles
             if income_stmt is None or income_stmt.empty:
-                return {"years": [], "data": {}, "error": "No hay datos históricos disponibles"}
+                return {"years": [], "metrics": {}, "error": "No hay datos históricos disponibles"}
             
             # Las columnas son las fechas de los reportes
             dates = income_stmt.columns[:years]
             
             historical_data = {
-                "years": [],
-                "data": {},
+                "years": [date.year if hasattr(date, 'year') else str(date)[:4] for date in dates],
+                "metrics": {},
                 "summary": {}
             }
             
-            def safe_get(df, key, col):
-                """Obtiene un valor de forma segura del DataFrame."""
-                try:
-                    if df is not None and key in df.index and col in df.columns:
-                        val = df.loc[key, col]
-                        if pd.notna(val):
-                            return float(val)
-                except (KeyError, IndexError, TypeError, ValueError):
-                    pass
-                return None
+            # Todas las filas necesarias en una sola pasada por estado
+            inc = _statement_rows(income_stmt, DETAILED_INCOME_ROWS, dates)
+            bal = _statement_rows(balance_sheet, DETAILED_BALANCE_ROWS, dates)
+            cfs = _statement_rows(cash_flow, DETAILED_CASHFLOW_ROWS, dates)
             
-            def calculate_margin(numerator, denominator):
-                """Calcula un margen de forma segura."""
-                if numerator is not None and denominator is not None and denominator != 0:
-                    return (numerator / denominator) * 100
-                return None
+            # Todas las métricas del período en una sola pasada (una columna por campo)
+            metrics = historical_data["metrics"] = _compute_year_metrics(inc, bal, cfs)
             
-            def calculate_growth(current, previous):
-                """Calcula crecimiento YoY."""
-                if current is not None and previous is not None and previous != 0:
-                    return ((current - previous) / abs(previous)) * 100
-                return None
-            
-            prev_revenue = None
-            prev_net_income = None
-            
-            for i, date in enumerate(dates):
-                year = date.year if hasattr(date, 'year') else str(date)[:4]
-                historical_data["years"].append(year)
-                
-                # Extraer métricas del Income Statement
-                revenue = safe_get(income_stmt, "Total Revenue", date)
-                gross_profit = safe_get(income_stmt, "Gross Profit", date)
-                operating_income = safe_get(income_stmt, "Operating Income", date)
-                net_income = safe_get(income_stmt, "Net Income", date)
-                ebitda = safe_get(income_stmt, "EBITDA", date)
-                
-                # Si no hay EBITDA directo, intentar calcularlo
-                if ebitda is None:
-                    depreciation = safe_get(cash_flow, "Depreciation And Amortization", date)
-                    if operating_income is not None and depreciation is not None:
-                        ebitda = operating_income + depreciation
-                
-                # Extraer métricas del Balance Sheet
-                total_assets = safe_get(balance_sheet, "Total Assets", date)
-                total_equity = safe_get(balance_sheet, "Stockholders Equity", date)
-                total_debt = safe_get(balance_sheet, "Total Debt", date)
-                long_term_debt = safe_get(balance_sheet, "Long Term Debt", date)
-                cash = safe_get(balance_sheet, "Cash And Cash Equivalents", date)
-                current_assets = safe_get(balance_sheet, "Current Assets", date)
-                current_liabilities = safe_get(balance_sheet, "Current Liabilities", date)
-                
-                # Shares Outstanding (para F-Score criterio de dilución)
-                shares_outstanding = safe_get(balance_sheet, "Ordinary Shares Number", date)
-                if shares_outstanding is None:
-                    shares_outstanding = safe_get(balance_sheet, "Share Issued", date)
-                if shares_outstanding is None:
-                    shares_outstanding = safe_get(balance_sheet, "Common Stock Shares Outstanding", date)
-                
-                # Extraer métricas del Cash Flow
-                operating_cash_flow = safe_get(cash_flow, "Operating Cash Flow", date)
-                capex = safe_get(cash_flow, "Capital Expenditure", date)
-                fcf = safe_get(cash_flow, "Free Cash Flow", date)
-                
-                # Si no hay FCF directo, calcularlo
-                if fcf is None and operating_cash_flow is not None and capex is not None:
-                    fcf = operating_cash_flow + capex  # capex es negativo
-                
-                # Calcular márgenes
-                gross_margin = calculate_margin(gross_profit, revenue)
-                operating_margin = calculate_margin(operating_income, revenue)
-                net_margin = calculate_margin(net_income, revenue)
-                ebitda_margin = calculate_margin(ebitda, revenue)
-                
-                # Calcular ratios
-                roe = calculate_margin(net_income, total_equity) if total_equity and total_equity > 0 else None
-                roa = calculate_margin(net_income, total_assets) if total_assets and total_assets > 0 else None
-                
-                debt_to_equity = None
-                if total_debt is not None and total_equity is not None and total_equity > 0:
-                    debt_to_equity = total_debt / total_equity
-                
-                current_ratio = None
-                if current_assets is not None and current_liabilities is not None and current_liabilities > 0:
-                    current_ratio = current_assets / current_liabilities
-                
-                net_debt = None
-                if total_debt is not None and cash is not None:
-                    net_debt = total_debt - cash
-                
-                net_debt_to_ebitda = None
-                if net_debt is not None and ebitda is not None and ebitda > 0:
-                    net_debt_to_ebitda = net_debt / ebitda
-                
-                # Calcular crecimiento
-                revenue_growth = calculate_growth(revenue, prev_revenue)
-                net_income_growth = calculate_growth(net_income, prev_net_income)
-                
-                prev_revenue = revenue
-                prev_net_income = net_income
-                
-                # Guardar datos del año
-                historical_data["data"][year] = {
-                    # Ingresos y utilidades (en millones)
-                    "revenue": revenue,
-                    "revenue_mm": revenue / 1e6 if revenue else None,
-                    "gross_profit": gross_profit,
-                    "gross_profit_mm": gross_profit / 1e6 if gross_profit else None,
-                    "operating_income": operating_income,
-                    "operating_income_mm": operating_income / 1e6 if operating_income else None,
-                    "net_income": net_income,
-                    "net_income_mm": net_income / 1e6 if net_income else None,
-                    "ebitda": ebitda,
-                    "ebitda_mm": ebitda / 1e6 if ebitda else None,
-                    
-                    # Márgenes (en porcentaje)
-                    "gross_margin": gross_margin,
-                    "operating_margin": operating_margin,
-                    "net_margin": net_margin,
-                    "ebitda_margin": ebitda_margin,
-                    
-                    # Balance
-                    "total_assets": total_assets,
-                    "total_assets_mm": total_assets / 1e6 if total_assets else None,
-                    "total_equity": total_equity,
-                    "total_equity_mm": total_equity / 1e6 if total_equity else None,
-                    "total_debt": total_debt,
-                    "total_debt_mm": total_debt / 1e6 if total_debt else None,
-                    "long_term_debt": long_term_debt,
-                    "long_term_debt_mm": long_term_debt / 1e6 if long_term_debt else None,
-                    "shares_outstanding": shares_outstanding,
-                    "cash": cash,
-                    "cash_mm": cash / 1e6 if cash else None,
-                    "net_debt": net_debt,
-                    "net_debt_mm": net_debt / 1e6 if net_debt else None,
-                    
-                    # Ratios
-                    "roe": roe,
-                    "roa": roa,
-                    "debt_to_equity": debt_to_equity,
-                    "current_ratio": current_ratio,
-                    "net_debt_to_ebitda": net_debt_to_ebitda,
-                    
-                    # Cash Flow
-                    "operating_cash_flow": operating_cash_flow,
-                    "operating_cash_flow_mm": operating_cash_flow / 1e6 if operating_cash_flow else None,
-                    "fcf": fcf,
-                    "fcf_mm": fcf / 1e6 if fcf else None,
-                    "capex": capex,
-                    "capex_mm": capex / 1e6 if capex else None,
-                    
-                    # Crecimiento
-                    "revenue_growth": revenue_growth,
-                    "net_income_growth": net_income_growth,
-                }
-            
-            # Calcular resumen de tendencias
+            # Calcular resumen de tendencias (columna[0]: año más reciente, [-1]: más antiguo)
             if len(historical_data["years"]) >= 2:
-                years_list = historical_data["years"]
-                first_year = years_list[-1]  # Año más antiguo
-                last_year = years_list[0]    # Año más reciente
-                
-                first_data = historical_data["data"].get(first_year, {})
-                last_data = historical_data["data"].get(last_year, {})
-                
-                def calc_cagr(end_val, start_val, periods):
-                    if end_val and start_val and start_val > 0 and periods > 0:
-                        return ((end_val / start_val) ** (1 / periods) - 1) * 100
-                    return None
-                
-                num_years = len(years_list) - 1
+                num_years = len(historical_data["years"]) - 1
                 
                 historical_data["summary"] = {
-                    "revenue_cagr": calc_cagr(
-                        last_data.get("revenue"), 
-                        first_data.get("revenue"), 
+                    "revenue_cagr": _calculate_cagr(
+                        metrics["revenue"][0], 
+                        metrics["revenue"][-1], 
                         num_years
                     ),
-                    "net_income_cagr": calc_cagr(
-                        last_data.get("net_income"), 
-                        first_data.get("net_income"), 
+                    "net_income_cagr": _calculate_cagr(
+                        metrics["net_income"][0], 
+                        metrics["net_income"][-1], 
                         num_years
                     ),
-                    "margin_trend": "improving" if (last_data.get("net_margin") or 0) > (first_data.get("net_margin") or 0) else "declining",
+                    "margin_trend": "improving" if (metrics["net_margin"][0] or 0) > (metrics["net_margin"][-1] or 0) else "declining",
                     # CORREGIDO: Manejar None apropiadamente y comparar D/E correctamente
                     # Si D/E reciente < D/E antiguo → mejorando (empresa se desapalancó)
                     "debt_trend": self._calculate_debt_trend(
-                        last_data.get("debt_to_equity"),
-                        first_data.get("debt_to_equity")
+                        metrics["debt_to_equity"][0],
+                        metrics["debt_to_equity"][-1]
                     ),
                 }
             
+            # Guardar en caché (TTL del pool "detailed"); los errores no se cachean
+            cache.set(cache_key, historical_data)
+            _disk_cache.set(symbol, "detailed", historical_data, years)
             return historical_data
         
         except (ConnectionError, TimeoutError) as e:
             logger.error(f"Error de conexión obteniendo históricos detallados de {symbol}: {e}")
-            return {"years": [], "data": {}, "error": f"Timeout: {e}"}
+            return {"years": [], "metrics": {}, "error": f"Timeout: {e}"}
         except ValueError as e:
             logger.warning(f"Error de conversión en históricos de {symbol}: {e}")
-            return {"years": [], "data": {}, "error": f"Datos inválidos: {e}"}
+            return {"years": [], "metrics": {}, "error": f"Datos inválidos: {e}"}
         except Exception as e:
             logger.error(f"Error obteniendo históricos detallados de {symbol}: {type(e).__name__}: {e}", exc_info=True)
-            return {"years": [], "data": {}, "error": str(e)}
+            return {"years": [], "metrics": {}, "error": str(e)}
     
     def get_market_comparison_data(self, sector: str) -> Dict[str, Any]:
         """
         Obtiene datos del mercado (SPY) y del sector (ETF) para comparación.
         Calcula YTD real (desde 1 de enero) y retorno de 1 año.
         """
-        from datetime import datetime, timedelta
-        
         result = {
             "market": {},
             "sector": {},
@@ -841,36 +1863,43 @@ class YahooFinanceFetcher:
         current_year = datetime.now().year
         ytd_start = f"{current_year}-01-01"
         
-        def calculate_returns(ticker_symbol: str) -> Dict[str, float]:
-            """Calcula YTD real y retorno de 1 año."""
+        def period_return(hist) -> Optional[float]:
+            """Rendimiento (%) entre el primer y el último cierre."""
+            if hist is not None and not hist.empty and len(hist) > 1:
+                return ((hist['Close'].iloc[-1] / hist['Close'].iloc[0]) - 1) * 100
+            return None
+        
+        def calculate_returns(ticker_symbol: str, ytd_future, year_future) -> Dict[str, float]:
+            """Calcula YTD real y retorno de 1 año a partir de las descargas en curso."""
             try:
-                ticker = yf.Ticker(ticker_symbol)
-                
-                # YTD real (desde 1 de enero)
-                ytd_hist = ticker.history(start=ytd_start)
-                ytd_return = None
-                if not ytd_hist.empty and len(ytd_hist) > 1:
-                    ytd_return = ((ytd_hist['Close'].iloc[-1] / ytd_hist['Close'].iloc[0]) - 1) * 100
-                
-                # Retorno de 1 año
-                year_hist = ticker.history(period="1y")
-                year_return = None
-                if not year_hist.empty and len(year_hist) > 1:
-                    year_return = ((year_hist['Close'].iloc[-1] / year_hist['Close'].iloc[0]) - 1) * 100
-                
+                ytd_return = period_return(ytd_future.result(timeout=PARALLEL_TASK_TIMEOUT))
+                year_return = period_return(year_future.result(timeout=PARALLEL_TASK_TIMEOUT))
                 return {
                     "ytd_return": round(ytd_return, 2) if ytd_return else None,
                     "year_return": round(year_return, 2) if year_return else None,
                 }
             except Exception as e:
-                print(f"Error calculando retornos para {ticker_symbol}: {e}")
+                logger.warning(f"Error calculando retornos para {ticker_symbol}: {e}")
                 return {"ytd_return": None, "year_return": None}
         
+        # Las 6 descargas (info + YTD + 1 año, para SPY y el ETF) son
+        # independientes: se lanzan todas a la vez sobre los cachés L1. Cada
+        # espera tiene su timeout, así una descarga colgada solo marca su parte
+        # con error
+        etf_symbol = self._get_sector_etf_symbol(sector)
+        futures = {}
+        for key, ticker_symbol in (("market", "SPY"), ("sector", etf_symbol)):
+            futures[key] = (
+                _overlap_executor.submit(get_ticker_info, ticker_symbol),
+                _overlap_executor.submit(get_price_history, ticker_symbol, None, ytd_start),
+                _overlap_executor.submit(get_price_history, ticker_symbol, "1y"),
+            )
+        
         try:
             # Datos del mercado (SPY)
-            spy = yf.Ticker("SPY")
-            spy_info = spy.info
-            spy_returns = calculate_returns("SPY")
+            info_future, ytd_future, year_future = futures["market"]
+            spy_info = info_future.result(timeout=PARALLEL_TASK_TIMEOUT)
+            spy_returns = calculate_returns("SPY", ytd_future, year_future)
             
             result["market"] = {
                 "name": "S&P 500",
@@ -885,15 +1914,14 @@ class YahooFinanceFetcher:
             }
             
         except Exception as e:
-            print(f"Error obteniendo datos de SPY: {e}")
+            logger.exception(f"Error obteniendo datos de SPY: {e}")
             result["market"] = {"name": "S&P 500", "symbol": "SPY", "error": str(e)}
         
         try:
             # Datos del sector (ETF) - usando mapeo dinámico
-            etf_symbol = self._get_sector_etf_symbol(sector)
-            etf = yf.Ticker(etf_symbol)
-            etf_info = etf.info
-            etf_returns = calculate_returns(etf_symbol)
+            info_future, ytd_future, year_future = futures["sector"]
+            etf_info = info_future.result(timeout=PARALLEL_TASK_TIMEOUT)
+            etf_returns = calculate_returns(etf_symbol, ytd_future, year_future)
             
             result["sector"] = {
                 "name": etf_info.get("shortName", sector),
@@ -909,25 +1937,25 @@ class YahooFinanceFetcher:
             }
             
         except Exception as e:
-            print(f"Error obteniendo datos del sector {sector}: {e}")
-            result["sector"] = {"name": sector, "symbol": self._get_sector_etf_symbol(sector), "error": str(e)}
+            logger.exception(f"Error obteniendo datos del sector {sector}: {e}")
+            result["sector"] = {"name": sector, "symbol": etf_symbol, "error": str(e)}
         
         return result
     
-    def get_sector_averages(self, sector: str) -> Dict[str, Optional[float]]:
+    def get_sector_averages(self, sector: str, force_refresh: bool = False) -> Dict[str, Optional[float]]:
         """Obtiene promedios del sector (simplificado - usa ETFs sectoriales)."""
         # Usar el mismo mapeo dinámico
         etf_symbol = self._get_sector_etf_symbol(sector)
         
         try:
-            ticker = yf.Ticker(etf_symbol)
-            info = ticker.info
+            # Caché L1 compartido: los mismos ETFs se consultan en cada análisis
+            info = fetch_ticker_info(yf.Ticker(etf_symbol)) if force_refresh else get_ticker_info(etf_symbol)
             
             return {
                 "sector_pe": info.get("trailingPE", 20.0),
                 "sector_ev_ebitda": 12.0,  # Difícil de obtener para ETFs
             }
-        except (KeyError, TypeError, ValueError, ConnectionError) as e:
+        except (KeyError, TypeError, ValueError, ConnectionError, TimeoutError) as e:
             logger.debug(f"No se pudo obtener datos del ETF {etf_symbol}: {e}")
             return {"sector_pe": 20.0, "sector_ev_ebitda": 12.0}
     
@@ -936,93 +1964,15 @@ class YahooFinanceFetcher:
         if not sector_name:
             return "SPY"
         
-        sector_etf_mapping = {
-            # Tecnología
-            "technology": "XLK",
-            "tech": "XLK",
-            "information technology": "XLK",
-            "software": "XLK",
-            "semiconductors": "XLK",
-            # Financiero
-            "financial services": "XLF",
-            "financial": "XLF",
-            "financials": "XLF",
-            "banks": "XLF",
-            "banking": "XLF",
-            "insurance": "XLF",
-            "capital markets": "XLF",
-            "credit services": "XLF",
-            # Healthcare
-            "healthcare": "XLV",
-            "health care": "XLV",
-            "biotechnology": "XLV",
-            "pharmaceuticals": "XLV",
-            "medical devices": "XLV",
-            # Consumo Cíclico
-            "consumer cyclical": "XLY",
-            "consumer discretionary": "XLY",
-            "retail": "XLY",
-            "automobiles": "XLY",
-            "auto manufacturers": "XLY",
-            "restaurants": "XLY",
-            "travel & leisure": "XLY",
-            "apparel": "XLY",
-            # Consumo Defensivo
-            "consumer defensive": "XLP",
-            "consumer staples": "XLP",
-            "food & beverage": "XLP",
-            "household products": "XLP",
-            "tobacco": "XLP",
-            # Industriales
-            "industrials": "XLI",
-            "industrial": "XLI",
-            "aerospace & defense": "XLI",
-            "machinery": "XLI",
-            "construction": "XLI",
-            "transportation": "XLI",
-            "airlines": "XLI",
-            # Energía
-            "energy": "XLE",
-            "oil & gas": "XLE",
-            "oil": "XLE",
-            "gas": "XLE",
-            "petroleum": "XLE",
-            # Utilities
-            "utilities": "XLU",
-            "utility": "XLU",
-            "electric utilities": "XLU",
-            "gas utilities": "XLU",
-            "water utilities": "XLU",
-            # Real Estate
-            "real estate": "XLRE",
-            "reits": "XLRE",
-            "reit": "XLRE",
-            "real estate services": "XLRE",
-            # Materiales
-            "materials": "XLB",
-            "basic materials": "XLB",
-            "chemicals": "XLB",
-            "metals & mining": "XLB",
-            "steel": "XLB",
-            "gold": "XLB",
-            # Comunicaciones
-            "communication services": "XLC",
-            "communications": "XLC",
-            "telecommunication": "XLC",
-            "telecom": "XLC",
-            "media": "XLC",
-            "entertainment": "XLC",
-            "interactive media": "XLC",
-        }
-        
-        sector_lower = sector_name.lower().strip()
+        sector_lower = sector_name.casefold().strip()
         
         # Búsqueda exacta
-        if sector_lower in sector_etf_mapping:
-            return sector_etf_mapping[sector_lower]
+        etf = self._SECTOR_ETF_MAP.get(sector_lower)
+        if etf:
+            return etf
         
         # Búsqueda parcial
-        for key, etf in sector_etf_mapping.items():
+        for key, etf in self._SECTOR_ETF_KEYS_SORTED:
             if key in sector_lower or sector_lower in key:
                 return etf
         
@@ -1033,253 +1983,27 @@ class YahooFinanceFetcher:
         Obtiene datos completos del sector para comparación.
         Incluye promedios típicos por sector y datos del ETF sectorial.
         """
-        # Datos típicos por sector (basados en promedios históricos)
-        sector_benchmarks = {
-            "Technology": {
-                "name": "Tecnología",
-                "etf": "XLK",
-                "typical_pe": 28.0,
-                "typical_ps": 6.5,
-                "typical_pb": 8.0,
-                "typical_ev_ebitda": 18.0,
-                "typical_roe": 0.22,
-                "typical_roa": 0.12,
-                "typical_gross_margin": 0.50,
-                "typical_operating_margin": 0.22,
-                "typical_net_margin": 0.18,
-                "typical_debt_equity": 0.45,
-                "typical_current_ratio": 2.0,
-                "growth_outlook": "Alto",
-                "volatility": "Alta",
-                "dividend_typical": "Bajo",
-            },
-            "Healthcare": {
-                "name": "Salud",
-                "etf": "XLV",
-                "typical_pe": 22.0,
-                "typical_ps": 2.5,
-                "typical_pb": 4.5,
-                "typical_ev_ebitda": 14.0,
-                "typical_roe": 0.18,
-                "typical_roa": 0.08,
-                "typical_gross_margin": 0.55,
-                "typical_operating_margin": 0.18,
-                "typical_net_margin": 0.12,
-                "typical_debt_equity": 0.60,
-                "typical_current_ratio": 1.8,
-                "growth_outlook": "Moderado-Alto",
-                "volatility": "Media",
-                "dividend_typical": "Moderado",
-            },
-            "Financial Services": {
-                "name": "Servicios Financieros",
-                "etf": "XLF",
-                "typical_pe": 14.0,
-                "typical_ps": 3.0,
-                "typical_pb": 1.3,
-                "typical_ev_ebitda": 10.0,
-                "typical_roe": 0.12,
-                "typical_roa": 0.01,
-                "typical_gross_margin": 0.60,
-                "typical_operating_margin": 0.30,
-                "typical_net_margin": 0.22,
-                "typical_debt_equity": 1.50,
-                "typical_current_ratio": 1.2,
-                "growth_outlook": "Moderado",
-                "volatility": "Media-Alta",
-                "dividend_typical": "Alto",
-            },
-            "Consumer Cyclical": {
-                "name": "Consumo Discrecional",
-                "etf": "XLY",
-                "typical_pe": 22.0,
-                "typical_ps": 1.8,
-                "typical_pb": 6.0,
-                "typical_ev_ebitda": 14.0,
-                "typical_roe": 0.25,
-                "typical_roa": 0.08,
-                "typical_gross_margin": 0.35,
-                "typical_operating_margin": 0.10,
-                "typical_net_margin": 0.06,
-                "typical_debt_equity": 1.00,
-                "typical_current_ratio": 1.3,
-                "growth_outlook": "Cíclico",
-                "volatility": "Alta",
-                "dividend_typical": "Bajo",
-            },
-            "Consumer Defensive": {
-                "name": "Consumo Básico",
-                "etf": "XLP",
-                "typical_pe": 20.0,
-                "typical_ps": 1.5,
-                "typical_pb": 5.0,
-                "typical_ev_ebitda": 14.0,
-                "typical_roe": 0.22,
-                "typical_roa": 0.08,
-                "typical_gross_margin": 0.35,
-                "typical_operating_margin": 0.12,
-                "typical_net_margin": 0.08,
-                "typical_debt_equity": 1.20,
-                "typical_current_ratio": 1.0,
-                "growth_outlook": "Estable",
-                "volatility": "Baja",
-                "dividend_typical": "Alto",
-            },
-            "Industrials": {
-                "name": "Industriales",
-                "etf": "XLI",
-                "typical_pe": 20.0,
-                "typical_ps": 2.0,
-                "typical_pb": 4.5,
-                "typical_ev_ebitda": 12.0,
-                "typical_roe": 0.18,
-                "typical_roa": 0.06,
-                "typical_gross_margin": 0.28,
-                "typical_operating_margin": 0.12,
-                "typical_net_margin": 0.08,
-                "typical_debt_equity": 0.90,
-                "typical_current_ratio": 1.4,
-                "growth_outlook": "Cíclico",
-                "volatility": "Media",
-                "dividend_typical": "Moderado",
-            },
-            "Energy": {
-                "name": "Energía",
-                "etf": "XLE",
-                "typical_pe": 12.0,
-                "typical_ps": 1.2,
-                "typical_pb": 2.0,
-                "typical_ev_ebitda": 6.0,
-                "typical_roe": 0.15,
-                "typical_roa": 0.07,
-                "typical_gross_margin": 0.45,
-                "typical_operating_margin": 0.15,
-                "typical_net_margin": 0.10,
-                "typical_debt_equity": 0.40,
-                "typical_current_ratio": 1.2,
-                "growth_outlook": "Volátil",
-                "volatility": "Muy Alta",
-                "dividend_typical": "Alto",
-            },
-            "Utilities": {
-                "name": "Servicios Públicos",
-                "etf": "XLU",
-                "typical_pe": 18.0,
-                "typical_ps": 2.5,
-                "typical_pb": 2.0,
-                "typical_ev_ebitda": 12.0,
-                "typical_roe": 0.10,
-                "typical_roa": 0.03,
-                "typical_gross_margin": 0.40,
-                "typical_operating_margin": 0.22,
-                "typical_net_margin": 0.12,
-                "typical_debt_equity": 1.40,
-                "typical_current_ratio": 0.8,
-                "growth_outlook": "Estable",
-                "volatility": "Baja",
-                "dividend_typical": "Muy Alto",
-            },
-            "Real Estate": {
-                "name": "Bienes Raíces",
-                "etf": "XLRE",
-                "typical_pe": 35.0,
-                "typical_ps": 6.0,
-                "typical_pb": 2.5,
-                "typical_ev_ebitda": 18.0,
-                "typical_roe": 0.08,
-                "typical_roa": 0.04,
-                "typical_gross_margin": 0.55,
-                "typical_operating_margin": 0.30,
-                "typical_net_margin": 0.20,
-                "typical_debt_equity": 0.90,
-                "typical_current_ratio": 1.0,
-                "growth_outlook": "Moderado",
-                "volatility": "Media",
-                "dividend_typical": "Muy Alto",
-            },
-            "Materials": {
-                "name": "Materiales",
-                "etf": "XLB",
-                "typical_pe": 16.0,
-                "typical_ps": 1.8,
-                "typical_pb": 3.0,
-                "typical_ev_ebitda": 9.0,
-                "typical_roe": 0.15,
-                "typical_roa": 0.06,
-                "typical_gross_margin": 0.30,
-                "typical_operating_margin": 0.14,
-                "typical_net_margin": 0.08,
-                "typical_debt_equity": 0.60,
-                "typical_current_ratio": 1.8,
-                "growth_outlook": "Cíclico",
-                "volatility": "Alta",
-                "dividend_typical": "Moderado",
-            },
-            "Communication Services": {
-                "name": "Comunicaciones",
-                "etf": "XLC",
-                "typical_pe": 18.0,
-                "typical_ps": 2.5,
-                "typical_pb": 3.5,
-                "typical_ev_ebitda": 10.0,
-                "typical_roe": 0.12,
-                "typical_roa": 0.05,
-                "typical_gross_margin": 0.55,
-                "typical_operating_margin": 0.18,
-                "typical_net_margin": 0.12,
-                "typical_debt_equity": 0.80,
-                "typical_current_ratio": 1.3,
-                "growth_outlook": "Moderado",
-                "volatility": "Media-Alta",
-                "dividend_typical": "Bajo-Moderado",
-            },
-        }
-        
-        # Default si no encontramos el sector
-        default_data = {
-            "name": sector or "General",
-            "etf": "SPY",
-            "typical_pe": 20.0,
-            "typical_ps": 2.5,
-            "typical_pb": 4.0,
-            "typical_ev_ebitda": 12.0,
-            "typical_roe": 0.15,
-            "typical_roa": 0.06,
-            "typical_gross_margin": 0.40,
-            "typical_operating_margin": 0.15,
-            "typical_net_margin": 0.10,
-            "typical_debt_equity": 0.80,
-            "typical_current_ratio": 1.5,
-            "growth_outlook": "Moderado",
-            "volatility": "Media",
-            "dividend_typical": "Moderado",
-        }
-        
         # Búsqueda flexible del sector
         benchmark = None
         if sector:
             sector_lower = sector.lower().strip()
             
-            # Primero búsqueda exacta
-            benchmark = sector_benchmarks.get(sector)
-            
-            # Si no, búsqueda case-insensitive
-            if not benchmark:
-                for key, data in sector_benchmarks.items():
-                    if key.lower() == sector_lower:
-                        benchmark = data
-                        break
+            # Primero búsqueda exacta, luego case-insensitive
+            benchmark = SECTOR_BENCHMARKS.get(sector) or _SECTOR_BENCHMARKS_LOWER.get(sector_lower)
             
             # Si no, búsqueda parcial
             if not benchmark:
-                for key, data in sector_benchmarks.items():
-                    if sector_lower in key.lower() or key.lower() in sector_lower:
+                for key, data in _SECTOR_BENCHMARKS_LOWER.items():
+                    if sector_lower in key or key in sector_lower:
                         benchmark = data
                         break
         
-        # Usar default si no encontramos
-        if not benchmark:
-            benchmark = default_data
+        # Copia: abajo se escriben los datos del ETF y las tablas son compartidas
+        if benchmark:
+            benchmark = dict(benchmark)
+        else:
+            # Usar default si no encontramos
+            benchmark = dict(DEFAULT_SECTOR_BENCHMARK, name=sector or "General")
             # Pero usar el ETF correcto basado en el mapeo
             etf_from_mapping = self._get_sector_etf_symbol(sector)
             benchmark["etf"] = etf_from_mapping
@@ -1287,9 +2011,8 @@ class YahooFinanceFetcher:
         # Intentar obtener datos en tiempo real del ETF
         try:
             etf_symbol = benchmark.get("etf", "SPY")
-            ticker = yf.Ticker(etf_symbol)
-            info = ticker.info
-            hist = ticker.history(period="1y")
+            info = get_ticker_info(etf_symbol)
+            hist = get_price_history(etf_symbol, "1y")
             
             # Calcular rendimiento del sector (YTD aproximado)
             if not hist.empty:
@@ -1328,7 +2051,7 @@ class FinancialDataService:
             self.yahoo = None
             self.yahoo_available = False
     
-    def get_complete_analysis_data(self, symbol: str, progress_callback: Optional[Callable[[str, float], None]] = None) -> Dict[str, Any]:
+    def get_complete_analysis_data(self, symbol: str, progress_callback: Optional[Callable[[str, float], None]] = None, force_refresh: bool = False) -> Dict[str, Any]:
         """
         Obtiene todos los datos necesarios para el análisis completo.
         
@@ -1337,6 +2060,7 @@ class FinancialDataService:
         Args:
             symbol: Símbolo del ticker (ej: AAPL, MSFT)
             progress_callback: Función opcional para reportar progreso (mensaje, porcentaje 0-100)
+            force_refresh: Ignorar cachés (memoria y disco) y volver a consultar Yahoo
         
         Returns:
             Dict con profile, financials, historical, sector_averages, contextual, errors
@@ -1364,7 +2088,6 @@ class FinancialDataService:
             raise InvalidSymbolError(f"Símbolo demasiado largo: {len(symbol)} caracteres")
         
         # Validar caracteres permitidos (letras, números, puntos, guiones)
-        import re
         if not re.match(r'^[A-Z0-9\.\-]+$', symbol):
             logger.warning(f"Símbolo con caracteres inválidos: {symbol}")
             raise InvalidSymbolError(f"Símbolo contiene caracteres inválidos: {symbol}")
@@ -1407,10 +2130,10 @@ class FinancialDataService:
         
         # Definir tareas a ejecutar en paralelo
         tasks = {
-            "profile": lambda: self.yahoo.get_company_profile(symbol),
-            "financials": lambda: self.yahoo.get_financial_data(symbol),
-            "historical": lambda: self.yahoo.get_historical_metrics(symbol),
-            "detailed": lambda: self.yahoo.get_detailed_historical_data(symbol, years=4),
+            "profile": lambda: self.yahoo.get_company_profile(symbol, force_refresh=force_refresh),
+            "financials": lambda: self.yahoo.get_financial_data(symbol, force_refresh=force_refresh),
+            "historical": lambda: self.yahoo.get_historical_metrics(symbol, force_refresh=force_refresh),
+            "detailed": lambda: self.yahoo.get_detailed_historical_data(symbol, years=4, force_refresh=force_refresh),
         }
         
         results_parallel = {}
@@ -1462,6 +2185,9 @@ class FinancialDataService:
                     result["errors"].append(error_msg)
                     logger.error(f"❌ {error_msg} para {symbol}", exc_info=True)
         
+        if self.yahoo.is_cooling_down:
+            result["errors"].append("Yahoo Finance está limitando peticiones; reintenta en unos minutos")
+        
         parallel_time = time.time() - start_time
         result["_timing"]["parallel_fetch"] = parallel_time
         logger.info(f"Fetch paralelo completado para {symbol} en {parallel_time:.2f}s")
@@ -1549,14 +2275,13 @@ class FinancialDataService:
         # ===== DATOS HISTÓRICOS DETALLADOS PARA PIOTROSKI F-SCORE =====
         if detailed_historical and detailed_historical.get("years"):
             years_list = detailed_historical.get("years", [])
-            hist_data = detailed_historical.get("data", {})
             
             if len(years_list) >= 2:
                 current_year = years_list[0]
                 prior_year = years_list[1]
                 
-                current_data = hist_data.get(current_year, {})
-                prior_data = hist_data.get(prior_year, {})
+                current_data = detailed_year_data(detailed_historical, current_year)
+                prior_data = detailed_year_data(detailed_historical, prior_year)
                 
                 # Debug
                 result["contextual"]["_debug_years"] = years_list[:2]
@@ -1617,7 +2342,7 @@ class FinancialDataService:
         # FASE 3: Promedios del sector (depende del profile)
         # ========================================
         if profile:
-            sector_avg = self.yahoo.get_sector_averages(profile.sector)
+            sector_avg = self.yahoo.get_sector_averages(profile.sector, force_refresh=force_refresh)
             result["sector_averages"] = sector_avg
             result["contextual"].update(sector_avg)
         
@@ -1661,6 +2386,135 @@ class FinancialDataService:
         }
 
 
+# =========================
+# CONTEXTO DE MERCADO (YTD)
+# =========================
+
+# Pool compartido para refrescos en segundo plano de los cachés L1
+_market_context_executor = ThreadPoolExecutor(
+    max_workers=THREAD_POOL_WORKERS, thread_name_prefix="market-context"
+)
+
+# Cachés L1 para Ticker.info / Ticker.history / yf.download (5 min, luego stale-while-revalidate)
+_INFO_CACHE = StaleWhileRevalidateCache(512, 300, _market_context_executor)
+_HIST_CACHE = StaleWhileRevalidateCache(1024, 300, _market_context_executor)
+
+
+class Statements(NamedTuple):
+    """Estados anuales de un símbolo (DataFrames de yfinance)."""
+    income: Any
+    balance: Any
+    cashflow: Any
+
+
+# Estados anuales: cambian una vez al año, 10 min en memoria es conservador
+_STATEMENTS_CACHE = StaleWhileRevalidateCache(256, 600, _market_context_executor)
+
+
+def _fetch_statement(symbol: str, attr: str):
+    throttle_yahoo()
+    # Un Ticker por estado: las tres descargas corren en hilos distintos
+    return getattr(yf.Ticker(symbol), attr)
+
+
+def _fetch_statements(symbol: str) -> Statements:
+    futures = [
+        _overlap_executor.submit(_fetch_statement, symbol, attr)
+        for attr in ("financials", "balance_sheet", "cashflow")
+    ]
+    return Statements(*(future.result() for future in futures))
+
+
+def get_statements(symbol: str, force_refresh: bool = False) -> Statements:
+    """
+    financials / balance_sheet / cashflow de un símbolo con caché L1.
+    
+    get_financial_data, get_historical_metrics y get_detailed_historical_data
+    corren en paralelo para el mismo símbolo: el single-flight hace que solo
+    uno de ellos descargue los estados y los demás reutilicen los DataFrames.
+    """
+    symbol = symbol.upper()
+    key = ("statements", symbol)
+    
+    def fetch():
+        return _singleflight(
+            _flight_key("statements", symbol, force_refresh=force_refresh),
+            lambda: _fetch_statements(symbol)
+        )
+    
+    if force_refresh:
+        statements = fetch()
+        _STATEMENTS_CACHE._store(key, statements)
+        return statements
+    return _STATEMENTS_CACHE.get_or_fetch(key, fetch)
+
+
+def get_ticker_info(symbol: str) -> Dict[str, Any]:
+    """Ticker.info con caché L1 compartido entre sesiones."""
+    symbol = symbol.upper()
+    return _INFO_CACHE.get_or_fetch(("info", symbol), lambda: fetch_ticker_info(yf.Ticker(symbol)))
+
+
+def get_price_history(symbol: str, period: Optional[str] = None, start: Optional[str] = None):
+    """Ticker.history (period o start) con caché L1 compartido entre sesiones."""
+    symbol = symbol.upper()
+    kwargs = {"start": start} if start else {"period": period or "1y"}
+    
+    def fetch():
+        throttle_yahoo()
+        return yf.Ticker(symbol).history(**kwargs)
+    
+    return _HIST_CACHE.get_or_fetch(("history", symbol, period, start), fetch)
+
+
+def get_ytd_returns(tickers: List[str], ytd_start: str) -> Dict[str, float]:
+    """
+    Rendimiento (%) desde ytd_start para varios tickers con un solo
+    yf.download (una petición batch en lugar de una por ticker).
+    Tickers sin datos quedan en 0.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))  # Sin duplicados, mismo orden
+    
+    def fetch():
+        throttle_yahoo()
+        # auto_adjust=True como Ticker.history: cierres ajustados por dividendos
+        # y splits, coherentes con la serie de 1 año que se muestra al lado
+        return yf.download(tickers, start=ytd_start, progress=False, threads=True, auto_adjust=True)["Close"]
+    
+    closes = _HIST_CACHE.get_or_fetch(("download", tuple(tickers), ytd_start), fetch)
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(name=tickers[0])
+    
+    # Primer y último cierre válido por columna (tickers con fechas de inicio distintas)
+    ytds = (closes.ffill().iloc[-1] / closes.bfill().iloc[0] - 1) * 100 if not closes.empty else {}
+    return {t: float(ytds[t]) if t in ytds and pd.notna(ytds[t]) else 0 for t in tickers}
+
+
+def fetch_market_context(symbol: str, sector_etf: str, ytd_start: str) -> Dict[str, Any]:
+    """
+    Obtiene el rendimiento YTD del símbolo, del mercado (SPY) y de su ETF
+    sectorial en una sola descarga batch de Yahoo.
+    
+    Si la descarga falla, los tres campos quedan en 0. El rango de 52 semanas
+    y el volumen promedio ya vienen en FinancialStatements (mismo Ticker.info
+    del análisis).
+    """
+    context = {"stock_ytd": 0, "market_ytd": 0, "sector_ytd": 0}
+    if not YFINANCE_AVAILABLE or not PANDAS_AVAILABLE:
+        return context
+    
+    try:
+        ytds = get_ytd_returns([symbol, "SPY", sector_etf], ytd_start)
+    except Exception as e:
+        logger.warning(f"Error calculando YTD para {symbol}: {e}")
+        return context
+    
+    context["stock_ytd"] = ytds[symbol.upper()]
+    context["market_ytd"] = ytds["SPY"]
+    context["sector_ytd"] = ytds[sector_etf.upper()]
+    return context
+
+
 def test_fetcher(symbol: str = "AAPL"):
     """Función de prueba para verificar que el fetcher funciona."""
     print(f"\n{'='*60}")
@@ -1726,11 +2580,11 @@ def benchmark_comparison(symbol: str = "AAPL"):
     service = FinancialDataService()
     
     # Limpiar caché para test justo
-    _data_cache.clear()
+    clear_caches()
     
     times = []
     for i in range(3):
-        _data_cache.clear()  # Limpiar entre runs
+        clear_caches()  # Limpiar entre runs
         start = time.time()
         data = service.get_complete_analysis_data(symbol)
         elapsed = time.time() - start
@@ -1750,11 +2604,30 @@ def benchmark_comparison(symbol: str = "AAPL"):
     return avg_time, cached_time
 
 
+def bulk_scan(symbols: List[str]):
+    """Descarga en paralelo los datos financieros de varios símbolos (p.ej. una watchlist)."""
+    print(f"\n{'='*60}")
+    print(f"BULK: {len(symbols)} símbolos")
+    print(f"{'='*60}\n")
+    
+    start = time.time()
+    results = YahooFinanceFetcher().get_bulk_financial_data(symbols)
+    
+    for symbol, financials in results.items():
+        if financials is None:
+            print(f"   {symbol}: ✗ sin datos")
+        else:
+            print(f"   {symbol}: ✓ precio {financials.price}, EPS {financials.eps}")
+    print(f"\n✅ Completado en {time.time() - start:.2f} segundos\n")
+
+
 if __name__ == "__main__":
-    import sys
     symbol = sys.argv[1] if len(sys.argv) > 1 else "AAPL"
     
     if "--benchmark" in sys.argv:
         benchmark_comparison(symbol)
+    elif "--bulk" in sys.argv:
+        # python data_fetcher.py AAPL,MSFT,GOOGL --bulk
+        bulk_scan(symbol.split(","))
     else:
         test_fetcher(symbol)
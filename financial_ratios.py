@@ -11,6 +11,7 @@ Versión: 3.1 - Configuración Centralizada
 from typing import Optional, Dict, List, Tuple, Any
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 
 # Importar configuración centralizada
 try:
@@ -3401,6 +3402,27 @@ def calculate_all_ratios(financial_data: Dict) -> Dict[str, Optional[float]]:
     }
 
 
+@lru_cache(maxsize=128)
+def _calculate_all_ratios_frozen(items: Tuple) -> Dict[str, Optional[float]]:
+    return calculate_all_ratios(dict(items))
+
+
+def calculate_all_ratios_cached(financial_data: Dict) -> Dict[str, Optional[float]]:
+    """Versión memoizada de calculate_all_ratios.
+    
+    La clave es el contenido completo de financial_data, así que datos
+    refrescados (otro precio, otro trimestre) nunca reutilizan ratios viejos.
+    Retorna una copia: el llamador puede enriquecer el dict sin tocar el caché.
+    """
+    try:
+        key = tuple(sorted(financial_data.items()))
+        hash(key)
+    except TypeError:
+        # Algún valor no hashable: calcular sin caché
+        return calculate_all_ratios(financial_data)
+    return dict(_calculate_all_ratios_frozen(key))
+
+
 def format_ratio(value: Optional[float], format_type: str = "decimal", decimals: int = 2) -> str:
     """Formatea un ratio para presentación.
     
@@ -3,6 +3,7 @@ Finanzer - Sistema de alertas y explicaciones.
 Proporciona contexto educativo para cada tipo de alerta financiera.
 """
 
+from functools import lru_cache
 from typing import Dict
 
 
@@ -54,9 +55,11 @@ GENERIC_EXPLANATIONS: Dict[str, str] = {
 }
 
 
+@lru_cache(maxsize=4096)
 def get_alert_explanation(category: str, reason: str) -> str:
     """
     Genera una explicación detallada para cada tipo de alerta.
+    Memoizada: los mismos (categoría, razón) se repiten entre análisis y sesiones.
     
     Args:
         category: Categoría de la alerta (valoración, deuda, etc.)
@@ -26,6 +26,8 @@ __all__ = [
     'get_score_color',
     'create_score_donut',
     'create_price_chart',
+    'create_period_charts',
+    'create_period_chart_payloads',
     'create_ytd_comparison_chart',
     # Tables (requiere dash)
     'create_comparison_metric_row',
@@ -35,6 +37,7 @@ __all__ = [
     'get_sensitivity_cell_class',
     # PDF (requiere reportlab)
     'generate_simple_pdf',
+    'ReportRatios',
 ]
 
 
@@ -49,10 +52,12 @@ def __getattr__(name):
         return locals()[name]
     
     if name in ('get_score_color', 'create_score_donut', 
-                'create_price_chart', 'create_ytd_comparison_chart'):
+                'create_price_chart', 'create_period_charts',
+                'create_period_chart_payloads', 'create_ytd_comparison_chart'):
         from .charts import (
             get_score_color, create_score_donut,
-            create_price_chart, create_ytd_comparison_chart
+            create_price_chart, create_period_charts, create_period_chart_payloads,
+            create_ytd_comparison_chart
         )
         return locals()[name]
     
@@ -64,8 +69,8 @@ def __getattr__(name):
         from .sensitivity import build_sensitivity_section, get_sensitivity_cell_class
         return locals()[name]
     
-    if name == 'generate_simple_pdf':
-        from .pdf_generator import generate_simple_pdf
-        return generate_simple_pdf
+    if name in ('generate_simple_pdf', 'ReportRatios'):
+        from .pdf_generator import generate_simple_pdf, ReportRatios
+        return locals()[name]
     
     raise AttributeError(f"module 'finanzer.components' has no attribute '{name}'")
@@ -3,16 +3,14 @@ Finanzer - Componentes de tarjetas de métricas.
 Cards para mostrar KPIs, scores y métricas financieras.
 """
 
+import uuid
+
 from dash import html
 import dash_bootstrap_components as dbc
 
 from .tooltips import METRIC_TOOLTIPS, LABEL_TO_TOOLTIP, get_tooltip_text
 
 
-# Contador global para IDs únicos de tooltips
-_tooltip_counter = [0]
-
-
 def create_info_icon(tooltip_id: str, tooltip_key: str):
     """Crea un ícono de información con tooltip moderno y accesible."""
     return html.Span([
@@ -54,9 +52,9 @@ def create_metric_card(label: str, value: str, icon: str = "📊", tooltip_key:
     if tooltip_key is None:
         tooltip_key = LABEL_TO_TOOLTIP.get(label)
     
-    # Generar ID único
-    _tooltip_counter[0] += 1
-    tip_id = f"mc-tip-{_tooltip_counter[0]}"
+    # ID único: los tabs se construyen en requests separados, quizá en otro
+    # worker, así que un contador por proceso podría repetir IDs ya en la página
+    tip_id = f"mc-tip-{uuid.uuid4().hex}"
     
     # Contenido del label con o sin tooltip
     if tooltip_key and tooltip_key in METRIC_TOOLTIPS:
@@ -90,5 +88,4 @@ def create_score_summary_card(label: str, score: int, max_score: int = 20, icon:
 
 
 def reset_tooltip_counter():
-    """Reinicia el contador de tooltips (útil para testing)."""
-    _tooltip_counter[0] = 0
+    """Sin efecto: los IDs de tooltip ya no usan contador (se mantiene por compatibilidad)."""
@@ -3,12 +3,30 @@ Finanzer - Componentes de gráficos.
 Visualizaciones de datos financieros con Plotly.
 """
 
+import json
 import logging
-import yfinance as yf
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from functools import lru_cache
 import plotly.graph_objects as go
+import plotly.io as pio
+
+from data_fetcher import get_price_history
 
 logger = logging.getLogger(__name__)
 
+# Figuras de precio ya construidas: (SYMBOL, period) -> (hist, resultado).
+# Se reutilizan mientras get_price_history devuelva el mismo DataFrame.
+_PRICE_CHART_CACHE_SIZE = 256
+_price_chart_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+# Los callbacks de Dash corren en hilos concurrentes: todo acceso al caché va con lock
+_price_chart_lock = threading.Lock()
+
+# Periodos del selector del tab Histórico, todos recortados del mismo histórico de 5 años
+PRICE_PERIODS = ("5d", "1mo", "3mo", "6mo", "1y", "5y")
+_PERIOD_DAYS = {"1mo": 30, "3mo": 91, "6mo": 182, "1y": 365}
+
 
 def get_score_color(score: int) -> tuple:
     """Retorna color y label según el score."""
@@ -22,8 +40,12 @@ def get_score_color(score: int) -> tuple:
         return "#ef4444", "EVITAR"
 
 
+@lru_cache(maxsize=128)
 def create_score_donut(score: int) -> go.Figure:
-    """Crea gráfico donut moderno y minimalista para el score."""
+    """
+    Crea gráfico donut moderno y minimalista para el score.
+    Memoizado por score: la figura es compartida y no debe mutarse.
+    """
     color, label = get_score_color(score)
     
     fig = go.Figure()
@@ -86,104 +108,199 @@ def create_price_chart(symbol: str, period: str = "1y"):
     Retorna: (figura, pct_change, end_price) o (None, 0, 0) si hay error
     """
     try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period=period)
-        
-        if hist.empty or len(hist) < 2:
-            return None, 0, 0
-        
-        start_price = float(hist['Close'].iloc[0])
-        end_price = float(hist['Close'].iloc[-1])
-        is_positive = end_price >= start_price
-        pct_change = ((end_price - start_price) / start_price) * 100
+        hist = get_price_history(symbol, period=period)
         
-        # Colores modernos
-        if is_positive:
-            line_color = '#10b981'  # Emerald
-            fill_color = 'rgba(16, 185, 129, 0.12)'
-        else:
-            line_color = '#f43f5e'  # Rose
-            fill_color = 'rgba(244, 63, 94, 0.12)'
-        
-        fig = go.Figure()
+        # Reusar la figura si el histórico no cambió desde la última vez
+        key = (symbol.upper(), period)
+        cached = _cached_chart(key, hist)
+        if cached is not None:
+            return cached
         
-        # Línea principal con área
-        fig.add_trace(go.Scatter(
-            x=hist.index, y=hist['Close'],
-            mode='lines',
-            line=dict(color=line_color, width=2.5, shape='spline'),
-            fill='tozeroy',
-            fillcolor=fill_color,
-            hovertemplate='%{x|%d %b %Y}<br><b>$%{y:.2f}</b><extra></extra>',
-            name=''
-        ))
-        
-        # Punto final destacado
-        fig.add_trace(go.Scatter(
-            x=[hist.index[-1]],
-            y=[end_price],
-            mode='markers',
-            marker=dict(color=line_color, size=10, line=dict(color='#18181b', width=3)),
-            hoverinfo='skip',
-            showlegend=False
-        ))
+        result = _build_price_chart(symbol, hist, period)
+        _remember_chart(key, hist, result)
+        return result
+    except Exception as e:
+        logger.warning(f"Error creating price chart for {symbol}: {e}")
+        return None, 0, 0
+
+
+def create_period_charts(symbol: str) -> dict:
+    """
+    Construye las figuras de todos los periodos (PRICE_PERIODS) con una sola
+    descarga diaria de 5 años, recortando cada ventana en memoria.
+    Retorna: {period: (figura, pct_change, end_price)}; (None, 0, 0) si hay error.
+    """
+    try:
+        hist = get_price_history(symbol, period="5y")
         
-        # Formato de fecha según período
-        if period in ['5d', '1wk']:
-            date_format = '%d %b'
-            nticks = 5
-        elif period in ['1mo', '3mo']:
-            date_format = '%d %b'
-            nticks = 6
-        elif period == '6mo':
-            date_format = '%b'
-            nticks = 6
-        elif period == '1y':
-            date_format = '%b %Y'
-            nticks = 6
-        else:  # 5y
-            date_format = '%Y'
-            nticks = 5
+        key = (symbol.upper(), PRICE_PERIODS)
+        cached = _cached_chart(key, hist)
+        if cached is not None:
+            return cached
         
-        fig.update_layout(
-            height=280,
-            margin=dict(l=10, r=70, t=10, b=35),
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(
-                showgrid=False,
-                showticklabels=True,
-                tickfont=dict(color='#71717a', size=10),
-                zeroline=False,
-                showline=False,
-                tickformat=date_format,
-                nticks=nticks,
-                fixedrange=True
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(255, 255, 255, 0.04)',
-                showticklabels=True,
-                tickfont=dict(color='#71717a', size=10),
-                tickprefix='$',
-                zeroline=False,
-                showline=False,
-                side='right',
-                fixedrange=True
-            ),
-            hovermode='x unified',
-            hoverlabel=dict(
-                bgcolor=line_color,
-                bordercolor=line_color,
-                font=dict(color='white', size=13)
-            ),
-            showlegend=False,
-        )
+        charts = {period: _build_price_chart(symbol, _slice_period(hist, period), period)
+                  for period in PRICE_PERIODS}
+        _remember_chart(key, hist, charts)
+        return charts
+    except Exception as e:
+        logger.warning(f"Error creating period charts for {symbol}: {e}")
+        return {period: (None, 0, 0) for period in PRICE_PERIODS}
+
+
+def create_period_chart_payloads(symbol: str) -> dict:
+    """
+    Como create_period_charts, pero cada periodo ya serializado a JSON plano:
+    {period: {"figure": dict, "pct": float, "end": float}} o None si no hay datos.
+    
+    La conversión de fechas/arrays de Plotly se hace una vez por histórico
+    descargado; mientras get_price_history devuelva el mismo DataFrame (TTL del
+    caché L1), los stores chart-* reutilizan el mismo payload.
+    """
+    try:
+        hist = get_price_history(symbol, period="5y")
+        key = (symbol.upper(), "payloads")
+        cached = _cached_chart(key, hist)
+        if cached is not None:
+            return cached
         
-        return fig, pct_change, end_price
+        payloads = {
+            period: {"figure": json.loads(pio.to_json(fig, validate=False)), "pct": pct_change, "end": end_price}
+            if fig else None
+            for period, (fig, pct_change, end_price) in create_period_charts(symbol).items()
+        }
+        _remember_chart(key, hist, payloads)
+        return payloads
     except Exception as e:
-        logger.warning(f"Error creating price chart for {symbol}: {e}")
+        logger.warning(f"Error serializing period charts for {symbol}: {e}")
+        return {period: None for period in PRICE_PERIODS}
+
+
+def _slice_period(hist, period: str):
+    """Recorta un histórico diario a la ventana del periodo (5d = últimas 5 sesiones)."""
+    if hist.empty or period == "5y":
+        return hist
+    if period == "5d":
+        return hist.tail(5)
+    cutoff = hist.index[-1] - timedelta(days=_PERIOD_DAYS[period])
+    return hist[hist.index >= cutoff]
+
+
+def _cached_chart(key: tuple, hist):
+    """Resultado guardado para `key` si se construyó con este mismo histórico; si no, None."""
+    with _price_chart_lock:
+        cached = _price_chart_cache.get(key)
+        if cached is None or cached[0] is not hist:
+            return None
+        _price_chart_cache.move_to_end(key)
+        return cached[1]
+
+
+def _remember_chart(key: tuple, hist, result) -> None:
+    """Guarda un resultado en _price_chart_cache con desalojo LRU."""
+    with _price_chart_lock:
+        _price_chart_cache[key] = (hist, result)
+        _price_chart_cache.move_to_end(key)
+        if len(_price_chart_cache) > _PRICE_CHART_CACHE_SIZE:
+            _price_chart_cache.popitem(last=False)
+
+
+def _build_price_chart(symbol: str, hist, period: str):
+    """Construye la figura de precio a partir de un histórico ya descargado."""
+    if hist.empty or len(hist) < 2:
         return None, 0, 0
+    
+    # Cierres como ndarray contiguo: una sola extracción para rendimiento y trazo
+    closes = hist['Close'].to_numpy(dtype=float)
+    start_price = float(closes[0])
+    end_price = float(closes[-1])
+    is_positive = end_price >= start_price
+    pct_change = (end_price / start_price - 1.0) * 100
+    
+    # Colores modernos
+    if is_positive:
+        line_color = '#10b981'  # Emerald
+        fill_color = 'rgba(16, 185, 129, 0.12)'
+    else:
+        line_color = '#f43f5e'  # Rose
+        fill_color = 'rgba(244, 63, 94, 0.12)'
+    
+    fig = go.Figure()
+    
+    # Línea principal con área
+    fig.add_trace(go.Scatter(
+        x=hist.index, y=closes,
+        mode='lines',
+        line=dict(color=line_color, width=2.5, shape='spline'),
+        fill='tozeroy',
+        fillcolor=fill_color,
+        hovertemplate='%{x|%d %b %Y}<br><b>$%{y:.2f}</b><extra></extra>',
+        name=''
+    ))
+    
+    # Punto final destacado
+    fig.add_trace(go.Scatter(
+        x=[hist.index[-1]],
+        y=[end_price],
+        mode='markers',
+        marker=dict(color=line_color, size=10, line=dict(color='#18181b', width=3)),
+        hoverinfo='skip',
+        showlegend=False
+    ))
+    
+    # Formato de fecha según período
+    if period in ['5d', '1wk']:
+        date_format = '%d %b'
+        nticks = 5
+    elif period in ['1mo', '3mo']:
+        date_format = '%d %b'
+        nticks = 6
+    elif period == '6mo':
+        date_format = '%b'
+        nticks = 6
+    elif period == '1y':
+        date_format = '%b %Y'
+        nticks = 6
+    else:  # 5y
+        date_format = '%Y'
+        nticks = 5
+    
+    fig.update_layout(
+        height=280,
+        margin=dict(l=10, r=70, t=10, b=35),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(
+            showgrid=False,
+            showticklabels=True,
+            tickfont=dict(color='#71717a', size=10),
+            zeroline=False,
+            showline=False,
+            tickformat=date_format,
+            nticks=nticks,
+            fixedrange=True
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255, 255, 255, 0.04)',
+            showticklabels=True,
+            tickfont=dict(color='#71717a', size=10),
+            tickprefix='$',
+            zeroline=False,
+            showline=False,
+            side='right',
+            fixedrange=True
+        ),
+        hovermode='x unified',
+        hoverlabel=dict(
+            bgcolor=line_color,
+            bordercolor=line_color,
+            font=dict(color='white', size=13)
+        ),
+        showlegend=False,
+        uirevision=symbol.upper(),  # Conservar estado de UI al cambiar de periodo
+    )
+    
+    return fig, pct_change, end_price
 
 
 def create_ytd_comparison_chart(stock_ytd: float, market_ytd: float, sector_ytd: float, symbol: str) -> go.Figure:
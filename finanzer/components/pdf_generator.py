@@ -6,20 +6,105 @@ Crea informes ejecutivos profesionales con análisis financiero.
 import io
 from datetime import datetime
 from typing import Optional
-from functools import partial
-
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Spacer
+from functools import partial, lru_cache
 
 from finanzer.utils.formatters import fmt as fmt_base
 
+# ReportLab se importa bajo demanda dentro de generate_simple_pdf():
+# la app arranca sin pagar el costo de cargarlo si nadie descarga un PDF.
+
+
+# Colores del reporte
+PRIMARY = '#059669'      # Verde esmeralda
+DARK = '#1e293b'         # Slate oscuro
+MUTED = '#64748b'        # Gris
+LIGHT_BG = '#f8fafc'     # Fondo claro
+SUCCESS = '#22c55e'
+WARNING = '#f59e0b'
+DANGER = '#ef4444'
+
+# Buckets del score indexados por (ts >= 50) + (ts >= 70): <50, 50-69, >=70
+SCORE_BUCKETS = (
+    (DANGER, "PRECAUCIÓN"),
+    (WARNING, "NEUTRAL"),
+    (SUCCESS, "FAVORABLE"),
+)
+
+# Color del indicador y de la etiqueta en la tabla de señales (default: SUCCESS)
+SIGNAL_LEVEL_COLORS = {
+    "Riesgo": DANGER,
+    "Atención": WARNING,
+}
+
+
+class ReportRatios:
+    """
+    Vista compacta (con __slots__) de las métricas que consume el reporte PDF.
+    
+    Se construye una sola vez a partir del dict de ratios (el mismo que guarda
+    el dcc.Store) y se accede por atributo en lugar de repetir ratios.get().
+    Las claves ausentes quedan en None.
+    """
+    __slots__ = (
+        "price", "eps", "book_value_per_share", "fcf", "shares_outstanding",
+        "revenue_cagr_3y", "beta",
+        # Valoración
+        "pe", "forward_pe", "pb", "ev_ebitda", "peg", "fcf_yield",
+        # Rentabilidad
+        "roe", "roa", "roic", "gross_margin", "operating_margin", "net_margin",
+        # Solidez
+        "current_ratio", "quick_ratio", "debt_to_equity", "net_debt_to_ebitda",
+        "interest_coverage",
+    )
+    
+    def __init__(self, ratios: dict):
+        for key in self.__slots__:
+            setattr(self, key, ratios.get(key))
+    
+    def to_dict(self) -> dict:
+        """Dict serializable (p.ej. para dcc.Store) con las métricas del reporte."""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+@lru_cache(maxsize=32)
+def _hex(color: str):
+    """Convierte un color hex a reportlab Color (parseado una sola vez por color)."""
+    from reportlab.lib import colors
+    return colors.HexColor(color)
+
+
+@lru_cache(maxsize=1)
+def _column_widths() -> dict:
+    """Anchos de columna de cada tabla del reporte, calculados una sola vez."""
+    from reportlab.lib.units import inch
+    pw = 7.5*inch
+    return {
+        "full": (pw,),
+        "header": (1.5*inch, pw-4*inch, 2.5*inch),
+        "exec": (1.5*inch,) * 5,
+        "category": (1.8*inch, 1.2*inch, 4.5*inch),
+        "metric_block": (1.5*inch, 1*inch),
+        "metrics_row": (pw / 3,) * 3,
+        "intrinsic": (1.8*inch, 1.5*inch, 1.2*inch, 3*inch),
+        "signals": (0.3*inch, 5.7*inch, 1.5*inch),
+        "footer": (1.5*inch, 2*inch, 4*inch),
+    }
+
+
+# Categorías del score: (etiqueta, clave en category_scores, descripción)
+SCORE_CATEGORY_ROWS = (
+    ("Valoración", "valoracion", "Métricas P/E, P/B, EV/EBITDA, etc."),
+    ("Rentabilidad", "rentabilidad", "ROE, ROA, márgenes operativos"),
+    ("Solidez", "solidez", "Liquidez, deuda, cobertura"),
+    ("Calidad", "calidad", "Consistencia, flujos de caja"),
+    ("Crecimiento", "crecimiento", "Tendencias de ingresos y EPS"),
+)
+
 
 def generate_simple_pdf(
     symbol: str, 
     company_name: str, 
-    ratios: dict, 
+    ratios, 
     alerts: dict, 
     score: int,
     dcf_calculator=None  # Función DCF opcional para evitar dependencia circular
@@ -30,7 +115,7 @@ def generate_simple_pdf(
     Args:
         symbol: Ticker del activo
         company_name: Nombre de la empresa
-        ratios: Dict con métricas financieras
+        ratios: Dict con métricas financieras (o un ReportRatios ya construido)
         alerts: Dict con alertas y señales
         score: Score total
         dcf_calculator: Función opcional para calcular DCF
@@ -38,6 +123,9 @@ def generate_simple_pdf(
     Returns:
         bytes del PDF generado
     """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Spacer
     
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(
@@ -50,16 +138,7 @@ def generate_simple_pdf(
     )
     
     story = []
-    pw = 7.5*inch
-    
-    # Colores
-    PRIMARY = '#059669'      # Verde esmeralda
-    DARK = '#1e293b'         # Slate oscuro
-    MUTED = '#64748b'        # Gris
-    LIGHT_BG = '#f8fafc'     # Fondo claro
-    SUCCESS = '#22c55e'
-    WARNING = '#f59e0b'  
-    DANGER = '#ef4444'
+    widths = _column_widths()
     
     # Wrapper de fmt con "—" para PDFs (en vez de "N/A")
     def fmt(val, tipo="x"):
@@ -67,6 +146,8 @@ def generate_simple_pdf(
         tipo_map = {"x": "number", "%": "percent", "$": "currency"}
         return fmt_base(val, tipo_map.get(tipo, tipo), na_text="—")
     
+    r = ratios if isinstance(ratios, ReportRatios) else ReportRatios(ratios)
+    
     sv2 = alerts.get("score_v2", {})
     ts = sv2.get("score", score)
     lv = sv2.get("level", "N/A")
@@ -80,14 +161,14 @@ def generate_simple_pdf(
     
     header = Table([
         [header_left, "", header_right]
-    ], colWidths=[1.5*inch, pw-4*inch, 2.5*inch])
+    ], colWidths=widths["header"])
     header.setStyle(TableStyle([
         ('FONTNAME', (0,0), (0,0), 'Helvetica-Bold'),
         ('FONTNAME', (2,0), (2,0), 'Helvetica'),
         ('FONTSIZE', (0,0), (0,0), 24),
         ('FONTSIZE', (2,0), (2,0), 11),
-        ('TEXTCOLOR', (0,0), (0,0), colors.HexColor(PRIMARY)),
-        ('TEXTCOLOR', (2,0), (2,0), colors.HexColor(MUTED)),
+        ('TEXTCOLOR', (0,0), (0,0), _hex(PRIMARY)),
+        ('TEXTCOLOR', (2,0), (2,0), _hex(MUTED)),
         ('ALIGN', (0,0), (0,0), 'LEFT'),
         ('ALIGN', (2,0), (2,0), 'RIGHT'),
         ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
@@ -96,9 +177,9 @@ def generate_simple_pdf(
     story.append(header)
     
     # Línea separadora verde
-    line = Table([[""]], colWidths=[pw])
+    line = Table([[""]], colWidths=widths["full"])
     line.setStyle(TableStyle([
-        ('LINEABOVE', (0,0), (-1,0), 3, colors.HexColor(PRIMARY)),
+        ('LINEABOVE', (0,0), (-1,0), 3, _hex(PRIMARY)),
         ('TOPPADDING', (0,0), (-1,-1), 0),
         ('BOTTOMPADDING', (0,0), (-1,-1), 8),
     ]))
@@ -108,37 +189,29 @@ def generate_simple_pdf(
     # RESUMEN EJECUTIVO - Score y Recomendación
     # ══════════════════════════════════════════════════════════════
     
-    # Determinar colores según score
-    if ts >= 70: 
-        score_color = SUCCESS
-        score_text = "FAVORABLE"
-    elif ts >= 50: 
-        score_color = WARNING
-        score_text = "NEUTRAL"
-    else: 
-        score_color = DANGER
-        score_text = "PRECAUCIÓN"
+    # Determinar colores según score (lookup directo, sin cadena de if/elif)
+    score_color, score_text = SCORE_BUCKETS[(ts >= 50) + (ts >= 70)]
     
     sig = alerts.get("signal", "—")
     gr = "Growth" if sv2.get("is_growth_company", False) else "Value"
-    price = ratios.get("price")
+    price = r.price
     
     exec_data = [
         ["SCORE", "EVALUACIÓN", "SEÑAL", "TIPO", "PRECIO"],
         [f"{ts}/100", lv, sig, gr, fmt(price, "$")]
     ]
-    exec_table = Table(exec_data, colWidths=[1.5*inch, 1.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
+    exec_table = Table(exec_data, colWidths=widths["exec"])
     exec_table.setStyle(TableStyle([
         ('FONTNAME', (0,0), (-1,0), 'Helvetica'),
         ('FONTNAME', (0,1), (-1,1), 'Helvetica-Bold'),
         ('FONTSIZE', (0,0), (-1,0), 8),
         ('FONTSIZE', (0,1), (-1,1), 14),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.HexColor(MUTED)),
-        ('TEXTCOLOR', (0,1), (0,1), colors.HexColor(score_color)),
-        ('TEXTCOLOR', (1,1), (-1,1), colors.HexColor(DARK)),
+        ('TEXTCOLOR', (0,0), (-1,0), _hex(MUTED)),
+        ('TEXTCOLOR', (0,1), (0,1), _hex(score_color)),
+        ('TEXTCOLOR', (1,1), (-1,1), _hex(DARK)),
         ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('BACKGROUND', (0,0), (-1,-1), colors.HexColor(LIGHT_BG)),
-        ('BOX', (0,0), (-1,-1), 1, colors.HexColor('#e2e8f0')),
+        ('BACKGROUND', (0,0), (-1,-1), _hex(LIGHT_BG)),
+        ('BOX', (0,0), (-1,-1), 1, _hex('#e2e8f0')),
         ('TOPPADDING', (0,0), (-1,-1), 10),
         ('BOTTOMPADDING', (0,0), (-1,-1), 10),
     ]))
@@ -149,19 +222,12 @@ def generate_simple_pdf(
     # DESGLOSE DEL SCORE POR CATEGORÍA
     # ══════════════════════════════════════════════════════════════
     
-    def score_bar_text(val, max_val=20):
-        pct = (val / max_val) * 100 if max_val > 0 else 0
-        return f"{val:.0f}/{max_val}"
-    
-    cat_data = [
-        ["Categoría", "Puntuación", ""],
-        ["Valoración", score_bar_text(cs.get('valoracion', 0)), "Métricas P/E, P/B, EV/EBITDA, etc."],
-        ["Rentabilidad", score_bar_text(cs.get('rentabilidad', 0)), "ROE, ROA, márgenes operativos"],
-        ["Solidez", score_bar_text(cs.get('solidez', 0)), "Liquidez, deuda, cobertura"],
-        ["Calidad", score_bar_text(cs.get('calidad', 0)), "Consistencia, flujos de caja"],
-        ["Crecimiento", score_bar_text(cs.get('crecimiento', 0)), "Tendencias de ingresos y EPS"],
-    ]
-    cat_table = Table(cat_data, colWidths=[1.8*inch, 1.2*inch, 4.5*inch])
+    cat_data = [["Categoría", "Puntuación", ""]]
+    cat_data.extend(
+        [label, f"{cs.get(key, 0):.0f}/20", desc]
+        for label, key, desc in SCORE_CATEGORY_ROWS
+    )
+    cat_table = Table(cat_data, colWidths=widths["category"])
     cat_styles = [
         ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
         ('FONTNAME', (0,1), (-1,-1), 'Helvetica'),
@@ -169,15 +235,15 @@ def generate_simple_pdf(
         ('FONTSIZE', (0,1), (0,-1), 10),
         ('FONTSIZE', (1,1), (1,-1), 11),
         ('FONTSIZE', (2,1), (2,-1), 8),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.HexColor(MUTED)),
-        ('TEXTCOLOR', (0,1), (0,-1), colors.HexColor(DARK)),
-        ('TEXTCOLOR', (1,1), (1,-1), colors.HexColor(PRIMARY)),
-        ('TEXTCOLOR', (2,1), (2,-1), colors.HexColor(MUTED)),
+        ('TEXTCOLOR', (0,0), (-1,0), _hex(MUTED)),
+        ('TEXTCOLOR', (0,1), (0,-1), _hex(DARK)),
+        ('TEXTCOLOR', (1,1), (1,-1), _hex(PRIMARY)),
+        ('TEXTCOLOR', (2,1), (2,-1), _hex(MUTED)),
         ('ALIGN', (0,0), (0,-1), 'LEFT'),
         ('ALIGN', (1,0), (1,-1), 'CENTER'),
         ('ALIGN', (2,0), (2,-1), 'LEFT'),
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor(LIGHT_BG)),
-        ('LINEBELOW', (0,0), (-1,0), 1, colors.HexColor('#e2e8f0')),
+        ('BACKGROUND', (0,0), (-1,0), _hex(LIGHT_BG)),
+        ('LINEBELOW', (0,0), (-1,0), 1, _hex('#e2e8f0')),
         ('TOPPADDING', (0,0), (-1,-1), 6),
         ('BOTTOMPADDING', (0,0), (-1,-1), 6),
     ]
@@ -189,34 +255,31 @@ def generate_simple_pdf(
     # MÉTRICAS CLAVE - 3 columnas
     # ══════════════════════════════════════════════════════════════
     
-    section_title = Table([["MÉTRICAS FINANCIERAS"]], colWidths=[pw])
+    section_title = Table([["MÉTRICAS FINANCIERAS"]], colWidths=widths["full"])
     section_title.setStyle(TableStyle([
         ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
         ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.HexColor(PRIMARY)),
-        ('LINEBELOW', (0,0), (-1,0), 1, colors.HexColor(PRIMARY)),
+        ('TEXTCOLOR', (0,0), (-1,-1), _hex(PRIMARY)),
+        ('LINEBELOW', (0,0), (-1,0), 1, _hex(PRIMARY)),
         ('BOTTOMPADDING', (0,0), (-1,-1), 8),
     ]))
     story.append(section_title)
     
-    # Tres columnas de métricas
-    col_width = pw / 3
-    
     def metric_block(title, metrics):
         """Crea un bloque de métricas"""
         rows = [[title, ""]]
         for name, value in metrics:
             rows.append([name, value])
-        t = Table(rows, colWidths=[1.5*inch, 1*inch])
+        t = Table(rows, colWidths=widths["metric_block"])
         styles = [
             ('FONTNAME', (0,0), (0,0), 'Helvetica-Bold'),
             ('FONTSIZE', (0,0), (0,0), 9),
-            ('TEXTCOLOR', (0,0), (0,0), colors.HexColor(DARK)),
+            ('TEXTCOLOR', (0,0), (0,0), _hex(DARK)),
             ('FONTNAME', (0,1), (0,-1), 'Helvetica'),
             ('FONTNAME', (1,1), (1,-1), 'Helvetica-Bold'),
             ('FONTSIZE', (0,1), (-1,-1), 8),
-            ('TEXTCOLOR', (0,1), (0,-1), colors.HexColor(MUTED)),
-            ('TEXTCOLOR', (1,1), (1,-1), colors.HexColor(DARK)),
+            ('TEXTCOLOR', (0,1), (0,-1), _hex(MUTED)),
+            ('TEXTCOLOR', (1,1), (1,-1), _hex(DARK)),
             ('ALIGN', (1,0), (1,-1), 'RIGHT'),
             ('TOPPADDING', (0,0), (-1,-1), 3),
             ('BOTTOMPADDING', (0,0), (-1,-1), 3),
@@ -226,39 +289,39 @@ def generate_simple_pdf(
     
     # Columna 1: Valoración
     val_metrics = [
-        ("P/E", fmt(ratios.get("pe"))),
-        ("Forward P/E", fmt(ratios.get("forward_pe"))),
-        ("P/B", fmt(ratios.get("pb"))),
-        ("EV/EBITDA", fmt(ratios.get("ev_ebitda"))),
-        ("PEG", fmt(ratios.get("peg"))),
-        ("FCF Yield", fmt(ratios.get("fcf_yield"), "%")),
+        ("P/E", fmt(r.pe)),
+        ("Forward P/E", fmt(r.forward_pe)),
+        ("P/B", fmt(r.pb)),
+        ("EV/EBITDA", fmt(r.ev_ebitda)),
+        ("PEG", fmt(r.peg)),
+        ("FCF Yield", fmt(r.fcf_yield, "%")),
     ]
     
     # Columna 2: Rentabilidad
     rent_metrics = [
-        ("ROE", fmt(ratios.get("roe"), "%")),
-        ("ROA", fmt(ratios.get("roa"), "%")),
-        ("ROIC", fmt(ratios.get("roic"), "%")),
-        ("Margen Bruto", fmt(ratios.get("gross_margin"), "%")),
-        ("Margen Op.", fmt(ratios.get("operating_margin"), "%")),
-        ("Margen Neto", fmt(ratios.get("net_margin"), "%")),
+        ("ROE", fmt(r.roe, "%")),
+        ("ROA", fmt(r.roa, "%")),
+        ("ROIC", fmt(r.roic, "%")),
+        ("Margen Bruto", fmt(r.gross_margin, "%")),
+        ("Margen Op.", fmt(r.operating_margin, "%")),
+        ("Margen Neto", fmt(r.net_margin, "%")),
     ]
     
     # Columna 3: Solidez
     sol_metrics = [
-        ("Current Ratio", fmt(ratios.get("current_ratio"))),
-        ("Quick Ratio", fmt(ratios.get("quick_ratio"))),
-        ("D/E", fmt(ratios.get("debt_to_equity"))),
-        ("Net D/EBITDA", fmt(ratios.get("net_debt_to_ebitda"))),
-        ("Int. Coverage", fmt(ratios.get("interest_coverage"))),
-        ("Beta", fmt(ratios.get("beta"))),
+        ("Current Ratio", fmt(r.current_ratio)),
+        ("Quick Ratio", fmt(r.quick_ratio)),
+        ("D/E", fmt(r.debt_to_equity)),
+        ("Net D/EBITDA", fmt(r.net_debt_to_ebitda)),
+        ("Int. Coverage", fmt(r.interest_coverage)),
+        ("Beta", fmt(r.beta)),
     ]
     
     metrics_row = Table([
         [metric_block("Valoración", val_metrics), 
          metric_block("Rentabilidad", rent_metrics),
          metric_block("Solidez", sol_metrics)]
-    ], colWidths=[col_width, col_width, col_width])
+    ], colWidths=widths["metrics_row"])
     metrics_row.setStyle(TableStyle([
         ('VALIGN', (0,0), (-1,-1), 'TOP'),
         ('LEFTPADDING', (0,0), (-1,-1), 5),
@@ -271,27 +334,27 @@ def generate_simple_pdf(
     # VALOR INTRÍNSECO
     # ══════════════════════════════════════════════════════════════
     
-    section_title2 = Table([["VALOR INTRÍNSECO"]], colWidths=[pw])
+    section_title2 = Table([["VALOR INTRÍNSECO"]], colWidths=widths["full"])
     section_title2.setStyle(TableStyle([
         ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
         ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.HexColor(PRIMARY)),
-        ('LINEBELOW', (0,0), (-1,0), 1, colors.HexColor(PRIMARY)),
+        ('TEXTCOLOR', (0,0), (-1,-1), _hex(PRIMARY)),
+        ('LINEBELOW', (0,0), (-1,0), 1, _hex(PRIMARY)),
         ('BOTTOMPADDING', (0,0), (-1,-1), 8),
     ]))
     story.append(section_title2)
     
     # Cálculos de valor intrínseco
-    eps = ratios.get("eps")
-    bvps = ratios.get("book_value_per_share")
+    eps = r.eps
+    bvps = r.book_value_per_share
     graham = (22.5 * eps * bvps) ** 0.5 if eps and bvps and eps > 0 and bvps > 0 else None
-    fcf = ratios.get("fcf")
-    shares = ratios.get("shares_outstanding")
+    fcf = r.fcf
+    shares = r.shares_outstanding
     
     dcf_value = None
     if dcf_calculator and fcf and shares and fcf > 0 and shares > 0:
         try:
-            growth_val = ratios.get("revenue_cagr_3y", 0.05) or 0.05
+            growth_val = r.revenue_cagr_3y or 0.05
             growth_val = min(max(growth_val, 0.02), 0.35)
             dcf_pdf = dcf_calculator(fcf=fcf, shares_outstanding=shares, revenue_growth_3y=growth_val)
             dcf_value = dcf_pdf.get("fair_value_per_share")
@@ -319,18 +382,18 @@ def generate_simple_pdf(
         ["Piotroski F-Score", f"{fv}/9" if fv is not None else "—", "", "8-9: Fuerte | 0-3: Débil"],
     ]
     
-    intrinsic_table = Table(intrinsic_data, colWidths=[1.8*inch, 1.5*inch, 1.2*inch, 3*inch])
+    intrinsic_table = Table(intrinsic_data, colWidths=widths["intrinsic"])
     intrinsic_table.setStyle(TableStyle([
         ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
         ('FONTNAME', (0,1), (-1,-1), 'Helvetica'),
         ('FONTSIZE', (0,0), (-1,-1), 8),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.HexColor(MUTED)),
-        ('TEXTCOLOR', (0,1), (0,-1), colors.HexColor(DARK)),
-        ('TEXTCOLOR', (1,1), (1,-1), colors.HexColor(PRIMARY)),
-        ('TEXTCOLOR', (3,1), (3,-1), colors.HexColor(MUTED)),
+        ('TEXTCOLOR', (0,0), (-1,0), _hex(MUTED)),
+        ('TEXTCOLOR', (0,1), (0,-1), _hex(DARK)),
+        ('TEXTCOLOR', (1,1), (1,-1), _hex(PRIMARY)),
+        ('TEXTCOLOR', (3,1), (3,-1), _hex(MUTED)),
         ('ALIGN', (1,0), (2,-1), 'CENTER'),
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor(LIGHT_BG)),
-        ('LINEBELOW', (0,0), (-1,0), 1, colors.HexColor('#e2e8f0')),
+        ('BACKGROUND', (0,0), (-1,0), _hex(LIGHT_BG)),
+        ('LINEBELOW', (0,0), (-1,0), 1, _hex('#e2e8f0')),
         ('TOPPADDING', (0,0), (-1,-1), 5),
         ('BOTTOMPADDING', (0,0), (-1,-1), 5),
     ]))
@@ -341,12 +404,12 @@ def generate_simple_pdf(
     # SEÑALES DETECTADAS
     # ══════════════════════════════════════════════════════════════
     
-    section_title3 = Table([["SEÑALES Y ALERTAS"]], colWidths=[pw])
+    section_title3 = Table([["SEÑALES Y ALERTAS"]], colWidths=widths["full"])
     section_title3.setStyle(TableStyle([
         ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
         ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.HexColor(PRIMARY)),
-        ('LINEBELOW', (0,0), (-1,0), 1, colors.HexColor(PRIMARY)),
+        ('TEXTCOLOR', (0,0), (-1,-1), _hex(PRIMARY)),
+        ('LINEBELOW', (0,0), (-1,0), 1, _hex(PRIMARY)),
         ('BOTTOMPADDING', (0,0), (-1,-1), 8),
     ]))
     story.append(section_title3)
@@ -435,38 +498,36 @@ def generate_simple_pdf(
     
     # Crear tabla de señales
     signal_rows = []
-    for c, r in danger_list: 
-        signal_rows.append(["●", f"{r[:70]}", "Riesgo"])
-    for c, r in warning_list: 
-        signal_rows.append(["●", f"{r[:70]}", "Atención"])
-    for c, r in success_list: 
-        signal_rows.append(["●", f"{r[:70]}", "Fortaleza"])
+    for _, reason in danger_list: 
+        signal_rows.append(["●", f"{reason[:70]}", "Riesgo"])
+    for _, reason in warning_list: 
+        signal_rows.append(["●", f"{reason[:70]}", "Atención"])
+    for _, reason in success_list: 
+        signal_rows.append(["●", f"{reason[:70]}", "Fortaleza"])
     
     if not signal_rows:
         signal_rows.append(["●", "Sin señales significativas detectadas", "Info"])
     
-    sig_table = Table(signal_rows, colWidths=[0.3*inch, 5.7*inch, 1.5*inch])
+    sig_table = Table(signal_rows, colWidths=widths["signals"])
     sig_styles = [
         ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+        ('FONTNAME', (1,0), (1,-1), 'Courier'),  # Monoespaciada: ancho = len(texto) * avance fijo
         ('FONTSIZE', (0,0), (-1,-1), 8),
         ('ALIGN', (0,0), (0,-1), 'CENTER'),
         ('ALIGN', (2,0), (2,-1), 'RIGHT'),
         ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
         ('TOPPADDING', (0,0), (-1,-1), 4),
         ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-        ('LINEBELOW', (0,0), (-1,-2), 0.5, colors.HexColor('#f1f5f9')),
+        ('LINEBELOW', (0,0), (-1,-2), 0.5, _hex('#f1f5f9')),
     ]
     
-    for i, row in enumerate(signal_rows):
-        if row[2] == "Riesgo":
-            sig_styles.append(('TEXTCOLOR', (0,i), (0,i), colors.HexColor(DANGER)))
-            sig_styles.append(('TEXTCOLOR', (2,i), (2,i), colors.HexColor(DANGER)))
-        elif row[2] == "Atención":
-            sig_styles.append(('TEXTCOLOR', (0,i), (0,i), colors.HexColor(WARNING)))
-            sig_styles.append(('TEXTCOLOR', (2,i), (2,i), colors.HexColor(WARNING)))
-        else:
-            sig_styles.append(('TEXTCOLOR', (0,i), (0,i), colors.HexColor(SUCCESS)))
-            sig_styles.append(('TEXTCOLOR', (2,i), (2,i), colors.HexColor(SUCCESS)))
+    # Colorear indicador (col 0) y etiqueta (col 2) de cada fila en un solo extend
+    row_colors = [_hex(SIGNAL_LEVEL_COLORS.get(level, SUCCESS)) for _, _, level in signal_rows]
+    sig_styles.extend(
+        ('TEXTCOLOR', (col, i), (col, i), color)
+        for i, color in enumerate(row_colors)
+        for col in (0, 2)
+    )
     
     sig_table.setStyle(TableStyle(sig_styles))
     story.append(sig_table)
@@ -476,22 +537,22 @@ def generate_simple_pdf(
     # FOOTER
     # ══════════════════════════════════════════════════════════════
     
-    footer_line = Table([[""]], colWidths=[pw])
+    footer_line = Table([[""]], colWidths=widths["full"])
     footer_line.setStyle(TableStyle([
-        ('LINEABOVE', (0,0), (-1,0), 1, colors.HexColor('#e2e8f0')),
+        ('LINEABOVE', (0,0), (-1,0), 1, _hex('#e2e8f0')),
         ('TOPPADDING', (0,0), (-1,-1), 8),
     ]))
     story.append(footer_line)
     
     footer = Table([
         ["Finanzer", datetime.now().strftime('%d/%m/%Y %H:%M'), "Este documento no constituye asesoría financiera"]
-    ], colWidths=[1.5*inch, 2*inch, 4*inch])
+    ], colWidths=widths["footer"])
     footer.setStyle(TableStyle([
         ('FONTNAME', (0,0), (0,0), 'Helvetica-Bold'),
         ('FONTNAME', (1,0), (-1,0), 'Helvetica'),
         ('FONTSIZE', (0,0), (-1,-1), 7),
-        ('TEXTCOLOR', (0,0), (0,0), colors.HexColor(PRIMARY)),
-        ('TEXTCOLOR', (1,0), (-1,0), colors.HexColor(MUTED)),
+        ('TEXTCOLOR', (0,0), (0,0), _hex(PRIMARY)),
+        ('TEXTCOLOR', (1,0), (-1,0), _hex(MUTED)),
         ('ALIGN', (0,0), (0,0), 'LEFT'),
         ('ALIGN', (1,0), (1,0), 'CENTER'),
         ('ALIGN', (2,0), (2,0), 'RIGHT'),
@@ -3,6 +3,18 @@ Base de datos de acciones populares para autocompletado.
 Incluye las empresas más buscadas del S&P 500, NASDAQ y otras populares.
 """
 
+from functools import lru_cache
+
+# RapidFuzz (C++) es opcional: solo se usa como respaldo tolerante a typos
+try:
+    from rapidfuzz import process as fuzz_process, fuzz
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+# Puntaje mínimo (0-100) de RapidFuzz para sugerir un ticker por similitud
+FUZZY_SCORE_CUTOFF = 80
+
 # Formato: "TICKER": "Nombre de la Empresa"
 POPULAR_STOCKS = {
     # === MEGA CAPS (Top 50) ===
@@ -737,23 +749,46 @@ POPULAR_STOCKS = {
 }
 
 
+# Índice precalculado una sola vez: evita upper/lower/split por ticker en cada búsqueda
+_SEARCH_INDEX = tuple(
+    (ticker, ticker.upper(), name, name.lower(), tuple(name.lower().split()))
+    for ticker, name in POPULAR_STOCKS.items()
+)
+
+# Texto "ticker nombre" por ticker para el respaldo difuso de RapidFuzz
+_FUZZY_CHOICES = {ticker: f"{ticker} {name}".lower() for ticker, name in POPULAR_STOCKS.items()}
+
+
 def search_stocks(query: str, limit: int = 10) -> list:
     """
     Busca acciones que coincidan con el query.
     Retorna lista de tuplas (ticker, nombre, match_score).
+    
+    El query se normaliza (strip + minúsculas) antes de consultar el caché,
+    así "aapl", "AAPL " y "Aapl" comparten la misma entrada.
     """
-    if not query or len(query) < 1:
+    if not query:
         return []
     
-    query_upper = query.upper().strip()
     query_lower = query.lower().strip()
+    if not query_lower:
+        return []
+    
+    # Copia para que el llamador pueda modificar la lista sin tocar el caché
+    return list(_search_stocks_cached(query_lower, limit))
+
+
+@lru_cache(maxsize=4096)
+def _search_stocks_cached(query_lower: str, limit: int) -> tuple:
+    """
+    Búsqueda real sobre POPULAR_STOCKS. El universo de tickers es estático
+    durante la vida del proceso, por lo que el caché no necesita TTL.
+    Hits/misses disponibles en _search_stocks_cached.cache_info().
+    """
+    query_upper = query_lower.upper()
     results = []
     
-    for ticker, name in POPULAR_STOCKS.items():
-        score = 0
-        ticker_upper = ticker.upper()
-        name_lower = name.lower()
-        
+    for ticker, ticker_upper, name, name_lower, name_words in _SEARCH_INDEX:
         # Match exacto de ticker = máxima prioridad
         if ticker_upper == query_upper:
             score = 1000
@@ -767,19 +802,30 @@ def search_stocks(query: str, limit: int = 10) -> list:
         elif name_lower.startswith(query_lower):
             score = 400
         # Alguna palabra del nombre empieza con query
-        elif any(word.startswith(query_lower) for word in name_lower.split()):
+        elif any(word.startswith(query_lower) for word in name_words):
             score = 200
         # Nombre contiene query
         elif query_lower in name_lower:
             score = 100
+        else:
+            continue
         
-        if score > 0:
-            results.append((ticker, name, score))
+        results.append((ticker, name, score))
+    
+    # Sin coincidencias literales: intentar por similitud (typos como "microsft")
+    if not results and RAPIDFUZZ_AVAILABLE:
+        matches = fuzz_process.extract(
+            query_lower, _FUZZY_CHOICES, scorer=fuzz.WRatio,
+            limit=limit, score_cutoff=FUZZY_SCORE_CUTOFF
+        )
+        # Escalado bajo 100 para no superar nunca a un match literal
+        results = [(ticker, POPULAR_STOCKS[ticker], int(score) - FUZZY_SCORE_CUTOFF)
+                   for _, score, ticker in matches]
     
     # Ordenar por score (mayor primero) y luego alfabéticamente
     results.sort(key=lambda x: (-x[2], x[0]))
     
-    return results[:limit]
+    return tuple(results[:limit])
 
 
 def get_stock_display(ticker: str) -> str:
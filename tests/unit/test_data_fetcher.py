@@ -0,0 +1,421 @@
+"""
+Tests for data_fetcher (infraestructura de caché y red)
+========================================================
+Validación de las piezas que no dependen de Yahoo Finance: TTL según
+horario de mercado, limitador token bucket, backoff de reintentos,
+single-flight, caché en disco y descarga en lote.
+
+Todas las fechas en UTC. Sesión regular NYSE: 13:30 - 21:00 UTC.
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import data_fetcher
+from data_fetcher import (
+    TokenBucket,
+    FileCache,
+    APITimeoutError,
+    throttle_yahoo,
+    _backoff_delay,
+    _singleflight,
+    _flight_key,
+    _inflight,
+    BASE_DELAY,
+    MAX_DELAY,
+    financials_ttl_minutes,
+    financials_remaining_minutes,
+    INTRADAY_FINANCIALS_TTL_MINUTES,
+    MAX_FINANCIALS_TTL_MINUTES,
+    FinancialStatements,
+    YahooFinanceFetcher,
+    NEGATIVE_RESULT,
+    get_cache,
+    clear_caches,
+)
+
+
+def utc(year, month, day, hour, minute=0):
+    return datetime(year, month, day, hour, minute, tzinfo=timezone.utc)
+
+
+# 2024-01-08 es lunes, 2024-01-12 viernes
+MONDAY = (2024, 1, 8)
+FRIDAY = (2024, 1, 12)
+
+
+class TestFinancialsTTL:
+    """TTL de FinancialStatements según horario de mercado."""
+    
+    def test_at_open_is_intraday(self):
+        assert financials_ttl_minutes(utc(*MONDAY, 13, 30)) == INTRADAY_FINANCIALS_TTL_MINUTES
+    
+    def test_just_before_close_is_intraday(self):
+        assert financials_ttl_minutes(utc(*MONDAY, 20, 59)) == INTRADAY_FINANCIALS_TTL_MINUTES
+    
+    def test_at_close_lasts_until_next_open(self):
+        # 21:00 lunes → 13:30 martes = 16h30
+        assert financials_ttl_minutes(utc(*MONDAY, 21, 0)) == 16 * 60 + 30
+    
+    def test_pre_open_lasts_until_same_day_open(self):
+        assert financials_ttl_minutes(utc(*MONDAY, 10, 0)) == 3 * 60 + 30
+    
+    def test_one_minute_before_open_is_not_below_intraday(self):
+        assert financials_ttl_minutes(utc(*MONDAY, 13, 29)) == INTRADAY_FINANCIALS_TTL_MINUTES
+    
+    def test_friday_after_close_is_capped(self):
+        # Hasta el lunes 13:30 serían 64h30: se aplica el máximo
+        assert financials_ttl_minutes(utc(*FRIDAY, 21, 0)) == MAX_FINANCIALS_TTL_MINUTES
+    
+    def test_weekend_is_capped(self):
+        assert financials_ttl_minutes(utc(2024, 1, 13, 15, 0)) == MAX_FINANCIALS_TTL_MINUTES
+    
+    def test_sunday_late_lasts_until_monday_open(self):
+        assert financials_ttl_minutes(utc(2024, 1, 14, 23, 0)) == 14 * 60 + 30
+
+
+class TestFinancialsRemainingMinutes:
+    """Frescura de una entrada guardada según la hora en que se guardó."""
+    
+    def test_intraday_snapshot_expires_after_intraday_ttl(self):
+        saved = utc(*MONDAY, 15, 0).timestamp()
+        assert financials_remaining_minutes(saved, now=saved + 10 * 60) == pytest.approx(5)
+        assert financials_remaining_minutes(saved, now=saved + 16 * 60) < 0
+    
+    def test_after_close_snapshot_valid_until_next_open(self):
+        saved = utc(*MONDAY, 22, 0).timestamp()
+        before_open = utc(2024, 1, 9, 13, 0).timestamp()
+        after_open = utc(2024, 1, 9, 13, 45).timestamp()
+        assert financials_remaining_minutes(saved, now=before_open) == pytest.approx(30)
+        assert financials_remaining_minutes(saved, now=after_open) < 0
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Reloj monotónico controlado: time.sleep avanza el reloj y se registra."""
+    clock = {"now": 1000.0, "sleeps": []}
+    
+    def sleep(seconds):
+        clock["sleeps"].append(seconds)
+        clock["now"] += seconds
+    
+    monkeypatch.setattr(data_fetcher.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(data_fetcher.time, "sleep", sleep)
+    return clock
+
+
+class TestTokenBucket:
+    """Ráfaga, reposición y cálculo de espera del limitador."""
+    
+    def test_burst_up_to_capacity_without_waiting(self, fake_clock):
+        bucket = TokenBucket(interval=0.5, capacity=4)
+        assert [bucket.acquire() for _ in range(4)] == [0.0] * 4
+        assert fake_clock["sleeps"] == []
+    
+    def test_wait_grows_with_queue(self, fake_clock):
+        bucket = TokenBucket(interval=0.5, capacity=2)
+        bucket.acquire()
+        bucket.acquire()
+        # Sin tokens: espera un intervalo completo
+        assert bucket.acquire() == pytest.approx(0.5)
+        assert fake_clock["sleeps"] == [pytest.approx(0.5)]
+    
+    def test_refill_after_idle(self, fake_clock):
+        bucket = TokenBucket(interval=0.5, capacity=2)
+        bucket.acquire()
+        bucket.acquire()
+        fake_clock["now"] += 0.25  # medio token repuesto
+        assert bucket.acquire() == pytest.approx(0.25)
+    
+    def test_refill_is_capped_at_capacity(self, fake_clock):
+        bucket = TokenBucket(interval=0.5, capacity=2)
+        fake_clock["now"] += 3600
+        assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+        assert bucket.acquire() == pytest.approx(0.5)
+    
+    def test_max_wait_exceeded_returns_none_without_consuming(self, fake_clock):
+        bucket = TokenBucket(interval=10.0, capacity=1)
+        bucket.acquire()
+        assert bucket.acquire(max_wait=5) is None
+        assert fake_clock["sleeps"] == []
+        # El intento rechazado no dejó deuda: la espera sigue siendo de un intervalo
+        assert bucket.acquire(max_wait=10) == pytest.approx(10.0)
+    
+    def test_release_returns_token(self, fake_clock):
+        bucket = TokenBucket(interval=10.0, capacity=1)
+        bucket.acquire()
+        bucket.release()
+        assert bucket.acquire(max_wait=0) == 0.0
+    
+    def test_throttle_raises_when_budget_exhausted(self, fake_clock, monkeypatch):
+        monkeypatch.setattr(data_fetcher, "_yahoo_hourly_limiter", TokenBucket(interval=10.0, capacity=1))
+        monkeypatch.setattr(data_fetcher, "_yahoo_limiter", TokenBucket(interval=0.5, capacity=4))
+        throttle_yahoo(max_wait=1)
+        with pytest.raises(APITimeoutError):
+            throttle_yahoo(max_wait=1)
+        # Los except (ConnectionError, TimeoutError) existentes lo capturan
+        assert issubclass(APITimeoutError, TimeoutError)
+
+
+class _HTTPError(Exception):
+    """Error con respuesta HTTP asociada, como requests.HTTPError."""
+    
+    def __init__(self, retry_after=None):
+        super().__init__("429 Too Many Requests")
+        headers = {"Retry-After": retry_after} if retry_after is not None else {}
+        self.response = type("Response", (), {"headers": headers})()
+
+
+class TestBackoffDelay:
+    """Decorrelated jitter y Retry-After, siempre dentro de [0, MAX_DELAY]."""
+    
+    def test_delay_within_bounds(self):
+        for attempt in range(10):
+            delay = _backoff_delay(_HTTPError(), attempt)
+            assert BASE_DELAY <= delay <= MAX_DELAY
+    
+    def test_retry_after_is_honored(self):
+        assert _backoff_delay(_HTTPError("7"), 0) == 7.0
+    
+    def test_retry_after_is_capped(self):
+        assert _backoff_delay(_HTTPError("3600"), 0) == MAX_DELAY
+        # Tampoco arrastra un valor enorme a los siguientes intentos
+        assert _backoff_delay(_HTTPError(), 1) <= MAX_DELAY
+    
+    def test_invalid_retry_after_is_ignored(self):
+        assert BASE_DELAY <= _backoff_delay(_HTTPError("mañana"), 0) <= MAX_DELAY
+
+
+def _run_concurrently(n, target):
+    """Lanza n hilos con target; el llamador decide cuándo hacer join."""
+    results, errors = [], []
+    
+    def worker():
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def _wait_until(condition, timeout=5.0):
+    """Espera activa corta hasta que condition() sea verdadera."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class TestSingleFlight:
+    """Coalescencia de llamadas concurrentes por clave."""
+    
+    def _blocking_fn(self, calls, release, outcome):
+        def fn():
+            calls.append(1)
+            release.wait(timeout=5)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return fn
+    
+    def test_concurrent_callers_share_one_call(self):
+        calls, release = [], threading.Event()
+        fn = self._blocking_fn(calls, release, {"ok": True})
+        threads, results, errors = _run_concurrently(5, lambda: _singleflight("test:share", fn))
+        # Dar tiempo a que todos se unan al vuelo antes de liberarlo
+        _wait_until(lambda: calls)
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        assert len(calls) == 1
+        assert errors == []
+        assert len(results) == 5
+        assert all(result is results[0] for result in results)
+        assert "test:share" not in _inflight
+    
+    def test_error_propagates_to_every_waiter(self):
+        calls, release = [], threading.Event()
+        fn = self._blocking_fn(calls, release, ValueError("sin datos"))
+        threads, results, errors = _run_concurrently(4, lambda: _singleflight("test:error", fn))
+        _wait_until(lambda: calls)
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        assert len(calls) == 1
+        assert results == []
+        assert len(errors) == 4
+        assert all(isinstance(e, ValueError) for e in errors)
+        assert "test:error" not in _inflight
+    
+    def test_sequential_calls_are_not_coalesced(self):
+        calls = []
+        for _ in range(3):
+            _singleflight("test:sequential", lambda: calls.append(1))
+        assert len(calls) == 3
+    
+    def test_force_refresh_uses_its_own_key(self):
+        assert _flight_key("profile", "AAPL") == "profile:AAPL"
+        assert _flight_key("profile", "AAPL", force_refresh=True) != _flight_key("profile", "AAPL")
+        assert _flight_key("historical", "AAPL", 5) == "historical:AAPL:5"
+
+
+class TestFileCache:
+    """Caché JSON en disco: TTL, misses tolerantes y escritura atómica."""
+    
+    @pytest.fixture
+    def disk_cache(self, tmp_path):
+        return FileCache(str(tmp_path), {"profile": timedelta(days=1), "historical": timedelta(hours=1)})
+    
+    def test_roundtrip(self, disk_cache):
+        disk_cache.set("aapl", "profile", {"name": "Apple"})
+        assert disk_cache.get("AAPL", "profile") == {"name": "Apple"}
+    
+    def test_args_are_part_of_the_key(self, disk_cache):
+        disk_cache.set("AAPL", "historical", {"years": 5}, 5)
+        assert disk_cache.get("AAPL", "historical", 5) == {"years": 5}
+        assert disk_cache.get("AAPL", "historical", 3) is None
+    
+    def test_entry_expires_after_ttl(self, disk_cache, monkeypatch):
+        disk_cache.set("AAPL", "historical", [1, 2, 3], 5)
+        now = time.time()
+        monkeypatch.setattr(data_fetcher.time, "time", lambda: now + 3599)
+        assert disk_cache.get("AAPL", "historical", 5) == [1, 2, 3]
+        monkeypatch.setattr(data_fetcher.time, "time", lambda: now + 3601)
+        assert disk_cache.get("AAPL", "historical", 5) is None
+    
+    def test_get_entry_returns_timestamp(self, disk_cache):
+        before = time.time()
+        disk_cache.set("AAPL", "profile", {"name": "Apple"})
+        ts, data = disk_cache.get_entry("AAPL", "profile")
+        assert before <= ts <= time.time()
+        assert data == {"name": "Apple"}
+    
+    def test_missing_file_is_a_miss(self, disk_cache):
+        assert disk_cache.get("NOPE", "profile") is None
+    
+    def test_unknown_endpoint_is_a_miss(self, disk_cache):
+        disk_cache.set("AAPL", "quotes", {"price": 1})
+        assert disk_cache.get("AAPL", "quotes") is None
+    
+    @pytest.mark.parametrize("content", ["{no es json", "", "[1, 2]", '{"ts": "ayer", "data": 1}'])
+    def test_corrupt_file_is_a_miss(self, disk_cache, tmp_path, content):
+        path = tmp_path / "AAPL" / "profile.json"
+        path.parent.mkdir()
+        path.write_text(content, encoding="utf-8")
+        assert disk_cache.get("AAPL", "profile") is None
+    
+    def test_failed_write_keeps_previous_entry(self, disk_cache, tmp_path, monkeypatch):
+        disk_cache.set("AAPL", "profile", {"name": "Apple"})
+        
+        def failing_replace(src, dst):
+            raise OSError("disco lleno")
+        
+        monkeypatch.setattr(data_fetcher.os, "replace", failing_replace)
+        disk_cache.set("AAPL", "profile", {"name": "Otra"})
+        
+        assert disk_cache.get("AAPL", "profile") == {"name": "Apple"}
+        assert [p.name for p in (tmp_path / "AAPL").iterdir()] == ["profile.json"]
+    
+    def test_unserializable_payload_is_not_written(self, disk_cache, tmp_path):
+        disk_cache.set("AAPL", "profile", {"when": object()})
+        assert disk_cache.get("AAPL", "profile") is None
+        assert not list(tmp_path.rglob("*.tmp"))
+    
+    @pytest.mark.parametrize("symbol", ["..", ".", "../AAPL", "A/B", "A\\B", ""])
+    def test_unsafe_symbol_is_never_written(self, tmp_path, symbol):
+        disk_cache = FileCache(str(tmp_path / "cache"), {"profile": timedelta(days=1)})
+        disk_cache.set(symbol, "profile", {"name": "x"})
+        assert disk_cache.get(symbol, "profile") is None
+        assert not list(tmp_path.rglob("profile.json"))
+    
+    @pytest.mark.parametrize("symbol", ["BRK-B", "^GSPC", "EURUSD=X", "7203.T"])
+    def test_yahoo_symbols_are_accepted(self, disk_cache, symbol):
+        disk_cache.set(symbol, "profile", {"name": symbol})
+        assert disk_cache.get(symbol, "profile") == {"name": symbol}
+    
+    def test_delete_removes_entry(self, disk_cache):
+        disk_cache.set("AAPL", "profile", {"name": "Apple"})
+        disk_cache.delete("AAPL", "profile")
+        disk_cache.delete("AAPL", "profile")  # Borrar lo que no existe no falla
+        assert disk_cache.get("AAPL", "profile") is None
+    
+    @pytest.mark.parametrize("endpoint, method", [
+        ("profile", "get_company_profile"),
+        ("financials", "get_financial_data"),
+    ])
+    def test_stale_layout_is_a_miss_and_deleted(self, tmp_path, monkeypatch, endpoint, method):
+        """Un JSON con campos de otra versión del dataclass no rompe la carga."""
+        disk_cache = FileCache(str(tmp_path), {endpoint: timedelta(days=1)})
+        disk_cache.set("AAPL", endpoint, {"campo_retirado": 1})
+        monkeypatch.setattr(data_fetcher, "_disk_cache", disk_cache)
+        monkeypatch.setattr(data_fetcher, "financials_remaining_minutes", lambda ts: 10)
+        monkeypatch.setattr(data_fetcher, "host_cooling_down", lambda: True)  # Sin red
+        clear_caches()
+        
+        fetcher = YahooFinanceFetcher.__new__(YahooFinanceFetcher)
+        assert getattr(fetcher, method)("AAPL") is None
+        assert not (tmp_path / "AAPL" / f"{endpoint}.json").exists()
+        clear_caches()
+
+
+class TestBulkFinancialData:
+    """get_bulk_financial_data: aciertos del pool sin descargar, fallos a None."""
+    
+    @pytest.fixture
+    def fetcher(self, monkeypatch):
+        clear_caches()
+        fetcher = YahooFinanceFetcher.__new__(YahooFinanceFetcher)
+        fetched = []
+        
+        def fake_get_financial_data(symbol):
+            fetched.append(symbol)
+            if symbol == "FAIL":
+                raise RuntimeError("Yahoo caído")
+            return FinancialStatements(price=100.0)
+        
+        monkeypatch.setattr(fetcher, "get_financial_data", fake_get_financial_data)
+        fetcher.fetched = fetched
+        yield fetcher
+        clear_caches()
+    
+    def _seed(self, symbol, value):
+        cache = get_cache("financials")
+        cache.set(cache._make_key("financials", symbol), value)
+    
+    def test_cached_symbols_are_not_fetched(self, fetcher):
+        cached = FinancialStatements(price=1.0)
+        self._seed("AAPL", cached)
+        self._seed("GONE", NEGATIVE_RESULT)
+        
+        results = fetcher.get_bulk_financial_data(["AAPL", "GONE"])
+        
+        assert results == {"AAPL": cached, "GONE": None}
+        assert fetcher.fetched == []
+    
+    def test_misses_are_fetched(self, fetcher):
+        self._seed("AAPL", FinancialStatements(price=1.0))
+        
+        results = fetcher.get_bulk_financial_data(["aapl", "MSFT", "GOOGL", "MSFT"])
+        
+        assert sorted(fetcher.fetched) == ["GOOGL", "MSFT"]
+        assert list(results) == ["AAPL", "MSFT", "GOOGL"]
+        assert results["MSFT"].price == 100.0
+    
+    def test_failed_symbol_maps_to_none(self, fetcher):
+        results = fetcher.get_bulk_financial_data(["MSFT", "FAIL"])
+        
+        assert results["FAIL"] is None
+        assert results["MSFT"].price == 100.0
@@ -703,3 +703,46 @@ class TestCalculateScoreV2:
                 assert expected_level == "Precaución"
             else:
                 assert expected_level == "Alto Riesgo"
+
+
+# =============================================================================
+# TESTS: NIVELES DE SCORE (config.py)
+# =============================================================================
+
+class TestGetScoreLevel:
+    """Tests para get_score_level y SCORE_LEVELS de config."""
+    
+    def test_level_boundaries(self):
+        """Cada mínimo pertenece a su nivel y el valor anterior al siguiente."""
+        from config import get_score_level
+        
+        assert get_score_level(100).name == "EXCEPTIONAL"
+        assert get_score_level(80).name == "EXCEPTIONAL"
+        assert get_score_level(79.9).name == "GOOD"
+        assert get_score_level(65).name == "GOOD"
+        assert get_score_level(50).name == "FAIR"
+        assert get_score_level(35).name == "WEAK"
+        assert get_score_level(0).name == "POOR"
+        assert get_score_level(-5).name == "POOR"
+    
+    def test_config_tables_are_read_only(self):
+        """SCORE_LEVELS y SECTOR_ADJUSTMENTS no se pueden modificar."""
+        from config import SCORE_LEVELS, SECTOR_ADJUSTMENTS
+        
+        with pytest.raises(TypeError):
+            SCORE_LEVELS["NEW"] = None
+        with pytest.raises(TypeError):
+            SECTOR_ADJUSTMENTS["energy"]["pe_weight"] = 1.0
+    
+    def test_score_level_supports_dict_access(self):
+        """ScoreLevel acepta el acceso tipo dict de la API anterior."""
+        from config import get_score_level, SCORE_LEVELS
+        
+        level = get_score_level(70)
+        assert level["name"] == "GOOD"
+        assert level["color"] == level.color
+        assert level.get("label") == "Bueno"
+        assert level.get("missing", "n/a") == "n/a"
+        assert SCORE_LEVELS["FAIR"]["min"] == 50
+        with pytest.raises(KeyError):
+            level["missing"]
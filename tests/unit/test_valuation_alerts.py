@@ -23,6 +23,7 @@ from financial_ratios import (
     growth_flags,
     aggregate_alerts,
     calculate_all_ratios,
+    calculate_all_ratios_cached,
     format_ratio,
     detect_growth_company,
 )
@@ -456,3 +457,16 @@ class TestCalculateAllRatios:
         
         assert result is not None
         assert isinstance(result, dict)
+    
+    def test_calculate_all_ratios_cached_matches_uncached(self):
+        financial_data = {"price": 150.0, "shares_outstanding": 1_000_000_000, "net_income": 5_000_000_000}
+        
+        assert calculate_all_ratios_cached(financial_data) == calculate_all_ratios(financial_data)
+    
+    def test_calculate_all_ratios_cached_returns_copy(self):
+        financial_data = {"price": 150.0, "net_income": 5_000_000_000}
+        
+        first = calculate_all_ratios_cached(financial_data)
+        first["pe"] = -1
+        
+        assert calculate_all_ratios_cached(financial_data)["pe"] != -1